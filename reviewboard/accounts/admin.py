@@ -57,6 +57,7 @@ class ProfileInline(admin.StackedInline):
             'classes': ('wide',),
             'fields': ('should_send_email',
                        'should_send_own_updates',
+                       'should_send_email_digest',
                        'collapsed_diffs',
                        'syntax_highlighting',
                        'is_private',
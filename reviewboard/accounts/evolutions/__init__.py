@@ -14,4 +14,6 @@ SEQUENCE = [
     'profile_default_use_rich_text',
     'reviewrequestvisit_visibility',
     'profile_settings',
+    'reviewrequestvisit_unread_review_count',
+    'profile_should_send_email_digest',
 ]
@@ -0,0 +1,10 @@
+from __future__ import unicode_literals
+
+from django_evolution.mutations import AddField
+from django.db import models
+
+
+MUTATIONS = [
+    AddField('Profile', 'should_send_email_digest', models.BooleanField,
+             initial=False)
+]
@@ -0,0 +1,10 @@
+from __future__ import unicode_literals
+
+from django_evolution.mutations import AddField
+from django.db import models
+
+
+MUTATIONS = [
+    AddField('ReviewRequestVisit', 'unread_review_count',
+             models.PositiveIntegerField, initial=0),
+]
@@ -84,6 +84,10 @@ class AccountSettingsForm(AccountPageForm):
         label=_('Get e-mail notifications for my own activity'),
         required=False)
 
+    should_send_email_digest = forms.BooleanField(
+        label=_('Combine e-mail notifications into a periodic digest'),
+        required=False)
+
     enable_desktop_notifications = forms.BooleanField(
         label=_('Show desktop notifications'),
         required=False)
@@ -104,6 +108,7 @@ class AccountSettingsForm(AccountPageForm):
             'default_use_rich_text': profile.should_use_rich_text,
             'should_send_email': profile.should_send_email,
             'should_send_own_updates': profile.should_send_own_updates,
+            'should_send_email_digest': profile.should_send_email_digest,
             'enable_desktop_notifications':
                 profile.should_enable_desktop_notifications,
         })
@@ -113,6 +118,11 @@ class AccountSettingsForm(AccountPageForm):
                 'disabled': True,
             })
 
+        if not siteconfig.get('mail_enable_digests'):
+            self.fields['should_send_email_digest'].widget.attrs.update({
+                'disabled': True,
+            })
+
     def save(self):
         """Save the form."""
         profile = self.user.get_profile()
@@ -131,11 +141,17 @@ class AccountSettingsForm(AccountPageForm):
             self.cleaned_data['should_send_own_updates']
         profile.settings['enable_desktop_notifications'] = \
             self.cleaned_data['enable_desktop_notifications']
+
+        if siteconfig.get('mail_enable_digests'):
+            profile.should_send_email_digest = \
+                self.cleaned_data['should_send_email_digest']
+
         profile.save(update_fields=(
             'default_use_rich_text',
             'open_an_issue',
             'settings',
             'should_send_email',
+            'should_send_email_digest',
             'should_send_own_updates',
             'syntax_highlighting',
             'timezone',
@@ -156,6 +172,7 @@ class AccountSettingsForm(AccountPageForm):
             (_('Notifications'), {
                 'fields': ('should_send_email',
                            'should_send_own_updates',
+                           'should_send_email_digest',
                            'enable_desktop_notifications'),
             })
         )
@@ -1,8 +1,11 @@
 from __future__ import unicode_literals
 
 import logging
+from collections import defaultdict
+from datetime import timedelta
 
-from django.db.models import Manager
+from django.db.models import F, Manager
+from django.utils import six, timezone
 from djblets.db.managers import ConcurrencyManager
 
 from reviewboard.accounts.trophies import trophies_registry
@@ -30,6 +33,158 @@ class ProfileManager(Manager):
 class ReviewRequestVisitManager(ConcurrencyManager):
     """Manager for review request visits."""
 
+    #: The maximum age of a visit's timestamp before it's always updated.
+    #:
+    #: Visits are otherwise only updated when there's been activity on the
+    #: review request since the stored timestamp.
+    timestamp_update_interval = timedelta(hours=1)
+
+    def update_timestamp(self, visit, last_activity_timestamp=None,
+                         timestamp=None):
+        """Update the timestamp of a visit, if needed.
+
+        The stored timestamp is only compared against the timestamps of
+        activity on the review request (to determine what's new to the user).
+        If nothing has happened on the review request since the stored
+        timestamp, updating it wouldn't change anything shown to the user, so
+        the write is skipped. This avoids a write on the visits table for
+        most page views of popular review requests.
+
+        When a write is needed, only the timestamp is updated, so that
+        concurrent changes to the visit's visibility aren't overwritten.
+
+        Args:
+            visit (reviewboard.accounts.models.ReviewRequestVisit):
+                The visit to update.
+
+            last_activity_timestamp (datetime.datetime, optional):
+                The timestamp of the latest activity on the review request.
+                If not provided, the visit will be updated if it's older than
+                :py:attr:`timestamp_update_interval`.
+
+            timestamp (datetime.datetime, optional):
+                The new timestamp for the visit. This defaults to the current
+                time.
+
+        Returns:
+            bool:
+            ``True`` if the visit was updated. ``False`` if an update wasn't
+            needed.
+        """
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        visit_timestamp = visit.timestamp
+
+        if (visit_timestamp >= timestamp - self.timestamp_update_interval and
+            (last_activity_timestamp is None or
+             visit_timestamp >= last_activity_timestamp)):
+            return False
+
+        self.filter(pk=visit.pk).update(timestamp=timestamp,
+                                        unread_review_count=0)
+        visit.timestamp = timestamp
+        visit.unread_review_count = 0
+
+        return True
+
+    def increment_unread_review_counts(self, review):
+        """Increment the unread review counts for a newly-published review.
+
+        The counts are incremented on the visits of all users other than the
+        review's author who last visited the review request before the review
+        was published.
+
+        Args:
+            review (reviewboard.reviews.models.review.Review):
+                The published review or reply.
+        """
+        (
+            self.filter(review_request=review.review_request_id,
+                        timestamp__lt=review.timestamp)
+            .exclude(user=review.user_id)
+            .update(unread_review_count=F('unread_review_count') + 1)
+        )
+
+    def reconcile_unread_review_counts(self, review_request_ids=None,
+                                       batch_size=1000):
+        """Recompute the unread review counts on visits.
+
+        This corrects any counts that have drifted from the reviews
+        published since each visit, such as after reviews have been deleted.
+        Visits are processed in batches, and only visits with incorrect
+        counts are updated.
+
+        Args:
+            review_request_ids (list of int, optional):
+                The IDs of the review requests to recompute counts for. By
+                default, counts on all visits are recomputed.
+
+            batch_size (int, optional):
+                The number of visits to process at a time.
+
+        Returns:
+            int:
+            The number of visits that had incorrect counts.
+        """
+        from reviewboard.reviews.models import Review
+
+        visits = self.order_by('pk')
+
+        if review_request_ids is not None:
+            visits = visits.filter(review_request__in=review_request_ids)
+
+        num_fixed = 0
+        last_pk = 0
+
+        while True:
+            # Fetch batches by ID range, rather than loading every visit up
+            # front, since there may be far too many to hold in memory.
+            batch = list(
+                visits.filter(pk__gt=last_pk)
+                .values_list('pk', 'user_id', 'review_request_id',
+                             'timestamp', 'unread_review_count')
+                [:batch_size])
+
+            if not batch:
+                break
+
+            last_pk = batch[-1][0]
+            reviews_by_review_request = defaultdict(list)
+
+            review_infos = (
+                Review.objects
+                .filter(public=True,
+                        review_request__in=set(
+                            visit_info[2] for visit_info in batch))
+                .values_list('review_request_id', 'user_id', 'timestamp')
+            )
+
+            for review_request_id, user_id, timestamp in review_infos:
+                reviews_by_review_request[review_request_id].append(
+                    (user_id, timestamp))
+
+            fixed_pks = defaultdict(list)
+
+            for (pk, user_id, review_request_id, visit_timestamp,
+                 unread_review_count) in batch:
+                count = sum(
+                    1
+                    for review_user_id, review_timestamp in
+                    reviews_by_review_request.get(review_request_id, [])
+                    if (review_user_id != user_id and
+                        review_timestamp > visit_timestamp)
+                )
+
+                if count != unread_review_count:
+                    fixed_pks[count].append(pk)
+
+            for count, pks in six.iteritems(fixed_pks):
+                self.filter(pk__in=pks).update(unread_review_count=count)
+                num_fixed += len(pks)
+
+        return num_fixed
+
     def unarchive_all(self, review_request):
         """Unarchive a review request for all users.
 
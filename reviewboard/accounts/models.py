@@ -21,6 +21,8 @@ from reviewboard.accounts.managers import (ProfileManager,
 from reviewboard.accounts.trophies import trophies_registry
 from reviewboard.admin.read_only import is_site_read_only_for
 from reviewboard.avatars import avatar_services
+from reviewboard.reviews.deferred_receivers import \
+    connect_deferrable_receiver
 from reviewboard.reviews.models import Group, ReviewRequest
 from reviewboard.reviews.signals import (reply_published,
                                          review_published,
@@ -56,6 +58,13 @@ class ReviewRequestVisit(models.Model):
     visibility = models.CharField(max_length=1, choices=VISIBILITY,
                                   default=VISIBLE)
 
+    #: The number of reviews and replies published by other users since the
+    #: visit.
+    #:
+    #: This is incremented when reviews are published, and reset when the
+    #: visit's timestamp is updated.
+    unread_review_count = models.PositiveIntegerField(default=0)
+
     # Set this up with a ReviewRequestVisitManager, which inherits from
     # ConcurrencyManager to help prevent race conditions.
     objects = ReviewRequestVisitManager()
@@ -100,6 +109,13 @@ class Profile(models.Model):
         help_text=_("Indicates whether the user wishes to receive emails "
                     "about their own activity."))
 
+    should_send_email_digest = models.BooleanField(
+        default=False,
+        verbose_name=_("receive email digests"),
+        help_text=_("Indicates whether the user wishes to receive review "
+                    "request activity in periodic digest emails, when "
+                    "digests are enabled for the server."))
+
     collapsed_diffs = models.BooleanField(
         default=True,
         verbose_name=_("collapsed diffs"),
@@ -675,12 +691,17 @@ User.is_admin_for_user = _is_admin_for_user
 User._meta.ordering = ('username',)
 
 
-@receiver(review_request_published)
-def _call_compute_trophies(sender, review_request, **kwargs):
-    if review_request.public and not review_request.changedescs.exists():
+def _call_compute_trophies(sender, review_request, first_publish=False,
+                           **kwargs):
+    # This may run in the background after later publishes, so it relies on
+    # whether this was the first publish at the time of the signal.
+    if first_publish:
         Trophy.objects.compute_trophies(review_request)
 
 
+connect_deferrable_receiver(review_request_published, _call_compute_trophies)
+
+
 @receiver(review_request_published)
 def _call_unarchive_all_for_review_request(sender, review_request, **kwargs):
     ReviewRequestVisit.objects.unarchive_all(review_request)
@@ -696,6 +717,17 @@ def _call_unarchive_all_for_reply(sender, reply, **kwargs):
     ReviewRequestVisit.objects.unarchive_all(reply.review_request_id)
 
 
+@receiver(review_published)
+def _call_increment_unread_review_counts_for_review(sender, review,
+                                                    **kwargs):
+    ReviewRequestVisit.objects.increment_unread_review_counts(review)
+
+
+@receiver(reply_published)
+def _call_increment_unread_review_counts_for_reply(sender, reply, **kwargs):
+    ReviewRequestVisit.objects.increment_unread_review_counts(reply)
+
+
 @receiver(user_registered)
 @receiver(local_site_user_added)
 def _add_default_groups(sender, user, local_site=None, **kwargs):
@@ -2,7 +2,10 @@
 
 from __future__ import unicode_literals
 
+from datetime import timedelta
+
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 from reviewboard.accounts.models import ReviewRequestVisit
 from reviewboard.testing import TestCase
@@ -57,3 +60,183 @@ class ReviewRequestVisitTests(TestCase):
             review_request, user, ReviewRequestVisit.ARCHIVED)
 
         self.assertEqual(visit.visibility, ReviewRequestVisit.ARCHIVED)
+
+    def test_update_timestamp_with_new_activity(self):
+        """Testing ReviewRequestVisitManager.update_timestamp with activity
+        since the last visit
+        """
+        visit, last_activity = self._create_visit(
+            visit_offset=timedelta(minutes=-10),
+            activity_offset=timedelta(minutes=-5))
+        now = timezone.now()
+
+        with self.assertNumQueries(1):
+            self.assertTrue(ReviewRequestVisit.objects.update_timestamp(
+                visit, last_activity_timestamp=last_activity, timestamp=now))
+
+        self.assertEqual(visit.timestamp, now)
+        self.assertEqual(ReviewRequestVisit.objects.get(pk=visit.pk).timestamp,
+                         now)
+
+    def test_update_timestamp_without_new_activity(self):
+        """Testing ReviewRequestVisitManager.update_timestamp without activity
+        since the last visit skips the write
+        """
+        visit, last_activity = self._create_visit(
+            visit_offset=timedelta(minutes=-5),
+            activity_offset=timedelta(minutes=-10))
+        old_timestamp = visit.timestamp
+
+        with self.assertNumQueries(0):
+            self.assertFalse(ReviewRequestVisit.objects.update_timestamp(
+                visit, last_activity_timestamp=last_activity))
+
+        self.assertEqual(visit.timestamp, old_timestamp)
+
+    def test_update_timestamp_with_stale_visit(self):
+        """Testing ReviewRequestVisitManager.update_timestamp with a visit
+        older than timestamp_update_interval
+        """
+        visit, last_activity = self._create_visit(
+            visit_offset=timedelta(days=-1),
+            activity_offset=timedelta(days=-2))
+
+        self.assertTrue(ReviewRequestVisit.objects.update_timestamp(
+            visit, last_activity_timestamp=last_activity))
+
+    def test_update_timestamp_preserves_visibility(self):
+        """Testing ReviewRequestVisitManager.update_timestamp doesn't
+        overwrite a concurrent visibility change
+        """
+        visit, last_activity = self._create_visit(
+            visit_offset=timedelta(minutes=-10),
+            activity_offset=timedelta(minutes=-5))
+
+        ReviewRequestVisit.objects.filter(pk=visit.pk).update(
+            visibility=ReviewRequestVisit.ARCHIVED)
+
+        ReviewRequestVisit.objects.update_timestamp(
+            visit, last_activity_timestamp=last_activity)
+
+        self.assertEqual(
+            ReviewRequestVisit.objects.get(pk=visit.pk).visibility,
+            ReviewRequestVisit.ARCHIVED)
+
+    def test_update_timestamp_resets_unread_review_count(self):
+        """Testing ReviewRequestVisitManager.update_timestamp resets the
+        unread review count
+        """
+        visit, last_activity = self._create_visit(
+            visit_offset=timedelta(minutes=-10),
+            activity_offset=timedelta(minutes=-5))
+        ReviewRequestVisit.objects.filter(pk=visit.pk).update(
+            unread_review_count=3)
+
+        ReviewRequestVisit.objects.update_timestamp(
+            visit, last_activity_timestamp=last_activity)
+
+        self.assertEqual(visit.unread_review_count, 0)
+        self.assertEqual(
+            ReviewRequestVisit.objects.get(pk=visit.pk).unread_review_count,
+            0)
+
+    def test_review_published_increments_unread_review_counts(self):
+        """Testing publishing reviews increments unread review counts for
+        other users' visits
+        """
+        visit, last_activity = self._create_visit(
+            visit_offset=timedelta(minutes=-10),
+            activity_offset=timedelta(minutes=-5))
+        review_request = visit.review_request
+        other_visit = ReviewRequestVisit.objects.create(
+            review_request=review_request,
+            user=User.objects.get(username='doc'),
+            timestamp=visit.timestamp)
+
+        review = self.create_review(review_request, user=visit.user)
+        review.publish()
+
+        reply = self.create_reply(review,
+                                  user=User.objects.get(username='doc'))
+        reply.publish()
+
+        self.assertEqual(
+            ReviewRequestVisit.objects.get(pk=visit.pk).unread_review_count,
+            1)
+        self.assertEqual(
+            ReviewRequestVisit.objects.get(
+                pk=other_visit.pk).unread_review_count,
+            1)
+
+    def test_reconcile_unread_review_counts(self):
+        """Testing ReviewRequestVisitManager.reconcile_unread_review_counts"""
+        visit, last_activity = self._create_visit(
+            visit_offset=timedelta(minutes=-10),
+            activity_offset=timedelta(minutes=-5))
+        review_request = visit.review_request
+
+        self.create_review(review_request,
+                           user=User.objects.get(username='doc'),
+                           publish=True)
+        self.create_review(review_request,
+                           user=User.objects.get(username='dopey'),
+                           publish=True,
+                           timestamp=visit.timestamp - timedelta(minutes=1))
+        self.create_review(review_request, user=visit.user, publish=True)
+
+        ReviewRequestVisit.objects.filter(pk=visit.pk).update(
+            unread_review_count=5)
+
+        self.assertEqual(
+            ReviewRequestVisit.objects.reconcile_unread_review_counts(),
+            1)
+        self.assertEqual(
+            ReviewRequestVisit.objects.get(pk=visit.pk).unread_review_count,
+            1)
+        self.assertEqual(
+            ReviewRequestVisit.objects.reconcile_unread_review_counts(),
+            0)
+
+    def test_reconcile_unread_review_counts_with_batches(self):
+        """Testing ReviewRequestVisitManager.reconcile_unread_review_counts
+        across several batches
+        """
+        visit, last_activity = self._create_visit(
+            visit_offset=timedelta(minutes=-10),
+            activity_offset=timedelta(minutes=-5))
+        review_request = visit.review_request
+
+        self.create_review(review_request,
+                           user=User.objects.get(username='doc'),
+                           publish=True)
+
+        visits = [visit] + [
+            ReviewRequestVisit.objects.create(
+                review_request=review_request,
+                user=User.objects.get(username=username),
+                timestamp=visit.timestamp)
+            for username in ('dopey', 'grumpy')
+        ]
+
+        ReviewRequestVisit.objects.update(unread_review_count=5)
+
+        self.assertEqual(
+            ReviewRequestVisit.objects.reconcile_unread_review_counts(
+                batch_size=2),
+            3)
+
+        for visit in visits:
+            self.assertEqual(
+                ReviewRequestVisit.objects.get(
+                    pk=visit.pk).unread_review_count,
+                1)
+
+    def _create_visit(self, visit_offset, activity_offset):
+        now = timezone.now()
+        review_request = self.create_review_request(publish=True)
+        visit = ReviewRequestVisit.objects.create(
+            review_request=review_request,
+            user=User.objects.get(username='admin'),
+            timestamp=now + visit_offset)
+
+        return visit, now + activity_offset
@@ -65,6 +65,23 @@ class DiffSettingsForm(SiteSettingsForm):
                     'to disable size restrictions.'),
         widget=forms.TextInput(attrs={'size': '15'}))
 
+    file_blob_store_enabled = forms.BooleanField(
+        label=_('Store file contents on disk'),
+        help_text=_('Store the contents of files fetched at full commit IDs '
+                    'in a local blob store in the site data directory, '
+                    'instead of in memcached.'),
+        required=False)
+
+    file_blob_store_max_size = forms.IntegerField(
+        label=_('Max file store size (bytes)'),
+        help_text=_('The maximum size (in bytes) of the on-disk file store. '
+                    'The least recently used files are removed by running '
+                    '<code>rb-site manage /path/to/site evict-file-blobs -- '
+                    '--loop</code> in the background. Enter 0 to disable '
+                    'size restrictions.'),
+        min_value=0,
+        widget=forms.TextInput(attrs={'size': '15'}))
+
     def load(self):
         """Load settings from the form.
 
@@ -109,5 +126,17 @@ class DiffSettingsForm(SiteSettingsForm):
                            'diffviewer_context_num_lines',
                            'diffviewer_paginate_by',
                            'diffviewer_paginate_orphans')
-            }
+            },
+            {
+                'title': _('File Storage'),
+                'description': _(
+                    'Files fetched from repositories are normally stored in '
+                    'the server cache. Files at immutable revisions can '
+                    'instead be stored on disk, which keeps large files from '
+                    'evicting other data from the cache.'
+                ),
+                'classes': ('wide',),
+                'fields': ('file_blob_store_enabled',
+                           'file_blob_store_max_size'),
+            },
         )
@@ -64,6 +64,32 @@ class EMailSettingsForm(SiteSettingsForm):
                     '"Default From address" above. <strong>Always</strong> '
                     'will use it unconditionally. <strong>Never</strong> will '
                     'use the default address for every e-mail.'))
+    mail_queue_messages = forms.BooleanField(
+        label=_('Queue e-mails'),
+        required=False,
+        help_text=_('If enabled, e-mails are queued and sent in the '
+                    'background over a single mail server connection, with '
+                    'temporary failures retried later, instead of being sent '
+                    'while handling the request that triggered them. This '
+                    'requires running <code>rb-site manage /path/to/site '
+                    'process-email-queue -- --loop</code> in the '
+                    'background.'))
+    mail_queue_rate = forms.IntegerField(
+        label=_('Maximum queued e-mails per minute'),
+        min_value=0,
+        required=False,
+        help_text=_('The maximum number of queued e-mails to send each '
+                    'minute. Enter 0 for no limit.'),
+        widget=forms.TextInput(attrs={'size': '5'}))
+    mail_enable_digests = forms.BooleanField(
+        label=_('Allow e-mail digests'),
+        required=False,
+        help_text=_('If enabled, users can choose to receive one combined '
+                    'e-mail for all review request activity over a period, '
+                    'instead of an e-mail for each change. Digests are sent '
+                    'by running <code>rb-site manage /path/to/site '
+                    'send-email-digests</code> periodically (for instance, '
+                    'hourly from cron).'))
     mail_host = forms.CharField(
         label=_('Mail server'),
         required=False,
@@ -149,14 +175,17 @@ class EMailSettingsForm(SiteSettingsForm):
                 'fields': ('mail_send_review_mail',
                            'mail_send_review_close_mail',
                            'mail_send_new_user_mail',
-                           'mail_send_password_changed_mail'),
+                           'mail_send_password_changed_mail',
+                           'mail_enable_digests'),
             },
             {
                 'title': _('E-Mail Delivery Settings'),
                 'classes': ('wide',),
                 'fields': ('mail_default_from',
                            'mail_from_spoofing',
-                           'mail_enable_autogenerated_header'),
+                           'mail_enable_autogenerated_header',
+                           'mail_queue_messages',
+                           'mail_queue_rate'),
             },
             {
                 'title': _('E-Mail Server Settings'),
@@ -278,6 +278,58 @@ class GeneralSettingsForm(SiteSettingsForm):
         required=True,
         help_text=_('The time zone used for all dates on this server.'))
 
+    review_request_page_max_loaded_entries = forms.IntegerField(
+        label=_('Max loaded entries'),
+        help_text=_('The maximum number of reviews and updates to load when '
+                    'viewing a review request. Older collapsed entries past '
+                    'this are loaded when expanded. Enter 0 to always load '
+                    'all entries.'),
+        min_value=0,
+        widget=forms.TextInput(attrs={'size': '5'}))
+
+    review_request_page_updates_wait_secs = forms.IntegerField(
+        label=_('Seconds to wait for changes'),
+        help_text=_('How long open review request pages can hold a request '
+                    'to the server open while waiting for changes. Each '
+                    'waiting page ties up a server process or thread. Enter '
+                    '0 to have pages check for changes on an interval '
+                    'instead.'),
+        min_value=0,
+        max_value=60,
+        widget=forms.TextInput(attrs={'size': '5'}))
+
+    review_request_page_max_updates_waiters = forms.IntegerField(
+        label=_('Max pages waiting for changes'),
+        help_text=_('The maximum number of review request pages that can '
+                    'wait for changes at once. Any others check for changes '
+                    'on an interval. This should be well under the number '
+                    'of requests the server can handle at once.'),
+        min_value=0,
+        widget=forms.TextInput(attrs={'size': '5'}))
+
+    webhooks_queue_deliveries = forms.BooleanField(
+        label=_('Queue WebHook deliveries'),
+        required=False,
+        help_text=_('If enabled, WebHooks are queued and sent in the '
+                    'background, with failed deliveries retried later, '
+                    'instead of being sent while handling the request that '
+                    'triggered them. This requires running '
+                    '<code>rb-site manage /path/to/site '
+                    'process-webhook-queue -- --loop</code> in the '
+                    'background.'))
+
+    defer_signal_receivers = forms.BooleanField(
+        label=_('Run deferrable tasks in the background'),
+        required=False,
+        help_text=_('If enabled, work that doesn\'t need to finish before '
+                    'a page is shown, such as computing trophies when a '
+                    'review request is published, is run in the background '
+                    'instead of while handling the request that triggered '
+                    'it. This requires running '
+                    '<code>rb-site manage /path/to/site '
+                    'process-deferred-tasks -- --loop</code> in the '
+                    'background.'))
+
     cache_type = forms.ChoiceField(
         label=_('Cache Backend'),
         help_text=_('The type of server-side caching to use.'),
@@ -516,4 +568,21 @@ class GeneralSettingsForm(SiteSettingsForm):
                 'classes': ('wide',),
                 'fields': ('cache_type',),
             },
+            {
+                'title': _('Review Request Page'),
+                'classes': ('wide',),
+                'fields': ('review_request_page_max_loaded_entries',
+                           'review_request_page_updates_wait_secs',
+                           'review_request_page_max_updates_waiters'),
+            },
+            {
+                'title': _('WebHooks'),
+                'classes': ('wide',),
+                'fields': ('webhooks_queue_deliveries',),
+            },
+            {
+                'title': _('Background Tasks'),
+                'classes': ('wide',),
+                'fields': ('defer_signal_receivers',),
+            },
         )
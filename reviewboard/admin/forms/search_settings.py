@@ -52,6 +52,16 @@ class SearchSettingsForm(SiteSettingsForm):
                    'with the Whoosh engine for large or multi-server '
                    'installs.'))
 
+    search_on_the_fly_indexing_queued = forms.BooleanField(
+        label=_('Queue on-the-fly index updates'),
+        required=False,
+        help_text=_('If enabled, changes are queued and applied to the '
+                    'search index in batches, instead of while handling the '
+                    'request that made the change. This requires running '
+                    '<code>rb-site manage /path/to/site '
+                    'process-search-queue -- --loop</code> in the '
+                    'background.'))
+
     def __init__(self, siteconfig, data=None, *args, **kwargs):
         """Initialize the search engine settings form.
 
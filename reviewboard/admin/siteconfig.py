@@ -34,6 +34,7 @@ from __future__ import unicode_literals
 import logging
 import os
 import re
+import threading
 
 from django.conf import settings, global_settings
 from django.core.exceptions import ImproperlyConfigured
@@ -147,6 +148,7 @@ defaults.update({
     'auth_x509_autocreate_users': False,
     'company': '',
     'default_use_rich_text': True,
+    'defer_signal_receivers': False,
     'diffviewer_context_num_lines': 5,
     'diffviewer_include_space_patterns': [],
     'diffviewer_max_diff_size': 0,
@@ -155,15 +157,25 @@ defaults.update({
     'diffviewer_syntax_highlighting': True,
     'diffviewer_syntax_highlighting_threshold': 0,
     'diffviewer_show_trailing_whitespace': True,
+    'file_blob_store_enabled': False,
+    'file_blob_store_max_size': 1024 * 1024 * 1024,
     'mail_send_review_mail': False,
     'mail_send_new_user_mail': False,
     'mail_send_password_changed_mail': False,
     'mail_enable_autogenerated_header': True,
     'mail_from_spoofing': EmailMessage.FROM_SPOOFING_SMART,
+    'mail_queue_messages': False,
+    'mail_queue_rate': 0,
+    'mail_enable_digests': False,
+    'review_request_issue_index_built': False,
+    'review_request_page_max_loaded_entries': 50,
+    'review_request_page_max_updates_waiters': 10,
+    'review_request_page_updates_wait_secs': 0,
     'search_enable': False,
     'send_support_usage_stats': True,
     'site_domain_method': 'http',
     'site_read_only': False,
+    'webhooks_queue_deliveries': False,
 
     'privacy_enable_user_consent': False,
     'privacy_info_html': None,
@@ -174,6 +186,8 @@ defaults.update({
     'search_backend_id': WhooshBackend.search_backend_id,
     'search_backend_settings': {},
     'search_on_the_fly_indexing': False,
+    'search_on_the_fly_indexing_queued': False,
+    'search_access_principals_indexed': False,
 
     # Overwrite this.
     'site_media_url': settings.SITE_ROOT + "media/",
@@ -242,9 +256,10 @@ def load_site_config(full_reload=False):
             })
 
         # Re-initialize Haystack's connection information to use the updated
-        # settings.
+        # settings. Haystack caches the engines per-thread, so replacing the
+        # thread-local storage discards them for all threads.
         connections.connections_info = settings.HAYSTACK_CONNECTIONS
-        connections._connections = {}
+        connections.thread_local = threading.local()
 
     # If siteconfig needs to be saved back to the DB, set dirty=true
     dirty = False
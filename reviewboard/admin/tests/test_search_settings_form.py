@@ -12,6 +12,7 @@ from reviewboard.admin.forms.search_settings import SearchSettingsForm
 from reviewboard.search import search_backend_registry
 from reviewboard.search.search_backends.base import (SearchBackend,
                                                      SearchBackendForm)
+from reviewboard.search.search_backends.sqlite_fts import SQLiteFTSBackend
 from reviewboard.search.search_backends.whoosh import WhooshBackend
 from reviewboard.testing.testcase import TestCase
 
@@ -35,6 +36,32 @@ class SearchSettingsFormTests(TestCase):
         finally:
             shutil.rmtree(index_dir)
 
+    def test_clean_sqlite_fts_without_index_file(self):
+        """Testing SearchSettingsForm.clean with the SQLite FTS5 backend and
+        no search index file with an SQLite database
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+        form = SearchSettingsForm(siteconfig, data={
+            'search_enable': True,
+            'search_backend_id': SQLiteFTSBackend.search_backend_id,
+            'sqlite_fts-search_index_file': '',
+        })
+
+        self.assertTrue(form.is_valid())
+
+    def test_clean_sqlite_fts_relative_index_file(self):
+        """Testing SearchSettingsForm.clean with the SQLite FTS5 backend and
+        a relative search index file path
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+        form = SearchSettingsForm(siteconfig, data={
+            'search_enable': True,
+            'search_backend_id': SQLiteFTSBackend.search_backend_id,
+            'sqlite_fts-search_index_file': 'search-index.sqlite3',
+        })
+
+        self.assertFalse(form.is_valid())
+
     def test_clean_invalid_backend(self):
         """Testing SearchSettingsForm.clean when the backend doesn't pass
         validation
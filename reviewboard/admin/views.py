@@ -22,6 +22,9 @@ from reviewboard.admin.security_checks import SecurityCheckRunner
 from reviewboard.admin.support import get_support_url, serialize_support_data
 from reviewboard.admin.widgets import (admin_widgets_registry,
                                        dynamic_activity_data)
+from reviewboard.hostingsvcs.http_stats import get_http_stats
+from reviewboard.hostingsvcs.service import get_hosting_services
+from reviewboard.scmtools.blob_store import get_file_blob_store
 from reviewboard.ssh.client import SSHClient
 from reviewboard.ssh.utils import humanize_key
 
@@ -109,6 +112,24 @@ def cache_stats(request, template_name="admin/cache_stats.html"):
     """
     cache_stats = get_cache_stats()
     cache_info = settings.CACHES[DEFAULT_FORWARD_CACHE_ALIAS]
+    blob_store = get_file_blob_store()
+
+    if blob_store.enabled:
+        file_blob_store_stats = blob_store.get_stats()
+    else:
+        file_blob_store_stats = None
+
+    hosting_services = sorted(get_hosting_services(),
+                              key=lambda service: service.name)
+    http_stats = get_http_stats([
+        service.hosting_service_id
+        for service in hosting_services
+    ])
+    hosting_service_http_stats = [
+        (service.name, http_stats[service.hosting_service_id])
+        for service in hosting_services
+        if service.hosting_service_id in http_stats
+    ]
 
     return render(
         request=request,
@@ -116,6 +137,8 @@ def cache_stats(request, template_name="admin/cache_stats.html"):
         context={
             'cache_hosts': cache_stats,
             'cache_backend': cache_info['BACKEND'],
+            'file_blob_store_stats': file_blob_store_stats,
+            'hosting_service_http_stats': hosting_service_http_stats,
             'title': _('Server Cache'),
             'root_path': reverse('admin:index'),
         })
@@ -0,0 +1,81 @@
+"""Generation numbers for invalidating groups of cached data.
+
+Some cached data depends on state that's expensive to track precisely, such
+as which users can access a repository. Rather than finding and deleting each
+affected cache entry when that state changes, the entries include a
+generation number in their cache keys, and the generation is bumped to
+invalidate all of them at once. Stale entries are never read again, and
+expire on their own.
+"""
+
+from __future__ import unicode_literals
+
+import time
+
+from django.core.cache import cache
+from djblets.cache.backend import make_cache_key
+
+
+class CacheGeneration(object):
+    """A generation number stored in the cache.
+
+    The generation is created on first use, and increased each time it's
+    bumped. Cached data should include the current generation in its cache
+    keys, so that bumping the generation invalidates it.
+
+    Attributes:
+        name (unicode):
+            The name of the generation, used for its cache key.
+    """
+
+    def __init__(self, name):
+        """Initialize the generation.
+
+        Args:
+            name (unicode):
+                The name of the generation, used for its cache key.
+        """
+        self.name = name
+
+    def get(self):
+        """Return the current generation.
+
+        Returns:
+            int:
+            The current generation.
+        """
+        key = make_cache_key(self.name)
+        generation = cache.get(key)
+
+        if generation is None:
+            generation = self._make_initial_generation()
+
+            if not cache.add(key, generation):
+                # Another process stored a generation first. Use that one.
+                generation = cache.get(key, generation)
+
+        return generation
+
+    def bump(self):
+        """Bump the generation, invalidating any data cached with it."""
+        key = make_cache_key(self.name)
+
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, self._make_initial_generation())
+
+    def _make_initial_generation(self):
+        """Return a new generation.
+
+        This is based on the current time, so that if the generation is
+        evicted from the cache, the new generation won't match that of any
+        stored data. Microseconds are used, since data cached using a
+        generation from before the eviction would otherwise be reused if the
+        generation had been bumped as many times as milliseconds had passed.
+
+        Returns:
+            int:
+            The new generation.
+        """
+        return int(time.time() * 1000000)
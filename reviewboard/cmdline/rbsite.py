@@ -2032,6 +2032,9 @@ class UpgradeCommand(Command):
             print('* Resetting in-database caches.')
             site.run_manage_command("fixreviewcounts")
 
+            print('* Rebuilding review request inboxes.')
+            site.run_manage_command('rebuild-inboxes')
+
         siteconfig.save()
 
         site.harden_passwords()
@@ -4,12 +4,15 @@ import pytz
 
 from django.contrib.auth.models import User
 from django.http import Http404
+from django.template.loader import render_to_string
+from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 from djblets.datagrid.grids import (
     Column,
     DateTimeColumn,
     DataGrid as DjbletsDataGrid,
     AlphanumericDataGrid as DjbletsAlphanumericDataGrid)
+from djblets.util.http import get_url_params_except
 from djblets.util.templatetags.djblets_utils import ageid
 
 from reviewboard.accounts.models import (LocalSiteProfile, Profile,
@@ -44,6 +47,11 @@ from reviewboard.datagrids.builtin_items import (IncomingSection,
                                                  UserGroupsItem,
                                                  UserProfileItem)
 from reviewboard.reviews.models import Group, ReviewRequest, Review
+from reviewboard.reviews.pagination import (DIRECTION_LAST,
+                                            InvalidCursorError,
+                                            encode_cursor,
+                                            get_keyset_ordering,
+                                            paginate_keyset)
 from reviewboard.site.urlresolvers import local_site_reverse
 
 
@@ -190,7 +198,156 @@ class AlphanumericDataGrid(DataGridJSMixin, DjbletsAlphanumericDataGrid):
     """
 
 
-class ReviewRequestDataGrid(ShowClosedReviewRequestsMixin, DataGrid):
+class KeysetPaginator(object):
+    """A paginator for datagrids using keyset pagination.
+
+    This provides the parts of Django's paginator interface used by
+    datagrids, with pages identified by cursors instead of page numbers.
+    See :py:mod:`reviewboard.reviews.pagination` for details.
+    """
+
+    def __init__(self, queryset, ordering, per_page, cursor=None):
+        """Initialize the paginator.
+
+        Args:
+            queryset (django.db.models.query.QuerySet):
+                The queryset to paginate.
+
+            ordering (list of tuple):
+                The keyset ordering for the queryset.
+
+            per_page (int):
+                The maximum number of results on each page.
+
+            cursor (unicode, optional):
+                The cursor for the requested page.
+        """
+        self.queryset = queryset
+        self.ordering = ordering
+        self.per_page = per_page
+        self.cursor = cursor
+
+    @cached_property
+    def count(self):
+        """The total number of results."""
+        return self.queryset.count()
+
+    @cached_property
+    def last_cursor(self):
+        """The cursor for the last page of results."""
+        return encode_cursor(self.ordering, None, DIRECTION_LAST)
+
+    def page(self, number):
+        """Return the page for the paginator's cursor.
+
+        If the cursor is invalid (for instance, if it was created before the
+        sort order changed), the first page is returned.
+
+        Args:
+            number (int, unused):
+                The page number requested by the datagrid. Keyset pages
+                are identified by cursors, so this is ignored.
+
+        Returns:
+            reviewboard.reviews.pagination.KeysetPage:
+            The page of results.
+        """
+        try:
+            return paginate_keyset(self.queryset, self.ordering,
+                                   self.per_page, cursor=self.cursor)
+        except InvalidCursorError:
+            return paginate_keyset(self.queryset, self.ordering,
+                                   self.per_page)
+
+
+class KeysetPaginationMixin(object):
+    """A mixin for datagrids that paginate using cursors where possible.
+
+    When the datagrid is sorted by columns that support keyset pagination,
+    pages are linked using cursors (through the ``?cursor=`` parameter),
+    which avoids scanning all earlier rows to show deep pages, and keeps
+    pages stable when rows are updated between requests. Other sorts, and
+    links to specific page numbers, use standard page-based pagination.
+    """
+
+    #: The template used to render the paginator for cursor-based pages.
+    keyset_paginator_template = 'datagrids/keyset_paginator.html'
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the datagrid.
+
+        Args:
+            *args (tuple):
+                Positional arguments for the parent constructor.
+
+            **kwargs (dict):
+                Keyword arguments for the parent constructor.
+        """
+        super(KeysetPaginationMixin, self).__init__(*args, **kwargs)
+
+        self.special_query_args.append('cursor')
+
+    def build_paginator(self, queryset):
+        """Build the paginator for the datagrid.
+
+        Args:
+            queryset (django.db.models.query.QuerySet):
+                The sorted queryset for the datagrid.
+
+        Returns:
+            object:
+            A :py:class:`KeysetPaginator`, if the sort order supports it and
+            a specific page number wasn't requested. Otherwise, the standard
+            paginator.
+        """
+        if self.request.GET.get('page', '1') == '1':
+            ordering = get_keyset_ordering(queryset)
+
+            if ordering is not None:
+                return KeysetPaginator(queryset, ordering, self.paginate_by,
+                                       cursor=self.request.GET.get('cursor'))
+
+        return super(KeysetPaginationMixin, self).build_paginator(queryset)
+
+    def render_paginator(self, adjacent_pages=3):
+        """Render the paginator for the datagrid.
+
+        Args:
+            adjacent_pages (int, optional):
+                The number of adjacent page numbers to show in page-based
+                paginators.
+
+        Returns:
+            unicode:
+            The paginator as HTML.
+        """
+        if not isinstance(self.paginator, KeysetPaginator):
+            return super(KeysetPaginationMixin, self).render_paginator(
+                adjacent_pages)
+
+        extra_query = get_url_params_except(self.request.GET,
+                                            'page', 'gridonly',
+                                            *self.special_query_args)
+
+        if extra_query:
+            extra_query += '&'
+
+        context = {
+            'is_paginated': self.page.has_other_pages(),
+            'has_next': self.page.has_next(),
+            'has_previous': self.page.has_previous(),
+            'next_cursor': self.page.next_cursor,
+            'previous_cursor': self.page.previous_cursor,
+            'last_cursor': self.paginator.last_cursor,
+            'extra_query': extra_query,
+        }
+        context.update(self.extra_context)
+
+        return render_to_string(self.keyset_paginator_template, context)
+
+
+class ReviewRequestDataGrid(ShowClosedReviewRequestsMixin,
+                            KeysetPaginationMixin, DataGrid):
     """A datagrid that displays a list of review requests.
 
     This datagrid accepts the show_closed parameter in the URL, allowing
@@ -14,6 +14,8 @@ from reviewboard.accounts.models import Profile, ReviewRequestVisit
 from reviewboard.datagrids.builtin_items import UserGroupsItem, UserProfileItem
 from reviewboard.datagrids.columns import (FullNameColumn, SummaryColumn,
                                            UsernameColumn)
+from reviewboard.datagrids.grids import (KeysetPaginator,
+                                         ReviewRequestDataGrid)
 from reviewboard.reviews.models import (Group,
                                         ReviewRequest,
                                         ReviewRequestDraft,
@@ -177,6 +179,126 @@ class AllReviewRequestViewTests(BaseViewTestCase):
         self.assertEqual(datagrid.rows[1]['object'].summary, 'Test 1')
 
 
+class KeysetPaginationTests(TestCase):
+    """Unit tests for reviewboard.datagrids.grids.KeysetPaginationMixin."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(KeysetPaginationTests, self).setUp()
+
+        self.review_requests = [
+            self.create_review_request(summary='Test %s' % i, publish=True)
+            for i in range(5)
+        ]
+
+        # Give every review request the same timestamp, so that the
+        # ordering falls back on IDs.
+        ReviewRequest.objects.update(
+            last_updated=self.review_requests[0].last_updated)
+
+    def _load_datagrid(self, **query):
+        """Load a review request datagrid with 2 results per page.
+
+        Args:
+            **query (dict):
+                The query arguments for the request.
+
+        Returns:
+            reviewboard.datagrids.grids.ReviewRequestDataGrid:
+            The loaded datagrid.
+        """
+        request = RequestFactory().get('/r/', query)
+        request.user = User.objects.get(username='grumpy')
+
+        datagrid = ReviewRequestDataGrid(
+            request,
+            ReviewRequest.objects.public(user=request.user,
+                                         status=None,
+                                         with_counts=True),
+            'All Review Requests')
+        datagrid.paginate_by = 2
+        datagrid.paginate_orphans = 0
+        datagrid.load_state()
+
+        return datagrid
+
+    def _get_summaries(self, datagrid):
+        """Return the summaries of the review requests in a datagrid.
+
+        Args:
+            datagrid (reviewboard.datagrids.grids.ReviewRequestDataGrid):
+                The loaded datagrid.
+
+        Returns:
+            list of unicode:
+            The summaries of the review requests, in order.
+        """
+        return [row['object'].summary for row in datagrid.rows]
+
+    def test_pages(self):
+        """Testing ReviewRequestDataGrid paginates with cursors"""
+        datagrid = self._load_datagrid()
+        self.assertIsInstance(datagrid.paginator, KeysetPaginator)
+        self.assertEqual(self._get_summaries(datagrid), ['Test 4', 'Test 3'])
+        self.assertFalse(datagrid.page.has_previous())
+
+        paginator_html = datagrid.render_paginator()
+        self.assertIn('cursor=%s' % datagrid.page.next_cursor,
+                      paginator_html)
+
+        # Updating a review request on the first page shouldn't cause any
+        # review requests to be repeated or skipped on later pages.
+        self.review_requests[3].save(update_fields=['last_updated'])
+
+        datagrid = self._load_datagrid(cursor=datagrid.page.next_cursor)
+        self.assertEqual(self._get_summaries(datagrid), ['Test 2', 'Test 1'])
+        self.assertTrue(datagrid.page.has_previous())
+        self.assertTrue(datagrid.page.has_next())
+
+        datagrid = self._load_datagrid(cursor=datagrid.page.next_cursor)
+        self.assertEqual(self._get_summaries(datagrid), ['Test 0'])
+        self.assertFalse(datagrid.page.has_next())
+
+        datagrid = self._load_datagrid(cursor=datagrid.page.previous_cursor)
+        self.assertEqual(self._get_summaries(datagrid), ['Test 2', 'Test 1'])
+
+    def test_last_page(self):
+        """Testing ReviewRequestDataGrid with a cursor for the last page"""
+        datagrid = self._load_datagrid()
+        datagrid = self._load_datagrid(cursor=datagrid.paginator.last_cursor)
+
+        self.assertEqual(self._get_summaries(datagrid), ['Test 1', 'Test 0'])
+        self.assertTrue(datagrid.page.has_previous())
+        self.assertFalse(datagrid.page.has_next())
+
+    def test_invalid_cursor(self):
+        """Testing ReviewRequestDataGrid with an invalid cursor shows the
+        first page
+        """
+        datagrid = self._load_datagrid(cursor='invalid')
+
+        self.assertEqual(self._get_summaries(datagrid), ['Test 4', 'Test 3'])
+
+    def test_page_number(self):
+        """Testing ReviewRequestDataGrid with a page number uses standard
+        pagination
+        """
+        datagrid = self._load_datagrid(page='2')
+
+        self.assertNotIsInstance(datagrid.paginator, KeysetPaginator)
+        self.assertEqual(len(datagrid.rows), 2)
+        self.assertIn('page=3', datagrid.render_paginator())
+
+    def test_unsupported_sort(self):
+        """Testing ReviewRequestDataGrid with a sort on a nullable column uses
+        standard pagination
+        """
+        datagrid = self._load_datagrid(sort='-diff_updated')
+
+        self.assertNotIsInstance(datagrid.paginator, KeysetPaginator)
+
+
 class DashboardViewTests(BaseViewTestCase):
     """Unit tests for the dashboard view."""
 
@@ -3,13 +3,19 @@
 from __future__ import unicode_literals
 
 import os
+import threading
 from functools import cmp_to_key
+from multiprocessing.pool import ThreadPool
 
+from django.db import connections
 from django.utils.encoding import force_bytes, force_text
+from django.utils.six.moves import zip
 from django.utils.translation import ugettext as _
 from djblets.util.compat.python.past import cmp
 
 from reviewboard.diffviewer.errors import EmptyDiffError
+from reviewboard.hostingsvcs.rate_limits import (api_call_priority,
+                                                 get_api_call_priority)
 from reviewboard.scmtools.core import (FileNotFoundError,
                                        PRE_CREATION,
                                        Revision,
@@ -26,6 +32,13 @@ _IMPL_EXTENSIONS = [
     b'c', b'C', b'cc', b'cpp', b'cxx', b'c++', b'm', b'mm', b'M'
 ]
 
+#: The maximum number of concurrent file existence checks in a process.
+MAX_FILE_EXISTS_WORKERS = 8
+
+
+_file_exists_pool = None
+_file_exists_pool_lock = threading.Lock()
+
 
 def create_filediffs(diff_file_contents, parent_diff_file_contents,
                      repository, basedir, base_commit_id, diffset,
@@ -345,6 +358,16 @@ def _process_files(parser, basedir, repository, base_commit_id,
 
     tool = repository.get_scmtool()
     basedir = force_bytes(basedir)
+    files = []
+
+    if check_existence:
+        existence_checker = _FileExistenceChecker(
+            repository=repository,
+            get_file_exists=get_file_exists,
+            base_commit_id=base_commit_id,
+            request=request)
+    else:
+        existence_checker = None
 
     for f in parser.parse():
         # This will either be a Revision or bytes. Either way, convert it
@@ -375,28 +398,179 @@ def _process_files(parser, basedir, repository, base_commit_id,
         source_filename = _normalize_filename(source_filename, basedir)
 
         # FIXME: this would be a good place to find permissions errors
-        if (source_revision != PRE_CREATION and
+        if (existence_checker is not None and
+            source_revision != PRE_CREATION and
             source_revision != UNKNOWN and
             not f.binary and
             not f.deleted and
             not f.moved and
-            not f.copied and
-            (check_existence and
-             not get_file_exists(force_text(source_filename),
-                                 force_text(source_revision),
-                                 base_commit_id=base_commit_id,
-                                 request=request))):
-            raise FileNotFoundError(force_text(source_filename),
-                                    force_text(source_revision),
-                                    base_commit_id)
+            not f.copied):
+            # This will begin checking in the background while we continue
+            # parsing the rest of the diff.
+            existence_checker.add(force_text(source_filename),
+                                  force_text(source_revision))
 
         f.orig_filename = source_filename
         f.orig_file_details = source_revision
         f.modified_filename = dest_filename
 
+        files.append(f)
+
+    if existence_checker is not None:
+        existence_checker.wait()
+
+    for f in files:
         yield f
 
 
+def _get_file_exists_pool():
+    """Return the process-wide pool used for file existence checks.
+
+    The pool is shared by all diffs being uploaded in the process, so the
+    number of concurrent checks stays bounded no matter how many uploads are
+    in progress.
+
+    Returns:
+        multiprocessing.pool.ThreadPool:
+        The thread pool.
+    """
+    global _file_exists_pool
+
+    with _file_exists_pool_lock:
+        if _file_exists_pool is None:
+            _file_exists_pool = ThreadPool(MAX_FILE_EXISTS_WORKERS)
+
+        return _file_exists_pool
+
+
+class _FileExistenceChecker(object):
+    """Checks for the existence of files in a repository.
+
+    Checks are started as soon as files are added, using a bounded,
+    process-wide pool of threads, so that remote lookups (such as HTTP
+    requests to a hosting service) overlap with each other and with diff
+    parsing.
+
+    If the repository's backend supports batched existence checks and the
+    repository's own :py:meth:`~reviewboard.scmtools.models.Repository.
+    get_file_exists` is being used, all files are instead checked in a single
+    call once parsing is complete.
+
+    Checks are made at the API call priority of the thread that created the
+    checker, since the worker threads don't share its state. Uploads run at
+    interactive priority, as the user is waiting on the result, so they
+    aren't refused while part of a hosting service's API rate limit is still
+    available.
+    """
+
+    def __init__(self, repository, get_file_exists, base_commit_id, request):
+        """Initialize the checker.
+
+        Args:
+            repository (reviewboard.scmtools.models.Repository):
+                The repository the files are in.
+
+            get_file_exists (callable):
+                A callable used to determine if a given file exists.
+
+            base_commit_id (unicode):
+                The ID of the commit that the diff is based upon.
+
+            request (django.http.HttpRequest):
+                The current HTTP request.
+        """
+        self.repository = repository
+        self.get_file_exists = get_file_exists
+        self.base_commit_id = base_commit_id
+        self.request = request
+
+        self._priority = get_api_call_priority()
+        self._files = []
+        self._results = []
+
+        self._use_batch = (get_file_exists == repository.get_file_exists and
+                           repository.supports_batch_file_exists)
+
+    def add(self, path, revision):
+        """Add a file to check.
+
+        Args:
+            path (unicode):
+                The path to the file.
+
+            revision (unicode):
+                The revision of the file.
+        """
+        if self._use_batch:
+            self._files.append((path, revision))
+            return
+
+        if not self._files:
+            # Make sure any state on the repository that may require
+            # database queries is loaded before it's accessed from threads.
+            self.repository.hosting_service
+
+        self._files.append((path, revision))
+        self._results.append(_get_file_exists_pool().apply_async(
+            self._check_file, (path, revision)))
+
+    def wait(self):
+        """Wait for all checks to complete.
+
+        Raises:
+            reviewboard.scmtools.errors.FileNotFoundError:
+                The first file (in the order added) that does not exist.
+
+            Exception:
+                Any error raised while checking a file.
+        """
+        if self._use_batch:
+            if self._files:
+                results = self.repository.get_files_exist(
+                    self._files,
+                    base_commit_id=self.base_commit_id,
+                    request=self.request)
+            else:
+                results = []
+        else:
+            results = (
+                result.get()
+                for result in self._results
+            )
+
+        for (path, revision), exists in zip(self._files, results):
+            if not exists:
+                raise FileNotFoundError(path, revision, self.base_commit_id)
+
+    def _check_file(self, path, revision):
+        """Check whether a file exists.
+
+        This is run in a worker thread.
+
+        Args:
+            path (unicode):
+                The path to the file.
+
+            revision (unicode):
+                The revision of the file.
+
+        Returns:
+            bool:
+            Whether the file exists.
+        """
+        try:
+            with api_call_priority(self._priority):
+                return self.get_file_exists(
+                    path,
+                    revision,
+                    base_commit_id=self.base_commit_id,
+                    request=self.request)
+        finally:
+            # Database connections are per-thread. Close any opened here, so
+            # that idle pool threads don't each hold a connection open.
+            connections.close_all()
+
+
 def _compare_files(file1, file2):
     """Compare two files to determine a relative sort order.
 
@@ -3,13 +3,19 @@
 from __future__ import unicode_literals
 
 from django.utils.timezone import now
+from kgb import SpyAgency
 
 from reviewboard.diffviewer.filediff_creator import create_filediffs
 from reviewboard.diffviewer.models import DiffCommit, DiffSet
+from reviewboard.hostingsvcs.rate_limits import (PRIORITY_BACKGROUND,
+                                                 PRIORITY_INTERACTIVE,
+                                                 api_call_priority,
+                                                 get_api_call_priority)
+from reviewboard.scmtools.core import FileNotFoundError
 from reviewboard.testing import TestCase
 
 
-class FileDiffCreatorTests(TestCase):
+class FileDiffCreatorTests(SpyAgency, TestCase):
     """Tests for reviewboard.diffviewer.filediff_creator."""
 
     fixtures = ['test_scmtools']
@@ -93,3 +99,138 @@ class FileDiffCreatorTests(TestCase):
 
         self.assertEqual(diffset.files.count(), 2)
         self.assertEqual(commits[1].files.count(), 1)
+
+    def test_create_filediffs_check_existence(self):
+        """Testing create_filediffs() with check_existence=True checks all
+        files
+        """
+        repository = self.create_repository(tool_name='Test')
+        diffset = self.create_diffset(repository=repository)
+        checked = []
+
+        def _get_file_exists(path, revision, **kwargs):
+            checked.append((path, revision, get_api_call_priority()))
+            return True
+
+        create_filediffs(
+            self._MULTI_FILE_DIFF,
+            None,
+            repository=repository,
+            basedir='/',
+            base_commit_id='0' * 40,
+            diffset=diffset,
+            check_existence=True,
+            get_file_exists=_get_file_exists)
+
+        self.assertEqual(
+            sorted(checked),
+            [
+                ('/file1', 'a1b2c3', PRIORITY_INTERACTIVE),
+                ('/file2', 'd4e5f6', PRIORITY_INTERACTIVE),
+            ])
+        self.assertEqual(diffset.files.count(), 2)
+
+    def test_create_filediffs_check_existence_with_priority(self):
+        """Testing create_filediffs() with check_existence=True checks files
+        at the caller's API call priority
+        """
+        repository = self.create_repository(tool_name='Test')
+        diffset = self.create_diffset(repository=repository)
+        checked = []
+
+        def _get_file_exists(path, revision, **kwargs):
+            checked.append(get_api_call_priority())
+            return True
+
+        with api_call_priority(PRIORITY_BACKGROUND):
+            create_filediffs(
+                self._MULTI_FILE_DIFF,
+                None,
+                repository=repository,
+                basedir='/',
+                base_commit_id='0' * 40,
+                diffset=diffset,
+                check_existence=True,
+                get_file_exists=_get_file_exists)
+
+        self.assertEqual(checked, [PRIORITY_BACKGROUND, PRIORITY_BACKGROUND])
+
+    def test_create_filediffs_check_existence_not_found(self):
+        """Testing create_filediffs() with check_existence=True and missing
+        file raises FileNotFoundError
+        """
+        repository = self.create_repository(tool_name='Test')
+        diffset = self.create_diffset(repository=repository)
+
+        def _get_file_exists(path, revision, **kwargs):
+            return path != '/file2'
+
+        with self.assertRaises(FileNotFoundError) as ctx:
+            create_filediffs(
+                self._MULTI_FILE_DIFF,
+                None,
+                repository=repository,
+                basedir='/',
+                base_commit_id='0' * 40,
+                diffset=diffset,
+                check_existence=True,
+                get_file_exists=_get_file_exists)
+
+        self.assertEqual(ctx.exception.path, '/file2')
+        self.assertEqual(ctx.exception.revision, 'd4e5f6')
+        self.assertEqual(diffset.files.count(), 0)
+
+    def test_create_filediffs_check_existence_batch(self):
+        """Testing create_filediffs() with check_existence=True uses
+        batched existence checks when supported
+        """
+        repository = self.create_repository(tool_name='Test')
+        diffset = self.create_diffset(repository=repository)
+        scmtool_cls = repository.scmtool_class
+
+        def _files_exist(_self, files, **kwargs):
+            return [True] * len(files)
+
+        self.spy_on(scmtool_cls.files_exist,
+                    owner=scmtool_cls,
+                    call_fake=_files_exist)
+        self.spy_on(scmtool_cls.file_exists, owner=scmtool_cls)
+
+        scmtool_cls.supports_batch_file_exists = True
+
+        try:
+            create_filediffs(
+                self._MULTI_FILE_DIFF,
+                None,
+                repository=repository,
+                basedir='/',
+                base_commit_id='0' * 40,
+                diffset=diffset,
+                check_existence=True,
+                get_file_exists=repository.get_file_exists)
+        finally:
+            scmtool_cls.supports_batch_file_exists = False
+
+        self.assertEqual(len(scmtool_cls.files_exist.calls), 1)
+        self.assertSpyNotCalled(scmtool_cls.file_exists)
+        self.assertEqual(
+            sorted(scmtool_cls.files_exist.calls[0].args[0]),
+            [('/file1', 'a1b2c3'), ('/file2', 'd4e5f6')])
+        self.assertEqual(diffset.files.count(), 2)
+
+    _MULTI_FILE_DIFF = (
+        b'diff --git a/file1 b/file1\n'
+        b'index a1b2c3..197009f 100644\n'
+        b'--- a/file1\n'
+        b'+++ b/file1\n'
+        b'@@ -2 +2 @@\n'
+        b'-blah blah\n'
+        b'+blah!\n'
+        b'diff --git a/file2 b/file2\n'
+        b'index d4e5f6..5b50866 100644\n'
+        b'--- a/file2\n'
+        b'+++ b/file2\n'
+        b'@@ -1 +1 @@\n'
+        b'-Hello there\n'
+        b'+Oh hi!\n'
+    )
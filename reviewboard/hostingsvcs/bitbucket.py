@@ -180,6 +180,8 @@ class BitbucketHookViews(object):
             logging.error('The payload is not in JSON format: %s', e)
             return HttpResponseBadRequest('Invalid payload format')
 
+        repository.invalidate_history_cache()
+
         server_url = get_server_url(request=request)
 
         try:
@@ -355,6 +357,8 @@ class BitbucketAPIPaginator(APIPaginator):
 class BitbucketClient(HostingServiceClient):
     """Client interface to the Bitbucket Cloud API."""
 
+    use_rate_limits = True
+
     def __init__(self, *args, **kwargs):
         """Initialize the client.
 
@@ -1,5 +1,7 @@
 from __future__ import unicode_literals
 
+from django.utils.translation import ugettext as _
+
 
 class HostingServiceError(Exception):
     """Base class for errors related to a hosting service."""
@@ -81,3 +83,34 @@ class InvalidPlanError(HostingServiceError):
 
 class SSHKeyAssociationError(HostingServiceError):
     pass
+
+
+class RateLimitExceededError(HostingServiceError):
+    """The API rate limit for a hosting service account has been reached.
+
+    This is raised without contacting the service when the account's known
+    budget has been used up, allowing callers to show a clean error instead
+    of waiting on requests that would fail.
+
+    Version Added:
+        4.0
+
+    Attributes:
+        retry_after (int):
+            The number of seconds until the rate limit resets.
+    """
+
+    def __init__(self, retry_after):
+        """Initialize the error.
+
+        Args:
+            retry_after (int):
+                The number of seconds until the rate limit resets.
+        """
+        super(RateLimitExceededError, self).__init__(
+            _('The API rate limit for this hosting service account has been '
+              'reached. Please try again in %d seconds.')
+            % retry_after,
+            http_code=429)
+
+        self.retry_after = retry_after
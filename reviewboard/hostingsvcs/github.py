@@ -182,6 +182,9 @@ class GitHubAPIPaginator(APIPaginator):
 class GitHubClient(HostingServiceClient):
     RAW_MIMETYPE = 'application/vnd.github.v3.raw'
 
+    use_http_cache = True
+    use_rate_limits = True
+
     def __init__(self, hosting_service):
         super(GitHubClient, self).__init__(hosting_service)
         self.account = hosting_service.account
@@ -462,11 +465,14 @@ class GitHubClient(HostingServiceClient):
                 The file could not be found or the API could not be accessed.
         """
         try:
+            # File contents are cached by the repository, and blobs never
+            # change, so there's nothing to gain by revalidating them.
             return self.http_get(
                 url='%s/git/blobs/%s' % (repo_api_url, sha),
                 headers={
                     'Accept': self.RAW_MIMETYPE,
-                }).data
+                },
+                use_http_cache=False).data
         except HostingServiceError:
             raise FileNotFoundError(path, sha)
 
@@ -641,6 +647,8 @@ class GitHubHookViews(object):
             logger.error('The payload is not in JSON format: %s', e)
             return HttpResponseBadRequest('Invalid payload format')
 
+        repository.invalidate_history_cache()
+
         server_url = get_server_url(request=request)
         review_request_id_to_commits = \
             GitHubHookViews._get_review_request_id_to_commits_map(
@@ -20,7 +20,8 @@ from reviewboard.hostingsvcs.errors import (AuthorizationError,
                                             RepositoryError)
 from reviewboard.hostingsvcs.forms import (HostingServiceAuthForm,
                                            HostingServiceForm)
-from reviewboard.hostingsvcs.service import HostingService
+from reviewboard.hostingsvcs.service import (HostingService,
+                                             HostingServiceClient)
 from reviewboard.scmtools.crypto_utils import (decrypt_password,
                                                encrypt_password)
 from reviewboard.scmtools.errors import FileNotFoundError
@@ -230,6 +231,16 @@ class GitLabGroupForm(HostingServiceForm):
         widget=forms.TextInput(attrs={'size': '60'}))
 
 
+class GitLabClient(HostingServiceClient):
+    """Client interface to the GitLab API.
+
+    Version Added:
+        4.0
+    """
+
+    use_rate_limits = True
+
+
 class GitLab(HostingService):
     """Hosting service support for GitLab.
 
@@ -253,6 +264,7 @@ class GitLab(HostingService):
     LINK_HEADER_RE = re.compile(r'\<(?P<url>[^\>]+)\>; rel="next"')
 
     auth_form = GitLabAuthForm
+    client_class = GitLabClient
 
     plans = [
         ('personal', {
@@ -0,0 +1,333 @@
+"""Persistent HTTP connection pooling for hosting service requests.
+
+By default, :py:mod:`urllib2` opens a new connection (and, for HTTPS,
+performs a new TLS handshake) for every request, and closes it as soon as
+the response has been read. Hosting service integrations often make several
+requests to the same API in a row, so this module provides handlers that
+keep connections open and reuse them for later requests to the same host.
+
+Idle connections are kept in a process-wide pool. Each connection is only
+ever used by one request at a time.
+"""
+
+from __future__ import unicode_literals
+
+import errno
+import io
+import logging
+import socket
+import threading
+import time
+
+from django.utils import six
+from django.utils.six.moves import http_client
+from django.utils.six.moves.urllib.error import URLError
+from django.utils.six.moves.urllib.request import HTTPHandler, HTTPSHandler
+from django.utils.six.moves.urllib.response import addinfourl
+
+from reviewboard.hostingsvcs.http_stats import record_http_stat
+
+
+logger = logging.getLogger(__name__)
+
+
+#: The maximum number of idle connections kept for each host.
+MAX_IDLE_CONNECTIONS_PER_HOST = 4
+
+#: The number of seconds an idle connection can be kept before it's closed.
+#:
+#: This is kept below the keep-alive timeouts used by most servers, so that
+#: connections are rarely reused after the server has closed them.
+IDLE_CONNECTION_TIMEOUT = 30
+
+#: HTTP methods that are safe to send again after a failed attempt.
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+def _is_stale_connection_error(e):
+    """Return whether an error means a reused connection had been closed.
+
+    These are the errors seen when the server closed an idle connection
+    before the request was sent: the connection is reset, or it's closed
+    without any part of a response being sent. Timeouts and other errors
+    may happen after the server received the request, so they aren't
+    included.
+
+    Args:
+        e (Exception):
+            The error raised while performing the request.
+
+    Returns:
+        bool:
+        ``True`` if the error indicates a stale connection.
+    """
+    if isinstance(e, socket.timeout):
+        return False
+
+    if isinstance(e, http_client.BadStatusLine):
+        # Python 3 raises RemoteDisconnected (a subclass of BadStatusLine)
+        # when no status line was received. Python 2 raises BadStatusLine
+        # with an empty line.
+        return (type(e).__name__ == 'RemoteDisconnected' or
+                e.line in ('', "''"))
+
+    return (isinstance(e, (IOError, OSError)) and
+            e.errno in (errno.ECONNRESET, errno.EPIPE, errno.ECONNABORTED))
+
+
+class HTTPConnectionPool(object):
+    """A pool of idle, reusable HTTP connections.
+
+    Connections are grouped by a key identifying the scheme, host, and any
+    TLS configuration, so that they're only ever reused for equivalent
+    requests.
+    """
+
+    def __init__(self, max_idle_per_host=MAX_IDLE_CONNECTIONS_PER_HOST,
+                 idle_timeout=IDLE_CONNECTION_TIMEOUT):
+        """Initialize the pool.
+
+        Args:
+            max_idle_per_host (int, optional):
+                The maximum number of idle connections kept for each key.
+
+            idle_timeout (int, optional):
+                The number of seconds before an idle connection is closed.
+        """
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Return an idle connection for the given key.
+
+        The connection is removed from the pool until it's released.
+
+        Args:
+            key (tuple):
+                The key identifying the connection.
+
+        Returns:
+            httplib.HTTPConnection:
+            The connection, or ``None`` if there are no usable idle
+            connections.
+        """
+        expired = []
+        conn = None
+        now = time.time()
+
+        with self._lock:
+            idle = self._idle.get(key)
+
+            while idle:
+                candidate, released = idle.pop()
+
+                if now - released < self.idle_timeout:
+                    conn = candidate
+                    break
+
+                expired.append(candidate)
+
+        for expired_conn in expired:
+            expired_conn.close()
+
+        return conn
+
+    def release(self, key, conn):
+        """Return a connection to the pool for later reuse.
+
+        If the pool is already full for this key, the connection will be
+        closed instead.
+
+        Args:
+            key (tuple):
+                The key identifying the connection.
+
+            conn (httplib.HTTPConnection):
+                The connection to release.
+        """
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+
+            if len(idle) < self.max_idle_per_host:
+                idle.append((conn, time.time()))
+                conn = None
+
+        if conn is not None:
+            conn.close()
+
+    def clear(self):
+        """Close all idle connections in the pool."""
+        with self._lock:
+            idle = self._idle
+            self._idle = {}
+
+        for conns in six.itervalues(idle):
+            for conn, released in conns:
+                conn.close()
+
+
+class PooledHTTPHandlerMixin(object):
+    """A mixin for urllib2 handlers that reuse pooled connections.
+
+    This replaces the handler's ``do_open``, which would normally create a
+    new connection for each request and close it afterward.
+    """
+
+    def __init__(self, pool_key=None, stats_key=None,
+                 retry_stale_connections=True, *args, **kwargs):
+        """Initialize the handler.
+
+        Args:
+            pool_key (unicode, optional):
+                An additional value to include in the pool key, identifying
+                any connection configuration not covered by the scheme and
+                host (such as a custom TLS certificate).
+
+            stats_key (unicode, optional):
+                The key under which connection statistics will be recorded.
+                This is generally the ID of the hosting service.
+
+            retry_stale_connections (bool, optional):
+                Whether to retry idempotent requests on a new connection
+                when a pooled connection turns out to have been closed by
+                the server. Callers that handle retries themselves can
+                disable this.
+
+            *args (tuple):
+                Positional arguments for the parent handler.
+
+            **kwargs (dict):
+                Keyword arguments for the parent handler.
+        """
+        super(PooledHTTPHandlerMixin, self).__init__(*args, **kwargs)
+
+        self._pool_key = pool_key
+        self._stats_key = stats_key
+        self._retry_stale_connections = retry_stale_connections
+
+    def do_open(self, http_class, req, **http_conn_args):
+        """Perform a request using a pooled connection.
+
+        Args:
+            http_class (type):
+                The :py:class:`httplib.HTTPConnection` subclass to construct
+                if a new connection is needed.
+
+            req (urllib2.Request):
+                The request to perform.
+
+            **http_conn_args (dict):
+                Additional arguments for constructing the connection.
+
+        Returns:
+            urllib.addinfourl:
+            The response, with the payload fully read.
+
+        Raises:
+            urllib2.URLError:
+                There was an error communicating with the server.
+        """
+        if six.PY2:
+            host = req.get_host()
+            selector = req.get_selector()
+            data = req.get_data()
+        else:
+            host = req.host
+            selector = req.selector
+            data = req.data
+
+        if not host:
+            raise URLError('no host given')
+
+        if getattr(req, '_tunnel_host', None):
+            # Proxy tunnels are rare and need per-request setup, so they
+            # aren't pooled.
+            return super(PooledHTTPHandlerMixin, self).do_open(
+                http_class, req, **http_conn_args)
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update(
+            (key, value)
+            for key, value in six.iteritems(req.headers)
+            if key not in headers
+        )
+        headers = dict(
+            (key.title(), value)
+            for key, value in six.iteritems(headers)
+        )
+
+        key = (http_class.__name__, host, self._pool_key)
+        method = req.get_method()
+        conn = connection_pool.acquire(key)
+
+        if conn is None:
+            reused = False
+        else:
+            reused = True
+            self._record_stat('connections_reused')
+
+        while True:
+            if conn is None:
+                conn = http_class(host, timeout=req.timeout, **http_conn_args)
+                self._record_stat('connections_opened')
+
+            try:
+                conn.request(method, selector, data, headers)
+                response = conn.getresponse()
+                payload = response.read()
+                break
+            except (http_client.HTTPException, IOError) as e:
+                conn.close()
+
+                if (reused and
+                    self._retry_stale_connections and
+                    method in IDEMPOTENT_METHODS and
+                    _is_stale_connection_error(e)):
+                    # The server closed the idle connection before the
+                    # request reached it. Try once more with a new
+                    # connection. Other failures, and other methods, may
+                    # have been acted upon by the server, so they're never
+                    # sent again.
+                    logger.debug('Pooled connection to %s failed (%s); '
+                                 'retrying with a new connection.',
+                                 host, e)
+                    conn = None
+                    reused = False
+                else:
+                    raise URLError(e)
+
+        if response.will_close:
+            conn.close()
+        else:
+            connection_pool.release(key, conn)
+
+        result = addinfourl(io.BytesIO(payload), response.msg,
+                            req.get_full_url(), response.status)
+        result.msg = response.reason
+
+        return result
+
+    def _record_stat(self, name):
+        """Record a connection statistic.
+
+        Args:
+            name (unicode):
+                The name of the statistic.
+        """
+        if self._stats_key:
+            record_http_stat(self._stats_key, name)
+
+
+class PooledHTTPHandler(PooledHTTPHandlerMixin, HTTPHandler):
+    """A urllib2 handler for HTTP requests using pooled connections."""
+
+
+class PooledHTTPSHandler(PooledHTTPHandlerMixin, HTTPSHandler):
+    """A urllib2 handler for HTTPS requests using pooled connections."""
+
+
+#: The process-wide pool of idle hosting service connections.
+connection_pool = HTTPConnectionPool()
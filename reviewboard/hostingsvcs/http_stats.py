@@ -0,0 +1,94 @@
+"""Statistics on HTTP requests made to hosting services.
+
+These are stored as counters in the cache, so that they're shared across
+all processes and can be shown on the Server Cache page in the
+administration UI.
+"""
+
+from __future__ import unicode_literals
+
+from django.core.cache import cache
+from djblets.cache.backend import make_cache_key
+
+
+#: The names of the statistics recorded for each hosting service.
+HTTP_STAT_NAMES = (
+    # The number of requests made through the hosting service client.
+    'requests',
+
+    # The number of new connections opened to the service.
+    'connections_opened',
+
+    # The number of requests sent over a pooled, already-open connection.
+    'connections_reused',
+
+    # The number of requests answered from the cache after the service
+    # reported that the content had not changed.
+    'cache_revalidated',
+
+    # The number of responses stored in the cache for later revalidation.
+    'cache_stored',
+
+    # The number of requests that failed.
+    'errors',
+
+    # The number of requests refused because the account's API rate limit
+    # had been reached.
+    'rate_limited',
+)
+
+
+HTTP_STATS_CACHE_KEY = 'hosting-service-http-stats:%s:%s'
+
+
+def record_http_stat(hosting_service_id, name, count=1):
+    """Increment an HTTP statistic for a hosting service.
+
+    Args:
+        hosting_service_id (unicode):
+            The ID of the hosting service.
+
+        name (unicode):
+            The name of the statistic.
+
+        count (int, optional):
+            The amount to increment the statistic by.
+    """
+    key = make_cache_key(HTTP_STATS_CACHE_KEY % (hosting_service_id, name))
+
+    try:
+        cache.incr(key, count)
+    except ValueError:
+        cache.set(key, count)
+
+
+def get_http_stats(hosting_service_ids):
+    """Return the HTTP statistics for hosting services.
+
+    Args:
+        hosting_service_ids (list of unicode):
+            The IDs of the hosting services to return statistics for.
+
+    Returns:
+        dict:
+        A dictionary mapping each hosting service ID that has made any
+        requests to a dictionary of statistics. Each of those contains the
+        counts for each name in :py:data:`HTTP_STAT_NAMES`.
+    """
+    keys = dict(
+        (make_cache_key(HTTP_STATS_CACHE_KEY % (hosting_service_id, name)),
+         (hosting_service_id, name))
+        for hosting_service_id in hosting_service_ids
+        for name in HTTP_STAT_NAMES
+    )
+    stats = {}
+
+    for key, value in cache.get_many(list(keys)).items():
+        hosting_service_id, name = keys[key]
+        stats.setdefault(hosting_service_id, {})[name] = value
+
+    for service_stats in stats.values():
+        for name in HTTP_STAT_NAMES:
+            service_stats.setdefault(name, 0)
+
+    return stats
@@ -0,0 +1,277 @@
+"""Rate limit tracking and scheduling for hosting service API calls.
+
+Many hosting services (such as GitHub, GitLab, and Bitbucket) limit the
+number of API requests an account can make in a window of time, and report
+the remaining budget in response headers. Once the budget is exhausted,
+requests fail until the window resets, which affects every user of the
+account.
+
+:py:class:`RateLimiter` tracks each account's budget in the cache, so that
+it's shared by all processes. The budget is treated as a bucket of tokens
+that's refilled when the service's rate limit window resets. Each request
+takes a token, and every response updates the bucket with the service's own
+count.
+
+Requests have a priority. Interactive requests (the default, such as loading
+files for a diff being viewed or checking that files in an uploaded diff
+exist) can use the entire budget. Background requests (such as filling in
+older commit history) can't use the last part of the budget, which is held
+in reserve for interactive requests. Code performing background work
+marks its requests using :py:func:`api_call_priority`.
+
+Requests are never held waiting for the budget to reset, since they're
+usually made while handling a web request. Once the budget for a priority
+is used up, requests fail right away with
+:py:class:`~reviewboard.hostingsvcs.errors.RateLimitExceededError`.
+"""
+
+from __future__ import unicode_literals
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.utils import six
+from djblets.cache.backend import make_cache_key
+
+from reviewboard.hostingsvcs.errors import RateLimitExceededError
+
+
+logger = logging.getLogger(__name__)
+
+
+#: Priority for requests made on behalf of a user waiting for the result.
+PRIORITY_INTERACTIVE = 'interactive'
+
+#: Priority for requests made in the background.
+PRIORITY_BACKGROUND = 'background'
+
+#: The fraction of an account's budget held in reserve for interactive use.
+BACKGROUND_RESERVE_RATIO = 0.1
+
+#: The header names used to report rate limits, in order of preference.
+#:
+#: Each is a tuple of the limit, remaining, and reset header names.
+RATE_LIMIT_HEADERS = [
+    ('X-RateLimit-Limit', 'X-RateLimit-Remaining', 'X-RateLimit-Reset'),
+    ('RateLimit-Limit', 'RateLimit-Remaining', 'RateLimit-Reset'),
+]
+
+
+_priority_state = threading.local()
+
+
+@contextmanager
+def api_call_priority(priority):
+    """Set the priority for hosting service API calls in this thread.
+
+    Args:
+        priority (unicode):
+            The priority for the calls. This is one of
+            :py:data:`PRIORITY_INTERACTIVE` or :py:data:`PRIORITY_BACKGROUND`.
+
+    Context:
+        Calls made by the current thread will use the provided priority.
+    """
+    old_priority = get_api_call_priority()
+    _priority_state.priority = priority
+
+    try:
+        yield
+    finally:
+        _priority_state.priority = old_priority
+
+
+def get_api_call_priority():
+    """Return the priority for hosting service API calls in this thread.
+
+    Returns:
+        unicode:
+        The priority for calls made by the current thread.
+    """
+    return getattr(_priority_state, 'priority', PRIORITY_INTERACTIVE)
+
+
+class RateLimiter(object):
+    """Tracks and enforces the API rate limit for a hosting service account.
+
+    Attributes:
+        account_id (int):
+            The ID of the hosting service account.
+
+        hosting_service_id (unicode):
+            The ID of the hosting service.
+    """
+
+    STATE_CACHE_KEY = 'hosting-service-rate-limit:%s:%s'
+    REMAINING_CACHE_KEY = 'hosting-service-rate-limit-remaining:%s:%s'
+
+    def __init__(self, hosting_service_id, account_id):
+        """Initialize the rate limiter.
+
+        Args:
+            hosting_service_id (unicode):
+                The ID of the hosting service.
+
+            account_id (int):
+                The ID of the hosting service account.
+        """
+        self.hosting_service_id = hosting_service_id
+        self.account_id = account_id
+
+        self._state_key = make_cache_key(
+            self.STATE_CACHE_KEY % (hosting_service_id, account_id))
+        self._remaining_key = make_cache_key(
+            self.REMAINING_CACHE_KEY % (hosting_service_id, account_id))
+
+    def get_state(self):
+        """Return the current rate limit state for the account.
+
+        Returns:
+            dict:
+            A dictionary containing ``limit``, ``remaining``, and ``reset``
+            (a Unix timestamp) keys, or ``None`` if the service hasn't
+            reported a rate limit or the window has reset since.
+        """
+        state = cache.get(self._state_key)
+
+        if state is None or time.time() >= state['reset']:
+            return None
+
+        remaining = cache.get(self._remaining_key)
+
+        if remaining is None:
+            return None
+
+        return dict(state, remaining=remaining)
+
+    def acquire(self, priority=None):
+        """Take a token for a request, failing if none are available.
+
+        If no tokens are available for the request's priority,
+        :py:class:`~reviewboard.hostingsvcs.errors.RateLimitExceededError`
+        is raised without making the request.
+
+        Args:
+            priority (unicode, optional):
+                The priority of the request. If not provided, the current
+                thread's priority (see :py:func:`api_call_priority`) is used.
+
+        Raises:
+            reviewboard.hostingsvcs.errors.RateLimitExceededError:
+                The budget for this priority has been used up.
+        """
+        if priority is None:
+            priority = get_api_call_priority()
+
+        state = self.get_state()
+
+        if state is None:
+            return
+
+        if priority == PRIORITY_BACKGROUND:
+            reserve = int(state['limit'] * BACKGROUND_RESERVE_RATIO)
+        else:
+            reserve = 0
+
+        if state['remaining'] <= reserve:
+            retry_after = max(int(state['reset'] - time.time()), 1)
+
+            logger.warning('Rate limit for hosting service %s, account %s '
+                           'has been reached (%s priority). Resets in %s '
+                           'seconds.',
+                           self.hosting_service_id, self.account_id,
+                           priority, retry_after)
+            raise RateLimitExceededError(retry_after=retry_after)
+
+        try:
+            cache.decr(self._remaining_key)
+        except ValueError:
+            # The window expired between checking the state and now.
+            pass
+
+    def update(self, headers, status_code=None):
+        """Update the account's budget from response headers.
+
+        Args:
+            headers (dict):
+                The headers from the service's response.
+
+            status_code (int, optional):
+                The HTTP status code of the response. If this is
+                :http:`429` and a :mailheader:`Retry-After` header is
+                present, the budget is considered empty until then.
+        """
+        headers = dict(
+            (key.lower(), value)
+            for key, value in six.iteritems(headers)
+        )
+        now = time.time()
+        limit = None
+        remaining = None
+        reset = None
+
+        for limit_header, remaining_header, reset_header in RATE_LIMIT_HEADERS:
+            remaining = self._parse_int(headers.get(remaining_header.lower()))
+
+            if remaining is not None:
+                limit = self._parse_int(headers.get(limit_header.lower()))
+                reset = self._parse_int(headers.get(reset_header.lower()))
+                break
+
+        retry_after = self._parse_int(headers.get('retry-after'))
+
+        if status_code == 429 and retry_after is not None:
+            remaining = 0
+            reset = now + retry_after
+
+        if remaining is None:
+            return
+
+        if reset is None:
+            # Without a reset time, assume a typical hourly window.
+            reset = now + 3600
+        elif reset < 1000000000:
+            # This is a number of seconds, rather than a timestamp.
+            reset = now + reset
+
+        if limit is None:
+            state = cache.get(self._state_key)
+
+            if state is not None:
+                limit = state['limit']
+            else:
+                limit = remaining
+
+        timeout = max(int(reset - now), 1)
+
+        cache.set_many(
+            {
+                self._state_key: {
+                    'limit': limit,
+                    'reset': reset,
+                },
+                self._remaining_key: remaining,
+            },
+            timeout)
+
+    def _parse_int(self, value):
+        """Return an integer parsed from a header value.
+
+        Args:
+            value (unicode):
+                The header value.
+
+        Returns:
+            int:
+            The parsed value, or ``None`` if missing or invalid.
+        """
+        if value is None:
+            return None
+
+        try:
+            return int(value)
+        except ValueError:
+            return None
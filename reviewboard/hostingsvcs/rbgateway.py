@@ -85,6 +85,8 @@ def hook_close_submitted(request, local_site_name=None,
     if 'commits' not in payload:
         return HttpResponseBadRequest('Invalid payload; expected "commits".')
 
+    repository.invalidate_history_cache()
+
     server_url = get_server_url(request=request)
     review_request_ids_to_commits = defaultdict(list)
 
@@ -13,27 +13,36 @@ from email.generator import _make_boundary as generate_boundary
 
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
+from django.conf import settings
 from django.conf.urls import include, url
+from django.core.cache import cache
 from django.dispatch import receiver
 from django.utils import six
 from django.utils.encoding import force_bytes, force_str, force_text
-from django.utils.six.moves.urllib.error import URLError
+from django.utils.six.moves.urllib.error import HTTPError, URLError
 from django.utils.six.moves.urllib.parse import (parse_qs, urlencode,
                                                  urlparse, urlunparse)
 from django.utils.six.moves.urllib.request import (
     Request as BaseURLRequest,
     HTTPBasicAuthHandler,
     HTTPDigestAuthHandler,
+    HTTPHandler,
     HTTPPasswordMgrWithDefaultRealm,
     HTTPSHandler,
     build_opener)
 from django.utils.translation import ugettext_lazy as _
+from djblets.cache.backend import make_cache_key
 from djblets.registries.errors import ItemLookupError
 from djblets.registries.registry import (ALREADY_REGISTERED, LOAD_ENTRY_POINT,
                                          NOT_REGISTERED)
 from djblets.util.decorators import cached_property
 
 import reviewboard.hostingsvcs.urls as hostingsvcs_urls
+from reviewboard.hostingsvcs.http_pool import (PooledHTTPHandler,
+                                               PooledHTTPSHandler)
+from reviewboard.hostingsvcs.errors import RateLimitExceededError
+from reviewboard.hostingsvcs.http_stats import record_http_stat
+from reviewboard.hostingsvcs.rate_limits import RateLimiter
 from reviewboard.registries.registry import EntryPointRegistry
 from reviewboard.scmtools.certs import Certificate
 from reviewboard.scmtools.crypto_utils import decrypt_password
@@ -292,21 +301,43 @@ class HostingServiceHTTPRequest(object):
         request.get_method = lambda: self.method
 
         hosting_service = self.hosting_service
+        handlers = list(self._urlopen_handlers)
 
-        if hosting_service and 'ssl_cert' in hosting_service.account.data:
-            # create_default_context only exists in Python 2.7.9+. Using it
-            # here should be fine, however, because accepting invalid or
-            # self-signed certificates is only possible when running
-            # against versions that have this (see the check for
-            # create_default_context below).
-            context = ssl.create_default_context()
-            context.load_verify_locations(
-                cadata=hosting_service.account.data['ssl_cert'])
-            context.check_hostname = False
-
-            self._urlopen_handlers.append(HTTPSHandler(context=context))
+        if hosting_service:
+            stats_key = hosting_service.hosting_service_id
+        else:
+            stats_key = None
+
+        if not any(isinstance(handler, (HTTPHandler, HTTPSHandler))
+                   for handler in handlers):
+            # Connections are reused across requests, unless a subclass or
+            # caller has provided its own handlers for opening connections.
+            https_kwargs = {}
+
+            if hosting_service and 'ssl_cert' in hosting_service.account.data:
+                ssl_cert = hosting_service.account.data['ssl_cert']
+
+                # create_default_context only exists in Python 2.7.9+. Using
+                # it here should be fine, however, because accepting invalid
+                # or self-signed certificates is only possible when running
+                # against versions that have this (see the check for
+                # create_default_context below).
+                context = ssl.create_default_context()
+                context.load_verify_locations(cadata=ssl_cert)
+                context.check_hostname = False
+
+                https_kwargs = {
+                    'context': context,
+                    'pool_key': hashlib.sha256(
+                        force_bytes(ssl_cert)).hexdigest(),
+                }
+
+            handlers += [
+                PooledHTTPHandler(stats_key=stats_key),
+                PooledHTTPSHandler(stats_key=stats_key, **https_kwargs),
+            ]
 
-        opener = build_opener(*self._urlopen_handlers)
+        opener = build_opener(*handlers)
         response = opener.open(request)
 
         if hosting_service:
@@ -532,6 +563,39 @@ class HostingServiceClient(object):
     #:     4.0
     use_http_digest_auth = False
 
+    #: Whether to cache GET responses for conditional revalidation.
+    #:
+    #: When enabled, successful responses containing an :mailheader:`ETag`
+    #: or :mailheader:`Last-Modified` header are cached. Later requests for
+    #: the same URL with the same credentials will send
+    #: :mailheader:`If-None-Match` or :mailheader:`If-Modified-Since`, and
+    #: an :http:`304` from the service will return the cached response.
+    #:
+    #: This is meant for small API responses. Clients should only turn this
+    #: on if they don't fetch file contents through :py:meth:`http_get`, or
+    #: if they pass ``use_http_cache=False`` when doing so. File contents are
+    #: cached separately by the repository.
+    #:
+    #: Version Added:
+    #:     4.0
+    use_http_cache = False
+
+    #: The maximum size of a response payload that will be cached.
+    #:
+    #: Version Added:
+    #:     4.0
+    http_cache_max_size = 64 * 1024
+
+    #: Whether to track and enforce the service's API rate limits.
+    #:
+    #: When enabled, the rate limit headers returned by the service are used
+    #: to track the account's remaining budget, shared across all processes.
+    #: See :py:mod:`reviewboard.hostingsvcs.rate_limits`.
+    #:
+    #: Version Added:
+    #:     4.0
+    use_rate_limits = False
+
     def __init__(self, hosting_service):
         """Initialize the client.
 
@@ -798,7 +862,7 @@ class HostingServiceClient(object):
                                  **kwargs)
 
     def http_request(self, url, body=None, headers=None, method='GET',
-                     **kwargs):
+                     priority=None, use_http_cache=None, **kwargs):
         """Perform an HTTP request, processing and handling results.
 
         This constructs an HTTP request based on the specified criteria,
@@ -830,6 +894,18 @@ class HostingServiceClient(object):
 
         See those methods for more information.
 
+        If :py:attr:`use_http_cache` is set (or ``use_http_cache=True`` is
+        passed), ``GET`` responses are cached and later revalidated with the
+        service using conditional requests. A :http:`304` response will return
+        the cached response.
+
+        If :py:attr:`use_rate_limits` is set, the account's API rate limit
+        budget is checked before the request is made, and updated from the
+        response. Requests are refused without waiting once the budget for
+        their priority is used up, and background requests are refused
+        before interactive ones. See
+        :py:mod:`reviewboard.hostingsvcs.rate_limits`.
+
         Version Changed:
             4.0:
             This now returns a :py:class:`HostingServiceHTTPResponse` instead
@@ -849,6 +925,19 @@ class HostingServiceClient(object):
             method (unicode, optional):
                 The HTTP method to use to perform the request.
 
+            priority (unicode, optional):
+                The priority of the request for rate limiting purposes. This
+                is one of :py:data:`~reviewboard.hostingsvcs.rate_limits.
+                PRIORITY_INTERACTIVE` or :py:data:`~reviewboard.hostingsvcs.
+                rate_limits.PRIORITY_BACKGROUND`. If not provided, the
+                priority set by :py:func:`~reviewboard.hostingsvcs.
+                rate_limits.api_call_priority` is used.
+
+            use_http_cache (bool, optional):
+                Whether to cache a ``GET`` response for conditional
+                revalidation. If not provided, :py:attr:`use_http_cache` is
+                used. Callers fetching file contents should pass ``False``.
+
             **kwargs (dict):
                 Additional keyword arguments to pass to
                 :py:meth:`build_http_request`.
@@ -858,6 +947,10 @@ class HostingServiceClient(object):
             The HTTP response for the request.
 
         Raises:
+            reviewboard.hostingsvcs.errors.RateLimitExceededError:
+                The API rate limit for the account has been reached. The
+                request was not made.
+
             reviewboard.hostingsvcs.errors.HostingServiceError:
                 There was an error performing the request, and the error has
                 been translated to a more specific hosting service error.
@@ -877,14 +970,202 @@ class HostingServiceClient(object):
                                           credentials=credentials,
                                           **kwargs)
 
+        hosting_service_id = self.hosting_service.hosting_service_id
+        cached_entry = None
+        cache_key = None
+
+        if hosting_service_id:
+            record_http_stat(hosting_service_id, 'requests')
+
+        rate_limiter = self.get_rate_limiter()
+
+        if rate_limiter is not None:
+            try:
+                rate_limiter.acquire(priority=priority)
+            except RateLimitExceededError:
+                record_http_stat(hosting_service_id, 'rate_limited')
+                raise
+
+        if use_http_cache is None:
+            use_http_cache = self.use_http_cache
+
+        if (use_http_cache and
+            method == 'GET' and
+            request.get_header('If-none-match') is None and
+            request.get_header('If-modified-since') is None):
+            cache_key = self._make_http_cache_key(request)
+            cached_entry = cache.get(cache_key)
+
+            if cached_entry is not None:
+                if cached_entry['etag']:
+                    request.add_header('If-None-Match',
+                                       cached_entry['etag'])
+
+                if cached_entry['last_modified']:
+                    request.add_header('If-Modified-Since',
+                                       cached_entry['last_modified'])
+
         try:
-            return self.process_http_response(self.open_http_request(request))
+            try:
+                response = self.open_http_request(request)
+                revalidated = (response.status_code == 304 and
+                               cached_entry is not None)
+                response_headers = response.headers
+            except HTTPError as e:
+                if e.code != 304 or cached_entry is None:
+                    raise
+
+                revalidated = True
+                response_headers = dict(e.headers or {})
+
+            if rate_limiter is not None:
+                rate_limiter.update(response_headers)
+
+            if revalidated:
+                response = self._build_cached_http_response(
+                    request, cached_entry, response_headers)
+
+            result = self.process_http_response(response)
         except URLError as e:
+            if hosting_service_id:
+                record_http_stat(hosting_service_id, 'errors')
+
+            if rate_limiter is not None and getattr(e, 'headers', None):
+                rate_limiter.update(dict(e.headers),
+                                    status_code=getattr(e, 'code', None))
+
             # This will either raise, or it will return and we'll raise.
             self.process_http_error(request, e)
 
             raise
 
+        if cache_key is not None and not revalidated:
+            self._store_http_cache_entry(cache_key, response)
+
+        return result
+
+    def get_rate_limiter(self):
+        """Return the rate limiter for requests made by this client.
+
+        Version Added:
+            4.0
+
+        Returns:
+            reviewboard.hostingsvcs.rate_limits.RateLimiter:
+            The rate limiter for the account, or ``None`` if requests are not
+            rate limited.
+        """
+        hosting_service = self.hosting_service
+        account = hosting_service.account
+
+        if (not self.use_rate_limits or
+            not hosting_service.hosting_service_id or
+            account is None or
+            account.pk is None):
+            return None
+
+        return RateLimiter(hosting_service.hosting_service_id, account.pk)
+
+    def _make_http_cache_key(self, request):
+        """Return the cache key for storing a GET response.
+
+        The key covers the URL and all request headers, so that responses
+        fetched with different credentials are never shared.
+
+        Args:
+            request (HostingServiceHTTPRequest):
+                The request being made.
+
+        Returns:
+            unicode:
+            The cache key.
+        """
+        headers = '\n'.join(
+            '%s: %s' % (force_text(key), force_text(value))
+            for key, value in sorted(six.iteritems(request.headers))
+        )
+
+        return make_cache_key('hosting-service-http:%s:%s' % (
+            self.hosting_service.hosting_service_id,
+            hashlib.sha256(force_bytes('%s\n%s' % (request.url, headers)))
+            .hexdigest()))
+
+    def _store_http_cache_entry(self, cache_key, response):
+        """Store a response for later conditional revalidation.
+
+        Responses are only stored if they're successful, include an
+        :mailheader:`ETag` or :mailheader:`Last-Modified` header, and are
+        no larger than :py:attr:`http_cache_max_size`.
+
+        Args:
+            cache_key (unicode):
+                The cache key to store the response under.
+
+            response (HostingServiceHTTPResponse):
+                The response to store.
+        """
+        etag = response.headers.get(str('Etag'))
+        last_modified = response.headers.get(str('Last-modified'))
+
+        if (response.status_code != 200 or
+            (not etag and not last_modified) or
+            response.data is None or
+            len(response.data) > self.http_cache_max_size):
+            return
+
+        cache.set(
+            cache_key,
+            {
+                'data': response.data,
+                'etag': force_text(etag or ''),
+                'headers': response.headers,
+                'last_modified': force_text(last_modified or ''),
+                'status_code': response.status_code,
+                'url': response.url,
+            },
+            settings.CACHE_EXPIRATION_TIME)
+
+        hosting_service_id = self.hosting_service.hosting_service_id
+
+        if hosting_service_id:
+            record_http_stat(hosting_service_id, 'cache_stored')
+
+    def _build_cached_http_response(self, request, cached_entry, headers):
+        """Return a response built from a revalidated cache entry.
+
+        Args:
+            request (HostingServiceHTTPRequest):
+                The request that was made.
+
+            cached_entry (dict):
+                The cached response information.
+
+            headers (dict):
+                The headers from the :http:`304` response. These take
+                precedence over the cached headers, as they may contain
+                updated information (such as rate limits).
+
+        Returns:
+            HostingServiceHTTPResponse:
+            The response.
+        """
+        response_headers = dict(cached_entry['headers'])
+        response_headers.update(
+            (str(key.capitalize()), str(value))
+            for key, value in six.iteritems(headers)
+        )
+
+        hosting_service_id = self.hosting_service.hosting_service_id
+
+        if hosting_service_id:
+            record_http_stat(hosting_service_id, 'cache_revalidated')
+
+        return self.http_response_cls(request=request,
+                                      url=cached_entry['url'],
+                                      data=cached_entry['data'],
+                                      headers=response_headers,
+                                      status_code=cached_entry['status_code'])
+
     def get_http_credentials(self, account, username=None, password=None,
                              **kwargs):
         """Return credentials used to authenticate with the service.
@@ -1440,6 +1721,16 @@ class HostingService(object):
     #:     3.0.17
     visible = True
 
+    #: Whether the service can check for many files' existence at once.
+    #:
+    #: If ``True``, :py:meth:`get_files_exist` must be overridden to check
+    #: all files in one operation. It will be used when validating uploaded
+    #: diffs, instead of checking each file concurrently.
+    #:
+    #: Version Added:
+    #:     4.0
+    supports_batch_file_exists = False
+
     self_hosted = False
     repository_url_patterns = None
 
@@ -1731,6 +2022,48 @@ class HostingService(object):
 
         return repository.get_scmtool().file_exists(path, revision, **kwargs)
 
+    def get_files_exist(self, repository, files, base_commit_id=None,
+                        **kwargs):
+        """Return whether each of a list of files exists in the repository.
+
+        By default, this checks each file in turn using
+        :py:meth:`get_file_exists`. Subclasses that set
+        :py:attr:`supports_batch_file_exists` to ``True`` must override this
+        to check all files in one operation.
+
+        Version Added:
+            4.0
+
+        Args:
+            repository (reviewboard.scmtools.models.Repository):
+                The repository to check for file existence.
+
+            files (list of tuple):
+                A list of ``(path, revision)`` tuples to check.
+
+            base_commit_id (unicode, optional):
+                The ID of the commit that the files were changed in.
+
+            **kwargs (dict):
+                Additional keyword arguments to be passed to the SCMTool.
+
+        Returns:
+            list of bool:
+            A list of results, in the same order as ``files``.
+
+        Raises:
+            NotImplementedError:
+                If this hosting service does not support repositories.
+        """
+        if not self.supports_repositories:
+            raise NotImplementedError
+
+        return [
+            self.get_file_exists(repository, path, revision,
+                                 base_commit_id=base_commit_id, **kwargs)
+            for path, revision in files
+        ]
+
     def get_branches(self, repository):
         """Return a list of all branches in the repositories.
 
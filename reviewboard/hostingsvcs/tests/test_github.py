@@ -906,6 +906,22 @@ class GitHubTests(GitHubTestCase):
             username='myuser',
             password='abc123')
 
+    def test_get_file_not_cached_for_revalidation(self):
+        """Testing GitHub.get_file doesn't cache file contents for
+        revalidation
+        """
+        with self.setup_http_test(payload=b'file data',
+                                  headers={
+                                      str('ETag'): str('"abc123"'),
+                                  },
+                                  expected_http_calls=2) as ctx:
+            repository = ctx.create_repository()
+            ctx.service.get_file(repository, 'readme', 'a' * 40)
+            data = ctx.service.get_file(repository, 'readme', 'a' * 40)
+
+        self.assertEqual(data, b'file data')
+        self.assertIsNone(ctx.http_requests[1].get_header('If-none-match'))
+
     def test_get_remote_repositories_with_owner(self):
         """Testing GitHub.get_remote_repositories with requesting
         authenticated user's repositories
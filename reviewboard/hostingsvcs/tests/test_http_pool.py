@@ -0,0 +1,225 @@
+"""Unit tests for reviewboard.hostingsvcs.http_pool."""
+
+from __future__ import unicode_literals
+
+import errno
+import socket
+import threading
+
+from django.core.cache import cache
+from django.utils.six.moves import BaseHTTPServer, http_client
+from django.utils.six.moves.urllib.error import HTTPError, URLError
+from django.utils.six.moves.urllib.request import build_opener
+
+from reviewboard.hostingsvcs.http_pool import (HTTPConnectionPool,
+                                               PooledHTTPHandler,
+                                               _is_stale_connection_error,
+                                               connection_pool)
+from reviewboard.hostingsvcs.http_stats import get_http_stats
+from reviewboard.hostingsvcs.models import HostingServiceAccount
+from reviewboard.hostingsvcs.service import (HostingService,
+                                             HostingServiceHTTPRequest)
+from reviewboard.testing.testcase import TestCase
+
+
+class PoolTestService(HostingService):
+    hosting_service_id = 'pool-test'
+
+
+class DummyConnection(object):
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class KeepAliveRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connection_count += 1
+
+    def do_GET(self):
+        self.server.requests.append(('GET', self.path))
+
+        if self.path == '/missing/':
+            status_code = 404
+            payload = b'Not found'
+        else:
+            status_code = 200
+            payload = b'test response'
+
+        self.send_response(status_code)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+        if self.path == '/close/':
+            # Close the connection without telling the client, as servers
+            # do when a keep-alive connection has been idle too long.
+            self.close_connection = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.do_GET()
+
+    def log_message(self, *args, **kwargs):
+        pass
+
+
+class HTTPConnectionPoolTests(TestCase):
+    """Unit tests for reviewboard.hostingsvcs.http_pool.HTTPConnectionPool."""
+
+    def test_acquire_after_release(self):
+        """Testing HTTPConnectionPool.acquire returns released connections"""
+        pool = HTTPConnectionPool()
+        conn = DummyConnection()
+
+        self.assertIsNone(pool.acquire('key'))
+        pool.release('key', conn)
+
+        self.assertIsNone(pool.acquire('other-key'))
+        self.assertIs(pool.acquire('key'), conn)
+        self.assertIsNone(pool.acquire('key'))
+        self.assertFalse(conn.closed)
+
+    def test_acquire_with_expired(self):
+        """Testing HTTPConnectionPool.acquire closes expired connections"""
+        pool = HTTPConnectionPool(idle_timeout=-1)
+        conn = DummyConnection()
+
+        pool.release('key', conn)
+
+        self.assertIsNone(pool.acquire('key'))
+        self.assertTrue(conn.closed)
+
+    def test_release_when_full(self):
+        """Testing HTTPConnectionPool.release closes connections when full"""
+        pool = HTTPConnectionPool(max_idle_per_host=1)
+        conn1 = DummyConnection()
+        conn2 = DummyConnection()
+
+        pool.release('key', conn1)
+        pool.release('key', conn2)
+
+        self.assertFalse(conn1.closed)
+        self.assertTrue(conn2.closed)
+
+
+class PooledHTTPHandlerTests(TestCase):
+    """Unit tests for pooled connections in HostingServiceHTTPRequest."""
+
+    def setUp(self):
+        super(PooledHTTPHandlerTests, self).setUp()
+
+        cache.clear()
+        connection_pool.clear()
+
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0),
+                                                KeepAliveRequestHandler)
+        self.server.connection_count = 0
+        self.server.requests = []
+        self.url = 'http://127.0.0.1:%s' % self.server.server_address[1]
+
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.service = PoolTestService(HostingServiceAccount())
+
+    def tearDown(self):
+        connection_pool.clear()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+        super(PooledHTTPHandlerTests, self).tearDown()
+
+    def test_open_reuses_connection(self):
+        """Testing HostingServiceHTTPRequest.open reuses connections"""
+        for i in range(3):
+            response = HostingServiceHTTPRequest(
+                '%s/api/' % self.url,
+                hosting_service=self.service).open()
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, b'test response')
+
+        self.assertEqual(self.server.connection_count, 1)
+
+        stats = get_http_stats(['pool-test'])['pool-test']
+        self.assertEqual(stats['connections_opened'], 1)
+        self.assertEqual(stats['connections_reused'], 2)
+
+    def test_open_with_http_error(self):
+        """Testing HostingServiceHTTPRequest.open with pooled connection and
+        HTTP error
+        """
+        request = HostingServiceHTTPRequest('%s/missing/' % self.url,
+                                            hosting_service=self.service)
+
+        with self.assertRaises(HTTPError) as ctx:
+            request.open()
+
+        self.assertEqual(ctx.exception.code, 404)
+        self.assertEqual(ctx.exception.read(), b'Not found')
+
+    def test_open_after_server_closed_connection(self):
+        """Testing HostingServiceHTTPRequest.open retries GET requests when
+        a pooled connection was closed by the server
+        """
+        HostingServiceHTTPRequest('%s/close/' % self.url,
+                                  hosting_service=self.service).open()
+
+        response = HostingServiceHTTPRequest(
+            '%s/api/' % self.url,
+            hosting_service=self.service).open()
+
+        self.assertEqual(response.data, b'test response')
+        self.assertEqual(self.server.connection_count, 2)
+        self.assertEqual(self.server.requests,
+                         [('GET', '/close/'), ('GET', '/api/')])
+
+    def test_open_post_after_server_closed_connection(self):
+        """Testing HostingServiceHTTPRequest.open doesn't retry POST
+        requests when a pooled connection was closed by the server
+        """
+        HostingServiceHTTPRequest('%s/close/' % self.url,
+                                  hosting_service=self.service).open()
+
+        with self.assertRaises(URLError):
+            HostingServiceHTTPRequest('%s/api/' % self.url,
+                                      method='POST',
+                                      body=b'data',
+                                      hosting_service=self.service).open()
+
+        self.assertEqual(self.server.connection_count, 1)
+        self.assertEqual(self.server.requests, [('GET', '/close/')])
+
+    def test_open_without_retry_stale_connections(self):
+        """Testing PooledHTTPHandler with retry_stale_connections=False
+        doesn't retry GET requests when a pooled connection was closed by
+        the server
+        """
+        opener = build_opener(PooledHTTPHandler(
+            retry_stale_connections=False))
+        opener.open('%s/close/' % self.url).read()
+
+        with self.assertRaises(URLError):
+            opener.open('%s/api/' % self.url)
+
+        self.assertEqual(self.server.connection_count, 1)
+        self.assertEqual(self.server.requests, [('GET', '/close/')])
+
+    def test_is_stale_connection_error(self):
+        """Testing _is_stale_connection_error"""
+        self.assertTrue(_is_stale_connection_error(
+            http_client.BadStatusLine("''")))
+        self.assertTrue(_is_stale_connection_error(
+            socket.error(errno.ECONNRESET, 'Connection reset by peer')))
+        self.assertFalse(_is_stale_connection_error(
+            socket.timeout('timed out')))
+        self.assertFalse(_is_stale_connection_error(
+            http_client.BadStatusLine('garbage')))
@@ -0,0 +1,186 @@
+"""Unit tests for reviewboard.hostingsvcs.rate_limits."""
+
+from __future__ import unicode_literals
+
+import time
+
+from kgb import SpyAgency
+
+from reviewboard.hostingsvcs.errors import RateLimitExceededError
+from reviewboard.hostingsvcs.models import HostingServiceAccount
+from reviewboard.hostingsvcs.rate_limits import (PRIORITY_BACKGROUND,
+                                                 RateLimiter,
+                                                 api_call_priority)
+from reviewboard.hostingsvcs.service import (HostingService,
+                                             HostingServiceClient,
+                                             HostingServiceHTTPResponse)
+from reviewboard.testing.testcase import TestCase
+
+
+class RateLimitedTestClient(HostingServiceClient):
+    use_rate_limits = True
+
+
+class RateLimitedTestService(HostingService):
+    hosting_service_id = 'rate-limit-test'
+    client_class = RateLimitedTestClient
+
+
+def _make_open_http_request(remaining):
+    def _open_http_request(client, request):
+        return HostingServiceHTTPResponse(
+            request=request,
+            url=request.url,
+            data=b'test response',
+            headers={
+                str('X-RateLimit-Limit'): str('100'),
+                str('X-RateLimit-Remaining'): str(remaining),
+                str('X-RateLimit-Reset'): str(int(time.time()) + 600),
+            },
+            status_code=200)
+
+    return _open_http_request
+
+
+class RateLimiterTests(SpyAgency, TestCase):
+    """Unit tests for reviewboard.hostingsvcs.rate_limits.RateLimiter."""
+
+    def setUp(self):
+        super(RateLimiterTests, self).setUp()
+
+        self.rate_limiter = RateLimiter('test', 1)
+
+    def _update(self, limit=100, remaining=50, reset_in=600):
+        self.rate_limiter.update({
+            str('X-RateLimit-Limit'): str(limit),
+            str('X-RateLimit-Remaining'): str(remaining),
+            str('X-RateLimit-Reset'): str(int(time.time()) + reset_in),
+        })
+
+    def test_acquire_without_state(self):
+        """Testing RateLimiter.acquire without a known rate limit"""
+        self.rate_limiter.acquire()
+
+        self.assertIsNone(self.rate_limiter.get_state())
+
+    def test_acquire_takes_token(self):
+        """Testing RateLimiter.acquire takes a token from the budget"""
+        self._update(remaining=50)
+        self.rate_limiter.acquire()
+
+        state = self.rate_limiter.get_state()
+        self.assertEqual(state['limit'], 100)
+        self.assertEqual(state['remaining'], 49)
+
+    def test_acquire_when_exhausted(self):
+        """Testing RateLimiter.acquire with an exhausted budget raises
+        RateLimitExceededError
+        """
+        self._update(remaining=0)
+
+        with self.assertRaises(RateLimitExceededError) as ctx:
+            self.rate_limiter.acquire()
+
+        self.assertGreater(ctx.exception.retry_after, 500)
+        self.assertEqual(ctx.exception.http_code, 429)
+
+    def test_acquire_when_exhausted_resetting_soon(self):
+        """Testing RateLimiter.acquire with an exhausted budget resetting
+        soon raises RateLimitExceededError without waiting
+        """
+        self._update(remaining=0, reset_in=3)
+
+        with self.assertRaises(RateLimitExceededError) as ctx:
+            self.rate_limiter.acquire()
+
+        self.assertLessEqual(ctx.exception.retry_after, 3)
+
+    def test_acquire_background_reserve(self):
+        """Testing RateLimiter.acquire for background requests keeps a reserve
+        for interactive requests
+        """
+        self._update(remaining=10)
+
+        with self.assertRaises(RateLimitExceededError):
+            self.rate_limiter.acquire(priority=PRIORITY_BACKGROUND)
+
+        with api_call_priority(PRIORITY_BACKGROUND):
+            with self.assertRaises(RateLimitExceededError):
+                self.rate_limiter.acquire()
+
+        self.rate_limiter.acquire()
+
+    def test_update_with_ratelimit_headers(self):
+        """Testing RateLimiter.update with RateLimit-* headers and a reset
+        in seconds
+        """
+        self.rate_limiter.update({
+            str('RateLimit-Limit'): str('600'),
+            str('RateLimit-Remaining'): str('599'),
+            str('RateLimit-Reset'): str('60'),
+        })
+
+        state = self.rate_limiter.get_state()
+        self.assertEqual(state['limit'], 600)
+        self.assertEqual(state['remaining'], 599)
+        self.assertLessEqual(state['reset'], time.time() + 60)
+
+    def test_update_with_retry_after(self):
+        """Testing RateLimiter.update with HTTP 429 and Retry-After"""
+        self._update(remaining=50)
+        self.rate_limiter.update({str('Retry-After'): str('30')},
+                                 status_code=429)
+
+        state = self.rate_limiter.get_state()
+        self.assertEqual(state['limit'], 100)
+        self.assertEqual(state['remaining'], 0)
+
+    def test_get_state_after_reset(self):
+        """Testing RateLimiter.get_state after the window has reset"""
+        self._update(remaining=0, reset_in=-10)
+
+        self.assertIsNone(self.rate_limiter.get_state())
+        self.rate_limiter.acquire()
+
+
+class HostingServiceClientRateLimitTests(SpyAgency, TestCase):
+    """Unit tests for rate limiting in HostingServiceClient.http_request."""
+
+    def setUp(self):
+        super(HostingServiceClientRateLimitTests, self).setUp()
+
+        account = HostingServiceAccount.objects.create(
+            service_name='rate-limit-test',
+            username='test-user')
+        self.client = RateLimitedTestService(account).client
+
+    def test_http_request_when_exhausted(self):
+        """Testing HostingServiceClient.http_request with an exhausted rate
+        limit does not make the request
+        """
+        self.spy_on(self.client.open_http_request,
+                    call_fake=_make_open_http_request(remaining=0))
+
+        self.client.http_get('http://example.com/1')
+
+        with self.assertRaises(RateLimitExceededError):
+            self.client.http_get('http://example.com/2')
+
+        self.assertEqual(len(self.client.open_http_request.calls), 1)
+
+    def test_http_request_background(self):
+        """Testing HostingServiceClient.http_request with background priority
+        and a low rate limit
+        """
+        self.spy_on(self.client.open_http_request,
+                    call_fake=_make_open_http_request(remaining=5))
+
+        self.client.http_get('http://example.com/1')
+
+        with self.assertRaises(RateLimitExceededError):
+            self.client.http_get('http://example.com/2',
+                                 priority=PRIORITY_BACKGROUND)
+
+        self.client.http_get('http://example.com/3')
+
+        self.assertEqual(len(self.client.open_http_request.calls), 2)
@@ -1,17 +1,18 @@
 from __future__ import unicode_literals
 
-from django.utils.translation import ugettext_lazy as _
+from django.utils.translation import ugettext, ugettext_lazy as _
 
 from reviewboard.admin import ModelAdmin, admin_site
 from reviewboard.notifications.forms import WebHookTargetForm
-from reviewboard.notifications.models import WebHookTarget
+from reviewboard.notifications.models import WebHookDelivery, WebHookTarget
 
 
 class WebHookTargetAdmin(ModelAdmin):
     form = WebHookTargetForm
 
-    list_display = ('url', 'enabled')
+    list_display = ('url', 'enabled', 'delivery_health')
     filter_horizontal = ('repositories',)
+    readonly_fields = ('delivery_health',)
     fieldsets = (
         (_('General Information'), {
             'fields': (
@@ -30,6 +31,11 @@ class WebHookTargetAdmin(ModelAdmin):
                 'secret',
             ),
         }),
+        (_('Delivery Health'), {
+            'fields': (
+                'delivery_health',
+            ),
+        }),
         (_('Advanced'), {
             'fields': (
                 'local_site',
@@ -39,5 +45,40 @@ class WebHookTargetAdmin(ModelAdmin):
         }),
     )
 
+    def delivery_health(self, webhook_target):
+        """Return a summary of recent queued deliveries to a WebHook.
+
+        Args:
+            webhook_target (reviewboard.notifications.models.WebHookTarget):
+                The WebHook being displayed.
+
+        Returns:
+            unicode:
+            The summary.
+        """
+        if webhook_target is None or webhook_target.pk is None:
+            return ''
+
+        health = WebHookDelivery.objects.get_health(webhook_target)
+
+        if not health['count']:
+            return ugettext('No recent queued deliveries')
+
+        summary = ugettext(
+            '%(delivered)d of the last %(count)d delivered, %(failed)d '
+            'failed, %(pending)d pending'
+        ) % health
+
+        if health['average_latency'] is not None:
+            summary += ugettext('; average time %d ms') % (
+                health['average_latency'] * 1000)
+
+        if health['last_error']:
+            summary += ugettext('; last error: %s') % health['last_error']
+
+        return summary
+
+    delivery_health.short_description = _('Recent deliveries')
+
 
 admin_site.register(WebHookTarget, WebHookTargetAdmin)
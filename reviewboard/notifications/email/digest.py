@@ -0,0 +1,195 @@
+"""Sending of e-mail digests.
+
+When e-mail digests are enabled, users who have chosen to receive them are
+left out of the e-mails for review request activity, and an
+:py:class:`~reviewboard.notifications.models.EmailDigestEvent` is recorded
+for each of them instead. The :py:class:`EmailDigestSender`, which is run
+periodically by the ``send-email-digests`` management command, sends each
+of these users a single e-mail covering all of their events.
+
+A digest has a section for each review request. Many users typically
+receive the same events for a review request (for instance, all members of
+a review group), so each section is rendered once and shared by every
+digest containing those events.
+"""
+
+from __future__ import unicode_literals
+
+import logging
+from itertools import groupby
+
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+from djblets.siteconfig.models import SiteConfiguration
+from djblets.util.compat.django.template.loader import render_to_string
+
+from reviewboard.admin.server import build_server_url
+from reviewboard.notifications.email.message import prepare_email_digest_mail
+from reviewboard.notifications.models import EmailDigestEvent, QueuedEmail
+
+
+logger = logging.getLogger(__name__)
+
+
+class EmailDigestSender(object):
+    """Sends e-mail digests of review request activity.
+
+    Rendered sections are kept for the lifetime of the sender, so a new
+    sender should be used for each run.
+    """
+
+    def __init__(self):
+        """Initialize the sender."""
+        # The server URL without a trailing slash, as used in all e-mails.
+        self._site_url = build_server_url('/')[:-1]
+        self._sections = {}
+
+    def send_digests(self, until=None):
+        """Send digests for all users with pending events.
+
+        Events are removed once their digest has been sent (or queued, if
+        queued e-mail delivery is enabled). If a digest can't be sent, its
+        events are kept for the next run.
+
+        Args:
+            until (datetime.datetime, optional):
+                The time of the newest events to include. This defaults to
+                the current time.
+
+        Returns:
+            int:
+            The number of digests sent.
+        """
+        if until is None:
+            until = timezone.now()
+
+        user_ids = list(
+            EmailDigestEvent.objects
+            .filter(timestamp__lte=until)
+            .order_by('user')
+            .values_list('user', flat=True)
+            .distinct()
+        )
+        num_sent = 0
+
+        for user_id in user_ids:
+            if self._send_digest(user_id, until):
+                num_sent += 1
+
+        return num_sent
+
+    def _send_digest(self, user_id, until):
+        """Send the digest for a user.
+
+        Args:
+            user_id (int):
+                The ID of the user.
+
+            until (datetime.datetime):
+                The time of the newest events to include.
+
+        Returns:
+            bool:
+            Whether a digest was sent.
+        """
+        events = list(
+            EmailDigestEvent.objects
+            .filter(user=user_id,
+                    timestamp__lte=until)
+            .select_related('user', 'actor', 'review_request',
+                            'review_request__local_site')
+            .order_by('review_request', 'pk')
+        )
+
+        if not events:
+            return False
+
+        user = events[0].user
+        text_sections = []
+        html_sections = []
+
+        if user.is_active and user.should_send_email():
+            for review_request_id, review_request_events in groupby(
+                    events, key=lambda event: event.review_request_id):
+                review_request_events = list(review_request_events)
+                review_request = review_request_events[0].review_request
+
+                # Access may have changed since the events were recorded.
+                if review_request.is_accessible_by(user):
+                    text_section, html_section = self._get_section(
+                        review_request, review_request_events)
+                    text_sections.append(text_section)
+                    html_sections.append(html_section)
+
+        sent = False
+
+        if text_sections:
+            message = prepare_email_digest_mail(user, text_sections,
+                                                html_sections)
+            siteconfig = SiteConfiguration.objects.get_current()
+
+            try:
+                if siteconfig.get('mail_queue_messages'):
+                    QueuedEmail.objects.queue_message(message)
+                else:
+                    message.send()
+            except Exception:
+                logger.exception('Could not send e-mail digest to "%s"',
+                                 message.to[0])
+
+                return False
+
+            sent = True
+
+        EmailDigestEvent.objects.filter(
+            pk__in=[event.pk for event in events]).delete()
+
+        return sent
+
+    def _get_section(self, review_request, events):
+        """Return the rendered section for a review request.
+
+        Sections are rendered once for each distinct set of events, and
+        shared between all digests containing those events.
+
+        Args:
+            review_request (reviewboard.reviews.models.review_request.
+                            ReviewRequest):
+                The review request.
+
+            events (list of reviewboard.notifications.models.
+                    EmailDigestEvent):
+                The events for the review request.
+
+        Returns:
+            tuple:
+            A 2-tuple of the plain-text and HTML sections.
+        """
+        key = (review_request.pk,) + tuple(
+            (event.event_type, event.object_id, event.actor_id,
+             event.timestamp)
+            for event in events
+        )
+
+        try:
+            return self._sections[key]
+        except KeyError:
+            pass
+
+        context = {
+            'events': events,
+            'review_request': review_request,
+            'site_url': self._site_url,
+        }
+
+        section = (
+            render_to_string(
+                template_name='notifications/email_digest_section.txt',
+                context=context),
+            mark_safe(render_to_string(
+                template_name='notifications/email_digest_section.html',
+                context=context)),
+        )
+        self._sections[key] = section
+
+        return section
@@ -21,7 +21,9 @@ from reviewboard.notifications.email.utils import (
     build_email_address,
     build_email_address_for_user,
     build_recipients,
+    divert_digest_recipients,
     recipients_to_addresses)
+from reviewboard.notifications.models import EmailDigestEvent
 from reviewboard.reviews.models import Group
 from reviewboard.reviews.signals import (review_request_published,
                                          review_published, reply_published,
@@ -92,7 +94,10 @@ def _get_server_base_url():
 def prepare_base_review_request_mail(user, review_request, subject,
                                      in_reply_to, to_field, cc_field,
                                      template_name_base, context=None,
-                                     extra_headers=None):
+                                     extra_headers=None,
+                                     digest_event_type=None,
+                                     digest_object_id=None,
+                                     record_digest_events=False):
     """Return a customized review request e-mail.
 
     This is intended to be called by one of the ``prepare_{type}_mail``
@@ -136,6 +141,23 @@ def prepare_base_review_request_mail(user, review_request, subject,
         extra_headers (dict, optional):
             Optional additional headers to include.
 
+        digest_event_type (unicode, optional):
+            The type of event to record for recipients who receive e-mail
+            digests, instead of sending them the e-mail. This is one of the
+            :py:class:`~reviewboard.notifications.models.EmailDigestEvent`
+            ``TYPE_*`` constants.
+
+        digest_object_id (int, optional):
+            The ID of the review, reply, or change description to record
+            with digest events.
+
+        record_digest_events (bool, optional):
+            Whether to record digest events for recipients who receive
+            e-mail digests, leaving them out of the e-mail. This is set when
+            sending the e-mail, and not when previewing it. If not set, or
+            if ``digest_event_type`` is not provided, all recipients will
+            receive the e-mail.
+
     Returns:
         EmailMessage:
         The prepared e-mail message.
@@ -148,6 +170,11 @@ def prepare_base_review_request_mail(user, review_request, subject,
         to_field.discard(user_email)
         cc_field.discard(user_email)
 
+    if record_digest_events and digest_event_type is not None:
+        divert_digest_recipients(to_field, cc_field, review_request, user,
+                                 event_type=digest_event_type,
+                                 object_id=digest_object_id)
+
     if not to_field and not cc_field:
         # This e-mail would have no recipients, so we won't send it.
         return None
@@ -245,6 +272,47 @@ def prepare_base_review_request_mail(user, review_request, subject,
                         headers=headers)
 
 
+def prepare_email_digest_mail(user, text_sections, html_sections):
+    """Return an e-mail digest of review request activity for a user.
+
+    Args:
+        user (django.contrib.auth.models.User):
+            The user the digest is for.
+
+        text_sections (list of unicode):
+            The rendered plain-text sections for each review request.
+
+        html_sections (list of django.utils.safestring.SafeText):
+            The rendered HTML sections for each review request.
+
+    Returns:
+        EmailMessage:
+        The generated message.
+    """
+    server_url = get_server_url()
+
+    context = {
+        'settings_url': build_server_url(reverse('user-preferences')),
+        'site_url': _get_server_base_url(),
+        'user': user,
+    }
+
+    text_body = render_to_string(
+        template_name='notifications/email_digest.txt',
+        context=dict(context, sections=text_sections))
+    html_body = render_to_string(
+        template_name='notifications/email_digest.html',
+        context=dict(context, sections=html_sections))
+
+    return EmailMessage(
+        subject='Review request activity on %s' % server_url,
+        text_body=text_body,
+        html_body=html_body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        sender=settings.DEFAULT_FROM_EMAIL,
+        to=(build_email_address_for_user(user),))
+
+
 def prepare_password_changed_mail(user):
     """Return an e-mail notifying the user that their password changed.
 
@@ -283,7 +351,8 @@ def prepare_password_changed_mail(user):
         to=(user_email,))
 
 
-def prepare_reply_published_mail(user, reply, review, review_request):
+def prepare_reply_published_mail(user, reply, review, review_request,
+                                 record_digest_events=False):
     """Return an e-mail representing the supplied reply to a review.
 
     Args:
@@ -299,6 +368,11 @@ def prepare_reply_published_mail(user, reply, review, review_request):
         review_request (reviewboard.reviews.models.review_request.ReviewRequest):
             The review request.
 
+        record_digest_events (bool, optional):
+            Whether to record digest events for recipients who receive
+            e-mail digests, leaving them out of the e-mail. This is set when
+            sending the e-mail, and not when previewing it.
+
     Returns:
         EmailMessage:
         The generated e-mail message.
@@ -335,11 +409,15 @@ def prepare_reply_published_mail(user, reply, review, review_request):
         user, review_request,
         'Re: Review Request %d: %s' % (review_request.display_id, summary),
         review.email_message_id, to_field, cc_field,
-        'notifications/reply_email', extra_context)
+        'notifications/reply_email', extra_context,
+        digest_event_type=EmailDigestEvent.TYPE_REPLY_PUBLISHED,
+        digest_object_id=reply.pk,
+        record_digest_events=record_digest_events)
 
 
 def prepare_review_published_mail(user, review, review_request, request,
-                                  to_owner_only=False):
+                                  to_owner_only=False,
+                                  record_digest_events=False):
     """Return an e-mail representing the supplied review.
 
     Args:
@@ -355,6 +433,11 @@ def prepare_review_published_mail(user, review, review_request, request,
         to_owner_only (bool):
             Whether or not the review should be sent to the submitter only.
 
+        record_digest_events (bool, optional):
+            Whether to record digest events for recipients who receive
+            e-mail digests, leaving them out of the e-mail. This is set when
+            sending the e-mail, and not when previewing it.
+
     Returns:
         EmailMessage:
         The generated e-mail message.
@@ -407,11 +490,14 @@ def prepare_review_published_mail(user, review, review_request, request,
         'Re: Review Request %d: %s' % (review_request.display_id, summary),
         review_request.email_message_id, to_field, cc_field,
         'notifications/review_email', extra_context,
-        extra_headers=extra_headers)
+        extra_headers=extra_headers,
+        digest_event_type=EmailDigestEvent.TYPE_REVIEW_PUBLISHED,
+        digest_object_id=review.pk,
+        record_digest_events=record_digest_events)
 
 
 def prepare_review_request_mail(user, review_request, changedesc=None,
-                                close_type=None):
+                                close_type=None, record_digest_events=False):
     """Return an e-mail representing the supplied review request.
 
     Args:
@@ -437,6 +523,11 @@ def prepare_review_request_mail(user, review_request, changedesc=None,
             * :py:attr:`~reviewboard.reviews.models.ReviewRequest.SUBMITTED`
             * :py:attr:`~reviewboard.reviews.models.ReviewRequest.DISCARDED`
 
+        record_digest_events (bool, optional):
+            Whether to record digest events for recipients who receive
+            e-mail digests, leaving them out of the e-mail. This is set when
+            sending the e-mail, and not when previewing it.
+
     Returns:
         EmailMessage:
         The e-mail message representing the review request.
@@ -462,8 +553,10 @@ def prepare_review_request_mail(user, review_request, changedesc=None,
         changedesc = review_request.changedescs.filter(public=True).latest()
         signal = review_request_closed
         extra_filter_kwargs['close_type'] = close_type
+        digest_event_type = EmailDigestEvent.TYPE_REVIEW_REQUEST_CLOSED
     else:
         signal = review_request_published
+        digest_event_type = EmailDigestEvent.TYPE_REVIEW_REQUEST_PUBLISHED
 
     limit_recipients_to = None
 
@@ -502,9 +595,17 @@ def prepare_review_request_mail(user, review_request, changedesc=None,
         user=user,
         **extra_filter_kwargs)
 
+    if changedesc:
+        digest_object_id = changedesc.pk
+    else:
+        digest_object_id = None
+
     return prepare_base_review_request_mail(
         user, review_request, subject, reply_message_id, to_field,
-        cc_field, 'notifications/review_request_email', extra_context)
+        cc_field, 'notifications/review_request_email', extra_context,
+        digest_event_type=digest_event_type,
+        digest_object_id=digest_object_id,
+        record_digest_events=record_digest_events)
 
 
 def prepare_user_registered_mail(user):
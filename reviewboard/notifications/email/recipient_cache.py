@@ -0,0 +1,108 @@
+"""Cached e-mail addresses for review group members and digest recipients.
+
+E-mails for review requests are sent to the members of each target review
+group, which means looking up each group's active members (and their
+profiles, to check whether they want e-mail) on every notification.
+Similarly, the addresses of users who receive e-mail digests are needed to
+leave them out of each e-mail.
+
+The resulting addresses are cached per group, and for all digest
+recipients. As with :py:mod:`reviewboard.reviews.access_cache`, all cached
+addresses are versioned by a single generation, which is bumped whenever a
+group's membership changes, or a group, user, profile, or :term:`Local Site`
+membership that affects the addresses is saved. These changes are rare
+compared to notifications, so invalidating everything at once is cheap.
+"""
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Q
+from djblets.cache.backend import make_cache_key
+from djblets.mail.utils import build_email_address_for_user
+
+from reviewboard.cache_generation import CacheGeneration
+
+
+#: The number of seconds to cache addresses.
+#:
+#: Entries are invalidated through the generation, so this only controls how
+#: long unused entries stay around.
+ADDRESSES_EXPIRATION_SECS = 60 * 60 * 24
+
+
+#: The generation of all cached addresses.
+#:
+#: This must be bumped whenever anything affecting which users receive a
+#: review group's e-mail, or their addresses, changes.
+recipients_generation = CacheGeneration('email-group-members-generation')
+
+
+def get_group_member_addresses(group):
+    """Return the e-mail addresses of a review group's members.
+
+    Only active members who want to receive e-mail are included. For groups
+    on a :term:`Local Site`, members must also be members or administrators
+    of the Local Site.
+
+    Args:
+        group (reviewboard.reviews.models.group.Group):
+            The review group.
+
+    Returns:
+        list of tuple:
+        A list of 2-tuples of each member's user ID and formatted e-mail
+        address.
+    """
+    key = make_cache_key('email-group-members:%s:%s' % (
+        recipients_generation.get(),
+        group.pk,
+    ))
+    members = cache.get(key)
+
+    if members is None:
+        users_q = Q(is_active=True)
+        local_site_id = group.local_site_id
+
+        if local_site_id:
+            users_q &= (Q(local_site=local_site_id) |
+                        Q(local_site_admins=local_site_id))
+
+        members = [
+            (user.pk, build_email_address_for_user(user))
+            for user in (group.users.filter(users_q)
+                         .select_related('profile')
+                         .distinct())
+            if user.should_send_email()
+        ]
+        cache.set(key, members, ADDRESSES_EXPIRATION_SECS)
+
+    return members
+
+
+def get_digest_user_addresses():
+    """Return the e-mail addresses of users who receive e-mail digests.
+
+    Only active users who want to receive e-mail are included.
+
+    Returns:
+        dict:
+        A dictionary mapping each formatted e-mail address to the ID of the
+        user.
+    """
+    key = make_cache_key('email-digest-users:%s'
+                         % recipients_generation.get())
+    addresses = cache.get(key)
+
+    if addresses is None:
+        addresses = {
+            build_email_address_for_user(user): user.pk
+            for user in (User.objects
+                         .filter(is_active=True,
+                                 profile__should_send_email=True,
+                                 profile__should_send_email_digest=True))
+        }
+        cache.set(key, addresses, ADDRESSES_EXPIRATION_SECS)
+
+    return addresses
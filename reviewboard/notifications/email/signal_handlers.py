@@ -12,6 +12,8 @@ from reviewboard.notifications.email.message import (
     prepare_review_request_mail,
     prepare_user_registered_mail,
     prepare_webapi_token_mail)
+from reviewboard.notifications.email.recipient_cache import \
+    recipients_generation
 from reviewboard.notifications.email.utils import send_email
 from reviewboard.reviews.models import ReviewRequest
 
@@ -35,6 +37,37 @@ def _update_email_info(obj, message_id):
     obj.save(update_fields=('email_message_id', 'time_emailed'))
 
 
+def invalidate_group_recipients(sender, action=None, update_fields=None,
+                                **kwargs):
+    """Invalidate cached review group e-mail recipients.
+
+    This handles changes to review group memberships, and to the groups,
+    users, profiles, and :term:`Local Site` memberships that determine who
+    receives a group's e-mail.
+
+    Args:
+        sender (type):
+            The class that sent the signal.
+
+        action (unicode, optional):
+            The action that was performed, for
+            :py:data:`~django.db.models.signals.m2m_changed` signals.
+
+        update_fields (frozenset of unicode, optional):
+            The fields that were saved, for
+            :py:data:`~django.db.models.signals.post_save` signals.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    if update_fields is not None and update_fields == {'last_login'}:
+        # This is saved on every login, and doesn't affect recipients.
+        return
+
+    if action is None or action in ('post_add', 'post_remove', 'post_clear'):
+        recipients_generation.bump()
+
+
 def send_password_changed_mail(user):
     """Send an e-mail when a user's password changes.
 
@@ -86,10 +119,12 @@ def send_reply_published_mail(user, reply, trivial, **kwargs):
     review = reply.base_reply_to
 
     message, sent = send_email(prepare_reply_published_mail,
+                               email_info_obj=reply,
                                user=user,
                                reply=reply,
                                review=review,
-                               review_request=review_request)
+                               review_request=review_request,
+                               record_digest_events=True)
 
     if sent:
         _update_email_info(reply, message.message_id)
@@ -131,11 +166,13 @@ def send_review_published_mail(user, review, request, to_owner_only,
         return
 
     message, sent = send_email(prepare_review_published_mail,
+                               email_info_obj=review,
                                user=user,
                                review=review,
                                review_request=review_request,
                                request=request,
-                               to_owner_only=to_owner_only)
+                               to_owner_only=to_owner_only,
+                               record_digest_events=True)
 
     if sent:
         _update_email_info(review, message.message_id)
@@ -170,9 +207,11 @@ def send_review_request_closed_mail(user, review_request, close_type,
         return
 
     message, sent = send_email(prepare_review_request_mail,
+                               email_info_obj=review_request,
                                user=user,
                                review_request=review_request,
-                               close_type=close_type)
+                               close_type=close_type,
+                               record_digest_events=True)
 
     if sent:
         _update_email_info(review_request, message.message_id)
@@ -216,9 +255,11 @@ def send_review_request_published_mail(user, review_request, trivial,
         return
 
     message, sent = send_email(prepare_review_request_mail,
+                               email_info_obj=review_request,
                                user=user,
                                review_request=review_request,
-                               changedesc=changedesc)
+                               changedesc=changedesc,
+                               record_digest_events=True)
 
     if sent:
         _update_email_info(review_request, message.message_id)
@@ -0,0 +1,250 @@
+"""Sending of queued e-mail messages.
+
+Queued messages (see :py:class:`~reviewboard.notifications.models.
+QueuedEmail`) are sent by a :py:class:`QueuedEmailSender`, which is run by
+the ``process-email-queue`` management command.
+
+Messages are sent through the configured e-mail backend, reusing one
+connection for many messages. Temporary failures (such as a mail server
+being unreachable, or replying with a ``4xx`` code) are retried later.
+"""
+
+from __future__ import unicode_literals
+
+import email
+import logging
+import smtplib
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.message import MIMEMixin
+from django.utils import six
+from django.utils.encoding import force_text
+
+from reviewboard.notifications.models import QueuedEmail
+
+
+logger = logging.getLogger(__name__)
+
+
+def _is_connection_error(error):
+    """Return whether an error was caused by the connection failing.
+
+    Args:
+        error (Exception):
+            The error raised while sending a message.
+
+    Returns:
+        bool:
+        Whether the connection to the mail server failed.
+    """
+    # On Python 3, all SMTP errors are IOErrors, so errors for a specific
+    # message have to be ruled out.
+    return (isinstance(error, (smtplib.SMTPServerDisconnected, IOError)) and
+            not isinstance(error, (smtplib.SMTPResponseException,
+                                   smtplib.SMTPRecipientsRefused)))
+
+
+def is_temporary_error(error):
+    """Return whether an error sending a message is temporary.
+
+    Args:
+        error (Exception):
+            The error raised while sending the message.
+
+    Returns:
+        bool:
+        Whether sending the message can be retried.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(
+            400 <= code < 500
+            for code, msg in six.itervalues(error.recipients)
+        )
+    elif isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    else:
+        return _is_connection_error(error)
+
+
+class SpooledMIMEMessage(MIMEMixin, email.message.Message):
+    """A MIME message loaded from the spool.
+
+    This can be serialized the same way as the messages built by Django's
+    :py:class:`~django.core.mail.EmailMessage`, which is what e-mail
+    backends expect.
+    """
+
+
+class SpooledEmailMessage(EmailMessage):
+    """An e-mail message loaded from the spool.
+
+    The message is sent exactly as it was built when it was queued.
+    """
+
+    def __init__(self, queued_email):
+        """Initialize the message.
+
+        Args:
+            queued_email (reviewboard.notifications.models.QueuedEmail):
+                The queued message.
+        """
+        super(SpooledEmailMessage, self).__init__(
+            from_email=queued_email.from_email,
+            to=queued_email.recipients)
+
+        self.message_id = queued_email.message_id
+        self._data = bytes(queued_email.message)
+
+    def message(self):
+        """Return the MIME message to send.
+
+        Returns:
+            SpooledMIMEMessage:
+            The MIME message.
+        """
+        if six.PY3:
+            return email.message_from_bytes(self._data,
+                                            _class=SpooledMIMEMessage)
+        else:
+            return email.message_from_string(self._data,
+                                             _class=SpooledMIMEMessage)
+
+
+class QueuedEmailSender(object):
+    """Sends queued e-mail messages.
+
+    A sender keeps its connection open between calls to
+    :py:meth:`process_messages`, so a single sender should be reused for as
+    long as messages are being sent. Call :py:meth:`close` when done.
+    """
+
+    #: The default number of messages to send over a connection.
+    DEFAULT_MESSAGES_PER_CONNECTION = 100
+
+    def __init__(self, rate=0,
+                 messages_per_connection=DEFAULT_MESSAGES_PER_CONNECTION):
+        """Initialize the sender.
+
+        Args:
+            rate (int, optional):
+                The maximum number of messages to send per minute, or 0 for
+                no limit.
+
+            messages_per_connection (int, optional):
+                The number of messages to send before reconnecting. Many
+                mail servers limit the number of messages accepted on a
+                connection.
+        """
+        self.rate = rate
+        self.messages_per_connection = messages_per_connection
+
+        self._connection = None
+        self._connection_count = 0
+        self._last_send_time = None
+
+    def process_messages(self, batch_size):
+        """Send a batch of due messages.
+
+        If sending fails in a way that affects all messages (such as the
+        mail server being unreachable), the rest of the batch is left for a
+        later call.
+
+        Args:
+            batch_size (int):
+                The maximum number of messages to send.
+
+        Returns:
+            int:
+            The number of messages processed.
+        """
+        num_processed = 0
+
+        for queued_email in QueuedEmail.objects.get_due(batch_size):
+            error = self._send(queued_email)
+            num_processed += 1
+
+            if error is None:
+                QueuedEmail.objects.record_attempt(queued_email)
+            else:
+                retry = is_temporary_error(error)
+                error_text = force_text(error) or type(error).__name__
+
+                QueuedEmail.objects.record_attempt(queued_email,
+                                                   error=error_text,
+                                                   retry=retry)
+
+                logger.warning('Could not send queued e-mail %s (attempt '
+                               '%d): %s',
+                               queued_email.message_id,
+                               queued_email.attempts,
+                               error_text)
+
+                if _is_connection_error(error):
+                    # The connection itself failed, so the other messages
+                    # would most likely fail as well.
+                    break
+
+        return num_processed
+
+    def close(self):
+        """Close the connection to the mail server."""
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception as e:
+                logger.debug('Error closing e-mail connection: %s', e)
+
+            self._connection = None
+
+    def _send(self, queued_email):
+        """Send a queued message.
+
+        Args:
+            queued_email (reviewboard.notifications.models.QueuedEmail):
+                The message to send.
+
+        Returns:
+            Exception:
+            The error raised while sending the message, or ``None`` if it
+            was sent.
+        """
+        self._throttle()
+
+        if (self._connection is not None and
+            self._connection_count >= self.messages_per_connection):
+            self.close()
+
+        try:
+            if self._connection is None:
+                self._connection = get_connection(fail_silently=False)
+                self._connection.open()
+                self._connection_count = 0
+
+            self._connection_count += 1
+
+            if not self._connection.send_messages(
+                    [SpooledEmailMessage(queued_email)]):
+                raise ValueError('The message has no recipients')
+        except Exception as e:
+            if _is_connection_error(e):
+                self.close()
+
+            return e
+
+        return None
+
+    def _throttle(self):
+        """Wait until the next message can be sent.
+
+        This keeps sending within the configured rate.
+        """
+        if self.rate > 0:
+            if self._last_send_time is not None:
+                delay = (self._last_send_time + 60.0 / self.rate -
+                         time.time())
+
+                if delay > 0:
+                    time.sleep(delay)
+
+            self._last_send_time = time.time()
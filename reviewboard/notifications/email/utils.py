@@ -8,9 +8,14 @@ from django.contrib.auth.models import User
 from django.db.models import Q
 from djblets.mail.utils import (build_email_address,
                                 build_email_address_for_user)
+from djblets.siteconfig.models import SiteConfiguration
 
 from reviewboard.accounts.models import ReviewRequestVisit
 from reviewboard.changedescs.models import ChangeDescription
+from reviewboard.notifications.email.recipient_cache import (
+    get_digest_user_addresses,
+    get_group_member_addresses)
+from reviewboard.notifications.models import EmailDigestEvent, QueuedEmail
 from reviewboard.reviews.models import Group
 
 
@@ -58,17 +63,7 @@ def build_recipients(user, review_request, extra_recipients=None,
     local_site = review_request.local_site_id
     submitter = review_request.submitter
 
-    target_people = review_request.target_people.filter(is_active=True).extra(
-        select={
-            'visibility': """
-                SELECT accounts_reviewrequestvisit.visibility
-                  FROM accounts_reviewrequestvisit
-                 WHERE accounts_reviewrequestvisit.review_request_id =
-                       reviews_reviewrequest_target_people.reviewrequest_id
-                   AND accounts_reviewrequestvisit.user_id =
-                       reviews_reviewrequest_target_people.user_id
-            """
-        })
+    target_people = review_request.target_people.filter(is_active=True)
 
     starred_users = User.objects.filter(
         is_active=True,
@@ -158,11 +153,18 @@ def build_recipients(user, review_request, extra_recipients=None,
     else:
         _filter_recipients(extra_recipients)
 
+        target_people = list(target_people.select_related('profile'))
+
+        if target_people:
+            muted_user_ids = get_muted_user_ids(review_request.pk)
+        else:
+            muted_user_ids = set()
+
         to_field.update(
             recipient
-            for recipient in target_people.select_related('profile')
+            for recipient in target_people
             if (recipient.should_send_email() and
-                recipient.visibility != ReviewRequestVisit.MUTED)
+                recipient.pk not in muted_user_ids)
         )
 
         recipients.update(to_field)
@@ -181,15 +183,47 @@ def build_recipients(user, review_request, extra_recipients=None,
     return to_field, cc_field
 
 
-def get_email_addresses_for_group(group, review_request_id=None):
+def get_muted_user_ids(review_request_id):
+    """Return the IDs of users who have muted a review request.
+
+    This is looked up once for all recipients of an e-mail, rather than
+    separately for each user or group.
+
+    Args:
+        review_request_id (int):
+            The ID of the review request.
+
+    Returns:
+        set of int:
+        The IDs of the users who have muted the review request.
+    """
+    return set(
+        ReviewRequestVisit.objects
+        .filter(review_request=review_request_id,
+                visibility=ReviewRequestVisit.MUTED)
+        .values_list('user_id', flat=True)
+    )
+
+
+def get_email_addresses_for_group(group, review_request_id=None,
+                                  muted_user_ids=None):
     """Build a list of e-mail addresses for the group.
 
+    The addresses of the group's members are cached until the group's
+    membership or any of the members change.
+
     Args:
         group (reviewboard.reviews.models.Group):
             The review group to build the e-mail addresses for.
 
         review_request_id (int, optional):
+            The ID of the review request the e-mail is for. Members who have
+            muted the review request will be excluded.
 
+        muted_user_ids (set of int, optional):
+            The IDs of the users who have muted the review request, as
+            returned by :py:func:`get_muted_user_ids`. This will be looked up
+            if not provided.
 
     Returns:
         list of unicode:
@@ -211,35 +245,22 @@ def get_email_addresses_for_group(group, review_request_id=None):
             addresses = group.mailing_list.split(',')
 
     if not (group.mailing_list and group.email_list_only):
-        users_q = Q(is_active=True)
-
-        local_site = group.local_site
-
-        if local_site:
-            users_q = users_q & (Q(local_site=local_site) |
-                                 Q(local_site_admins=local_site))
-
-        users = group.users.filter(users_q).select_related('profile')
-
-        if review_request_id:
-            users = users.extra(select={
-                'visibility': """
-                    SELECT accounts_reviewrequestvisit.visibility
-                      FROM accounts_reviewrequestvisit
-                     WHERE accounts_reviewrequestvisit.review_request_id =
-                           %s
-                       AND accounts_reviewrequestvisit.user_id =
-                           reviews_group_users.user_id
-                """ % review_request_id
-            })
-
-        addresses.extend([
-            build_email_address_for_user(u)
-            for u in users
-            if (u.should_send_email() and
-                (not review_request_id or
-                 u.visibility != ReviewRequestVisit.MUTED))
-        ])
+        members = get_group_member_addresses(group)
+
+        if review_request_id and members:
+            if muted_user_ids is None:
+                muted_user_ids = get_muted_user_ids(review_request_id)
+
+            addresses.extend(
+                address
+                for user_id, address in members
+                if user_id not in muted_user_ids
+            )
+        else:
+            addresses.extend(
+                address
+                for user_id, address in members
+            )
 
     return addresses
 
@@ -256,6 +277,7 @@ def recipients_to_addresses(recipients, review_request_id=None):
         set: The e-mail addresses for all recipients.
     """
     addresses = set()
+    muted_user_ids = None
 
     for recipient in recipients:
         assert isinstance(recipient, User) or isinstance(recipient, Group)
@@ -263,19 +285,97 @@ def recipients_to_addresses(recipients, review_request_id=None):
         if isinstance(recipient, User):
             addresses.add(build_email_address_for_user(recipient))
         else:
-            addresses.update(get_email_addresses_for_group(recipient,
-                                                           review_request_id))
+            if review_request_id and muted_user_ids is None:
+                muted_user_ids = get_muted_user_ids(review_request_id)
+
+            addresses.update(get_email_addresses_for_group(
+                recipient,
+                review_request_id,
+                muted_user_ids=muted_user_ids))
 
     return addresses
 
 
-def send_email(email_builder, **kwargs):
+def divert_digest_recipients(to_field, cc_field, review_request, user,
+                             event_type, object_id=None):
+    """Record digest events for recipients who receive e-mail digests.
+
+    If e-mail digests are enabled, the addresses of users who have chosen to
+    receive them are removed from the recipients, and an
+    :py:class:`~reviewboard.notifications.models.EmailDigestEvent` is
+    recorded for each of them instead.
+
+    Args:
+        to_field (set of unicode):
+            The addresses the e-mail will be sent to. This will be modified.
+
+        cc_field (set of unicode):
+            The addresses to be CC'ed on the e-mail. This will be modified.
+
+        review_request (reviewboard.reviews.models.review_request.
+                        ReviewRequest):
+            The review request the e-mail is regarding.
+
+        user (django.contrib.auth.models.User):
+            The user who triggered the e-mail.
+
+        event_type (unicode):
+            The type of event. This is one of the
+            :py:class:`~reviewboard.notifications.models.EmailDigestEvent`
+            ``TYPE_*`` constants.
+
+        object_id (int, optional):
+            The ID of the review, reply, or change description the e-mail is
+            about.
+
+    Returns:
+        set of int:
+        The IDs of the users whose addresses were removed.
+    """
+    siteconfig = SiteConfiguration.objects.get_current()
+
+    if not siteconfig.get('mail_enable_digests'):
+        return set()
+
+    digest_addresses = get_digest_user_addresses()
+    user_ids = set()
+
+    if digest_addresses:
+        for field in (to_field, cc_field):
+            for address in list(field):
+                user_id = digest_addresses.get(address)
+
+                if user_id is not None:
+                    field.discard(address)
+                    user_ids.add(user_id)
+
+    if user_ids:
+        EmailDigestEvent.objects.record_events(user_ids=user_ids,
+                                               review_request=review_request,
+                                               actor=user,
+                                               event_type=event_type,
+                                               object_id=object_id)
+
+    return user_ids
+
+
+def send_email(email_builder, email_info_obj=None, **kwargs):
     """Attempt to send an e-mail, logging any exceptions that occur.
 
+    If queued e-mail delivery is enabled, the message will be queued, to be
+    sent by the ``process-email-queue`` management command, instead of
+    being sent immediately.
+
     Args:
         email_builder (callable):
             A function that generates an :py:class:`EmailMessage`.
 
+        email_info_obj (django.db.models.Model, optional):
+            The object whose ``email_message_id`` and ``time_emailed`` fields
+            should be updated when a message is queued. Callers are
+            responsible for updating these for messages that are sent
+            immediately.
+
         **kwargs (dict):
             Keyword arguments to provide to ``email_builder``.
 
@@ -284,14 +384,22 @@ def send_email(email_builder, **kwargs):
         A tuple of:
 
         * The message that was generated (:py:class`EmailMessage`).
-        * Whether or not the message was sent successfully (:py:class:`bool`).
+        * Whether or not the message was sent immediately and successfully
+          (:py:class:`bool`).
     """
     message = email_builder(**kwargs)
 
     if message is None:
         return None, False
 
+    siteconfig = SiteConfiguration.objects.get_current()
+
     try:
+        if siteconfig.get('mail_queue_messages'):
+            QueuedEmail.objects.queue_message(message, email_info_obj)
+
+            return message, False
+
         message.send()
     except Exception:
         logging.exception(
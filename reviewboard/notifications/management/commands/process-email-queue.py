@@ -0,0 +1,129 @@
+"""Management command to send queued e-mail messages."""
+
+from __future__ import unicode_literals
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import CommandError
+from django.utils.translation import ugettext as _
+from djblets.siteconfig.models import SiteConfiguration
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.notifications.email.spool import QueuedEmailSender
+from reviewboard.notifications.models import QueuedEmail
+
+
+class Command(BaseCommand):
+    """Management command to send queued e-mail messages."""
+
+    help = _('Sends e-mails queued when queued e-mail delivery is enabled, '
+             'retrying temporary failures.')
+
+    #: The default maximum number of messages to process at a time.
+    DEFAULT_BATCH_SIZE = 100
+
+    #: The default number of days to keep messages that couldn't be sent.
+    DEFAULT_KEEP_DAYS = 7
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            default=False,
+            dest='loop',
+            help=_('Keep running, checking for new messages every second.'))
+
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=self.DEFAULT_BATCH_SIZE,
+            dest='batch_size',
+            help=_('The maximum number of messages to process at a time. '
+                   'Defaults to %(default)s.'))
+
+        parser.add_argument(
+            '--messages-per-connection',
+            type=int,
+            default=QueuedEmailSender.DEFAULT_MESSAGES_PER_CONNECTION,
+            dest='messages_per_connection',
+            help=_('The number of messages to send before reconnecting to '
+                   'the mail server. Defaults to %(default)s.'))
+
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=self.DEFAULT_KEEP_DAYS,
+            dest='keep_days',
+            metavar='DAYS',
+            help=_('The number of days to keep messages that could not be '
+                   'sent. Defaults to %(default)s.'))
+
+    def handle(self, *args, **options):
+        """Handle the command.
+
+        The sending rate is limited by the ``mail_queue_rate`` site
+        configuration setting.
+
+        Args:
+            *args (tuple, unused):
+                Positional arguments passed to the command.
+
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                An invalid option was provided.
+        """
+        batch_size = options['batch_size']
+        messages_per_connection = options['messages_per_connection']
+        keep_days = options['keep_days']
+
+        if batch_size < 1:
+            raise CommandError(_('--batch-size must be at least 1.'))
+
+        if messages_per_connection < 1:
+            raise CommandError(
+                _('--messages-per-connection must be at least 1.'))
+
+        if keep_days < 0:
+            raise CommandError(_('--keep-days cannot be negative.'))
+
+        siteconfig = SiteConfiguration.objects.get_current()
+        sender = QueuedEmailSender(
+            rate=siteconfig.get('mail_queue_rate') or 0,
+            messages_per_connection=messages_per_connection)
+
+        try:
+            while True:
+                num_processed = 0
+
+                while True:
+                    num_messages = sender.process_messages(batch_size)
+                    num_processed += num_messages
+
+                    if num_messages < batch_size:
+                        break
+
+                if num_processed:
+                    self.stdout.write(_('Processed %d queued e-mails.')
+                                      % num_processed)
+                else:
+                    # Don't hold a connection open while idle.
+                    sender.close()
+
+                QueuedEmail.objects.prune(timedelta(days=keep_days))
+
+                if not options['loop']:
+                    break
+
+                time.sleep(1)
+        finally:
+            sender.close()
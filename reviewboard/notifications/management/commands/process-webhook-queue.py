@@ -0,0 +1,133 @@
+"""Management command to send queued WebHook deliveries."""
+
+from __future__ import unicode_literals
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import CommandError
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.notifications.models import WebHookDelivery
+from reviewboard.notifications.webhook_delivery import WebHookDeliveryWorker
+
+
+class Command(BaseCommand):
+    """Management command to send queued WebHook deliveries."""
+
+    help = _('Sends WebHook deliveries queued when queued WebHook delivery '
+             'is enabled, retrying failed deliveries.')
+
+    #: The default maximum number of deliveries to process at a time.
+    DEFAULT_BATCH_SIZE = 100
+
+    #: The default number of days to keep finished deliveries.
+    DEFAULT_KEEP_DAYS = 7
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            default=False,
+            dest='loop',
+            help=_('Keep running, checking for new deliveries every '
+                   'second.'))
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=WebHookDeliveryWorker.DEFAULT_MAX_WORKERS,
+            dest='workers',
+            help=_('The number of deliveries to send concurrently. '
+                   'Defaults to %(default)s.'))
+
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=self.DEFAULT_BATCH_SIZE,
+            dest='batch_size',
+            help=_('The maximum number of deliveries to process at a time. '
+                   'Defaults to %(default)s.'))
+
+        parser.add_argument(
+            '--timeout',
+            type=int,
+            default=WebHookDeliveryWorker.DEFAULT_TIMEOUT_SECS,
+            dest='timeout',
+            metavar='SECONDS',
+            help=_('The number of seconds to wait for a response. Defaults '
+                   'to %(default)s.'))
+
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=self.DEFAULT_KEEP_DAYS,
+            dest='keep_days',
+            metavar='DAYS',
+            help=_('The number of days to keep finished deliveries in the '
+                   'delivery log. Defaults to %(default)s.'))
+
+    def handle(self, *args, **options):
+        """Handle the command.
+
+        Args:
+            *args (tuple, unused):
+                Positional arguments passed to the command.
+
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                An invalid option was provided.
+        """
+        workers = options['workers']
+        batch_size = options['batch_size']
+        timeout = options['timeout']
+        keep_days = options['keep_days']
+
+        if workers < 1:
+            raise CommandError(_('--workers must be at least 1.'))
+
+        if batch_size < 1:
+            raise CommandError(_('--batch-size must be at least 1.'))
+
+        if timeout < 1:
+            raise CommandError(_('--timeout must be at least 1.'))
+
+        if keep_days < 0:
+            raise CommandError(_('--keep-days cannot be negative.'))
+
+        worker = WebHookDeliveryWorker(max_workers=workers, timeout=timeout)
+
+        try:
+            while True:
+                num_processed = 0
+
+                while True:
+                    num_deliveries = worker.process_deliveries(batch_size)
+                    num_processed += num_deliveries
+
+                    if num_deliveries < batch_size:
+                        break
+
+                if num_processed:
+                    self.stdout.write(
+                        _('Processed %d queued WebHook deliveries.')
+                        % num_processed)
+
+                WebHookDelivery.objects.prune(timedelta(days=keep_days))
+
+                if not options['loop']:
+                    break
+
+                time.sleep(1)
+        finally:
+            worker.close()
@@ -0,0 +1,76 @@
+"""Management command to send e-mail digests."""
+
+from __future__ import unicode_literals
+
+import time
+
+from django.core.management.base import CommandError
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.notifications.email.digest import EmailDigestSender
+
+
+class Command(BaseCommand):
+    """Management command to send e-mail digests."""
+
+    help = _('Sends e-mail digests of review request activity to users who '
+             'have chosen to receive them.')
+
+    #: The default number of minutes between digests when looping.
+    DEFAULT_INTERVAL_MINS = 60
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            default=False,
+            dest='loop',
+            help=_('Keep running, sending digests every --interval '
+                   'minutes.'))
+
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=self.DEFAULT_INTERVAL_MINS,
+            dest='interval',
+            metavar='MINUTES',
+            help=_('The number of minutes between digests when using '
+                   '--loop. Defaults to %(default)s.'))
+
+    def handle(self, *args, **options):
+        """Handle the command.
+
+        Args:
+            *args (tuple, unused):
+                Positional arguments passed to the command.
+
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                An invalid option was provided.
+        """
+        interval = options['interval']
+
+        if interval < 1:
+            raise CommandError(_('--interval must be at least 1.'))
+
+        while True:
+            start_time = time.time()
+            num_sent = EmailDigestSender().send_digests()
+
+            if num_sent:
+                self.stdout.write(_('Sent %d e-mail digests.') % num_sent)
+
+            if not options['loop']:
+                break
+
+            time.sleep(max(0, start_time + interval * 60 - time.time()))
@@ -1,6 +1,425 @@
 from __future__ import unicode_literals
 
-from django.db.models import Manager, Q
+from datetime import timedelta
+
+from django.db.models import Exists, Manager, OuterRef, Q
+from django.utils import six, timezone
+
+from reviewboard.notifications.webhook_target_cache import \
+    get_cached_webhook_targets
+
+
+def _get_retry_delay(attempts, retry_delay, max_retry_delay):
+    """Return the delay before retrying a failed attempt.
+
+    The delay doubles for each attempt made, up to a maximum.
+
+    Args:
+        attempts (int):
+            The number of attempts made so far.
+
+        retry_delay (int):
+            The number of seconds to wait after the first attempt.
+
+        max_retry_delay (int):
+            The maximum number of seconds to wait.
+
+    Returns:
+        datetime.timedelta:
+        The delay before the next attempt.
+    """
+    return timedelta(seconds=min(retry_delay * 2 ** (attempts - 1),
+                                 max_retry_delay))
+
+
+class EmailDigestEventManager(Manager):
+    """A manager for EmailDigestEvent models."""
+
+    def record_events(self, user_ids, review_request, actor, event_type,
+                      object_id=None):
+        """Record an event for the digests of several users.
+
+        Args:
+            user_ids (set of int):
+                The IDs of the users who will receive the event.
+
+            review_request (reviewboard.reviews.models.review_request.
+                            ReviewRequest):
+                The review request the event is for.
+
+            actor (django.contrib.auth.models.User):
+                The user who triggered the event.
+
+            event_type (unicode):
+                The type of event. This is one of the
+                :py:class:`~reviewboard.notifications.models.EmailDigestEvent`
+                ``TYPE_*`` constants.
+
+            object_id (int, optional):
+                The ID of the review, reply, or change description for the
+                event.
+
+        Returns:
+            list of reviewboard.notifications.models.EmailDigestEvent:
+            The recorded events.
+        """
+        timestamp = timezone.now()
+
+        return self.bulk_create(
+            self.model(user_id=user_id,
+                       review_request=review_request,
+                       actor=actor,
+                       event_type=event_type,
+                       object_id=object_id,
+                       timestamp=timestamp)
+            for user_id in sorted(user_ids)
+        )
+
+
+class QueuedEmailManager(Manager):
+    """A manager for QueuedEmail models.
+
+    This provides functions for queueing messages and recording the results
+    of attempts to send them.
+    """
+
+    #: The maximum number of attempts to make to send a message.
+    MAX_ATTEMPTS = 8
+
+    #: The number of seconds to wait before first retrying a message.
+    #:
+    #: This doubles for each later retry, up to :py:attr:`MAX_RETRY_DELAY`.
+    RETRY_DELAY = 60
+
+    #: The maximum number of seconds to wait before retrying a message.
+    MAX_RETRY_DELAY = 60 * 60
+
+    def queue_message(self, message, email_info_obj=None):
+        """Queue an e-mail message to be sent.
+
+        The message is built immediately, so its ``message_id`` attribute
+        will be set once queued.
+
+        Args:
+            message (django.core.mail.EmailMessage):
+                The message to queue.
+
+            email_info_obj (django.db.models.Model, optional):
+                The object whose ``email_message_id`` and ``time_emailed``
+                fields should be updated. These are updated as soon as the
+                message is queued, so that later e-mails about the object
+                are threaded as replies to it.
+
+        Returns:
+            reviewboard.notifications.models.QueuedEmail:
+            The queued message.
+        """
+        from reviewboard.notifications.email.signal_handlers import \
+            _update_email_info
+
+        mime_message = message.message()
+
+        if six.PY3:
+            data = mime_message.as_bytes()
+        else:
+            data = mime_message.as_string()
+
+        queued_email = self.create(from_email=message.from_email,
+                                   recipients=message.recipients(),
+                                   message=data,
+                                   message_id=mime_message['Message-ID'])
+
+        if email_info_obj is not None:
+            _update_email_info(email_info_obj, queued_email.message_id)
+
+        return queued_email
+
+    def get_due(self, batch_size):
+        """Return pending messages that are due to be sent.
+
+        Messages are returned in the order they were queued.
+
+        Args:
+            batch_size (int):
+                The maximum number of messages to return.
+
+        Returns:
+            list of reviewboard.notifications.models.QueuedEmail:
+            The messages to send.
+        """
+        return list(
+            self.filter(status=self.model.STATUS_PENDING,
+                        next_attempt__lte=timezone.now())
+            .order_by('pk')
+            [:batch_size])
+
+    def record_attempt(self, queued_email, error=None, retry=False):
+        """Record the result of an attempt to send a message.
+
+        Sent messages are removed from the queue. Failed messages that can
+        be retried are rescheduled with exponential backoff, until
+        :py:attr:`MAX_ATTEMPTS` have been made.
+
+        Args:
+            queued_email (reviewboard.notifications.models.QueuedEmail):
+                The message that was sent.
+
+            error (unicode, optional):
+                The error from the attempt, if it failed.
+
+            retry (bool, optional):
+                Whether a failed attempt can be retried.
+        """
+        if error is None:
+            queued_email.delete()
+            return
+
+        now = timezone.now()
+
+        queued_email.attempts += 1
+        queued_email.last_attempt = now
+        queued_email.error = error
+
+        if retry and queued_email.attempts < self.MAX_ATTEMPTS:
+            queued_email.next_attempt = now + _get_retry_delay(
+                queued_email.attempts, self.RETRY_DELAY,
+                self.MAX_RETRY_DELAY)
+        else:
+            queued_email.status = self.model.STATUS_FAILED
+
+        queued_email.save(update_fields=('attempts', 'last_attempt', 'error',
+                                         'status', 'next_attempt'))
+
+    def prune(self, max_age):
+        """Delete old messages that couldn't be sent.
+
+        Args:
+            max_age (datetime.timedelta):
+                The age of the oldest failed messages to keep.
+
+        Returns:
+            int:
+            The number of messages deleted.
+        """
+        return self.filter(
+            status=self.model.STATUS_FAILED,
+            timestamp__lt=timezone.now() - max_age).delete()[0]
+
+
+class WebHookDeliveryManager(Manager):
+    """A manager for WebHookDelivery models.
+
+    This provides functions for queueing deliveries, recording the results of
+    delivery attempts, and summarizing recent deliveries to a target.
+    """
+
+    #: The maximum number of attempts to make for a delivery.
+    MAX_ATTEMPTS = 8
+
+    #: The number of seconds to wait before the first retry of a delivery.
+    #:
+    #: This doubles for each later retry, up to :py:attr:`MAX_RETRY_DELAY`.
+    RETRY_DELAY = 30
+
+    #: The maximum number of seconds to wait before retrying a delivery.
+    MAX_RETRY_DELAY = 60 * 60
+
+    #: The number of recent deliveries summarized by :py:meth:`get_health`.
+    HEALTH_SAMPLE_SIZE = 20
+
+    def queue_delivery(self, target, event, url, body, headers):
+        """Queue a prepared delivery to a WebHook target.
+
+        Args:
+            target (reviewboard.notifications.models.WebHookTarget):
+                The target to deliver to.
+
+            event (unicode):
+                The name of the event being delivered.
+
+            url (unicode):
+                The URL to send to, without any credentials.
+
+            body (bytes):
+                The encoded payload.
+
+            headers (dict):
+                The HTTP headers to send, including any signature and
+                ``Authorization`` headers.
+
+        Returns:
+            reviewboard.notifications.models.WebHookDelivery:
+            The queued delivery.
+        """
+        return self.create(target=target,
+                           event=event,
+                           url=url,
+                           body=body,
+                           headers=headers)
+
+    def get_due(self, batch_size):
+        """Return pending deliveries that are due to be attempted.
+
+        Deliveries are returned in the order they were queued. Deliveries
+        to a target are held back while an earlier delivery to that target
+        is waiting to be retried, so that each target receives its
+        deliveries in order.
+
+        Args:
+            batch_size (int):
+                The maximum number of deliveries to return.
+
+        Returns:
+            list of reviewboard.notifications.models.WebHookDelivery:
+            The deliveries to attempt.
+        """
+        now = timezone.now()
+        pending = self.filter(status=self.model.STATUS_PENDING)
+        earlier_waiting = pending.filter(target=OuterRef('target'),
+                                         pk__lt=OuterRef('pk'),
+                                         next_attempt__gt=now)
+
+        return list(
+            pending
+            .filter(next_attempt__lte=now)
+            .annotate(held_back=Exists(earlier_waiting.values('pk')))
+            .filter(held_back=False)
+            .order_by('pk')
+            [:batch_size])
+
+    def record_attempt(self, delivery, latency, response_status=None,
+                       error=None, retry=False):
+        """Record the result of a delivery attempt.
+
+        Failed deliveries that can be retried are rescheduled with
+        exponential backoff, until :py:attr:`MAX_ATTEMPTS` have been made.
+
+        Args:
+            delivery (reviewboard.notifications.models.WebHookDelivery):
+                The delivery that was attempted.
+
+            latency (float):
+                The number of seconds the attempt took.
+
+            response_status (int, optional):
+                The HTTP status code of the response, if one was received.
+
+            error (unicode, optional):
+                The error from the attempt, if it failed.
+
+            retry (bool, optional):
+                Whether a failed attempt can be retried.
+        """
+        now = timezone.now()
+
+        delivery.attempts += 1
+        delivery.last_attempt = now
+        delivery.latency = latency
+        delivery.response_status = response_status
+        delivery.error = error or ''
+
+        if error is None:
+            delivery.status = self.model.STATUS_DELIVERED
+        elif retry and delivery.attempts < self.MAX_ATTEMPTS:
+            delivery.next_attempt = now + _get_retry_delay(
+                delivery.attempts, self.RETRY_DELAY, self.MAX_RETRY_DELAY)
+        else:
+            delivery.status = self.model.STATUS_FAILED
+
+        delivery.save(update_fields=('attempts', 'last_attempt', 'latency',
+                                     'response_status', 'error', 'status',
+                                     'next_attempt'))
+
+    def defer(self, deliveries, until):
+        """Postpone pending deliveries without counting an attempt.
+
+        Args:
+            deliveries (list of
+                        reviewboard.notifications.models.WebHookDelivery):
+                The deliveries to postpone.
+
+            until (datetime.datetime):
+                When the deliveries should next be attempted.
+        """
+        self.filter(pk__in=[delivery.pk for delivery in deliveries]).update(
+            next_attempt=until)
+
+    def prune(self, max_age):
+        """Delete old, finished deliveries from the log.
+
+        Args:
+            max_age (datetime.timedelta):
+                The age of the oldest finished deliveries to keep.
+
+        Returns:
+            int:
+            The number of deliveries deleted.
+        """
+        return self.filter(
+            status__in=(self.model.STATUS_DELIVERED,
+                        self.model.STATUS_FAILED),
+            timestamp__lt=timezone.now() - max_age).delete()[0]
+
+    def get_health(self, target):
+        """Return a summary of recent deliveries to a target.
+
+        Args:
+            target (reviewboard.notifications.models.WebHookTarget):
+                The target to summarize.
+
+        Returns:
+            dict:
+            A dictionary containing:
+
+            ``count`` (:py:class:`int`):
+                The number of recent deliveries summarized.
+
+            ``delivered`` (:py:class:`int`):
+                The number of those that were delivered.
+
+            ``failed`` (:py:class:`int`):
+                The number of those that failed and won't be retried.
+
+            ``pending`` (:py:class:`int`):
+                The number of those still waiting to be attempted or retried.
+
+            ``average_latency`` (:py:class:`float`):
+                The average number of seconds taken by the last attempt of
+                each delivery, or ``None`` if none were attempted.
+
+            ``last_error`` (:py:class:`unicode`):
+                The most recent error, or ``None`` if there wasn't one.
+        """
+        deliveries = list(
+            self.filter(target=target)
+            .order_by('-pk')
+            .values_list('status', 'latency', 'error')
+            [:self.HEALTH_SAMPLE_SIZE])
+        latencies = [
+            latency
+            for status, latency, error in deliveries
+            if latency is not None
+        ]
+        errors = [
+            error
+            for status, latency, error in deliveries
+            if error
+        ]
+        statuses = [status for status, latency, error in deliveries]
+
+        if latencies:
+            average_latency = sum(latencies) / len(latencies)
+        else:
+            average_latency = None
+
+        return {
+            'count': len(deliveries),
+            'delivered': statuses.count(self.model.STATUS_DELIVERED),
+            'failed': statuses.count(self.model.STATUS_FAILED),
+            'pending': statuses.count(self.model.STATUS_PENDING),
+            'average_latency': average_latency,
+            'last_error': errors[0] if errors else None,
+        }
 
 
 class WebHookTargetManager(Manager):
@@ -11,10 +430,55 @@ class WebHookTargetManager(Manager):
     """
 
     def for_event(self, event, local_site_id=None, repository_id=None):
-        """Returns a list of matching webhook targets for the given event."""
+        """Return a list of matching webhook targets for the given event.
+
+        The results are cached until any WebHook target changes, so that
+        this can be called on every event without querying the database.
+
+        Args:
+            event (unicode):
+                The name of the event.
+
+            local_site_id (int, optional):
+                The ID of the :term:`Local Site` the event is for, if any.
+
+            repository_id (int, optional):
+                The ID of the repository the event is for, if any.
+
+        Returns:
+            list of reviewboard.notifications.models.WebHookTarget:
+            The enabled targets for the event.
+
+        Raises:
+            ValueError:
+                The event was :py:attr:`WebHookTarget.ALL_EVENTS
+                <reviewboard.notifications.models.WebHookTarget.ALL_EVENTS>`.
+        """
         if event == self.model.ALL_EVENTS:
             raise ValueError('"%s" is not a valid event choice' % event)
 
+        return get_cached_webhook_targets(
+            event, local_site_id, repository_id,
+            lambda: self._compute_for_event(event, local_site_id,
+                                            repository_id))
+
+    def _compute_for_event(self, event, local_site_id, repository_id):
+        """Query the matching webhook targets for the given event.
+
+        Args:
+            event (unicode):
+                The name of the event.
+
+            local_site_id (int):
+                The ID of the :term:`Local Site` the event is for, if any.
+
+            repository_id (int):
+                The ID of the repository the event is for, if any.
+
+        Returns:
+            list of reviewboard.notifications.models.WebHookTarget:
+            The enabled targets for the event.
+        """
         q = Q(enabled=True) & Q(local_site=local_site_id)
 
         if repository_id is None:
@@ -1,13 +1,18 @@
 from __future__ import unicode_literals
 
+from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext_lazy as _
 from djblets.db.fields import JSONField
 from djblets.util.compat.django.core.validators import URLValidator
 from multiselectfield import MultiSelectField
 
-from reviewboard.notifications.managers import WebHookTargetManager
+from reviewboard.notifications.managers import (EmailDigestEventManager,
+                                                QueuedEmailManager,
+                                                WebHookDeliveryManager,
+                                                WebHookTargetManager)
 from reviewboard.scmtools.models import Repository
 from reviewboard.site.models import LocalSite
 
@@ -173,3 +178,218 @@ class WebHookTarget(models.Model):
         db_table = 'notifications_webhooktarget'
         verbose_name = _('Webhook')
         verbose_name_plural = _('Webhooks')
+
+
+@python_2_unicode_compatible
+class WebHookDelivery(models.Model):
+    """A queued or completed delivery of a WebHook event to a target.
+
+    When queued WebHook delivery is enabled, events are prepared while
+    handling the request that triggered them (rendering the payload and
+    computing headers and signatures), and stored as pending deliveries.
+    These are sent by the ``process-webhook-queue`` management command, which
+    retries failed deliveries with exponential backoff.
+
+    Once sent (or given up on), deliveries are kept as a log of recent
+    delivery attempts for the target.
+    """
+
+    #: The status for a delivery that has not yet succeeded.
+    STATUS_PENDING = 'P'
+
+    #: The status for a successful delivery.
+    STATUS_DELIVERED = 'D'
+
+    #: The status for a delivery that failed and won't be retried.
+    STATUS_FAILED = 'F'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_DELIVERED, _('Delivered')),
+        (STATUS_FAILED, _('Failed')),
+    )
+
+    target = models.ForeignKey(WebHookTarget,
+                               on_delete=models.CASCADE,
+                               related_name='deliveries')
+    event = models.CharField(max_length=64)
+
+    #: The URL to send to, without any credentials.
+    #:
+    #: Credentials in the target's URL are sent in the prepared
+    #: ``Authorization`` header instead.
+    url = models.TextField()
+
+    body = models.BinaryField()
+    headers = JSONField()
+
+    status = models.CharField(max_length=1,
+                              choices=STATUS_CHOICES,
+                              default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    #: When the delivery should next be attempted, if pending.
+    next_attempt = models.DateTimeField(default=timezone.now)
+
+    last_attempt = models.DateTimeField(null=True)
+
+    #: The HTTP status code from the last attempt, if a response was received.
+    response_status = models.PositiveIntegerField(null=True)
+
+    #: The number of seconds taken by the last attempt.
+    latency = models.FloatField(null=True)
+
+    #: The error from the last attempt, if it failed.
+    error = models.TextField(blank=True)
+
+    objects = WebHookDeliveryManager()
+
+    def __str__(self):
+        """Return a string representation of the delivery.
+
+        Returns:
+            unicode:
+            A string representation of the delivery.
+        """
+        return '%s to %s (%s)' % (self.event, self.url,
+                                  self.get_status_display())
+
+    class Meta:
+        db_table = 'notifications_webhookdelivery'
+        index_together = (('status', 'next_attempt'),)
+        verbose_name = _('Webhook Delivery')
+        verbose_name_plural = _('Webhook Deliveries')
+
+
+@python_2_unicode_compatible
+class QueuedEmail(models.Model):
+    """An e-mail message waiting to be sent.
+
+    When queued e-mail delivery is enabled, messages are fully built while
+    handling the request that triggered them, and stored as entries in this
+    spool. These are sent by the ``process-email-queue`` management command,
+    which reuses a single mail server connection for many messages and
+    retries temporary failures.
+
+    Sent messages are removed from the spool. Messages that couldn't be sent
+    are kept for a while, for reference.
+    """
+
+    #: The status for a message that has not yet been sent.
+    STATUS_PENDING = 'P'
+
+    #: The status for a message that failed and won't be retried.
+    STATUS_FAILED = 'F'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_FAILED, _('Failed')),
+    )
+
+    #: The envelope sender address.
+    from_email = models.TextField()
+
+    #: The envelope recipient addresses, including any Bcc addresses.
+    recipients = JSONField()
+
+    #: The complete MIME message.
+    message = models.BinaryField()
+
+    message_id = models.CharField(max_length=255)
+
+    status = models.CharField(max_length=1,
+                              choices=STATUS_CHOICES,
+                              default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    #: When sending should next be attempted, if pending.
+    next_attempt = models.DateTimeField(default=timezone.now)
+
+    last_attempt = models.DateTimeField(null=True)
+
+    #: The error from the last attempt, if it failed.
+    error = models.TextField(blank=True)
+
+    objects = QueuedEmailManager()
+
+    def __str__(self):
+        """Return a string representation of the queued message.
+
+        Returns:
+            unicode:
+            A string representation of the queued message.
+        """
+        return '%s (%s)' % (self.message_id, self.get_status_display())
+
+    class Meta:
+        db_table = 'notifications_queuedemail'
+        index_together = (('status', 'next_attempt'),)
+        verbose_name = _('Queued E-mail')
+        verbose_name_plural = _('Queued E-mails')
+
+
+@python_2_unicode_compatible
+class EmailDigestEvent(models.Model):
+    """A review request event waiting to be sent in an e-mail digest.
+
+    When e-mail digests are enabled, users who have chosen to receive them
+    are left out of the e-mails for review request activity. Instead, an
+    event is recorded for each of them, and the ``send-email-digests``
+    management command periodically sends each user one e-mail covering
+    all of their events.
+
+    Events are removed once they have been sent.
+    """
+
+    #: The event for a review request being published or updated.
+    TYPE_REVIEW_REQUEST_PUBLISHED = 'P'
+
+    #: The event for a review request being closed.
+    TYPE_REVIEW_REQUEST_CLOSED = 'C'
+
+    #: The event for a review being published.
+    TYPE_REVIEW_PUBLISHED = 'R'
+
+    #: The event for a reply to a review being published.
+    TYPE_REPLY_PUBLISHED = 'Y'
+
+    TYPE_CHOICES = (
+        (TYPE_REVIEW_REQUEST_PUBLISHED, _('Review request published')),
+        (TYPE_REVIEW_REQUEST_CLOSED, _('Review request closed')),
+        (TYPE_REVIEW_PUBLISHED, _('Review published')),
+        (TYPE_REPLY_PUBLISHED, _('Reply published')),
+    )
+
+    #: The user who will receive the event in their digest.
+    user = models.ForeignKey(User, related_name='email_digest_events')
+
+    review_request = models.ForeignKey('reviews.ReviewRequest',
+                                       related_name='email_digest_events')
+
+    event_type = models.CharField(max_length=1, choices=TYPE_CHOICES)
+
+    #: The user who triggered the event.
+    actor = models.ForeignKey(User, related_name='+')
+
+    #: The ID of the review, reply, or change description for the event.
+    object_id = models.PositiveIntegerField(null=True)
+
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    objects = EmailDigestEventManager()
+
+    def __str__(self):
+        """Return a string representation of the event.
+
+        Returns:
+            unicode:
+            A string representation of the event.
+        """
+        return '%s: %s' % (self.user, self.get_event_type_display())
+
+    class Meta:
+        db_table = 'notifications_emaildigestevent'
+        verbose_name = _('E-mail Digest Event')
+        verbose_name_plural = _('E-mail Digest Events')
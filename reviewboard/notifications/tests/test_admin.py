@@ -4,7 +4,7 @@ from __future__ import unicode_literals
 
 from django.core import urlresolvers
 
-from reviewboard.notifications.models import WebHookTarget
+from reviewboard.notifications.models import WebHookDelivery, WebHookTarget
 from reviewboard.testing.testcase import TestCase
 
 
@@ -42,3 +42,38 @@ class WebhookTargetAdminTests(TestCase):
         response = self.client.get(
             urlresolvers.reverse('admin:notifications_webhooktarget_change',
                                  args=(webhooktarget.pk,)))
+
+    def test_webhooktarget_delivery_health(self):
+        """Testing that the WebHookTarget change page shows recent delivery
+        health
+        """
+        self.assertTrue(self.client.login(username='admin', password='admin'))
+        webhooktarget = WebHookTarget.objects.create(
+            url='http://example.com/endpoint/',
+            events='*')
+
+        response = self.client.get(
+            urlresolvers.reverse('admin:notifications_webhooktarget_change',
+                                 args=(webhooktarget.pk,)))
+        self.assertContains(response, 'No recent queued deliveries')
+
+        for status, error in ((WebHookDelivery.STATUS_DELIVERED, ''),
+                              (WebHookDelivery.STATUS_FAILED,
+                               'HTTP 404 Not Found')):
+            WebHookDelivery.objects.create(target=webhooktarget,
+                                           event='review_request_published',
+                                           url=webhooktarget.url,
+                                           body=b'{}',
+                                           headers={},
+                                           status=status,
+                                           attempts=1,
+                                           latency=0.25,
+                                           error=error)
+
+        response = self.client.get(
+            urlresolvers.reverse('admin:notifications_webhooktarget_change',
+                                 args=(webhooktarget.pk,)))
+        self.assertContains(
+            response,
+            '1 of the last 2 delivered, 1 failed, 0 pending; average time '
+            '250 ms; last error: HTTP 404 Not Found')
@@ -0,0 +1,222 @@
+"""Unit tests for e-mail digests."""
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.core import mail
+from djblets.mail.utils import build_email_address_for_user
+from kgb import SpyAgency
+
+from reviewboard.notifications.email.digest import EmailDigestSender
+from reviewboard.notifications.email.message import \
+    prepare_review_request_mail
+from reviewboard.notifications.models import EmailDigestEvent
+from reviewboard.notifications.tests.test_email_sending import \
+    EmailTestHelper
+from reviewboard.site.urlresolvers import local_site_reverse
+from reviewboard.testing import TestCase
+
+
+class EmailDigestTests(EmailTestHelper, SpyAgency, TestCase):
+    """Unit tests for e-mail digests."""
+
+    fixtures = ['test_users']
+
+    email_siteconfig_settings = {
+        'mail_send_review_mail': True,
+        'mail_enable_digests': True,
+    }
+
+    def setUp(self):
+        super(EmailDigestTests, self).setUp()
+
+        self.grumpy = User.objects.get(username='grumpy')
+        profile = self.grumpy.get_profile()
+        profile.should_send_email_digest = True
+        profile.save(update_fields=('should_send_email_digest',))
+
+    def test_publish_records_event(self):
+        """Testing that publishing a review request records digest events
+        instead of e-mailing users who receive digests
+        """
+        review_request = self._create_review_request()
+        review_request.publish(review_request.submitter)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertNotIn(build_email_address_for_user(self.grumpy),
+                         mail.outbox[0].recipients())
+        self.assertIn(build_email_address_for_user(review_request.submitter),
+                      mail.outbox[0].recipients())
+
+        event = EmailDigestEvent.objects.get()
+        self.assertEqual(event.user, self.grumpy)
+        self.assertEqual(event.review_request, review_request)
+        self.assertEqual(event.actor, review_request.submitter)
+        self.assertEqual(event.event_type,
+                         EmailDigestEvent.TYPE_REVIEW_REQUEST_PUBLISHED)
+        self.assertIsNone(event.object_id)
+
+    def test_publish_review_records_event(self):
+        """Testing that publishing a review records digest events"""
+        review_request = self._create_review_request(publish=True)
+        EmailDigestEvent.objects.all().delete()
+        mail.outbox = []
+
+        review = self.create_review(review_request,
+                                    user=review_request.submitter)
+        review.publish()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertNotIn(build_email_address_for_user(self.grumpy),
+                         mail.outbox[0].recipients())
+
+        event = EmailDigestEvent.objects.get()
+        self.assertEqual(event.user, self.grumpy)
+        self.assertEqual(event.event_type,
+                         EmailDigestEvent.TYPE_REVIEW_PUBLISHED)
+        self.assertEqual(event.object_id, review.pk)
+
+    def test_publish_with_only_digest_recipients(self):
+        """Testing that no e-mail is sent when all recipients receive
+        digests
+        """
+        review_request = self.create_review_request(
+            summary='My test review request')
+        review_request.target_people.add(self.grumpy)
+
+        profile = review_request.submitter.get_profile()
+        profile.should_send_own_updates = False
+        profile.save(update_fields=('should_send_own_updates',))
+
+        review_request.publish(review_request.submitter)
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EmailDigestEvent.objects.count(), 1)
+
+    def test_publish_with_digests_disabled(self):
+        """Testing that users receive e-mails immediately when digests are
+        disabled for the server
+        """
+        review_request = self._create_review_request()
+
+        with self.siteconfig_settings({'mail_enable_digests': False}):
+            review_request.publish(review_request.submitter)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(build_email_address_for_user(self.grumpy),
+                      mail.outbox[0].recipients())
+        self.assertFalse(EmailDigestEvent.objects.exists())
+
+    def test_prepare_mail_without_recording_events(self):
+        """Testing that preparing an e-mail without sending it doesn't
+        record digest events
+        """
+        review_request = self._create_review_request(publish=True)
+        EmailDigestEvent.objects.all().delete()
+
+        message = prepare_review_request_mail(review_request.submitter,
+                                              review_request)
+
+        self.assertIn(build_email_address_for_user(self.grumpy),
+                      message.recipients())
+        self.assertFalse(EmailDigestEvent.objects.exists())
+
+    def test_preview_email_view(self):
+        """Testing that previewing a review request e-mail doesn't record
+        digest events
+        """
+        review_request = self._create_review_request(publish=True)
+        EmailDigestEvent.objects.all().delete()
+
+        with self.settings(DEBUG=True):
+            response = self.client.get(
+                local_site_reverse(
+                    'preview-review-request-email',
+                    kwargs={
+                        'review_request_id': review_request.pk,
+                        'message_format': 'text',
+                    }))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(EmailDigestEvent.objects.exists())
+
+    def test_send_digests(self):
+        """Testing EmailDigestSender.send_digests"""
+        dopey = User.objects.get(username='dopey')
+        profile = dopey.get_profile()
+        profile.should_send_email_digest = True
+        profile.save(update_fields=('should_send_email_digest',))
+
+        review_request = self._create_review_request()
+        review_request.target_people.add(dopey)
+        review_request.publish(review_request.submitter)
+
+        review = self.create_review(review_request,
+                                    user=review_request.submitter)
+        review.publish()
+
+        self.assertEqual(EmailDigestEvent.objects.count(), 4)
+        mail.outbox = []
+
+        self.spy_on(EmailDigestSender._get_section, owner=EmailDigestSender)
+        self.assertEqual(EmailDigestSender().send_digests(), 2)
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['Dopey Dwarf <dopey@example.com>',
+             'Grumpy Dwarf <grumpy@example.com>'])
+        self.assertFalse(EmailDigestEvent.objects.exists())
+
+        # Both users received the same events, so the section was rendered
+        # only once.
+        spy = EmailDigestSender._get_section.spy
+        self.assertEqual(len(spy.calls), 2)
+        self.assertIs(spy.calls[0].return_value, spy.calls[1].return_value)
+
+        message = mail.outbox[0]
+        self.assertIn('Review Request %s: My test review request'
+                      % review_request.display_id,
+                      message.body)
+        self.assertIn('published the review request', message.body)
+        self.assertIn('reviewed the change', message.body)
+        self.assertIn('#review%s' % review.pk, message.body)
+
+    def test_send_digests_with_inaccessible_review_request(self):
+        """Testing EmailDigestSender.send_digests skips review requests the
+        user can no longer access
+        """
+        review_request = self._create_review_request(publish=True)
+        self.assertEqual(EmailDigestEvent.objects.count(), 1)
+        mail.outbox = []
+
+        group = self.create_review_group(invite_only=True)
+        review_request.target_people.remove(self.grumpy)
+        review_request.target_groups.add(group)
+
+        self.assertEqual(EmailDigestSender().send_digests(), 0)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(EmailDigestEvent.objects.exists())
+
+    def _create_review_request(self, publish=False):
+        """Create a review request for testing.
+
+        The review request will target its submitter and Grumpy.
+
+        Args:
+            publish (bool, optional):
+                Whether to publish the review request.
+
+        Returns:
+            reviewboard.reviews.models.review_request.ReviewRequest:
+            The review request.
+        """
+        review_request = self.create_review_request(
+            summary='My test review request')
+        review_request.target_people.add(review_request.submitter,
+                                         self.grumpy)
+
+        if publish:
+            review_request.publish(review_request.submitter)
+
+        return review_request
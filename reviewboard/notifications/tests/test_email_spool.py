@@ -0,0 +1,204 @@
+"""Unit tests for queued e-mail delivery."""
+
+from __future__ import unicode_literals
+
+import smtplib
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.utils import timezone
+from kgb import SpyAgency
+
+from reviewboard.notifications.email import spool
+from reviewboard.notifications.email.spool import (QueuedEmailSender,
+                                                   is_temporary_error)
+from reviewboard.notifications.models import QueuedEmail
+from reviewboard.notifications.tests.test_email_sending import \
+    EmailTestHelper
+from reviewboard.testing import TestCase
+
+
+class QueuedEmailTests(EmailTestHelper, SpyAgency, TestCase):
+    """Unit tests for queued e-mail delivery."""
+
+    fixtures = ['test_users']
+
+    email_siteconfig_settings = {
+        'mail_send_review_mail': True,
+        'mail_queue_messages': True,
+    }
+
+    def test_publish_queues_message(self):
+        """Testing that publishing a review request queues its e-mail when
+        queued e-mail delivery is enabled
+        """
+        review_request = self.create_review_request(
+            summary='My test review request')
+        review_request.target_people.add(review_request.submitter)
+        review_request.publish(review_request.submitter)
+
+        self.assertEqual(len(mail.outbox), 0)
+
+        # The Message-ID is recorded right away, so that replies are
+        # threaded even before the message is sent.
+        queued_email = QueuedEmail.objects.get()
+        review_request.refresh_from_db()
+        self.assertEqual(review_request.email_message_id,
+                         queued_email.message_id)
+        self.assertIsNotNone(review_request.time_emailed)
+
+        QueuedEmailSender().process_messages(batch_size=10)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(QueuedEmail.objects.exists())
+
+        message = mail.outbox[0].message()
+        self.assertEqual(message['Message-ID'], queued_email.message_id)
+        self.assertEqual(message['Subject'],
+                         'Review Request %s: My test review request'
+                         % review_request.pk)
+
+    def test_queued_reply_threading(self):
+        """Testing that e-mails queued after a queued review request e-mail
+        are threaded as replies to it
+        """
+        review_request = self.create_review_request(
+            summary='My test review request')
+        review_request.target_people.add(review_request.submitter)
+        review_request.publish(review_request.submitter)
+
+        review = self.create_review(review_request=review_request)
+        review.publish()
+
+        queued_emails = list(QueuedEmail.objects.order_by('pk'))
+        self.assertEqual(len(queued_emails), 2)
+
+        QueuedEmailSender().process_messages(batch_size=10)
+
+        self.assertEqual(len(mail.outbox), 2)
+
+        message = mail.outbox[1].message()
+        self.assertEqual(message['In-Reply-To'], queued_emails[0].message_id)
+        self.assertTrue(message['Subject'].startswith('Re: '))
+
+    def test_process_messages_reuses_connection(self):
+        """Testing QueuedEmailSender.process_messages reuses connections"""
+        self.spy_on(spool.get_connection)
+
+        for i in range(5):
+            self._queue_message()
+
+        sender = QueuedEmailSender(messages_per_connection=2)
+        self.assertEqual(sender.process_messages(batch_size=10), 5)
+        sender.close()
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(len(spool.get_connection.spy.calls), 3)
+
+    def test_process_messages_with_temporary_error(self):
+        """Testing QueuedEmailSender.process_messages retries messages after
+        temporary errors
+        """
+        queued_email = self._queue_message()
+
+        self.spy_on(EmailBackend.send_messages,
+                    owner=EmailBackend,
+                    call_fake=self._raise(
+                        smtplib.SMTPResponseException(451, 'Try again')))
+        QueuedEmailSender().process_messages(batch_size=10)
+
+        queued_email = QueuedEmail.objects.get(pk=queued_email.pk)
+        self.assertEqual(queued_email.status, QueuedEmail.STATUS_PENDING)
+        self.assertEqual(queued_email.attempts, 1)
+        self.assertEqual(queued_email.error, '(451, \'Try again\')')
+        self.assertGreater(queued_email.next_attempt, timezone.now())
+
+    def test_process_messages_with_permanent_error(self):
+        """Testing QueuedEmailSender.process_messages with an error that
+        can't be retried
+        """
+        queued_email1 = self._queue_message()
+        queued_email2 = self._queue_message()
+
+        self.spy_on(EmailBackend.send_messages,
+                    owner=EmailBackend,
+                    call_fake=self._raise(smtplib.SMTPRecipientsRefused({
+                        'doc@example.com': (550, b'No such user'),
+                    })))
+        QueuedEmailSender().process_messages(batch_size=10)
+
+        for queued_email in (queued_email1, queued_email2):
+            queued_email = QueuedEmail.objects.get(pk=queued_email.pk)
+            self.assertEqual(queued_email.status, QueuedEmail.STATUS_FAILED)
+            self.assertEqual(queued_email.attempts, 1)
+
+    def test_process_messages_with_connection_error(self):
+        """Testing QueuedEmailSender.process_messages leaves the rest of the
+        batch after a connection error
+        """
+        queued_email1 = self._queue_message()
+        queued_email2 = self._queue_message()
+
+        self.spy_on(EmailBackend.send_messages,
+                    owner=EmailBackend,
+                    call_fake=self._raise(
+                        smtplib.SMTPServerDisconnected('Connection lost')))
+        self.assertEqual(
+            QueuedEmailSender().process_messages(batch_size=10),
+            1)
+
+        queued_email1 = QueuedEmail.objects.get(pk=queued_email1.pk)
+        self.assertEqual(queued_email1.status, QueuedEmail.STATUS_PENDING)
+        self.assertEqual(queued_email1.attempts, 1)
+        self.assertEqual(queued_email1.error, 'Connection lost')
+
+        queued_email2 = QueuedEmail.objects.get(pk=queued_email2.pk)
+        self.assertEqual(queued_email2.attempts, 0)
+
+    def test_is_temporary_error(self):
+        """Testing is_temporary_error"""
+        self.assertTrue(is_temporary_error(
+            smtplib.SMTPServerDisconnected('Connection lost')))
+        self.assertTrue(is_temporary_error(IOError('Connection refused')))
+        self.assertTrue(is_temporary_error(
+            smtplib.SMTPSenderRefused(451, 'Try again', 'doc@example.com')))
+        self.assertTrue(is_temporary_error(smtplib.SMTPRecipientsRefused({
+            'doc@example.com': (452, b'Mailbox full'),
+        })))
+        self.assertFalse(is_temporary_error(
+            smtplib.SMTPDataError(554, 'Rejected')))
+        self.assertFalse(is_temporary_error(smtplib.SMTPRecipientsRefused({
+            'doc@example.com': (452, b'Mailbox full'),
+            'grumpy@example.com': (550, b'No such user'),
+        })))
+        self.assertFalse(is_temporary_error(ValueError('No recipients')))
+
+    def _queue_message(self):
+        """Queue a message for testing.
+
+        Returns:
+            reviewboard.notifications.models.QueuedEmail:
+            The queued message.
+        """
+        return QueuedEmail.objects.queue_message(
+            EmailMessage(subject='Test',
+                         body='Test message',
+                         from_email=self.sender,
+                         to=['doc@example.com']))
+
+    def _raise(self, error):
+        """Return a function that raises an error.
+
+        Args:
+            error (Exception):
+                The error to raise.
+
+        Returns:
+            callable:
+            The function.
+        """
+        def _send_messages(*args, **kwargs):
+            raise error
+
+        return _send_messages
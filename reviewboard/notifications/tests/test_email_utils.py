@@ -4,7 +4,7 @@ from django.contrib.auth.models import User
 from djblets.mail.utils import build_email_address_for_user
 from djblets.testing.decorators import add_fixtures
 
-from reviewboard.accounts.models import Profile
+from reviewboard.accounts.models import Profile, ReviewRequestVisit
 from reviewboard.notifications.email.utils import (
     build_recipients,
     get_email_addresses_for_group,
@@ -797,3 +797,99 @@ class EmailUtilsTests(TestCase):
 
         self.assertEqual(to, set([submitter, user1]))
         self.assertEqual(len(cc), 0)
+
+    def test_get_email_addresses_for_group_cached(self):
+        """Testing get_email_addresses_for_group caches member addresses"""
+        group = self.create_review_group('group1')
+        user1 = User.objects.create_user(username='user1', first_name='User',
+                                         last_name='One',
+                                         email='user1@example.com')
+        group.users.add(user1)
+
+        # Load the profile, so it isn't created when building addresses.
+        user1.get_profile()
+
+        self.assertEqual(get_email_addresses_for_group(group),
+                         [build_email_address_for_user(user1)])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_email_addresses_for_group(group),
+                             [build_email_address_for_user(user1)])
+
+    def test_get_email_addresses_for_group_invalidated(self):
+        """Testing get_email_addresses_for_group invalidates cached addresses
+        when members change
+        """
+        group = self.create_review_group('group1')
+        user1 = User.objects.create_user(username='user1', first_name='User',
+                                         last_name='One',
+                                         email='user1@example.com')
+        user2 = User.objects.create_user(username='user2', first_name='User',
+                                         last_name='Two',
+                                         email='user2@example.com')
+        group.users.add(user1)
+
+        self.assertEqual(get_email_addresses_for_group(group),
+                         [build_email_address_for_user(user1)])
+
+        # Adding a member.
+        group.users.add(user2)
+        self.assertEqual(
+            set(get_email_addresses_for_group(group)),
+            set([build_email_address_for_user(user1),
+                 build_email_address_for_user(user2)]))
+
+        # Changing a member's address.
+        user2.email = 'user2@example.org'
+        user2.save()
+        self.assertEqual(
+            set(get_email_addresses_for_group(group)),
+            set([build_email_address_for_user(user1),
+                 'User Two <user2@example.org>']))
+
+        # Turning off e-mail for a member.
+        profile = user2.get_profile()
+        profile.should_send_email = False
+        profile.save()
+        self.assertEqual(get_email_addresses_for_group(group),
+                         [build_email_address_for_user(user1)])
+
+        # Removing a member.
+        group.users.remove(user1)
+        self.assertEqual(get_email_addresses_for_group(group), [])
+
+    @add_fixtures(['test_users'])
+    def test_recipients_to_addresses_with_muted_group_members(self):
+        """Testing recipients_to_addresses with group members who muted the
+        review request
+        """
+        review_request = self.create_review_request()
+        group1 = self.create_review_group('group1')
+        group2 = self.create_review_group('group2')
+        user1 = User.objects.get(username='doc')
+        user2 = User.objects.get(username='grumpy')
+        user3 = User.objects.get(username='dopey')
+
+        group1.users.add(user1, user2)
+        group2.users.add(user3)
+
+        for user in (user1, user2, user3):
+            # Load the profile, so it isn't created when building addresses.
+            user.get_profile()
+
+        for user in (user2, user3):
+            ReviewRequestVisit.objects.create(
+                user=user,
+                review_request=review_request,
+                visibility=ReviewRequestVisit.MUTED)
+
+        # Prime the cache.
+        recipients_to_addresses([group1, group2], review_request.pk)
+
+        # The muted users are looked up in a single query for all groups.
+        with self.assertNumQueries(1):
+            addresses = recipients_to_addresses([group1, group2],
+                                                review_request.pk)
+
+        self.assertEqual(addresses,
+                         set([build_email_address_for_user(user1)]))
@@ -170,3 +170,75 @@ class WebHookTargetManagerTests(TestCase):
         with self.assertRaisesMessage(ValueError,
                                       '"*" is not a valid event choice'):
             WebHookTarget.objects.for_event(WebHookTarget.ALL_EVENTS)
+
+    def test_for_event_cached(self):
+        """Testing WebHookTargetManager.for_event caches results"""
+        target = WebHookTarget.objects.create(
+            events='event1',
+            url=self.ENDPOINT_URL,
+            enabled=True,
+            apply_to=WebHookTarget.APPLY_TO_ALL)
+
+        self.assertEqual(WebHookTarget.objects.for_event('event1'), [target])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(WebHookTarget.objects.for_event('event1'),
+                             [target])
+
+        # Events without targets are cached as well.
+        with self.assertNumQueries(1):
+            self.assertEqual(WebHookTarget.objects.for_event('event2'), [])
+            self.assertEqual(WebHookTarget.objects.for_event('event2'), [])
+
+    def test_for_event_after_target_saved(self):
+        """Testing WebHookTargetManager.for_event after saving a target"""
+        target = WebHookTarget.objects.create(
+            events='event1',
+            url=self.ENDPOINT_URL,
+            enabled=True,
+            apply_to=WebHookTarget.APPLY_TO_ALL)
+
+        self.assertEqual(WebHookTarget.objects.for_event('event1'), [target])
+
+        target.enabled = False
+        target.save()
+
+        self.assertEqual(WebHookTarget.objects.for_event('event1'), [])
+
+    def test_for_event_after_target_deleted(self):
+        """Testing WebHookTargetManager.for_event after deleting a target"""
+        target = WebHookTarget.objects.create(
+            events='event1',
+            url=self.ENDPOINT_URL,
+            enabled=True,
+            apply_to=WebHookTarget.APPLY_TO_ALL)
+
+        self.assertEqual(WebHookTarget.objects.for_event('event1'), [target])
+
+        target.delete()
+
+        self.assertEqual(WebHookTarget.objects.for_event('event1'), [])
+
+    @add_fixtures(['test_scmtools'])
+    def test_for_event_after_repositories_changed(self):
+        """Testing WebHookTargetManager.for_event after changing a target's
+        repositories
+        """
+        repository = self.create_repository()
+        target = WebHookTarget.objects.create(
+            events='event1',
+            url=self.ENDPOINT_URL,
+            enabled=True,
+            apply_to=WebHookTarget.APPLY_TO_SELECTED_REPOS)
+
+        self.assertEqual(
+            WebHookTarget.objects.for_event('event1',
+                                            repository_id=repository.pk),
+            [])
+
+        target.repositories.add(repository)
+
+        self.assertEqual(
+            WebHookTarget.objects.for_event('event1',
+                                            repository_id=repository.pk),
+            [target])
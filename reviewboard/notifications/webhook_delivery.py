@@ -0,0 +1,382 @@
+"""Delivery of queued WebHook events.
+
+Queued deliveries (see
+:py:class:`~reviewboard.notifications.models.WebHookDelivery`) are sent by
+a :py:class:`WebHookDeliveryWorker`, which is run by the
+``process-webhook-queue`` management command.
+
+Deliveries to different targets are sent concurrently from a pool of
+threads, while deliveries to the same target are sent in order. If a
+delivery fails and is waiting to be retried, the target's later deliveries
+are held back until it's delivered or given up on. Connections are kept
+alive and reused for later deliveries to the same host.
+
+Each target has a circuit breaker. After several consecutive failures, the
+target's deliveries are postponed for a while instead of being attempted,
+so that a dead endpoint doesn't tie up the workers or use up its
+deliveries' retries.
+"""
+
+from __future__ import unicode_literals
+
+import logging
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from multiprocessing.pool import ThreadPool
+
+from django.utils import six, timezone
+from django.utils.encoding import force_str, force_text
+from django.utils.six.moves.urllib.error import HTTPError
+from django.utils.six.moves.urllib.request import Request, build_opener
+
+from reviewboard.hostingsvcs.http_pool import (PooledHTTPHandler,
+                                               PooledHTTPSHandler)
+from reviewboard.notifications.models import WebHookDelivery
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_retryable_status(response_status):
+    """Return whether a failed delivery can be retried.
+
+    Deliveries are retried if no response was received, or if the server
+    reported a temporary problem. Other error responses (such as a
+    :http:`404`) indicate a problem with the WebHook configuration, and
+    won't be fixed by retrying.
+
+    Args:
+        response_status (int):
+            The HTTP status code of the response, or ``None`` if no response
+            was received.
+
+    Returns:
+        bool:
+        Whether the delivery can be retried.
+    """
+    return (response_status is None or
+            response_status >= 500 or
+            response_status in (408, 429))
+
+
+class CircuitBreaker(object):
+    """A circuit breaker for deliveries to a WebHook target.
+
+    The breaker opens after :py:attr:`failure_threshold` consecutive failed
+    attempts. While open, no deliveries are attempted. Once
+    :py:attr:`reset_secs` have passed, a single delivery is attempted. If it
+    succeeds, the breaker closes, and otherwise it opens again.
+
+    Attributes:
+        failures (int):
+            The number of consecutive failed attempts.
+
+        open_until (datetime.datetime):
+            When the breaker will next allow an attempt, or ``None`` if it
+            hasn't opened since the last successful attempt.
+    """
+
+    def __init__(self, failure_threshold, reset_secs):
+        """Initialize the circuit breaker.
+
+        Args:
+            failure_threshold (int):
+                The number of consecutive failures that open the breaker.
+
+            reset_secs (int):
+                The number of seconds the breaker stays open.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_secs = reset_secs
+        self.failures = 0
+        self.open_until = None
+
+    def is_open(self, now):
+        """Return whether the breaker is blocking attempts.
+
+        Args:
+            now (datetime.datetime):
+                The current time.
+
+        Returns:
+            bool:
+            Whether the breaker is open.
+        """
+        return self.open_until is not None and now < self.open_until
+
+    def record_success(self):
+        """Record a successful attempt, closing the breaker."""
+        self.failures = 0
+        self.open_until = None
+
+    def record_failure(self, now):
+        """Record a failed attempt, opening the breaker if needed.
+
+        Args:
+            now (datetime.datetime):
+                The time of the failed attempt.
+        """
+        self.failures += 1
+
+        if self.failures >= self.failure_threshold:
+            self.open_until = now + timedelta(seconds=self.reset_secs)
+
+
+class WebHookDeliveryWorker(object):
+    """Sends queued WebHook deliveries.
+
+    A worker keeps its thread pool, connections, and circuit breakers
+    between calls to :py:meth:`process_deliveries`, so a single worker
+    should be reused for as long as deliveries are being processed.
+
+    All database access happens on the calling thread. The pool threads only
+    send the prepared requests.
+    """
+
+    #: The default number of deliveries to send concurrently.
+    DEFAULT_MAX_WORKERS = 4
+
+    #: The default number of seconds to wait for a response.
+    DEFAULT_TIMEOUT_SECS = 10
+
+    #: The default number of consecutive failures that open a circuit.
+    DEFAULT_FAILURE_THRESHOLD = 5
+
+    #: The default number of seconds a circuit stays open.
+    DEFAULT_RESET_SECS = 5 * 60
+
+    def __init__(self,
+                 max_workers=DEFAULT_MAX_WORKERS,
+                 timeout=DEFAULT_TIMEOUT_SECS,
+                 failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_secs=DEFAULT_RESET_SECS):
+        """Initialize the worker.
+
+        Args:
+            max_workers (int, optional):
+                The number of deliveries to send concurrently.
+
+            timeout (int, optional):
+                The number of seconds to wait for a response.
+
+            failure_threshold (int, optional):
+                The number of consecutive failures that open a target's
+                circuit breaker.
+
+            reset_secs (int, optional):
+                The number of seconds a target's circuit breaker stays open.
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_secs = reset_secs
+
+        self._breakers = {}
+        # Failed deliveries are retried by the queue, with backoff, so the
+        # handlers mustn't send them again themselves.
+        self._opener = build_opener(
+            PooledHTTPHandler(retry_stale_connections=False),
+            PooledHTTPSHandler(retry_stale_connections=False))
+        self._pool = None
+
+    def process_deliveries(self, batch_size):
+        """Send a batch of due deliveries.
+
+        Deliveries to targets with open circuit breakers are postponed until
+        the breaker allows another attempt.
+
+        Args:
+            batch_size (int):
+                The maximum number of deliveries to process.
+
+        Returns:
+            int:
+            The number of deliveries processed, including postponed
+            deliveries.
+        """
+        deliveries = WebHookDelivery.objects.get_due(batch_size)
+
+        if not deliveries:
+            return 0
+
+        now = timezone.now()
+        deliveries_by_target = OrderedDict()
+
+        for delivery in deliveries:
+            deliveries_by_target.setdefault(delivery.target_id,
+                                            []).append(delivery)
+
+        tasks = []
+
+        for target_id, target_deliveries in \
+                six.iteritems(deliveries_by_target):
+            breaker = self._get_breaker(target_id)
+
+            if breaker.is_open(now):
+                WebHookDelivery.objects.defer(target_deliveries,
+                                              breaker.open_until)
+            else:
+                tasks.append([
+                    (delivery.pk, delivery.url, bytes(delivery.body),
+                     delivery.headers)
+                    for delivery in target_deliveries
+                ])
+
+        if len(tasks) > 1 and self.max_workers > 1:
+            if self._pool is None:
+                self._pool = ThreadPool(self.max_workers)
+
+            results = self._pool.map(self._send_all, tasks)
+        else:
+            results = [self._send_all(task) for task in tasks]
+
+        deliveries_by_id = dict(
+            (delivery.pk, delivery)
+            for delivery in deliveries
+        )
+
+        for task_results in results:
+            for delivery_id, latency, response_status, error in task_results:
+                self._record_result(deliveries_by_id[delivery_id], latency,
+                                    response_status, error)
+
+        return len(deliveries)
+
+    def close(self):
+        """Shut down the worker's thread pool."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def _get_breaker(self, target_id):
+        """Return the circuit breaker for a target.
+
+        Args:
+            target_id (int):
+                The ID of the target.
+
+        Returns:
+            CircuitBreaker:
+            The circuit breaker.
+        """
+        try:
+            return self._breakers[target_id]
+        except KeyError:
+            breaker = CircuitBreaker(self.failure_threshold, self.reset_secs)
+            self._breakers[target_id] = breaker
+
+            return breaker
+
+    def _record_result(self, delivery, latency, response_status, error):
+        """Record the result of a delivery attempt.
+
+        Args:
+            delivery (reviewboard.notifications.models.WebHookDelivery):
+                The delivery that was attempted.
+
+            latency (float):
+                The number of seconds the attempt took.
+
+            response_status (int):
+                The HTTP status code of the response, or ``None`` if no
+                response was received.
+
+            error (unicode):
+                The error from the attempt, or ``None`` if it succeeded.
+        """
+        breaker = self._get_breaker(delivery.target_id)
+        retry = error is not None and is_retryable_status(response_status)
+
+        if error is None:
+            breaker.record_success()
+        elif retry:
+            breaker.record_failure(timezone.now())
+
+        WebHookDelivery.objects.record_attempt(delivery,
+                                               latency=latency,
+                                               response_status=response_status,
+                                               error=error,
+                                               retry=retry)
+
+        if error is None:
+            logger.info('Delivered WebHook event %s to %s in %.3f seconds',
+                        delivery.event, delivery.url, latency)
+        else:
+            logger.warning('Could not deliver WebHook event %s to %s '
+                           '(attempt %d): %s',
+                           delivery.event, delivery.url, delivery.attempts,
+                           error)
+
+    def _send_all(self, task):
+        """Send deliveries to a target, in order.
+
+        This is run on the pool threads. If a delivery fails in a way that
+        can be retried, the remaining deliveries aren't attempted. They're
+        held back by :py:meth:`WebHookDeliveryManager.get_due
+        <reviewboard.notifications.managers.WebHookDeliveryManager.get_due>`
+        until the failed delivery is retried, so that they aren't sent out
+        of order.
+
+        Args:
+            task (list of tuple):
+                The ID, URL, body, and headers of each delivery.
+
+        Returns:
+            list of tuple:
+            The ID, latency, response status, and error of each attempted
+            delivery.
+        """
+        results = []
+
+        for delivery_id, url, body, headers in task:
+            latency, response_status, error = self._send(url, body, headers)
+            results.append((delivery_id, latency, response_status, error))
+
+            if error is not None and is_retryable_status(response_status):
+                break
+
+        return results
+
+    def _send(self, url, body, headers):
+        """Send a single delivery.
+
+        Args:
+            url (unicode):
+                The URL to send to.
+
+            body (bytes):
+                The encoded payload.
+
+            headers (dict):
+                The HTTP headers to send.
+
+        Returns:
+            tuple:
+            A 3-tuple of the number of seconds taken, the HTTP status code of
+            the response (or ``None`` if no response was received), and the
+            error (or ``None`` if the delivery succeeded).
+        """
+        request = Request(
+            force_str(url),
+            body,
+            dict(
+                (force_str(key), force_str(value))
+                for key, value in six.iteritems(headers)
+            ))
+        start_time = time.time()
+
+        try:
+            response = self._opener.open(request, timeout=self.timeout)
+            response_status = response.getcode()
+            response.read()
+            error = None
+        except HTTPError as e:
+            response_status = e.code
+            error = 'HTTP %s %s' % (e.code, force_text(e.reason))
+        except Exception as e:
+            response_status = None
+            error = force_text(e) or type(e).__name__
+
+        return time.time() - start_time, response_status, error
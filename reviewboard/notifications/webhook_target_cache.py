@@ -0,0 +1,101 @@
+"""Cached lists of the WebHook targets for each event.
+
+Every review request publish, review, reply, close, and reopen looks up the
+WebHook targets for the event, :term:`Local Site`, and repository involved,
+even though WebHook configuration rarely changes.
+
+The matching targets are cached in the shared cache, and in each process,
+keyed by the event, Local Site, and repository. As with
+:py:mod:`reviewboard.reviews.access_cache`, all cached targets are versioned
+by a single generation, which is bumped whenever a target is saved or
+deleted, or its repositories change. Each process still checks the
+generation on every lookup, so changes made in one process are seen by all
+others.
+"""
+
+from __future__ import unicode_literals
+
+import threading
+
+from django.core.cache import cache
+from djblets.cache.backend import make_cache_key
+
+from reviewboard.cache_generation import CacheGeneration
+
+
+#: The number of seconds to cache targets in the shared cache.
+#:
+#: Entries are invalidated through the generation, so this only controls how
+#: long unused entries stay around.
+WEBHOOK_TARGETS_EXPIRATION_SECS = 60 * 60 * 24
+
+
+#: The generation of all cached targets.
+#:
+#: This must be bumped whenever anything affecting which WebHook targets
+#: match an event, or the targets themselves, changes.
+webhook_targets_generation = CacheGeneration('webhook-targets-generation')
+
+
+#: A lock for the targets cached in this process.
+_local_lock = threading.Lock()
+
+#: The generation of the targets cached in this process.
+_local_generation = None
+
+#: The targets cached in this process, keyed by event, Local Site ID, and
+#: repository ID.
+_local_targets = {}
+
+
+def get_cached_webhook_targets(event, local_site_id, repository_id,
+                               compute_targets):
+    """Return the WebHook targets for an event, computing them if needed.
+
+    Args:
+        event (unicode):
+            The name of the event.
+
+        local_site_id (int):
+            The ID of the :term:`Local Site` the event is for, if any.
+
+        repository_id (int):
+            The ID of the repository the event is for, if any.
+
+        compute_targets (callable):
+            A function returning the targets, used if they're not cached.
+
+    Returns:
+        list of reviewboard.notifications.models.WebHookTarget:
+        The matching targets.
+    """
+    global _local_generation, _local_targets
+
+    generation = webhook_targets_generation.get()
+    local_key = (event, local_site_id, repository_id)
+
+    with _local_lock:
+        if _local_generation != generation:
+            _local_generation = generation
+            _local_targets = {}
+
+        targets = _local_targets.get(local_key)
+
+    if targets is None:
+        key = make_cache_key('webhook-targets:%s:%s:%s:%s' % (
+            generation,
+            event,
+            local_site_id or '',
+            repository_id or '',
+        ))
+        targets = cache.get(key)
+
+        if targets is None:
+            targets = list(compute_targets())
+            cache.set(key, targets, WEBHOOK_TARGETS_EXPIRATION_SECS)
+
+        with _local_lock:
+            if _local_generation == generation:
+                _local_targets[local_key] = targets
+
+    return list(targets)
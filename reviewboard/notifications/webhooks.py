@@ -10,6 +10,7 @@ from datetime import datetime
 import django
 from django.contrib.sites.models import Site
 from django.db.models import Model
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.db.models.query import QuerySet
 from django.http.request import HttpRequest
 from django.utils import six
@@ -28,7 +29,9 @@ from djblets.webapi.encoders import (BasicAPIEncoder, JSONEncoderAdapter,
                                      ResourceAPIEncoder, XMLEncoderAdapter)
 
 from reviewboard import get_package_version
-from reviewboard.notifications.models import WebHookTarget
+from reviewboard.notifications.models import WebHookDelivery, WebHookTarget
+from reviewboard.notifications.webhook_target_cache import \
+    webhook_targets_generation
 from reviewboard.reviews.models import Review, ReviewRequest
 from reviewboard.reviews.signals import (review_request_closed,
                                          review_request_published,
@@ -266,6 +269,11 @@ def normalize_webhook_payload(payload, request, use_string_keys=False):
 def dispatch_webhook_event(request, webhook_targets, event, payload):
     """Dispatch the given event and payload to the given WebHook targets.
 
+    If queued WebHook delivery is enabled, the prepared requests are stored
+    as :py:class:`~reviewboard.notifications.models.WebHookDelivery` entries,
+    to be sent by the ``process-webhook-queue`` management command.
+    Otherwise, they're sent immediately.
+
     Args:
         request (django.http.HttpRequest):
             The HTTP request from the client.
@@ -286,9 +294,16 @@ def dispatch_webhook_event(request, webhook_targets, event, payload):
             There was an error with the payload format. Details are in the
             log and the exception message.
     """
+    if not webhook_targets:
+        # There's nothing to send, so don't bother serializing the payload.
+        return
+
     encoder = BasicAPIEncoder()
     bodies = {}
 
+    siteconfig = SiteConfiguration.objects.get_current()
+    queue_deliveries = siteconfig.get('webhooks_queue_deliveries')
+
     raw_norm_payload = None
     json_norm_payload = None
 
@@ -386,21 +401,37 @@ def dispatch_webhook_event(request, webhook_targets, event, payload):
             headers[b'X-Hub-Signature'] = \
                 ('sha1=%s' % signer.hexdigest()).encode('utf-8')
 
+        url = webhook_target.url
+        url_parts = urlsplit(url)
+
+        if url_parts.username or url_parts.password:
+            credentials, netloc = url_parts.netloc.split('@', 1)
+            url = urlunsplit(
+                (url_parts.scheme, netloc, url_parts.path,
+                 url_parts.query, url_parts.fragment))
+            credentials = b64encode(credentials.encode('utf-8'))
+            headers[str('Authorization')] = force_str(
+                'Basic %s' % force_text(credentials))
+
+        if queue_deliveries:
+            logging.info('Queueing webhook for event %s to %s',
+                         event, webhook_target.url)
+
+            WebHookDelivery.objects.queue_delivery(
+                target=webhook_target,
+                event=event,
+                url=url,
+                body=body,
+                headers=dict(
+                    (force_text(key), force_text(value))
+                    for key, value in six.iteritems(headers)
+                ))
+            continue
+
         logging.info('Dispatching webhook for event %s to %s',
                      event, webhook_target.url)
 
         try:
-            url = webhook_target.url
-            url_parts = urlsplit(url)
-
-            if url_parts.username or url_parts.password:
-                credentials, netloc = url_parts.netloc.split('@', 1)
-                url = urlunsplit(
-                    (url_parts.scheme, netloc, url_parts.path,
-                     url_parts.query, url_parts.fragment))
-                headers[str('Authorization')] = force_str(
-                    'Basic %s' % b64encode(credentials.encode('utf-8')))
-
             urlopen(Request(url, body, headers))
         except Exception as e:
             logging.exception('Could not dispatch WebHook to %s: %s',
@@ -438,12 +469,12 @@ def review_request_closed_cb(user, review_request, close_type, **kwargs):
     webhook_targets = WebHookTarget.objects.for_event(
         event, review_request.local_site_id, review_request.repository_id)
 
-    if review_request.local_site_id:
-        local_site_name = review_request.local_site.name
-    else:
-        local_site_name = None
-
     if webhook_targets:
+        if review_request.local_site_id:
+            local_site_name = review_request.local_site.name
+        else:
+            local_site_name = None
+
         if close_type == review_request.SUBMITTED:
             close_type = 'submitted'
         elif close_type == review_request.DISCARDED:
@@ -478,12 +509,12 @@ def review_request_published_cb(user, review_request, changedesc,
     webhook_targets = WebHookTarget.objects.for_event(
         event, review_request.local_site_id, review_request.repository_id)
 
-    if review_request.local_site_id:
-        local_site_name = review_request.local_site.name
-    else:
-        local_site_name = None
-
     if webhook_targets:
+        if review_request.local_site_id:
+            local_site_name = review_request.local_site.name
+        else:
+            local_site_name = None
+
         request = FakeHTTPRequest(user, local_site_name=local_site_name)
         payload = {
             'event': event,
@@ -506,12 +537,12 @@ def review_request_reopened_cb(user, review_request, **kwargs):
     webhook_targets = WebHookTarget.objects.for_event(
         event, review_request.local_site_id, review_request.repository_id)
 
-    if review_request.local_site_id:
-        local_site_name = review_request.local_site.name
-    else:
-        local_site_name = None
-
     if webhook_targets:
+        if review_request.local_site_id:
+            local_site_name = review_request.local_site.name
+        else:
+            local_site_name = None
+
         if not user:
             user = review_request.submitter
 
@@ -535,12 +566,12 @@ def review_published_cb(user, review, **kwargs):
     webhook_targets = WebHookTarget.objects.for_event(
         event, review_request.local_site_id, review_request.repository_id)
 
-    if review_request.local_site_id:
-        local_site_name = review_request.local_site.name
-    else:
-        local_site_name = None
-
     if webhook_targets:
+        if review_request.local_site_id:
+            local_site_name = review_request.local_site.name
+        else:
+            local_site_name = None
+
         request = FakeHTTPRequest(user, local_site_name=local_site_name)
         payload = _serialize_review(review, request)
         payload['event'] = event
@@ -558,12 +589,12 @@ def reply_published_cb(user, reply, **kwargs):
     webhook_targets = WebHookTarget.objects.for_event(
         event, review_request.local_site_id, review_request.repository_id)
 
-    if review_request.local_site_id:
-        local_site_name = review_request.local_site.name
-    else:
-        local_site_name = None
-
     if webhook_targets:
+        if review_request.local_site_id:
+            local_site_name = review_request.local_site.name
+        else:
+            local_site_name = None
+
         request = FakeHTTPRequest(user, local_site_name=local_site_name)
         payload = _serialize_reply(reply, request)
         payload['event'] = event
@@ -575,7 +606,33 @@ def reply_published_cb(user, reply, **kwargs):
             pass
 
 
+def invalidate_webhook_targets(sender, action=None, **kwargs):
+    """Invalidate the cached WebHook targets for each event.
+
+    This handles WebHook targets being saved or deleted, and changes to the
+    repositories they apply to.
+
+    Args:
+        sender (type):
+            The class that sent the signal.
+
+        action (unicode, optional):
+            The action that was performed, for
+            :py:data:`~django.db.models.signals.m2m_changed` signals.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    if action is None or action in ('post_add', 'post_remove', 'post_clear'):
+        webhook_targets_generation.bump()
+
+
 def connect_signals():
+    post_save.connect(invalidate_webhook_targets, sender=WebHookTarget)
+    post_delete.connect(invalidate_webhook_targets, sender=WebHookTarget)
+    m2m_changed.connect(invalidate_webhook_targets,
+                        sender=WebHookTarget.repositories.through)
+
     review_request_closed.connect(review_request_closed_cb,
                                   sender=ReviewRequest)
     review_request_published.connect(review_request_published_cb,
@@ -0,0 +1,15 @@
+"""Review request and review-specific initialization."""
+
+from __future__ import unicode_literals
+
+from reviewboard.signals import initializing
+
+
+def _on_initializing(**kwargs):
+    """Set up signal handlers for reviews."""
+    from reviewboard.reviews.signal_handlers import connect_signal_handlers
+
+    connect_signal_handlers()
+
+
+initializing.connect(_on_initializing)
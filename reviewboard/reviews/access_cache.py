@@ -0,0 +1,84 @@
+"""Cached sets of the repositories and review groups a user can access.
+
+Filtering out private review requests requires knowing which private
+repositories and invite-only review groups a user has access to, which
+means joining against the access lists and group memberships of each. This
+happens on every dashboard, datagrid, API list, and search request.
+
+The resulting IDs are cached per user and :term:`Local Site`. Rather than
+tracking which users are affected by each change, all cached sets are
+versioned by a single access generation, which is bumped whenever a
+repository or review group is saved or deleted, or an access list or group
+membership changes. These changes are rare compared to the lookups, so
+invalidating everything at once is cheap, and can never leave a stale set
+behind.
+"""
+
+from __future__ import unicode_literals
+
+from django.core.cache import cache
+from djblets.cache.backend import make_cache_key
+
+from reviewboard.cache_generation import CacheGeneration
+
+
+#: The number of seconds to cache each user's accessible IDs.
+#:
+#: Entries are invalidated through the access generation, so this only
+#: controls how long unused entries stay around.
+ACCESSIBLE_IDS_EXPIRATION_SECS = 60 * 60 * 24
+
+
+#: The generation of all cached accessible IDs.
+#:
+#: This must be bumped whenever anything affecting which repositories or
+#: review groups a user can access changes.
+access_generation = CacheGeneration('accessible-ids-generation')
+
+
+def get_cached_accessible_ids(name, user, local_site, compute_ids,
+                              extra_key=None):
+    """Return a user's accessible IDs, computing and caching them if needed.
+
+    Args:
+        name (unicode):
+            The name of the type of ID being cached (for instance,
+            ``repositories``).
+
+        user (django.contrib.auth.models.User):
+            The user the IDs are accessible by. This may be an anonymous
+            user.
+
+        local_site (reviewboard.site.models.LocalSite):
+            The :term:`Local Site` the IDs are limited to, if any.
+
+        compute_ids (callable):
+            A function returning the IDs, used if they're not cached.
+
+        extra_key (unicode, optional):
+            Additional state the IDs depend on, such as options used to
+            compute them, which will be included in the cache key.
+
+    Returns:
+        list of int:
+        The accessible IDs.
+    """
+    if local_site is None:
+        local_site_id = ''
+    else:
+        local_site_id = local_site.pk
+
+    key = make_cache_key('accessible-ids:%s:%s:%s:%s:%s' % (
+        access_generation.get(),
+        name,
+        user.pk or '',
+        local_site_id,
+        extra_key or '',
+    ))
+    ids = cache.get(key)
+
+    if ids is None:
+        ids = list(compute_ids())
+        cache.set(key, ids, ACCESSIBLE_IDS_EXPIRATION_SECS)
+
+    return ids
@@ -0,0 +1,219 @@
+"""Access principals for filtering out inaccessible review requests.
+
+A user can access a review request they don't own if they can access its
+repository (if any), and they're either a requested reviewer or can access
+one of the requested review groups (if any).
+
+Principals express both sides of this as flat lists of strings. A review
+request lists the principals that grant access to it, grouped by prefix
+(``owner:``, ``repository:``, and reviewer principals), and a user has a
+principal set listing the principals they hold. The user can access the
+review request if they share its owner principal, or share both a
+repository principal and a reviewer principal with it.
+
+This lets search indexes store a single multi-valued field and filter it
+with a few set intersections, instead of a condition per accessible review
+group. The same principal set also builds the database query used by
+:py:meth:`ReviewRequestManager._query
+<reviewboard.reviews.managers.ReviewRequestManager._query>`, so that the
+two can't drift apart.
+"""
+
+from __future__ import unicode_literals
+
+from django.db.models import Q
+from haystack.query import SQ
+
+
+#: The repository principal for review requests without a private repository.
+ANY_REPOSITORY_PRINCIPAL = 'repository:any'
+
+#: The reviewer principal for review requests any user can review.
+#:
+#: This is used when there are no requested review groups, or when any of
+#: them are public.
+ANY_REVIEWER_PRINCIPAL = 'reviewer:any'
+
+
+def get_review_request_principals(review_request):
+    """Return the principals granting access to a review request.
+
+    The review request's target groups and people are fetched with
+    ``.all()``, so callers preparing many review requests should prefetch
+    them.
+
+    Args:
+        review_request (reviewboard.reviews.models.review_request.
+                        ReviewRequest):
+            The review request.
+
+    Returns:
+        list of unicode:
+        The principals granting access to the review request.
+    """
+    principals = ['owner:%d' % review_request.submitter_id]
+
+    repository = review_request.repository
+
+    if repository is None or repository.public:
+        principals.append(ANY_REPOSITORY_PRINCIPAL)
+    else:
+        principals.append('repository:%d' % repository.pk)
+
+    principals += [
+        'user:%d' % user.pk
+        for user in review_request.target_people.all()
+    ]
+
+    groups = list(review_request.target_groups.all())
+
+    if not groups or any(not group.invite_only for group in groups):
+        principals.append(ANY_REVIEWER_PRINCIPAL)
+    else:
+        principals += [
+            'group:%d' % group.pk
+            for group in groups
+        ]
+
+    return principals
+
+
+def get_user_principals(user, local_site=None):
+    """Return the principal set for a user.
+
+    This is built from the IDs of the private repositories and invite-only
+    review groups the user can access, which are cached until any access
+    lists change. Public repositories and groups are covered by the ``any``
+    principals.
+
+    Args:
+        user (django.contrib.auth.models.User):
+            The user. This must be authenticated.
+
+        local_site (reviewboard.site.models.LocalSite, optional):
+            The :term:`Local Site` being accessed, if any.
+
+    Returns:
+        UserAccessPrincipals:
+        The user's principal set.
+    """
+    from reviewboard.reviews.models import Group
+    from reviewboard.scmtools.models import Repository
+
+    return UserAccessPrincipals(
+        user=user,
+        private_repository_ids=Repository.objects.accessible_private_ids(
+            user,
+            local_site=local_site),
+        invite_only_group_ids=Group.objects.accessible_invite_only_ids(
+            user,
+            local_site=local_site))
+
+
+class UserAccessPrincipals(object):
+    """The principals held by a user.
+
+    Attributes:
+        user (django.contrib.auth.models.User):
+            The user holding the principals.
+
+        private_repository_ids (list of int):
+            The IDs of the private repositories the user can access.
+
+        invite_only_group_ids (list of int):
+            The IDs of the invite-only review groups the user can access.
+    """
+
+    def __init__(self, user, private_repository_ids, invite_only_group_ids):
+        """Initialize the principal set.
+
+        Args:
+            user (django.contrib.auth.models.User):
+                The user holding the principals.
+
+            private_repository_ids (list of int):
+                The IDs of the private repositories the user can access.
+
+            invite_only_group_ids (list of int):
+                The IDs of the invite-only review groups the user can
+                access.
+        """
+        self.user = user
+        self.private_repository_ids = private_repository_ids
+        self.invite_only_group_ids = invite_only_group_ids
+
+    @property
+    def owner_principals(self):
+        """The principals granting access as the owner.
+
+        Type:
+            list of unicode
+        """
+        return ['owner:%d' % self.user.pk]
+
+    @property
+    def repository_principals(self):
+        """The principals granting access to repositories.
+
+        Type:
+            list of unicode
+        """
+        return [ANY_REPOSITORY_PRINCIPAL] + [
+            'repository:%d' % repository_id
+            for repository_id in self.private_repository_ids
+        ]
+
+    @property
+    def reviewer_principals(self):
+        """The principals granting access as a reviewer.
+
+        Type:
+            list of unicode
+        """
+        return [ANY_REVIEWER_PRINCIPAL, 'user:%d' % self.user.pk] + [
+            'group:%d' % group_id
+            for group_id in self.invite_only_group_ids
+        ]
+
+    def get_review_request_query(self):
+        """Return a database query for review requests the user can access.
+
+        Access through public repositories and review groups is checked
+        against the repositories and groups themselves, so only the private
+        ones the user can access are listed in the query.
+
+        Returns:
+            django.db.models.Q:
+            The query for :py:class:`~reviewboard.reviews.models.
+            review_request.ReviewRequest` objects.
+        """
+        return (
+            Q(submitter=self.user) |
+            ((Q(repository=None) |
+              Q(repository__public=True) |
+              Q(repository__in=self.private_repository_ids)) &
+             (Q(target_people=self.user) |
+              Q(target_groups=None) |
+              Q(target_groups__invite_only=False) |
+              Q(target_groups__in=self.invite_only_group_ids)))
+        )
+
+    def get_search_query(self, field_name):
+        """Return a search query for review requests the user can access.
+
+        Args:
+            field_name (unicode):
+                The name of the search index field containing the principals
+                from :py:func:`get_review_request_principals`.
+
+        Returns:
+            haystack.query.SQ:
+            The search query.
+        """
+        lookup = '%s__in' % field_name
+
+        return (
+            SQ(**{lookup: self.owner_principals}) |
+            (SQ(**{lookup: self.repository_principals}) &
+             SQ(**{lookup: self.reviewer_principals}))
+        )
@@ -0,0 +1,314 @@
+"""Signal receivers that can be run in the background.
+
+Receivers connected to signals such as
+:py:data:`~reviewboard.reviews.signals.review_request_published` normally run
+while handling the request that emitted the signal, adding to its latency.
+Receivers whose work doesn't need to be finished before the response (such
+as computing trophies, or talking to other services) can instead be
+connected with :py:func:`connect_deferrable_receiver`.
+
+When the ``defer_signal_receivers`` site configuration setting is enabled,
+calls to these receivers are recorded as
+:py:class:`~reviewboard.reviews.models.DeferredReceiverTask` entries, and run
+by the ``process-deferred-tasks`` management command. Otherwise, they're run
+immediately, as with any other receiver.
+
+Tasks are run at least once. Model instances passed to the signal are
+stored by ID, and loaded again when the task is run, so receivers will see
+the latest state of each object. If a call can't be stored (for instance,
+if it's passed an object that isn't a saved model instance), the receiver
+is run immediately instead.
+"""
+
+from __future__ import unicode_literals
+
+import logging
+import time
+
+from django.apps import apps
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Model
+from django.utils import six
+from django.utils.encoding import force_text
+from djblets.siteconfig.models import SiteConfiguration
+
+from reviewboard.reviews.receiver_stats import (get_receiver_name,
+                                                record_receiver_time)
+
+
+logger = logging.getLogger(__name__)
+
+
+#: The registered deferrable receivers, keyed by name.
+_receivers = {}
+
+
+def _serialize_value(value):
+    """Serialize a signal argument for storage.
+
+    Args:
+        value (object):
+            The value to serialize.
+
+    Returns:
+        object:
+        The JSON-compatible serialized value.
+
+    Raises:
+        ValueError:
+            The value can't be serialized.
+    """
+    if value is None or isinstance(value, (bool, float, six.text_type) +
+                                   six.integer_types):
+        return value
+    elif isinstance(value, Model) and value.pk is not None:
+        return {
+            'model': value._meta.label_lower,
+            'pk': value.pk,
+        }
+    else:
+        raise ValueError('Values of type %s cannot be stored'
+                         % type(value).__name__)
+
+
+def _deserialize_value(value):
+    """Deserialize a stored signal argument.
+
+    Args:
+        value (object):
+            The serialized value.
+
+    Returns:
+        object:
+        The deserialized value.
+
+    Raises:
+        django.core.exceptions.ObjectDoesNotExist:
+            A model instance no longer exists.
+    """
+    if isinstance(value, dict):
+        model = apps.get_model(value['model'])
+
+        return model.objects.get(pk=value['pk'])
+    else:
+        return value
+
+
+class _DeferrableReceiver(object):
+    """A signal receiver that may be run in the background.
+
+    This is connected to the signal in place of the actual receiver.
+    """
+
+    def __init__(self, signal, receiver, name):
+        """Initialize the receiver.
+
+        Args:
+            signal (django.dispatch.Signal):
+                The signal the receiver is connected to.
+
+            receiver (callable):
+                The actual receiver.
+
+            name (unicode):
+                The registered name of the receiver.
+        """
+        self.signal = signal
+        self.receiver = receiver
+        self.receiver_name = name
+
+    def __call__(self, sender, **kwargs):
+        """Handle the signal.
+
+        Args:
+            sender (object):
+                The sender of the signal.
+
+            **kwargs (dict):
+                Keyword arguments passed to the signal.
+
+        Returns:
+            object:
+            The result of the receiver, if run immediately.
+        """
+        kwargs.pop('signal', None)
+        siteconfig = SiteConfiguration.objects.get_current()
+
+        if siteconfig.get('defer_signal_receivers'):
+            from reviewboard.reviews.models import DeferredReceiverTask
+
+            try:
+                if sender is None:
+                    sender_name = ''
+                else:
+                    sender_name = sender._meta.label_lower
+
+                serialized_kwargs = {
+                    key: _serialize_value(value)
+                    for key, value in six.iteritems(kwargs)
+                }
+            except (AttributeError, ValueError) as e:
+                logger.debug('Running signal receiver %s immediately, since '
+                             'its arguments cannot be stored: %s',
+                             self.receiver_name, e)
+            else:
+                DeferredReceiverTask.objects.queue_task(
+                    receiver_name=self.receiver_name,
+                    sender=sender_name,
+                    kwargs=serialized_kwargs)
+
+                return None
+
+        return self.receiver(signal=self.signal, sender=sender, **kwargs)
+
+
+def connect_deferrable_receiver(signal, receiver, sender=None, name=None):
+    """Connect a receiver that may be run in the background.
+
+    The receiver must be safe to run more than once for the same signal, and
+    must not depend on any state that isn't passed to it, since it may run
+    in another process after the signal has been handled.
+
+    Args:
+        signal (django.dispatch.Signal):
+            The signal to connect to.
+
+        receiver (callable):
+            The receiver to connect.
+
+        sender (django.db.models.Model, optional):
+            The model class to receive signals from. If not provided, signals
+            from all senders are received.
+
+        name (unicode, optional):
+            The unique name for the receiver, used to find it again when
+            running deferred calls. This defaults to the receiver's module
+            and function name.
+
+    Returns:
+        unicode:
+        The name the receiver was registered with.
+    """
+    if name is None:
+        name = get_receiver_name(receiver)
+
+    _receivers[name] = _DeferrableReceiver(signal, receiver, name)
+    signal.connect(_receivers[name], sender=sender, weak=False,
+                   dispatch_uid='deferrable:%s' % name)
+
+    return name
+
+
+def disconnect_deferrable_receiver(name, sender=None):
+    """Disconnect a receiver connected by connect_deferrable_receiver.
+
+    Any of its pending calls will fail once they've been retried.
+
+    Args:
+        name (unicode):
+            The name the receiver was registered with.
+
+        sender (django.db.models.Model, optional):
+            The model class the receiver was connected for.
+    """
+    deferrable_receiver = _receivers.pop(name, None)
+
+    if deferrable_receiver is not None:
+        deferrable_receiver.signal.disconnect(
+            sender=sender,
+            dispatch_uid='deferrable:%s' % name)
+
+
+class DeferredReceiverRunner(object):
+    """Runs deferred calls to signal receivers."""
+
+    #: The default number of seconds a worker can spend on a task before
+    #: another worker will run it.
+    DEFAULT_CLAIM_SECS = 5 * 60
+
+    def __init__(self, claim_secs=DEFAULT_CLAIM_SECS):
+        """Initialize the runner.
+
+        Args:
+            claim_secs (int, optional):
+                The number of seconds a worker can spend on a task before
+                another worker will run it.
+        """
+        self.claim_secs = claim_secs
+
+    def process_tasks(self, batch_size):
+        """Run a batch of due tasks.
+
+        Args:
+            batch_size (int):
+                The maximum number of tasks to run.
+
+        Returns:
+            int:
+            The number of tasks processed.
+        """
+        from reviewboard.reviews.models import DeferredReceiverTask
+
+        tasks = DeferredReceiverTask.objects.claim_due(batch_size,
+                                                       self.claim_secs)
+
+        for task in tasks:
+            try:
+                self._run_task(task)
+            except Exception as e:
+                logger.exception('Deferred call to signal receiver %s failed '
+                                 '(attempt %d)',
+                                 task.receiver_name, task.attempts + 1)
+                error = force_text(e) or type(e).__name__
+            else:
+                error = None
+
+            DeferredReceiverTask.objects.record_attempt(task, error=error)
+
+        return len(tasks)
+
+    def _run_task(self, task):
+        """Run a task.
+
+        If an object the signal was about has since been deleted, the
+        receiver isn't run, since there's nothing left for it to do.
+
+        Args:
+            task (reviewboard.reviews.models.DeferredReceiverTask):
+                The task to run.
+
+        Raises:
+            Exception:
+                The task failed. It will be retried.
+        """
+        try:
+            deferrable_receiver = _receivers[task.receiver_name]
+        except KeyError:
+            # This may be provided by an extension that hasn't been loaded
+            # yet, so this is retried.
+            raise LookupError('The receiver is not registered')
+
+        if task.sender:
+            sender = apps.get_model(task.sender)
+        else:
+            sender = None
+
+        try:
+            kwargs = {
+                key: _deserialize_value(value)
+                for key, value in six.iteritems(task.kwargs)
+            }
+        except ObjectDoesNotExist as e:
+            logger.info('Skipping deferred call to signal receiver %s: %s',
+                        task.receiver_name, e)
+            return
+
+        start_time = time.time()
+
+        try:
+            deferrable_receiver.receiver(signal=deferrable_receiver.signal,
+                                         sender=sender,
+                                         **kwargs)
+        finally:
+            record_receiver_time('%s (deferred)' % task.receiver_name,
+                                 time.time() - start_time)
@@ -3,14 +3,20 @@
 from __future__ import unicode_literals
 
 import logging
-from collections import Counter, defaultdict
+from collections import Counter, OrderedDict, defaultdict
 from datetime import datetime
 from itertools import chain
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
 from django.db.models import Q
-from django.utils import six
+from django.template.context import Context
+from django.utils import six, timezone
+from django.utils.safestring import mark_safe
 from django.utils.timezone import utc
-from django.utils.translation import ugettext as _
+from django.utils.translation import get_language, ugettext as _
+from djblets.cache.backend import make_cache_key
 from djblets.registries.registry import (ALREADY_REGISTERED,
                                          ATTRIBUTE_REGISTERED,
                                          NOT_REGISTERED)
@@ -19,6 +25,8 @@ from djblets.util.compat.django.template.loader import render_to_string
 from djblets.util.dates import get_latest_timestamp
 from djblets.util.decorators import cached_property
 
+from reviewboard.admin.read_only import is_site_read_only_for
+from reviewboard.cache_generation import CacheGeneration
 from reviewboard.diffviewer.models import DiffCommit
 from reviewboard.registries.registry import OrderedRegistry
 from reviewboard.reviews.builtin_fields import (CommitListField,
@@ -26,13 +34,30 @@ from reviewboard.reviews.builtin_fields import (CommitListField,
 from reviewboard.reviews.features import status_updates_feature
 from reviewboard.reviews.fields import get_review_request_fieldsets
 from reviewboard.reviews.models import (BaseComment,
-                                        Comment,
                                         FileAttachmentComment,
-                                        GeneralComment,
                                         Review,
                                         ReviewRequest,
+                                        ReviewRequestIssue,
                                         ScreenshotComment,
                                         StatusUpdate)
+from reviewboard.reviews.page_snapshot import (COMMENT_TYPES,
+                                               get_page_snapshot,
+                                               get_page_snapshot_key,
+                                               invalidate_page_snapshot,
+                                               store_page_snapshot)
+
+
+#: The maximum number of comments to load in a single query.
+_MAX_COMMENTS_PER_QUERY = 500
+
+
+#: The generation of the user information shown in rendered entries.
+#:
+#: Entries show the names and avatars of the users involved in them. Rather
+#: than tracking which entries show each user, all cached entry HTML is
+#: versioned by this generation, which must be bumped whenever a user's
+#: account, profile, or avatar settings change.
+entry_users_generation = CacheGeneration('review-request-page-entry-users')
 
 
 class ReviewRequestPageData(object):
@@ -244,6 +269,10 @@ class ReviewRequestPageData(object):
             'verifying': 0,
         }
 
+        # Comments built from the page snapshot that haven't been fully
+        # loaded yet. See _load_comments().
+        self._partial_comments = []
+
         self.status_updates_enabled = status_updates_feature.is_enabled(
             local_site=review_request.local_site)
 
@@ -424,123 +453,7 @@ class ReviewRequestPageData(object):
                 screenshot._comments = []
 
         if self.reviews:
-            review_ids = self.reviews_by_id.keys()
-
-            for model, review_field_name, key, ordering in (
-                (GeneralComment,
-                 'general_comments',
-                 'general_comments',
-                 None),
-                (ScreenshotComment,
-                 'screenshot_comments',
-                 'screenshot_comments',
-                 None),
-                (FileAttachmentComment,
-                 'file_attachment_comments',
-                 'file_attachment_comments',
-                 None),
-                (Comment,
-                 'comments',
-                 'diff_comments',
-                 ('comment__filediff',
-                  'comment__first_line',
-                  'comment__timestamp'))):
-                # Due to mistakes in how we initially made the schema, we have
-                # a ManyToManyField in between comments and reviews, instead of
-                # comments having a ForeignKey to the review. This makes it
-                # difficult to easily go from a comment to a review ID.
-                #
-                # The solution to this is to not query the comment objects, but
-                # rather the through table. This will let us grab the review
-                # and comment in one go, using select_related.
-                related_field = Review._meta.get_field(review_field_name)
-                comment_field_name = related_field.m2m_reverse_field_name()
-                through = related_field.rel.through
-                q = (
-                    through.objects.filter(review__in=review_ids)
-                    .select_related()
-                )
-
-                if ordering:
-                    q = q.order_by(*ordering)
-
-                objs = list(q)
-
-                # We do two passes. One to build a mapping, and one to actually
-                # process comments.
-                comment_map = {}
-
-                for obj in objs:
-                    comment = getattr(obj, comment_field_name)
-                    comment._type = key
-                    comment._replies = []
-                    comment_map[comment.pk] = comment
-
-                for obj in objs:
-                    comment = getattr(obj, comment_field_name)
-
-                    self.all_comments.append(comment)
-
-                    # Short-circuit some object fetches for the comment by
-                    # setting some internal state on them.
-                    assert obj.review_id in self.reviews_by_id
-                    review = self.reviews_by_id[obj.review_id]
-                    comment.review_obj = review
-                    comment._review = review
-                    comment._review_request = self.review_request
-
-                    # If the comment has an associated object (such as a file
-                    # attachment) that we've already fetched, attach it to
-                    # prevent future queries.
-                    if isinstance(comment, FileAttachmentComment):
-                        attachment_id = comment.file_attachment_id
-                        f = self.file_attachments_by_id[attachment_id]
-                        comment.file_attachment = f
-                        f._comments.append(comment)
-
-                        diff_against_id = \
-                            comment.diff_against_file_attachment_id
-
-                        if diff_against_id is not None:
-                            f = self.file_attachments_by_id[diff_against_id]
-                            comment.diff_against_file_attachment = f
-                    elif isinstance(comment, ScreenshotComment):
-                        screenshot = \
-                            self.screenshots_by_id[comment.screenshot_id]
-                        comment.screenshot = screenshot
-                        screenshot._comments.append(comment)
-
-                    # We've hit legacy database cases where there were entries
-                    # that weren't a reply, and were just orphaned. Check and
-                    # ignore anything we don't expect.
-                    is_reply = review.is_reply()
-
-                    if is_reply == comment.is_reply():
-                        if is_reply:
-                            replied_comment = comment_map[comment.reply_to_id]
-                            replied_comment._replies.append(comment)
-
-                            if not review.public:
-                                self.draft_reply_comments.setdefault(
-                                    review.base_reply_to_id, []).append(
-                                        comment)
-                        else:
-                            self.review_comments.setdefault(
-                                review.pk, []).append(comment)
-
-                    if review.public and comment.issue_opened:
-                        status_key = comment.issue_status_to_string(
-                            comment.issue_status)
-
-                        # Both "verifying" states get lumped together in the
-                        # same section in the issue summary table.
-                        if status_key in ('verifying-resolved',
-                                          'verifying-dropped'):
-                            status_key = 'verifying'
-
-                        self.issue_counts[status_key] += 1
-                        self.issue_counts['total'] += 1
-                        self.issues.append(comment)
+            self._populate_comments(self._load_comments())
 
         if self.review_request.created_with_history:
             pks = [diffset.pk for diffset in self.diffsets]
@@ -550,13 +463,24 @@ class ReviewRequestPageData(object):
 
             self.commits_by_diffset_id = DiffCommit.objects.by_diffset_ids(pks)
 
-    def get_entries(self):
+    def get_entries(self, max_loaded_main_entries=None):
         """Return all entries for the review request page.
 
         This will create and populate entries for the page (based on the
         entry classes provided in :py:attr:`entry_classes`). The entries can
         then be injected into the review request page.
 
+        If ``max_loaded_main_entries`` is provided, older collapsed ``main``
+        entries past that number will be marked as deferred (see
+        :py:attr:`BaseReviewRequestPageEntry.deferred`). These are rendered
+        as placeholders, and loaded by the page when needed. Comments only
+        shown in deferred entries won't have all their fields loaded.
+
+        Args:
+            max_loaded_main_entries (int, optional):
+                The maximum number of ``main`` entries to fully load. If
+                ``None`` or 0, all entries will be loaded.
+
         Returns:
             dict:
             A dictionary of entries. This has ``initial`` and ``main`` keys,
@@ -591,11 +515,428 @@ class ReviewRequestPageData(object):
         # displayed in registration order.
         main_entries.sort(key=lambda item: item.added_timestamp)
 
+        if (max_loaded_main_entries and
+            len(main_entries) > max_loaded_main_entries):
+            # Defer the oldest entries, leaving any that are shown expanded
+            # (such as those with open issues or unseen updates).
+            for entry in main_entries[:-max_loaded_main_entries]:
+                if entry.template_name and entry.collapsed:
+                    entry.deferred = True
+
+        if self._partial_comments:
+            # Load the rest of the comments built from the page snapshot,
+            # skipping those only shown in deferred entries.
+            skip_review_ids = set()
+
+            for entry in main_entries:
+                if entry.deferred:
+                    if isinstance(entry, ReviewEntry):
+                        skip_review_ids.add(entry.review.pk)
+                    elif isinstance(entry, StatusUpdatesEntryMixin):
+                        skip_review_ids.update(
+                            update.review_id
+                            for update in entry.status_updates
+                            if update.review_id is not None
+                        )
+
+            if not self._load_partial_comments(skip_review_ids):
+                # The snapshot refers to comments that have since been
+                # deleted. Discard it, and load all the comments directly.
+                invalidate_page_snapshot(self.review_request.pk)
+
+                self._reset_comments()
+                self._populate_comments(self._load_comments(
+                    use_snapshot=False))
+
+                return self.get_entries(
+                    max_loaded_main_entries=max_loaded_main_entries)
+
         return {
             'initial': initial_entries,
             'main': main_entries,
         }
 
+    def _populate_comments(self, comments):
+        """Populate the comment data for the page.
+
+        This links each comment to its review, its file attachment or
+        screenshot, and the comments replying to it, and computes the issue
+        counts.
+
+        Args:
+            comments (list of tuple):
+                The comments to populate, as returned by
+                :py:meth:`_load_comments`.
+        """
+        use_issue_index = ReviewRequestIssue.objects.is_index_built()
+        issue_comments = OrderedDict()
+
+        for key, comment_pairs in comments:
+            # We do two passes. One to build a mapping, and one to actually
+            # process comments.
+            comment_map = {}
+
+            for review_id, comment in comment_pairs:
+                comment._type = key
+                comment._replies = []
+                comment_map[comment.pk] = comment
+
+            for review_id, comment in comment_pairs:
+                self.all_comments.append(comment)
+
+                # Short-circuit some object fetches for the comment by
+                # setting some internal state on them.
+                assert review_id in self.reviews_by_id
+                review = self.reviews_by_id[review_id]
+                comment.review_obj = review
+                comment._review = review
+                comment._review_request = self.review_request
+
+                # If the comment has an associated object (such as a file
+                # attachment) that we've already fetched, attach it to
+                # prevent future queries.
+                if isinstance(comment, FileAttachmentComment):
+                    attachment_id = comment.file_attachment_id
+                    f = self.file_attachments_by_id[attachment_id]
+                    comment.file_attachment = f
+                    f._comments.append(comment)
+
+                    diff_against_id = comment.diff_against_file_attachment_id
+
+                    if diff_against_id is not None:
+                        f = self.file_attachments_by_id[diff_against_id]
+                        comment.diff_against_file_attachment = f
+                elif isinstance(comment, ScreenshotComment):
+                    screenshot = self.screenshots_by_id[comment.screenshot_id]
+                    comment.screenshot = screenshot
+                    screenshot._comments.append(comment)
+
+                # We've hit legacy database cases where there were entries
+                # that weren't a reply, and were just orphaned. Check and
+                # ignore anything we don't expect.
+                is_reply = review.is_reply()
+
+                if is_reply == comment.is_reply():
+                    if is_reply:
+                        replied_comment = comment_map[comment.reply_to_id]
+                        replied_comment._replies.append(comment)
+
+                        if not review.public:
+                            self.draft_reply_comments.setdefault(
+                                review.base_reply_to_id, []).append(comment)
+                    else:
+                        self.review_comments.setdefault(
+                            review.pk, []).append(comment)
+
+                if review.public and comment.issue_opened:
+                    if use_issue_index:
+                        issue_comments[(comment.comment_type,
+                                        comment.pk)] = comment
+                    else:
+                        self._add_issue(comment, comment.issue_status)
+
+        if use_issue_index:
+            self._load_issues(issue_comments)
+
+    def _add_issue(self, comment, status):
+        """Add an issue to the issue summary table.
+
+        Args:
+            comment (reviewboard.reviews.models.base_comment.BaseComment):
+                The comment with the issue.
+
+            status (unicode):
+                The status of the issue.
+        """
+        status_key = BaseComment.issue_status_to_string(status)
+
+        # Both "verifying" states get lumped together in the same section in
+        # the issue summary table.
+        if status_key in ('verifying-resolved', 'verifying-dropped'):
+            status_key = 'verifying'
+
+        self.issue_counts[status_key] += 1
+        self.issue_counts['total'] += 1
+        self.issues.append(comment)
+
+    def _load_issues(self, issue_comments):
+        """Load the issues shown in the issue summary table from the index.
+
+        The issues and their counts come from the review request's issue
+        index (see :py:class:`~reviewboard.reviews.models.
+        review_request_issue.ReviewRequestIssue`), rather than from the
+        issue states of every comment. Comments already loaded for the page
+        are reused, and any others are fetched by ID.
+
+        Args:
+            issue_comments (collections.OrderedDict):
+                A mapping of ``(comment_type, comment_id)`` keys to loaded
+                comments with issues, in display order.
+        """
+        index_infos = OrderedDict(
+            ((comment_type, comment_id), (status, review_id))
+            for comment_type, comment_id, status, review_id in (
+                ReviewRequestIssue.objects
+                .filter(review_request=self.review_request)
+                .order_by('pk')
+                .values_list('comment_type', 'comment_id', 'status',
+                             'review'))
+        )
+
+        for issue_key, comment in six.iteritems(issue_comments):
+            if issue_key in index_infos:
+                self._add_issue(comment, index_infos[issue_key][0])
+
+        missing_keys = [
+            issue_key
+            for issue_key in six.iterkeys(index_infos)
+            if issue_key not in issue_comments
+        ]
+
+        if not missing_keys:
+            return
+
+        # The index has issues on reviews that were published after the
+        # page's reviews were loaded.
+        reviews_by_id = dict(self.reviews_by_id)
+        missing_review_ids = (set(index_infos[issue_key][1]
+                                  for issue_key in missing_keys) -
+                              set(reviews_by_id))
+
+        if missing_review_ids:
+            reviews_by_id.update(
+                (review.pk, review)
+                for review in (Review.objects
+                               .filter(pk__in=missing_review_ids)
+                               .select_related('user', 'user__profile'))
+            )
+
+        for model, review_field_name, key, ordering, attnames in \
+                COMMENT_TYPES:
+            comment_ids = [
+                comment_id
+                for comment_type, comment_id in missing_keys
+                if comment_type == model.comment_type
+            ]
+
+            if comment_ids:
+                for comment in model.objects.filter(pk__in=comment_ids):
+                    status, review_id = \
+                        index_infos[(model.comment_type, comment.pk)]
+                    comment.review_obj = reviews_by_id[review_id]
+                    self._add_issue(comment, status)
+
+    def _load_comments(self, use_snapshot=True):
+        """Load the comments for all reviews on the page.
+
+        Comments on published reviews are built from the page snapshot (see
+        :py:mod:`reviewboard.reviews.page_snapshot`), if one is stored. These
+        only have the fields stored in the snapshot loaded. The rest are
+        loaded by :py:meth:`_load_partial_comments`, once it's known which
+        comments will be shown.
+
+        Comments on any other reviews (such as drafts, or reviews published
+        since the snapshot was stored) are loaded in full. If there's no
+        snapshot stored, all comments are loaded in full, and a new snapshot
+        is stored from them.
+
+        Args:
+            use_snapshot (bool, optional):
+                Whether to use the page snapshot.
+
+        Returns:
+            list of tuple:
+            A list of ``(key, comment_pairs)`` tuples, one for each type of
+            comment. ``comment_pairs`` is a list of ``(review_id, comment)``
+            tuples, in display order.
+        """
+        snapshot = None
+        snapshot_review_ids = set()
+
+        if use_snapshot:
+            # The key must be fetched before the comments are queried, so
+            # that a new snapshot isn't used if they change in the meantime.
+            snapshot_key = get_page_snapshot_key(self.review_request.pk)
+            snapshot = get_page_snapshot(snapshot_key)
+
+            if snapshot is not None:
+                snapshot_review_ids = snapshot['review_ids']
+
+        query_review_ids = [
+            review_id
+            for review_id in six.iterkeys(self.reviews_by_id)
+            if review_id not in snapshot_review_ids
+        ]
+        results = []
+        snapshot_rows = {}
+
+        for model, review_field_name, key, ordering, attnames in \
+                COMMENT_TYPES:
+            comment_pairs = []
+
+            if snapshot is not None:
+                for row in snapshot['comments'][key]:
+                    review_id = row[0]
+
+                    if review_id in self.reviews_by_id:
+                        comment = self._make_partial_comment(model, attnames,
+                                                             row[1:])
+                        self._partial_comments.append(comment)
+                        comment_pairs.append((review_id, comment))
+
+            if query_review_ids:
+                # Due to mistakes in how we initially made the schema, we
+                # have a ManyToManyField in between comments and reviews,
+                # instead of comments having a ForeignKey to the review. This
+                # makes it difficult to easily go from a comment to a review
+                # ID.
+                #
+                # The solution to this is to not query the comment objects,
+                # but rather the through table. This will let us grab the
+                # review and comment in one go, using select_related.
+                related_field = Review._meta.get_field(review_field_name)
+                comment_field_name = related_field.m2m_reverse_field_name()
+                through = related_field.rel.through
+                q = (
+                    through.objects.filter(review__in=query_review_ids)
+                    .select_related()
+                )
+
+                if ordering:
+                    q = q.order_by(*ordering)
+
+                comment_pairs += [
+                    (obj.review_id, getattr(obj, comment_field_name))
+                    for obj in q
+                ]
+
+            if use_snapshot and snapshot is None:
+                snapshot_rows[key] = [
+                    (review_id,) + tuple(
+                        getattr(comment, attname)
+                        for attname in attnames
+                    )
+                    for review_id, comment in comment_pairs
+                    if self.reviews_by_id[review_id].public
+                ]
+
+            results.append((key, comment_pairs))
+
+        if use_snapshot and snapshot is None:
+            store_page_snapshot(
+                snapshot_key,
+                review_ids=[
+                    review.pk
+                    for review in self.reviews
+                    if review.public
+                ],
+                comment_rows=snapshot_rows)
+
+        return results
+
+    def _make_partial_comment(self, model, attnames, values):
+        """Return a comment with only some of its fields loaded.
+
+        The remaining fields are deferred, and will be loaded by
+        :py:meth:`_load_partial_comments`.
+
+        Args:
+            model (type):
+                The comment model.
+
+            attnames (tuple of unicode):
+                The attribute names of the fields being loaded.
+
+            values (tuple):
+                The values of the fields being loaded.
+
+        Returns:
+            reviewboard.reviews.models.base_comment.BaseComment:
+            The comment.
+        """
+        values_by_attname = dict(zip(attnames, values))
+        field_attnames = [
+            field.attname
+            for field in model._meta.concrete_fields
+            if field.attname in values_by_attname
+        ]
+
+        return model.from_db(
+            DEFAULT_DB_ALIAS,
+            field_attnames,
+            [values_by_attname[attname] for attname in field_attnames])
+
+    def _load_partial_comments(self, skip_review_ids):
+        """Load the remaining fields for comments built from the snapshot.
+
+        Comments on the given reviews (and replies to them) will be skipped,
+        unless they're issues or are on file attachments or screenshots,
+        which are shown elsewhere on the page.
+
+        Args:
+            skip_review_ids (set of int):
+                The IDs of reviews whose comments don't need to be loaded.
+
+        Returns:
+            bool:
+            ``True`` if the comments were loaded. ``False`` if any of the
+            comments no longer exist.
+        """
+        comments_by_model = defaultdict(dict)
+        skipped_comments = []
+
+        for comment in self._partial_comments:
+            review = comment.review_obj
+
+            if ((review.pk in skip_review_ids or
+                 review.base_reply_to_id in skip_review_ids) and
+                not comment.issue_opened and
+                not isinstance(comment, (FileAttachmentComment,
+                                         ScreenshotComment))):
+                skipped_comments.append(comment)
+            else:
+                comments_by_model[type(comment)][comment.pk] = comment
+
+        self._partial_comments = skipped_comments
+
+        for model, comments in six.iteritems(comments_by_model):
+            comment_ids = list(comments)
+            attnames = comments[comment_ids[0]].get_deferred_fields()
+
+            for i in range(0, len(comment_ids), _MAX_COMMENTS_PER_QUERY):
+                q = model.objects.filter(
+                    pk__in=comment_ids[i:i + _MAX_COMMENTS_PER_QUERY])
+
+                for loaded_comment in q:
+                    comment = comments.pop(loaded_comment.pk)
+
+                    for attname in attnames:
+                        comment.__dict__[attname] = \
+                            loaded_comment.__dict__[attname]
+
+            if comments:
+                return False
+
+        return True
+
+    def _reset_comments(self):
+        """Reset the comment data for the page."""
+        self.all_comments = []
+        self.review_comments = {}
+        self.draft_reply_comments = {}
+        self.issues = []
+        self.issue_counts = {
+            key: 0
+            for key in self.issue_counts
+        }
+        self._partial_comments = []
+
+        for attachment in self.all_file_attachments:
+            attachment._comments = []
+
+        for screenshot in self.all_screenshots:
+            screenshot._comments = []
+
     def _build_id_map(self, objects):
         """Return an ID map from a list of objects.
 
@@ -634,6 +975,11 @@ class BaseReviewRequestPageEntry(object):
         collapsed (bool):
             Whether the entry should be initially collapsed.
 
+        deferred (bool):
+            Whether loading the entry has been deferred. Deferred entries are
+            rendered as collapsed placeholders, which load the full entry
+            from the server when expanded.
+
         entry_id (unicode):
             The ID of the entry. This will be unique across this type of entry,
             and may refer to a database object ID.
@@ -713,9 +1059,15 @@ class BaseReviewRequestPageEntry(object):
     #: The template to render for the HTML.
     template_name = None
 
+    #: The template to render for the HTML when the entry is deferred.
+    deferred_template_name = 'reviews/entries/deferred.html'
+
     #: The template to render for any JavaScript.
     js_template_name = 'reviews/entries/entry.js'
 
+    #: The template to render for any JavaScript when the entry is deferred.
+    deferred_js_template_name = 'reviews/entries/deferred_entry.js'
+
     #: The name of the JavaScript Backbone.Model class for this entry.
     js_model_class = 'RB.ReviewRequestPage.Entry'
 
@@ -728,6 +1080,15 @@ class BaseReviewRequestPageEntry(object):
     #: the entry, or disabled altogether.
     has_content = True
 
+    #: Whether the rendered HTML for entries of this type can be cached.
+    #:
+    #: If set, :py:meth:`get_render_cache_data` must return data that changes
+    #: whenever the content of the entry changes.
+    render_cache_enabled = False
+
+    #: The number of seconds rendered HTML for an entry is cached.
+    render_cache_expiration = 24 * 60 * 60
+
     @classmethod
     def build_entries(cls, data):
         """Generate entry instances from review request page data.
@@ -793,6 +1154,7 @@ class BaseReviewRequestPageEntry(object):
         self.added_timestamp = added_timestamp
         self.updated_timestamp = updated_timestamp or added_timestamp
         self.avatar_user = avatar_user
+        self.deferred = False
 
     def __repr__(self):
         """Return a string representation for this entry.
@@ -929,45 +1291,106 @@ class BaseReviewRequestPageEntry(object):
         """
         return {}
 
-    def render_to_string(self, request, context):
+    def get_render_cache_data(self):
+        """Return data identifying the current content of the entry.
+
+        This is used to build the cache key for the entry's rendered HTML
+        when :py:attr:`render_cache_enabled` is set. The data describing the
+        viewer (such as the user, language, and collapsed state) is added by
+        :py:meth:`render_to_string`.
+
+        By default, this contains the entry's type, ID, and updated timestamp,
+        along with the entry class's ETag data. Subclasses should extend this
+        with anything else that affects their content.
+
+        Returns:
+            list:
+            A list of values identifying the content of the entry.
+        """
+        return [
+            self.entry_type_id,
+            self.entry_id,
+            self.updated_timestamp,
+            type(self).build_etag_data(self.data),
+        ]
+
+    def render_to_string(self, request, context, include_empty=False):
         """Render the entry to a string.
 
         If the entry doesn't have a template associated, or doesn't have
-        any content (as determined by :py:attr:`has_content`), then this
-        will return an empty string.
+        any content (as determined by :py:attr:`has_content`) and
+        ``include_empty`` is not set, then this will return an empty string.
+
+        If :py:attr:`render_cache_enabled` is set, the rendered HTML will be
+        cached, and reused until the entry's content (see
+        :py:meth:`get_render_cache_data`) or the way it's shown to the user
+        changes.
+
+        If the entry is deferred, :py:attr:`deferred_template_name` will be
+        rendered instead of the full entry, without any extra context.
 
         Args:
             request (django.http.HttpRequest):
                 The HTTP request from the client.
 
-            context (django.template.RequestContext):
+            context (django.template.RequestContext or dict):
                 The existing template context on the page.
 
+            include_empty (bool, optional):
+                Whether to render the entry even if it has no content. This
+                is used when sending updates for entries already on the
+                page.
+
         Returns:
             unicode:
             The resulting HTML for the entry.
         """
-        if not self.template_name or not self.has_content:
+        if (not self.template_name or
+            (not self.has_content and not include_empty)):
             return ''
 
+        if self.deferred:
+            template_name = self.deferred_template_name
+        else:
+            template_name = self.template_name
+
         user = request.user
         last_visited = context.get('last_visited')
-
-        new_context = flatten_context(context)
+        cache_key = None
 
         try:
+            entry_is_new = (
+                user.is_authenticated() and
+                last_visited is not None and
+                self.is_entry_new(last_visited=last_visited,
+                                  user=user))
+            show_entry_statuses_area = (
+                self.entry_pos !=
+                BaseReviewRequestPageEntry.ENTRY_POS_INITIAL)
+
+            if self.render_cache_enabled and not self.deferred:
+                cache_key = self._make_render_cache_key(
+                    user=user,
+                    entry_is_new=entry_is_new,
+                    show_entry_statuses_area=show_entry_statuses_area)
+                html = cache.get(cache_key)
+
+                if html is not None:
+                    return mark_safe(html)
+
+            if isinstance(context, Context):
+                new_context = flatten_context(context)
+            else:
+                new_context = dict(context)
+
             new_context.update({
                 'entry': self,
-                'entry_is_new': (
-                    user.is_authenticated() and
-                    last_visited is not None and
-                    self.is_entry_new(last_visited=last_visited,
-                                      user=user)),
-                'show_entry_statuses_area': (
-                    self.entry_pos !=
-                    BaseReviewRequestPageEntry.ENTRY_POS_INITIAL),
+                'entry_is_new': entry_is_new,
+                'show_entry_statuses_area': show_entry_statuses_area,
             })
-            new_context.update(self.get_extra_context(request, context))
+
+            if not self.deferred:
+                new_context.update(self.get_extra_context(request, context))
         except Exception as e:
             logging.exception('Error generating template context for %s '
                               '(ID=%s): %s',
@@ -975,7 +1398,7 @@ class BaseReviewRequestPageEntry(object):
             return ''
 
         try:
-            return render_to_string(template_name=self.template_name,
+            html = render_to_string(template_name=template_name,
                                     context=new_context,
                                     request=request)
         except Exception as e:
@@ -983,10 +1406,68 @@ class BaseReviewRequestPageEntry(object):
                               self.__class__.__name__, self.entry_id, e)
             return ''
 
+        if cache_key is not None:
+            cache.set(cache_key, six.text_type(html),
+                      self.render_cache_expiration)
+
+        return html
+
     def finalize(self):
         """Perform final computations after all comments have been added."""
         pass
 
+    def _make_render_cache_key(self, user, entry_is_new,
+                               show_entry_statuses_area):
+        """Return the cache key for the entry's rendered HTML.
+
+        Args:
+            user (django.contrib.auth.models.User):
+                The user viewing the page.
+
+            entry_is_new (bool):
+                Whether the entry is shown as new.
+
+            show_entry_statuses_area (bool):
+                Whether the entry's statuses area is shown.
+
+        Returns:
+            unicode:
+            The cache key.
+        """
+        # The content of an entry can depend on the user's permissions,
+        # draft replies, and display settings, so rendered entries are only
+        # shared between anonymous users.
+        if user.is_authenticated():
+            user_id = user.pk
+        else:
+            user_id = ''
+
+        # Entries can show state from the review request itself (such as
+        # file attachment captions), so any change to it will cause entries
+        # to be re-rendered. The same goes for the names and avatars of any
+        # users shown.
+        review_request = self.data.review_request
+
+        key_data = self.get_render_cache_data() + [
+            review_request.pk,
+            review_request.last_updated,
+            review_request.status,
+            user_id,
+            self.collapsed,
+            entry_is_new,
+            show_entry_statuses_area,
+            get_language(),
+            timezone.get_current_timezone_name(),
+            is_site_read_only_for(user),
+            entry_users_generation.get(),
+            settings.AJAX_SERIAL,
+        ]
+
+        return make_cache_key('review-request-page-entry-html:%s' % ':'.join(
+            six.text_type(value)
+            for value in key_data
+        ))
+
 
 class ReviewEntryMixin(object):
     """Mixin to provide functionality for entries containing reviews."""
@@ -1059,6 +1540,40 @@ class ReviewEntryMixin(object):
             'bodyBottom': review.body_bottom,
         }
 
+    def get_review_render_cache_data(self, review, comments):
+        """Return data identifying the current content of a review.
+
+        This covers the state that can change after a review is published
+        (its Ship It, issue states, and replies).
+
+        Args:
+            review (reviewboard.reviews.models.review.Review):
+                The review.
+
+            comments (dict):
+                A dictionary of the review's comments. Each key is a comment
+                type, and each value is a list of comments.
+
+        Returns:
+            list:
+            A list of values identifying the content of the review.
+        """
+        cache_data = [
+            review.pk,
+            review.ship_it,
+            self.data.latest_timestamps_by_review_id.get(review.pk),
+        ]
+
+        for comment_type, type_comments in sorted(six.iteritems(comments)):
+            cache_data += [
+                '%s-%s-%s-%s' % (comment_type, comment.pk,
+                                 comment.issue_status,
+                                 len(comment._replies))
+                for comment in type_comments
+            ]
+
+        return cache_data
+
 
 class DiffCommentsSerializerMixin(object):
     """Mixin to provide diff comment data serialization."""
@@ -1104,6 +1619,7 @@ class StatusUpdatesEntryMixin(DiffCommentsSerializerMixin, ReviewEntryMixin):
 
     needs_reviews = True
     needs_status_updates = True
+    render_cache_enabled = True
 
     @classmethod
     def build_etag_data(cls, data):
@@ -1138,6 +1654,27 @@ class StatusUpdatesEntryMixin(DiffCommentsSerializerMixin, ReviewEntryMixin):
         self.status_updates_by_review = {}
         self.state_counts = Counter()
 
+    def get_render_cache_data(self):
+        """Return data identifying the current content of the entry.
+
+        This includes the state of each status update and its review.
+
+        Returns:
+            list:
+            A list of values identifying the content of the entry.
+        """
+        cache_data = \
+            super(StatusUpdatesEntryMixin, self).get_render_cache_data()
+
+        for update in self.status_updates:
+            cache_data += [update.pk, update.effective_state]
+
+            if update.review_id is not None:
+                cache_data += self.get_review_render_cache_data(
+                    update.review, update.comments)
+
+        return cache_data
+
     def are_status_updates_collapsed(self, status_updates):
         """Return whether all status updates should be collapsed.
 
@@ -1532,6 +2069,7 @@ class ReviewEntry(ReviewEntryMixin, DiffCommentsSerializerMixin,
     entry_type_id = 'review'
 
     needs_reviews = True
+    render_cache_enabled = True
 
     template_name = 'reviews/entries/review.html'
     js_model_class = 'RB.ReviewRequestPage.ReviewEntry'
@@ -1608,6 +2146,20 @@ class ReviewEntry(ReviewEntryMixin, DiffCommentsSerializerMixin,
         """
         return '%s%s' % (self.entry_type_id, self.review.pk)
 
+    def get_render_cache_data(self):
+        """Return data identifying the current content of the entry.
+
+        This includes the state of the review and its comments.
+
+        Returns:
+            list:
+            A list of values identifying the content of the entry.
+        """
+        return (
+            super(ReviewEntry, self).get_render_cache_data() +
+            self.get_review_render_cache_data(self.review, self.comments)
+        )
+
     def is_entry_new(self, last_visited, user, **kwargs):
         """Return whether the entry is new, from the user's perspective.
 
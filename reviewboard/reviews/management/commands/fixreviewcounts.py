@@ -6,6 +6,7 @@ from django.utils.translation import ugettext as _
 from djblets.util.compat.django.core.management.base import BaseCommand
 
 from reviewboard.accounts.admin import fix_review_counts
+from reviewboard.accounts.models import ReviewRequestVisit
 
 
 class Command(BaseCommand):
@@ -22,3 +23,4 @@ class Command(BaseCommand):
                 options are available.
         """
         fix_review_counts()
+        ReviewRequestVisit.objects.reconcile_unread_review_counts()
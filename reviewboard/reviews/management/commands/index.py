@@ -1,8 +1,140 @@
 """Management command to manage the search index."""
 
-from django.core.management import call_command
+from __future__ import unicode_literals
+
+import multiprocessing
+import time
+
+from django.apps import apps
+from django.core.management.base import CommandError
+from django.db import connections as db_connections
+from django.utils import timezone
+from django.utils.encoding import force_text
 from django.utils.translation import ugettext as _
+from djblets.siteconfig.models import SiteConfiguration
 from djblets.util.compat.django.core.management.base import BaseCommand
+from haystack import connection_router, connections
+
+from reviewboard.search import search_backend_registry
+from reviewboard.search.models import SearchIndexProgress
+from reviewboard.search.search_backends.whoosh import WhooshBackend
+
+
+def _get_pk_ranges(queryset, batch_size, after_pk=None):
+    """Yield ranges of object IDs covering a queryset.
+
+    Each range covers at most ``batch_size`` objects.
+
+    Args:
+        queryset (django.db.models.query.QuerySet):
+            The queryset to cover.
+
+        batch_size (int):
+            The maximum number of objects in each range.
+
+        after_pk (int, optional):
+            The ID to start after.
+
+    Yields:
+        tuple:
+        A 2-tuple of the first and last object IDs in each range.
+    """
+    queryset = (
+        queryset
+        .select_related(None)
+        .prefetch_related(None)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+
+    while True:
+        if after_pk is None:
+            batch_queryset = queryset
+        else:
+            batch_queryset = queryset.filter(pk__gt=after_pk)
+
+        pks = list(batch_queryset[:batch_size])
+
+        if not pks:
+            break
+
+        yield pks[0], pks[-1]
+
+        after_pk = pks[-1]
+
+
+def _build_queryset(index, using, since=None):
+    """Return the queryset of objects to index.
+
+    Args:
+        index (haystack.indexes.SearchIndex):
+            The search index.
+
+        using (unicode):
+            The name of the search connection.
+
+        since (datetime.datetime, optional):
+            The earliest updated timestamp of objects to index.
+
+    Returns:
+        django.db.models.query.QuerySet:
+        The queryset of objects to index.
+    """
+    queryset = index.index_queryset(using=using)
+    updated_field = index.get_updated_field()
+
+    if since is not None and updated_field:
+        queryset = queryset.filter(**{
+            '%s__gte' % updated_field: since,
+        })
+
+    return queryset
+
+
+def _init_worker(using):
+    """Initialize a worker process.
+
+    Args:
+        using (unicode):
+            The name of the search connection.
+    """
+    # Make sure the worker doesn't share any search connection state with
+    # the parent process.
+    connections[using].reset_sessions()
+
+
+def _index_range(args):
+    """Index the objects in a range of IDs.
+
+    This is run in worker processes, and must be a module-level function so
+    that it can be passed to them.
+
+    Args:
+        args (tuple):
+            A tuple of the search connection name, model name, first and last
+            object IDs in the range, and the earliest updated timestamp of
+            objects to index (or ``None``).
+
+    Returns:
+        tuple:
+        A 2-tuple of the last object ID in the range and the number of
+        objects indexed.
+    """
+    using, model_name, first_pk, last_pk, since = args
+
+    index = (
+        connections[using].get_unified_index()
+        .get_index(apps.get_model(model_name))
+    )
+    objs = list(
+        _build_queryset(index, using, since)
+        .filter(pk__gte=first_pk, pk__lte=last_pk)
+    )
+
+    if objs:
+        connections[using].get_backend().update(index, objs)
+
+    return last_pk, len(objs)
 
 
 class Command(BaseCommand):
@@ -11,6 +143,9 @@ class Command(BaseCommand):
     help = _('Creates a search index of review requests.')
     requires_model_validation = True
 
+    #: The default number of objects to index in each batch.
+    DEFAULT_BATCH_SIZE = 100
+
     def add_arguments(self, parser):
         """Add arguments to the command.
 
@@ -25,15 +160,249 @@ class Command(BaseCommand):
             default=False,
             help='Rebuild the database index')
 
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            dest='resume',
+            default=False,
+            help=_('Resume an interrupted rebuild of the index.'))
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            dest='workers',
+            default=1,
+            help=_('The number of processes used to index objects. This '
+                   'is not supported for the Whoosh backend. Defaults to '
+                   '%(default)s.'))
+
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            dest='batch_size',
+            default=self.DEFAULT_BATCH_SIZE,
+            help=_('The maximum number of objects to load and index at a '
+                   'time. Defaults to %(default)s.'))
+
     def handle(self, **options):
         """Handle the command.
 
+        Without ``--full``, this indexes objects that were updated since the
+        last successful run (or all objects, if there hasn't been one).
+
+        With ``--full``, the index is cleared and all objects are indexed.
+        Progress is saved after each batch, so that if the rebuild is
+        interrupted, it can be continued with ``--resume``. Once the rebuild
+        is complete, search results are filtered using only the access
+        principals stored for each review request.
+
         Args:
             **options (dict):
                 Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                An invalid option was provided, or there was no rebuild to
+                resume.
         """
-        # Call the appropriate Haystack command to refresh the search index.
-        if options['rebuild']:
-            call_command('rebuild_index', interactive=False)
+        rebuild = options['rebuild']
+        resume = options['resume']
+        self.workers = options['workers']
+        self.batch_size = options['batch_size']
+        self.verbosity = int(options.get('verbosity', 1))
+
+        if self.workers < 1:
+            raise CommandError(_('--workers must be at least 1.'))
+
+        if self.batch_size < 1:
+            raise CommandError(_('--batch-size must be at least 1.'))
+
+        if rebuild and resume:
+            raise CommandError(_('--full and --resume cannot be combined.'))
+
+        backend = search_backend_registry.current_backend
+
+        if (self.workers > 1 and backend is not None and
+            backend.search_backend_id == WhooshBackend.search_backend_id):
+            raise CommandError(
+                _('--workers is not supported for the Whoosh backend.'))
+
+        for using in connection_router.for_write():
+            unified_index = connections[using].get_unified_index()
+            indexes = [
+                unified_index.get_index(model)
+                for model in unified_index.get_indexed_models()
+            ]
+
+            if rebuild:
+                self._start_rebuild(using, indexes)
+            elif resume:
+                if not SearchIndexProgress.objects.filter(
+                        connection=using,
+                        rebuild_started__isnull=False).exists():
+                    raise CommandError(
+                        _('There is no interrupted rebuild to resume.'))
+
+            for index in indexes:
+                self._index_model(using, index, resume or rebuild)
+
+        if rebuild or resume:
+            # Every review request has now been indexed with its access
+            # principals, so search no longer needs to fall back on the
+            # older access fields.
+            siteconfig = SiteConfiguration.objects.get_current()
+            siteconfig.set('search_access_principals_indexed', True)
+            siteconfig.save()
+
+    def _start_rebuild(self, using, indexes):
+        """Start a rebuild of the index.
+
+        This will clear the index and record the start of the rebuild for
+        each model.
+
+        Args:
+            using (unicode):
+                The name of the search connection.
+
+            indexes (list of haystack.indexes.SearchIndex):
+                The indexes being rebuilt.
+        """
+        now = timezone.now()
+
+        connections[using].get_backend().clear()
+
+        for index in indexes:
+            SearchIndexProgress.objects.update_or_create(
+                connection=using,
+                model_name=index.get_model()._meta.label_lower,
+                defaults={
+                    'rebuild_started': now,
+                    'rebuild_last_pk': None,
+                })
+
+    def _index_model(self, using, index, rebuild):
+        """Index the objects for a model.
+
+        Args:
+            using (unicode):
+                The name of the search connection.
+
+            index (haystack.indexes.SearchIndex):
+                The search index for the model.
+
+            rebuild (bool):
+                Whether this is part of a rebuild of the index.
+        """
+        model = index.get_model()
+        model_name = model._meta.label_lower
+        progress = SearchIndexProgress.objects.get_or_create(
+            connection=using,
+            model_name=model_name)[0]
+
+        if rebuild:
+            if progress.rebuild_started is None:
+                # This model was already finished in the rebuild being
+                # resumed.
+                return
+
+            started = progress.rebuild_started
+            since = None
+            after_pk = progress.rebuild_last_pk
+        else:
+            started = timezone.now()
+            since = progress.last_indexed
+            after_pk = None
+
+        verbose_name = force_text(model._meta.verbose_name_plural)
+        queryset = _build_queryset(index, using, since)
+        tasks = [
+            (using, model_name, first_pk, last_pk, since)
+            for first_pk, last_pk in _get_pk_ranges(queryset, self.batch_size,
+                                                    after_pk)
+        ]
+
+        if self.verbosity >= 1:
+            self.stdout.write(_('Indexing %s...') % verbose_name)
+
+        start_time = time.time()
+        num_indexed = 0
+
+        if self.workers > 1:
+            # Worker processes must open their own database connections.
+            db_connections.close_all()
+
+            pool = multiprocessing.Pool(self.workers,
+                                        initializer=_init_worker,
+                                        initargs=(using,))
+
+            try:
+                # Results are returned in order, so the saved progress
+                # always covers every range before it.
+                results = pool.imap(_index_range, tasks)
+
+                for last_pk, count in results:
+                    num_indexed += count
+                    self._save_progress(progress, rebuild, last_pk,
+                                        num_indexed, start_time)
+            finally:
+                pool.terminate()
+                pool.join()
         else:
-            call_command('update_index')
+            for task in tasks:
+                last_pk, count = _index_range(task)
+                num_indexed += count
+                self._save_progress(progress, rebuild, last_pk, num_indexed,
+                                    start_time)
+
+        progress.rebuild_started = None
+        progress.rebuild_last_pk = None
+        progress.last_indexed = started
+        progress.save(update_fields=('rebuild_started', 'rebuild_last_pk',
+                                     'last_indexed'))
+
+        if self.verbosity >= 1:
+            elapsed = time.time() - start_time
+
+            self.stdout.write(
+                _('Indexed %(count)d %(name)s in %(secs).1f seconds '
+                  '(%(rate).1f per second).')
+                % {
+                    'count': num_indexed,
+                    'name': verbose_name,
+                    'secs': elapsed,
+                    'rate': num_indexed / max(elapsed, 0.001),
+                })
+
+    def _save_progress(self, progress, rebuild, last_pk, num_indexed,
+                       start_time):
+        """Save progress after indexing a batch of objects.
+
+        Args:
+            progress (reviewboard.search.models.SearchIndexProgress):
+                The progress for the model.
+
+            rebuild (bool):
+                Whether this is part of a rebuild of the index.
+
+            last_pk (int):
+                The last object ID in the batch.
+
+            num_indexed (int):
+                The number of objects indexed so far.
+
+            start_time (float):
+                When indexing of the model started.
+        """
+        if rebuild:
+            progress.rebuild_last_pk = last_pk
+            progress.save(update_fields=('rebuild_last_pk',))
+
+        if self.verbosity >= 2:
+            elapsed = time.time() - start_time
+
+            self.stdout.write(
+                _('  Indexed %(count)d so far (%(rate).1f per second).')
+                % {
+                    'count': num_indexed,
+                    'rate': num_indexed / max(elapsed, 0.001),
+                })
@@ -0,0 +1,213 @@
+"""Management command to run deferred signal receivers."""
+
+from __future__ import unicode_literals
+
+import multiprocessing
+import time
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.core.management.base import CommandError
+from django.db import connections
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.reviews.deferred_receivers import DeferredReceiverRunner
+from reviewboard.reviews.models import DeferredReceiverTask
+from reviewboard.reviews.receiver_stats import get_receiver_stats
+
+
+class Command(BaseCommand):
+    """Management command to run deferred signal receivers."""
+
+    help = _('Runs signal receivers deferred when running deferrable tasks '
+             'in the background is enabled, retrying failed tasks.')
+
+    #: The default maximum number of tasks to process at a time.
+    DEFAULT_BATCH_SIZE = 100
+
+    #: The default number of days to keep failed tasks.
+    DEFAULT_KEEP_DAYS = 7
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            default=False,
+            dest='loop',
+            help=_('Keep running, checking for new tasks every second.'))
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            dest='workers',
+            help=_('The number of worker processes to run tasks in. '
+                   'Defaults to %(default)s.'))
+
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=self.DEFAULT_BATCH_SIZE,
+            dest='batch_size',
+            help=_('The maximum number of tasks for each worker to process '
+                   'at a time. Defaults to %(default)s.'))
+
+        parser.add_argument(
+            '--timeout',
+            type=int,
+            default=DeferredReceiverRunner.DEFAULT_CLAIM_SECS,
+            dest='timeout',
+            metavar='SECONDS',
+            help=_('The number of seconds a worker can spend on a task '
+                   'before it is run again by another worker. Defaults to '
+                   '%(default)s.'))
+
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=self.DEFAULT_KEEP_DAYS,
+            dest='keep_days',
+            metavar='DAYS',
+            help=_('The number of days to keep tasks that have failed. '
+                   'Defaults to %(default)s.'))
+
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            default=False,
+            dest='stats',
+            help=_('Show the time spent in each timed signal receiver, '
+                   'and exit.'))
+
+    def handle(self, *args, **options):
+        """Handle the command.
+
+        Args:
+            *args (tuple, unused):
+                Positional arguments passed to the command.
+
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                An invalid option was provided.
+        """
+        if options['stats']:
+            self._show_stats()
+            return
+
+        workers = options['workers']
+        batch_size = options['batch_size']
+        timeout = options['timeout']
+        keep_days = options['keep_days']
+
+        if workers < 1:
+            raise CommandError(_('--workers must be at least 1.'))
+
+        if batch_size < 1:
+            raise CommandError(_('--batch-size must be at least 1.'))
+
+        if timeout < 1:
+            raise CommandError(_('--timeout must be at least 1.'))
+
+        if keep_days < 0:
+            raise CommandError(_('--keep-days cannot be negative.'))
+
+        if workers == 1:
+            self._run_worker(batch_size=batch_size,
+                             timeout=timeout,
+                             keep_days=keep_days,
+                             loop=options['loop'])
+            return
+
+        # Connections can't be shared with the worker processes, so close
+        # them before forking. Each process will open its own.
+        connections.close_all()
+
+        for cache in caches.all():
+            cache.close()
+
+        processes = [
+            multiprocessing.Process(
+                target=self._run_worker,
+                kwargs={
+                    'batch_size': batch_size,
+                    'timeout': timeout,
+                    'keep_days': keep_days if i == 0 else None,
+                    'loop': options['loop'],
+                })
+            for i in range(workers)
+        ]
+
+        for process in processes:
+            process.start()
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+
+    def _run_worker(self, batch_size, timeout, keep_days, loop):
+        """Run deferred tasks.
+
+        Args:
+            batch_size (int):
+                The maximum number of tasks to process at a time.
+
+            timeout (int):
+                The number of seconds to claim each task for.
+
+            keep_days (int):
+                The number of days to keep failed tasks. If ``None``, this
+                worker won't prune old tasks.
+
+            loop (bool):
+                Whether to keep running, checking for new tasks every second.
+        """
+        runner = DeferredReceiverRunner(claim_secs=timeout)
+
+        while True:
+            num_processed = 0
+
+            while True:
+                num_tasks = runner.process_tasks(batch_size)
+                num_processed += num_tasks
+
+                if num_tasks < batch_size:
+                    break
+
+            if num_processed:
+                self.stdout.write(_('Processed %d deferred tasks.')
+                                  % num_processed)
+
+            if keep_days is not None:
+                DeferredReceiverTask.objects.prune(timedelta(days=keep_days))
+
+            if not loop:
+                break
+
+            time.sleep(1)
+
+    def _show_stats(self):
+        """Show the time spent in each timed signal receiver."""
+        stats = get_receiver_stats()
+
+        if not stats:
+            self.stdout.write(_('No signal receivers have been timed.'))
+            return
+
+        for stat in stats:
+            self.stdout.write(
+                _('%(name)s: %(calls)d calls, %(total_ms)d ms total, '
+                  '%(average_ms).1f ms average')
+                % stat)
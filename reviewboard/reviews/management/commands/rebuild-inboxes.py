@@ -0,0 +1,106 @@
+"""Management command to rebuild or check review request inbox entries."""
+
+from __future__ import unicode_literals
+
+from django.core.management.base import CommandError
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.reviews.models import ReviewRequest, ReviewRequestInboxEntry
+
+
+class Command(BaseCommand):
+    """Management command to rebuild or check review request inbox entries.
+    """
+
+    help = _('Rebuilds the incoming review request entries used for users\' '
+             'dashboards, or checks them for inconsistencies.')
+
+    #: The number of review requests to process at a time.
+    BATCH_SIZE = 500
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            'review_request_ids',
+            metavar='REVIEW_REQUEST_ID',
+            nargs='*',
+            help=_('Specific review request IDs to rebuild or check. By '
+                   'default, all review requests are processed.'))
+
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            default=False,
+            dest='check',
+            help=_('Report inconsistent entries without changing them.'))
+
+    def handle(self, *args, **options):
+        """Handle the command.
+
+        Args:
+            *args (tuple, unused):
+                Positional arguments passed to the command.
+
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                An invalid review request ID was provided, or inconsistent
+                entries were found when using ``--check``.
+        """
+        check = options['check']
+
+        try:
+            review_request_ids = [
+                int(review_request_id)
+                for review_request_id in options['review_request_ids']
+            ]
+        except ValueError as e:
+            raise CommandError(_('Invalid review request ID: %s') % e)
+
+        if not review_request_ids:
+            review_request_ids = list(
+                ReviewRequest.objects.order_by('pk')
+                .values_list('pk', flat=True))
+
+        num_changes = 0
+        inconsistencies = []
+
+        for i in range(0, len(review_request_ids), self.BATCH_SIZE):
+            batch_ids = review_request_ids[i:i + self.BATCH_SIZE]
+
+            if check:
+                inconsistencies += \
+                    ReviewRequestInboxEntry.objects.find_inconsistencies(
+                        review_request_ids=batch_ids)
+            else:
+                num_changes += ReviewRequestInboxEntry.objects.update_entries(
+                    review_request_ids=batch_ids)
+
+        if check:
+            for review_request_id, user_id in inconsistencies:
+                self.stdout.write(
+                    _('Inconsistent entry for review request '
+                      '%(review_request_id)s and user %(user_id)s')
+                    % {
+                        'review_request_id': review_request_id,
+                        'user_id': user_id,
+                    })
+
+            if inconsistencies:
+                raise CommandError(
+                    _('Found %d inconsistent inbox entries. Run this command '
+                      'without --check to fix them.')
+                    % len(inconsistencies))
+
+            self.stdout.write(_('Inbox entries are consistent.'))
+        else:
+            self.stdout.write(_('Rebuilt inbox entries. %d entries changed.')
+                              % num_changes)
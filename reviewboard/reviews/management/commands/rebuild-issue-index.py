@@ -0,0 +1,84 @@
+"""Management command to rebuild the index of issues on review requests."""
+
+from __future__ import unicode_literals
+
+from django.core.management.base import CommandError
+from django.utils.translation import ugettext as _
+from djblets.siteconfig.models import SiteConfiguration
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.reviews.models import ReviewRequest, ReviewRequestIssue
+
+
+class Command(BaseCommand):
+    """Management command to rebuild the index of issues on review requests.
+
+    This must be run once for all review requests after upgrading, before
+    the index is used for the issue summary table and the API's issue count
+    filters.
+    """
+
+    help = _('Rebuilds the index of issues used for the issue summary table '
+             'and issue count queries.')
+
+    #: The number of review requests to process at a time.
+    BATCH_SIZE = 500
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            'review_request_ids',
+            metavar='REVIEW_REQUEST_ID',
+            nargs='*',
+            help=_('Specific review request IDs to rebuild. By default, all '
+                   'review requests are processed, and the index is enabled '
+                   'once complete.'))
+
+    def handle(self, *args, **options):
+        """Handle the command.
+
+        Args:
+            *args (tuple, unused):
+                Positional arguments passed to the command.
+
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                An invalid review request ID was provided.
+        """
+        try:
+            review_request_ids = [
+                int(review_request_id)
+                for review_request_id in options['review_request_ids']
+            ]
+        except ValueError as e:
+            raise CommandError(_('Invalid review request ID: %s') % e)
+
+        rebuild_all = not review_request_ids
+
+        if rebuild_all:
+            review_request_ids = list(
+                ReviewRequest.objects.order_by('pk')
+                .values_list('pk', flat=True))
+
+        num_issues = 0
+
+        for i in range(0, len(review_request_ids), self.BATCH_SIZE):
+            num_issues += ReviewRequestIssue.objects.rebuild(
+                review_request_ids[i:i + self.BATCH_SIZE])
+
+        if rebuild_all:
+            siteconfig = SiteConfiguration.objects.get_current()
+            siteconfig.set(
+                ReviewRequestIssue.objects.INDEX_BUILT_SITECONFIG_KEY, True)
+            siteconfig.save()
+
+        self.stdout.write(_('Rebuilt the issue index. %d issues indexed.')
+                          % num_issues)
@@ -1,16 +1,21 @@
 from __future__ import unicode_literals
 
 import logging
+from collections import defaultdict
+from datetime import timedelta
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import connections, router, transaction
-from django.db.models import Manager, Q
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Count, Manager, Q
 from django.db.models.query import QuerySet
-from django.utils import six
+from django.utils import six, timezone
 from djblets.db.managers import ConcurrencyManager
+from djblets.siteconfig.models import SiteConfiguration
 
 from reviewboard.diffviewer.models import DiffSetHistory
+from reviewboard.reviews.access_cache import get_cached_accessible_ids
+from reviewboard.reviews.access_principals import get_user_principals
 from reviewboard.scmtools.errors import ChangeNumberInUseError
 from reviewboard.scmtools.models import Repository
 
@@ -34,6 +39,133 @@ class DefaultReviewerManager(Manager):
                 (local_site and local_site.is_mutable_by(user)))
 
 
+class DeferredReceiverTaskManager(Manager):
+    """A manager for DeferredReceiverTask models.
+
+    This provides functions for queueing tasks, claiming them to run, and
+    recording the results.
+    """
+
+    #: The maximum number of attempts to make to run a task.
+    MAX_ATTEMPTS = 5
+
+    #: The number of seconds to wait before first retrying a task.
+    #:
+    #: This doubles for each later retry, up to :py:attr:`MAX_RETRY_DELAY`.
+    RETRY_DELAY = 30
+
+    #: The maximum number of seconds to wait before retrying a task.
+    MAX_RETRY_DELAY = 60 * 60
+
+    def queue_task(self, receiver_name, sender, kwargs):
+        """Queue a call to a receiver.
+
+        Args:
+            receiver_name (unicode):
+                The registered name of the receiver.
+
+            sender (unicode):
+                The model that sent the signal, in ``app_label.model_name``
+                form, or an empty string.
+
+            kwargs (dict):
+                The serialized keyword arguments for the receiver.
+
+        Returns:
+            reviewboard.reviews.models.DeferredReceiverTask:
+            The queued task.
+        """
+        return self.create(receiver_name=receiver_name,
+                           sender=sender,
+                           kwargs=kwargs)
+
+    def claim_due(self, batch_size, claim_secs):
+        """Claim pending tasks that are due to be run.
+
+        Claimed tasks won't be returned by other calls until the claim
+        expires, so several workers can run tasks at once. If a task is not
+        recorded as run before then, it will be claimed again.
+
+        Tasks are returned in the order they were queued.
+
+        Args:
+            batch_size (int):
+                The maximum number of tasks to claim.
+
+            claim_secs (int):
+                The number of seconds to hold the claim for.
+
+        Returns:
+            list of reviewboard.reviews.models.DeferredReceiverTask:
+            The claimed tasks.
+        """
+        now = timezone.now()
+        claimed_until = now + timedelta(seconds=claim_secs)
+        tasks = []
+
+        for task in (self.filter(status=self.model.STATUS_PENDING,
+                                 next_attempt__lte=now)
+                     .order_by('pk')[:batch_size]):
+            # Only one worker can move the task's next attempt forward, so
+            # this fails if another worker claimed it first.
+            if self.filter(pk=task.pk,
+                           next_attempt=task.next_attempt).update(
+                               next_attempt=claimed_until):
+                task.next_attempt = claimed_until
+                tasks.append(task)
+
+        return tasks
+
+    def record_attempt(self, task, error=None):
+        """Record the result of running a task.
+
+        Successful tasks are removed from the queue. Failed tasks are
+        rescheduled with exponential backoff, until :py:attr:`MAX_ATTEMPTS`
+        have been made.
+
+        Args:
+            task (reviewboard.reviews.models.DeferredReceiverTask):
+                The task that was run.
+
+            error (unicode, optional):
+                The error from running the task, if it failed.
+        """
+        if error is None:
+            task.delete()
+            return
+
+        now = timezone.now()
+
+        task.attempts += 1
+        task.last_attempt = now
+        task.error = error
+
+        if task.attempts < self.MAX_ATTEMPTS:
+            task.next_attempt = now + timedelta(seconds=min(
+                self.RETRY_DELAY * 2 ** (task.attempts - 1),
+                self.MAX_RETRY_DELAY))
+        else:
+            task.status = self.model.STATUS_FAILED
+
+        task.save(update_fields=('attempts', 'last_attempt', 'error',
+                                 'status', 'next_attempt'))
+
+    def prune(self, max_age):
+        """Delete old tasks that failed.
+
+        Args:
+            max_age (datetime.timedelta):
+                The age of the oldest failed tasks to keep.
+
+        Returns:
+            int:
+            The number of tasks deleted.
+        """
+        return self.filter(
+            status=self.model.STATUS_FAILED,
+            timestamp__lt=timezone.now() - max_age).delete()[0]
+
+
 class ReviewGroupManager(Manager):
     """A manager for Group models."""
 
@@ -121,6 +253,45 @@ class ReviewGroupManager(Manager):
         """
         return self.accessible(*args, **kwargs).values_list('pk', flat=True)
 
+    def accessible_invite_only_ids(self, user, local_site=None):
+        """Return IDs of invite-only groups accessible by the given user.
+
+        Any user can access groups that aren't invite-only, so only the
+        invite-only groups are listed. This keeps the list small enough to
+        cache and to use directly in queries. The IDs are cached until the
+        access lists of any review groups change.
+
+        Args:
+            user (django.contrib.auth.models.User):
+                The user that must have access to any returned groups.
+
+            local_site (reviewboard.site.models.LocalSite, optional):
+                A specific :term:`Local Site` that the groups must be
+                associated with.
+
+        Returns:
+            list of int:
+            The list of IDs.
+        """
+        # Access to invite-only groups depends on a permission, which isn't
+        # covered by the access generation, so it's part of the key instead.
+        can_view_invite_only = (
+            user.is_superuser or
+            user.has_perm('reviews.can_view_invite_only_groups', local_site))
+
+        return get_cached_accessible_ids(
+            'invite-only-groups',
+            user,
+            local_site,
+            lambda: (
+                self.accessible(user,
+                                visible_only=False,
+                                local_site=local_site)
+                .filter(invite_only=True)
+                .values_list('pk', flat=True)
+            ),
+            extra_key='%d' % can_view_invite_only)
+
     def can_create(self, user, local_site=None):
         """Returns whether the user can create groups."""
         return (user.is_superuser or
@@ -129,23 +300,38 @@ class ReviewGroupManager(Manager):
 
 class ReviewRequestQuerySet(QuerySet):
     def with_counts(self, user):
+        """Return a queryset including the new review counts for a user.
+
+        Each review request will have a ``new_review_count`` attribute,
+        containing the number of reviews and replies published by other users
+        since the user last visited it. This is read from the counter
+        maintained on the user's
+        :py:class:`~reviewboard.accounts.models.ReviewRequestVisit`, rather
+        than counted from the reviews.
+
+        Args:
+            user (django.contrib.auth.models.User):
+                The user to include counts for.
+
+        Returns:
+            ReviewRequestQuerySet:
+            The new queryset. If the user is anonymous, this will be the
+            original queryset.
+        """
         queryset = self
 
         if user and user.is_authenticated():
             select_dict = {}
 
             select_dict['new_review_count'] = """
-                SELECT COUNT(*)
-                  FROM reviews_review, accounts_reviewrequestvisit
-                  WHERE reviews_review.public
-                    AND reviews_review.review_request_id =
-                        reviews_reviewrequest.id
-                    AND accounts_reviewrequestvisit.review_request_id =
-                        reviews_reviewrequest.id
-                    AND accounts_reviewrequestvisit.user_id = %(user_id)s
-                    AND reviews_review.timestamp >
-                        accounts_reviewrequestvisit.timestamp
-                    AND reviews_review.user_id != %(user_id)s
+                COALESCE(
+                  (SELECT accounts_reviewrequestvisit.unread_review_count
+                     FROM accounts_reviewrequestvisit
+                     WHERE accounts_reviewrequestvisit.review_request_id =
+                           reviews_reviewrequest.id
+                       AND accounts_reviewrequestvisit.user_id =
+                           %(user_id)s),
+                  0)
             """ % {
                 'user_id': six.text_type(user.id)
             }
@@ -358,10 +544,8 @@ class ReviewRequestManager(ConcurrencyManager):
         This is meant to be passed as an extra_query to
         ReviewRequest.objects.public().
         """
-        query_user = self._get_query_user(user_or_username)
-        groups = list(query_user.review_groups.values_list('pk', flat=True))
-
-        return Q(target_groups__in=groups)
+        return self._get_inbox_query(user_or_username,
+                                     targeted_by_group=True)
 
     def get_to_user_directly_query(self, user_or_username):
         """Returns the query targetting a user directly.
@@ -372,17 +556,9 @@ class ReviewRequestManager(ConcurrencyManager):
         This is meant to be passed as an extra_query to
         ReviewRequest.objects.public().
         """
-        query_user = self._get_query_user(user_or_username)
-
-        query = Q(target_people=query_user)
-
-        try:
-            profile = query_user.get_profile()
-            query = query | Q(starred_by=profile)
-        except ObjectDoesNotExist:
-            pass
-
-        return query
+        return self._get_inbox_query(
+            user_or_username,
+            Q(targeted_directly=True) | Q(starred=True))
 
     def get_to_user_query(self, user_or_username):
         """Returns the query targetting a user indirectly.
@@ -394,18 +570,7 @@ class ReviewRequestManager(ConcurrencyManager):
         This is meant to be passed as an extra_query to
         ReviewRequest.objects.public().
         """
-        query_user = self._get_query_user(user_or_username)
-        groups = list(query_user.review_groups.values_list('pk', flat=True))
-
-        query = Q(target_people=query_user) | Q(target_groups__in=groups)
-
-        try:
-            profile = query_user.get_profile()
-            query = query | Q(starred_by=profile)
-        except ObjectDoesNotExist:
-            pass
-
-        return query
+        return self._get_inbox_query(user_or_username)
 
     def get_from_user_query(self, user_or_username):
         """Returns the query for review requests created by a user.
@@ -495,8 +660,6 @@ class ReviewRequestManager(ConcurrencyManager):
                extra_query=None, local_site=None, filter_private=False,
                show_inactive=False, show_all_unpublished=False,
                show_all_local_sites=False):
-        from reviewboard.reviews.models import Group
-
         is_authenticated = (user is not None and user.is_authenticated())
 
         if show_all_unpublished:
@@ -522,28 +685,15 @@ class ReviewRequestManager(ConcurrencyManager):
             query = query & extra_query
 
         if filter_private and (not user or not user.is_superuser):
-            # This must always be kept in sync with RBSearchForm.search.
-            repo_query = Q(repository=None)
-            group_query = Q(target_groups=None)
-
             if is_authenticated:
-                accessible_repo_ids = \
-                    Repository.objects.accessible_ids(user, visible_only=False,
-                                                      local_site=local_site)
-                accessible_group_ids = \
-                    Group.objects.accessible(user, visible_only=False,
-                                             local_site=local_site)
-
-                repo_query = repo_query | Q(repository__in=accessible_repo_ids)
-                group_query = (group_query |
-                               Q(target_groups__in=accessible_group_ids))
-
-                query = query & (Q(submitter=user) |
-                                 (repo_query &
-                                  (Q(target_people=user) | group_query)))
+                # This shares its access rules with RBSearchForm.search.
+                principals = get_user_principals(user, local_site=local_site)
+                query = query & principals.get_review_request_query()
             else:
-                repo_query |= Q(repository__public=True)
-                group_query |= Q(target_groups__invite_only=False)
+                repo_query = (Q(repository=None) |
+                              Q(repository__public=True))
+                group_query = (Q(target_groups=None) |
+                               Q(target_groups__invite_only=False))
 
                 query = query & repo_query & group_query
 
@@ -554,6 +704,38 @@ class ReviewRequestManager(ConcurrencyManager):
 
         return query
 
+    def _get_inbox_query(self, user_or_username, *args, **kwargs):
+        """Return a query for review requests in a user's inbox.
+
+        This looks up review requests through the user's
+        :py:class:`~reviewboard.reviews.models.review_request_inbox_entry.
+        ReviewRequestInboxEntry` entries, rather than joining against the
+        review requests' targets and the user's groups and stars.
+
+        Args:
+            user_or_username (django.contrib.auth.models.User or unicode):
+                The user object or username to query for.
+
+            *args (tuple):
+                Additional queries for filtering the entries.
+
+            **kwargs (dict):
+                Additional arguments for filtering the entries.
+
+        Returns:
+            django.db.models.Q:
+            The query for the review requests.
+        """
+        from reviewboard.reviews.models import ReviewRequestInboxEntry
+
+        query_user = self._get_query_user(user_or_username)
+
+        return Q(pk__in=(
+            ReviewRequestInboxEntry.objects
+            .filter(user=query_user, *args, **kwargs)
+            .values('review_request')
+        ))
+
     def _get_query_user(self, user_or_username):
         """Returns a User object, given a possible User or username."""
         if isinstance(user_or_username, User):
@@ -737,3 +919,462 @@ class ReviewManager(ConcurrencyManager):
         query = self.filter(query).distinct()
 
         return query
+
+
+class ReviewRequestInboxEntryManager(Manager):
+    """A manager for ReviewRequestInboxEntry models.
+
+    This keeps users' incoming review request entries in sync with the
+    review requests' target people and groups, the groups' members, and the
+    users' starred review requests.
+    """
+
+    #: The flags on an entry, in the order they're computed.
+    FLAG_FIELDS = ('targeted_directly', 'targeted_by_group', 'starred')
+
+    #: The maximum number of attempts made to update entries.
+    #:
+    #: Updates are retried if another process updated the same entries at
+    #: the same time.
+    MAX_UPDATE_ATTEMPTS = 3
+
+    def update_entries(self, review_request_ids=None, user_ids=None):
+        """Update entries to match the current targets and stars.
+
+        Only entries for the provided review requests and users are
+        updated. At least one of these should be provided, unless all
+        entries are being rebuilt.
+
+        Args:
+            review_request_ids (list of int, optional):
+                The IDs of the review requests to update entries for.
+
+            user_ids (list of int, optional):
+                The IDs of the users to update entries for.
+
+        Returns:
+            int:
+            The number of entries that were created, updated, or deleted.
+        """
+        for attempt in range(self.MAX_UPDATE_ATTEMPTS):
+            to_create, to_update, to_delete = self._diff_entries(
+                review_request_ids=review_request_ids,
+                user_ids=user_ids)
+
+            num_changes = (len(to_create) + len(to_delete) +
+                           sum(len(pks) for pks in six.itervalues(to_update)))
+
+            if num_changes == 0:
+                return 0
+
+            try:
+                with transaction.atomic():
+                    if to_delete:
+                        self.filter(pk__in=to_delete).delete()
+
+                    for flags, pks in six.iteritems(to_update):
+                        self.filter(pk__in=pks).update(
+                            **dict(zip(self.FLAG_FIELDS, flags)))
+
+                    if to_create:
+                        self.bulk_create(to_create)
+
+                return num_changes
+            except IntegrityError:
+                # Another process created some of the same entries at the
+                # same time. Compare against its results and try again.
+                logging.debug('Inbox entries for review requests %r and '
+                              'users %r were updated concurrently.',
+                              review_request_ids, user_ids)
+
+        logging.warning('Unable to update inbox entries for review requests '
+                        '%r and users %r after %d attempts.',
+                        review_request_ids, user_ids,
+                        self.MAX_UPDATE_ATTEMPTS)
+
+        return 0
+
+    def find_inconsistencies(self, review_request_ids=None, user_ids=None):
+        """Return entries that don't match the current targets and stars.
+
+        Args:
+            review_request_ids (list of int, optional):
+                The IDs of the review requests to check entries for.
+
+            user_ids (list of int, optional):
+                The IDs of the users to check entries for.
+
+        Returns:
+            list of tuple:
+            A sorted list of ``(review_request_id, user_id)`` tuples for
+            entries that are missing, out of date, or shouldn't exist.
+        """
+        to_create, to_update, to_delete = self._diff_entries(
+            review_request_ids=review_request_ids,
+            user_ids=user_ids)
+
+        pks = set(to_delete)
+
+        for flag_pks in six.itervalues(to_update):
+            pks.update(flag_pks)
+
+        keys = set(
+            (entry.review_request_id, entry.user_id)
+            for entry in to_create
+        )
+        keys.update(
+            self.filter(pk__in=pks).values_list('review_request_id',
+                                                'user_id'))
+
+        return sorted(keys)
+
+    def _diff_entries(self, review_request_ids, user_ids):
+        """Compare entries against the current targets and stars.
+
+        Args:
+            review_request_ids (list of int):
+                The IDs of the review requests to compare entries for, or
+                ``None`` for all review requests.
+
+            user_ids (list of int):
+                The IDs of the users to compare entries for, or ``None``
+                for all users.
+
+        Returns:
+            tuple:
+            A 3-tuple containing:
+
+            1. A list of unsaved entries to create.
+            2. A dictionary mapping tuples of new flag values (in
+               :py:attr:`FLAG_FIELDS` order) to lists of IDs of entries to
+               update.
+            3. A list of IDs of entries to delete.
+        """
+        expected = self._compute_flags(review_request_ids, user_ids)
+
+        existing = self._filter_ids(self.all(),
+                                    'review_request_id', review_request_ids,
+                                    'user_id', user_ids)
+
+        to_create = []
+        to_update = defaultdict(list)
+        to_delete = []
+
+        for entry_info in existing.values_list('pk', 'review_request_id',
+                                               'user_id',
+                                               *self.FLAG_FIELDS):
+            pk = entry_info[0]
+            key = entry_info[1:3]
+            flags = expected.pop(key, None)
+
+            if flags is None:
+                to_delete.append(pk)
+            elif tuple(flags) != tuple(entry_info[3:]):
+                to_update[tuple(flags)].append(pk)
+
+        for (review_request_id, user_id), flags in six.iteritems(expected):
+            to_create.append(self.model(
+                review_request_id=review_request_id,
+                user_id=user_id,
+                **dict(zip(self.FLAG_FIELDS, flags))))
+
+        return to_create, to_update, to_delete
+
+    def _compute_flags(self, review_request_ids, user_ids):
+        """Compute the expected flags for entries.
+
+        Args:
+            review_request_ids (list of int):
+                The IDs of the review requests to compute flags for, or
+                ``None`` for all review requests.
+
+            user_ids (list of int):
+                The IDs of the users to compute flags for, or ``None`` for
+                all users.
+
+        Returns:
+            dict:
+            A dictionary mapping ``(review_request_id, user_id)`` tuples to
+            lists of flag values, in :py:attr:`FLAG_FIELDS` order.
+        """
+        from reviewboard.accounts.models import Profile
+        from reviewboard.reviews.models import Group, ReviewRequest
+
+        expected = defaultdict(lambda: [False, False, False])
+
+        target_people = self._filter_ids(
+            ReviewRequest.target_people.through.objects.all(),
+            'reviewrequest_id', review_request_ids,
+            'user_id', user_ids)
+
+        for key in target_people.values_list('reviewrequest_id', 'user_id'):
+            expected[key][0] = True
+
+        # Review requests can reach users through any number of groups. We
+        # look up the groups and their members separately, starting from
+        # whichever side is being filtered, to avoid scanning either table.
+        target_groups = ReviewRequest.target_groups.through.objects.all()
+        group_users = Group.users.through.objects.all()
+
+        if review_request_ids is not None:
+            target_groups = list(
+                target_groups
+                .filter(reviewrequest_id__in=review_request_ids)
+                .values_list('reviewrequest_id', 'group_id'))
+            group_users = (
+                self._filter_ids(
+                    group_users,
+                    'group_id',
+                    set(group_id for _, group_id in target_groups),
+                    'user_id', user_ids)
+                .values_list('group_id', 'user_id'))
+        else:
+            group_users = list(
+                self._filter_ids(group_users, 'user_id', user_ids)
+                .values_list('group_id', 'user_id'))
+            target_groups = (
+                target_groups
+                .filter(group_id__in=set(group_id
+                                         for group_id, _ in group_users))
+                .values_list('reviewrequest_id', 'group_id'))
+
+        group_user_ids = defaultdict(list)
+
+        for group_id, user_id in group_users:
+            group_user_ids[group_id].append(user_id)
+
+        for review_request_id, group_id in target_groups:
+            for user_id in group_user_ids.get(group_id, []):
+                expected[(review_request_id, user_id)][1] = True
+
+        starred = self._filter_ids(
+            Profile.starred_review_requests.through.objects.all(),
+            'reviewrequest_id', review_request_ids,
+            'profile__user_id', user_ids)
+
+        for key in starred.values_list('reviewrequest_id',
+                                       'profile__user_id'):
+            expected[key][2] = True
+
+        return expected
+
+    def _filter_ids(self, queryset, field1, ids1, field2=None, ids2=None):
+        """Filter a queryset by lists of IDs, where provided.
+
+        Args:
+            queryset (django.db.models.query.QuerySet):
+                The queryset to filter.
+
+            field1 (unicode):
+                The name of the first field to filter on.
+
+            ids1 (list of int):
+                The IDs to filter the first field by, or ``None``.
+
+            field2 (unicode, optional):
+                The name of the second field to filter on.
+
+            ids2 (list of int, optional):
+                The IDs to filter the second field by, or ``None``.
+
+        Returns:
+            django.db.models.query.QuerySet:
+            The filtered queryset.
+        """
+        for field, ids in ((field1, ids1), (field2, ids2)):
+            if ids is not None:
+                queryset = queryset.filter(**{'%s__in' % field: ids})
+
+        return queryset
+
+
+class ReviewRequestIssueManager(Manager):
+    """A manager for ReviewRequestIssue models.
+
+    This maintains the index of issues opened on review requests, and
+    provides queries for it.
+    """
+
+    #: The siteconfig key marking that the index has been built.
+    #:
+    #: This is set by the ``rebuild-issue-index`` management command once
+    #: all existing review requests have been indexed.
+    INDEX_BUILT_SITECONFIG_KEY = 'review_request_issue_index_built'
+
+    #: The maximum number of attempts made to rebuild the index.
+    MAX_REBUILD_ATTEMPTS = 3
+
+    def is_index_built(self):
+        """Return whether the index covers all review requests.
+
+        Entries are maintained for new reviews as soon as the index exists,
+        but review requests created before then aren't indexed until the
+        ``rebuild-issue-index`` management command is run. Until then,
+        callers must compute issues from the comments instead.
+
+        Returns:
+            bool:
+            Whether the index can be used.
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+
+        return siteconfig.get(self.INDEX_BUILT_SITECONFIG_KEY)
+
+    def index_review(self, review):
+        """Index the issues on a review.
+
+        Any existing index entries for the review are replaced. Drafts and
+        replies don't have any entries.
+
+        Args:
+            review (reviewboard.reviews.models.review.Review):
+                The review to index.
+
+        Returns:
+            list of reviewboard.reviews.models.review_request_issue.
+            ReviewRequestIssue:
+            The new index entries for the review.
+        """
+        self.filter(review=review).delete()
+
+        if not review.public or review.is_reply():
+            return []
+
+        issues = self._build_issues(review__pk=review.pk)
+
+        if issues:
+            self.bulk_create(issues)
+
+        return issues
+
+    def update_comment(self, comment):
+        """Update the index entry for a comment's issue.
+
+        This should be called when the issue status of a published comment
+        changes.
+
+        Args:
+            comment (reviewboard.reviews.models.base_comment.BaseComment):
+                The comment that was updated.
+        """
+        self.filter(comment_type=comment.comment_type,
+                    comment_id=comment.pk).update(status=comment.issue_status,
+                                                  timestamp=comment.timestamp)
+
+    def remove_comment(self, comment):
+        """Remove the index entry for a comment's issue.
+
+        Args:
+            comment (reviewboard.reviews.models.base_comment.BaseComment):
+                The comment being removed.
+        """
+        self.filter(comment_type=comment.comment_type,
+                    comment_id=comment.pk).delete()
+
+    def rebuild(self, review_request_ids):
+        """Rebuild the issue index for review requests.
+
+        Args:
+            review_request_ids (list of int):
+                The IDs of the review requests to rebuild the index for.
+
+        Returns:
+            int:
+            The number of index entries created.
+        """
+        for attempt in range(self.MAX_REBUILD_ATTEMPTS):
+            issues = self._build_issues(
+                review__review_request__in=review_request_ids,
+                review__public=True,
+                review__base_reply_to__isnull=True)
+
+            try:
+                with transaction.atomic():
+                    self.filter(
+                        review_request__in=review_request_ids).delete()
+                    self.bulk_create(issues)
+
+                return len(issues)
+            except IntegrityError:
+                # A review was published while rebuilding, and indexed its
+                # own issues. Try again with the current state.
+                logging.debug('Issue index for review requests %r was '
+                              'updated while rebuilding (attempt %d).',
+                              review_request_ids, attempt + 1)
+
+        raise IntegrityError(
+            'Unable to rebuild the issue index for review requests %r after '
+            '%d attempts.'
+            % (review_request_ids, self.MAX_REBUILD_ATTEMPTS))
+
+    def get_review_request_ids_with_count(self, statuses, min_count):
+        """Return a query for review requests with a number of issues.
+
+        Args:
+            statuses (list of unicode):
+                The issue statuses to count.
+
+            min_count (int):
+                The minimum number of issues with those statuses.
+
+        Returns:
+            django.db.models.query.QuerySet:
+            A queryset for the IDs of matching review requests, suitable for
+            use in ``pk__in`` filters. Review requests without any issues
+            are never included.
+        """
+        return (
+            self.filter(status__in=statuses)
+            .order_by()
+            .values('review_request')
+            .annotate(count=Count('pk'))
+            .filter(count__gte=min_count)
+            .values('review_request')
+        )
+
+    def _build_issues(self, **review_query):
+        """Build index entries for comments with issues.
+
+        Args:
+            **review_query (dict):
+                Query arguments for filtering the comments, based on their
+                reviews.
+
+        Returns:
+            list of reviewboard.reviews.models.review_request_issue.
+            ReviewRequestIssue:
+            The unsaved index entries.
+        """
+        from reviewboard.reviews.models import (Comment,
+                                                FileAttachmentComment,
+                                                GeneralComment,
+                                                ScreenshotComment)
+
+        issues = []
+
+        for comment_cls in (GeneralComment, ScreenshotComment,
+                            FileAttachmentComment, Comment):
+            comment_infos = (
+                comment_cls.objects
+                .filter(issue_opened=True, **review_query)
+                .exclude(issue_status__isnull=True)
+                .exclude(issue_status='')
+                .order_by('pk')
+                .values_list('pk', 'issue_status', 'timestamp',
+                             'review__pk', 'review__review_request_id',
+                             'review__user_id')
+            )
+
+            issues += [
+                self.model(review_request_id=review_request_id,
+                           review_id=review_id,
+                           reviewer_id=reviewer_id,
+                           comment_type=comment_cls.comment_type,
+                           comment_id=comment_id,
+                           status=issue_status,
+                           timestamp=timestamp)
+                for (comment_id, issue_status, timestamp, review_id,
+                     review_request_id, reviewer_id) in comment_infos
+            ]
+
+        return issues
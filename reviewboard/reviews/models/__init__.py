@@ -2,6 +2,8 @@ from __future__ import unicode_literals
 
 from reviewboard.reviews.models.base_comment import BaseComment
 from reviewboard.reviews.models.default_reviewer import DefaultReviewer
+from reviewboard.reviews.models.deferred_receiver_task import \
+    DeferredReceiverTask
 from reviewboard.reviews.models.diff_comment import Comment
 from reviewboard.reviews.models.file_attachment_comment import \
     FileAttachmentComment
@@ -10,6 +12,10 @@ from reviewboard.reviews.models.group import Group
 from reviewboard.reviews.models.review import Review
 from reviewboard.reviews.models.review_request import ReviewRequest
 from reviewboard.reviews.models.review_request_draft import ReviewRequestDraft
+from reviewboard.reviews.models.review_request_inbox_entry import \
+    ReviewRequestInboxEntry
+from reviewboard.reviews.models.review_request_issue import \
+    ReviewRequestIssue
 from reviewboard.reviews.models.screenshot import Screenshot
 from reviewboard.reviews.models.screenshot_comment import ScreenshotComment
 from reviewboard.reviews.models.status_update import StatusUpdate
@@ -19,12 +25,15 @@ __all__ = [
     'BaseComment',
     'Comment',
     'DefaultReviewer',
+    'DeferredReceiverTask',
     'FileAttachmentComment',
     'GeneralComment',
     'Group',
     'Review',
     'ReviewRequest',
     'ReviewRequestDraft',
+    'ReviewRequestInboxEntry',
+    'ReviewRequestIssue',
     'Screenshot',
     'ScreenshotComment',
     'StatusUpdate',
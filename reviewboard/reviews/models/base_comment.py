@@ -10,6 +10,7 @@ from djblets.db.fields import CounterField, JSONField
 from djblets.db.managers import ConcurrencyManager
 
 from reviewboard.admin.read_only import is_site_read_only_for
+from reviewboard.reviews.page_updates import bump_page_updates_version
 
 
 @python_2_unicode_compatible
@@ -277,6 +278,10 @@ class BaseComment(models.Model):
                 Keyword arguments passed to the method (unused).
         """
         from reviewboard.reviews.models.review_request import ReviewRequest
+        from reviewboard.reviews.models.review_request_issue import \
+            ReviewRequestIssue
+        from reviewboard.reviews.page_snapshot import \
+            update_comment_in_page_snapshot
 
         self.timestamp = timezone.now()
 
@@ -310,8 +315,14 @@ class BaseComment(models.Model):
                                 new_field: 1,
                             })
 
+                    ReviewRequestIssue.objects.update_comment(self)
+
                 q = ReviewRequest.objects.filter(pk=review.review_request_id)
                 q.update(last_review_activity_timestamp=self.timestamp)
+
+                update_comment_in_page_snapshot(review.review_request_id,
+                                                self)
+                bump_page_updates_version(review.review_request_id)
         except ObjectDoesNotExist:
             pass
 
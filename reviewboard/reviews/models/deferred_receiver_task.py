@@ -0,0 +1,85 @@
+"""Definitions for the DeferredReceiverTask model."""
+
+from __future__ import unicode_literals
+
+from django.db import models
+from django.utils import timezone
+from django.utils.encoding import python_2_unicode_compatible
+from django.utils.translation import ugettext_lazy as _
+from djblets.db.fields import JSONField
+
+from reviewboard.reviews.managers import DeferredReceiverTaskManager
+
+
+@python_2_unicode_compatible
+class DeferredReceiverTask(models.Model):
+    """A call to a signal receiver waiting to be run in the background.
+
+    When deferred receivers are enabled, receivers connected through
+    :py:func:`~reviewboard.reviews.deferred_receivers.
+    connect_deferrable_receiver` are recorded as tasks when their signal is
+    emitted, instead of being run while handling the request that emitted
+    it. Tasks are run by the ``process-deferred-tasks`` management command.
+
+    Tasks are removed once they've run successfully. A task is claimed for
+    a limited time while running, so if a worker exits before finishing it,
+    the task is run again. Receivers must therefore be safe to run more than
+    once for the same signal.
+    """
+
+    #: The status for a task that has not yet run successfully.
+    STATUS_PENDING = 'P'
+
+    #: The status for a task that failed and won't be retried.
+    STATUS_FAILED = 'F'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_FAILED, _('Failed')),
+    )
+
+    #: The registered name of the receiver to run.
+    receiver_name = models.CharField(max_length=255)
+
+    #: The model that sent the signal, in ``app_label.model_name`` form.
+    #:
+    #: This is empty if the signal was not sent by a model.
+    sender = models.CharField(max_length=128, blank=True)
+
+    #: The serialized keyword arguments the signal was sent with.
+    kwargs = JSONField()
+
+    status = models.CharField(max_length=1,
+                              choices=STATUS_CHOICES,
+                              default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    #: When the task should next be run, if pending.
+    #:
+    #: While a worker is running the task, this is the time at which the
+    #: worker's claim on it expires.
+    next_attempt = models.DateTimeField(default=timezone.now)
+
+    last_attempt = models.DateTimeField(null=True)
+
+    #: The error from the last attempt, if it failed.
+    error = models.TextField(blank=True)
+
+    objects = DeferredReceiverTaskManager()
+
+    def __str__(self):
+        """Return a string representation of the task.
+
+        Returns:
+            unicode:
+            A string representation of the task.
+        """
+        return '%s (%s)' % (self.receiver_name, self.get_status_display())
+
+    class Meta:
+        app_label = 'reviews'
+        db_table = 'reviews_deferredreceivertask'
+        index_together = (('status', 'next_attempt'),)
+        verbose_name = _('Deferred Receiver Task')
+        verbose_name_plural = _('Deferred Receiver Tasks')
@@ -21,8 +21,7 @@ from reviewboard.reviews.models.diff_comment import Comment
 from reviewboard.reviews.models.file_attachment_comment import \
     FileAttachmentComment
 from reviewboard.reviews.models.general_comment import GeneralComment
-from reviewboard.reviews.models.review_request import (ReviewRequest,
-                                                       fetch_issue_counts)
+from reviewboard.reviews.models.review_request import ReviewRequest
 from reviewboard.reviews.models.screenshot_comment import ScreenshotComment
 from reviewboard.reviews.signals import (reply_publishing, reply_published,
                                          review_publishing, review_published,
@@ -350,6 +349,9 @@ class Review(models.Model):
         This will make the review public and update the timestamps of all
         contained comments.
         """
+        from reviewboard.reviews.models.review_request_issue import \
+            ReviewRequestIssue
+
         if not user:
             user = self.user
 
@@ -379,15 +381,13 @@ class Review(models.Model):
             reply_published.send(sender=self.__class__,
                                  user=user, reply=self, trivial=trivial)
         else:
-            issue_counts = fetch_issue_counts(self.review_request,
-                                              Q(pk=self.pk))
+            # Index the issues filed in this review. This also tells us how
+            # many issues were filed.
+            issues = ReviewRequestIssue.objects.index_review(self)
 
             # Since we're publishing the review, all filed issues should be
             # open.
-            assert issue_counts[BaseComment.RESOLVED] == 0
-            assert issue_counts[BaseComment.DROPPED] == 0
-            assert issue_counts[BaseComment.VERIFYING_RESOLVED] == 0
-            assert issue_counts[BaseComment.VERIFYING_DROPPED] == 0
+            assert all(issue.status == BaseComment.OPEN for issue in issues)
 
             if self.ship_it:
                 ship_it_value = 1
@@ -398,7 +398,7 @@ class Review(models.Model):
             CounterField.increment_many(
                 self.review_request,
                 {
-                    'issue_open_count': issue_counts[BaseComment.OPEN],
+                    'issue_open_count': len(issues),
                     'issue_dropped_count': 0,
                     'issue_resolved_count': 0,
                     'issue_verifying_count': 0,
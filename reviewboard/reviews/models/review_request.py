@@ -1186,7 +1186,9 @@ class ReviewRequest(BaseReviewRequestDetails):
         else:
             changes = None
 
-        if not self.public and not self.changedescs.exists():
+        first_publish = not self.public and not self.changedescs.exists()
+
+        if first_publish:
             # This is a brand new review request that we're publishing
             # for the first time. Set the creation timestamp to now.
             self.time_added = timestamp
@@ -1197,7 +1199,8 @@ class ReviewRequest(BaseReviewRequestDetails):
 
         review_request_published.send(sender=self.__class__, user=user,
                                       review_request=self, trivial=trivial,
-                                      changedesc=changes)
+                                      changedesc=changes,
+                                      first_publish=first_publish)
 
     def determine_user_for_changedesc(self, changedesc):
         """Determine the user associated with the change description.
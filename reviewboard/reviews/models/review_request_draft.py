@@ -394,7 +394,8 @@ class ReviewRequestDraft(BaseReviewRequestDetails):
                                           user=user,
                                           review_request=review_request,
                                           trivial=trivial,
-                                          changedesc=self.changedesc)
+                                          changedesc=self.changedesc,
+                                          first_publish=False)
 
         return self.changedesc
 
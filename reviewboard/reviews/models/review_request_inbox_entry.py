@@ -0,0 +1,58 @@
+"""Definitions for the ReviewRequestInboxEntry model."""
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils.encoding import python_2_unicode_compatible
+from django.utils.translation import ugettext_lazy as _
+
+from reviewboard.reviews.managers import ReviewRequestInboxEntryManager
+from reviewboard.reviews.models.review_request import ReviewRequest
+
+
+@python_2_unicode_compatible
+class ReviewRequestInboxEntry(models.Model):
+    """An entry for a review request in a user's incoming review requests.
+
+    There's one entry for each user a review request is directed to, either
+    as a target person, through membership in a target group, or by having
+    starred it. Entries are kept up to date as these relations change, so
+    that a user's incoming review requests can be looked up without joining
+    against each of them.
+
+    Entries don't take the review request's status or visibility into
+    account. Those are filtered on the review request itself.
+    """
+
+    user = models.ForeignKey(User, related_name='+')
+    review_request = models.ForeignKey(ReviewRequest,
+                                       related_name='inbox_entries')
+
+    #: Whether the user is one of the review request's target people.
+    targeted_directly = models.BooleanField(default=False)
+
+    #: Whether the user is a member of one of the review request's groups.
+    targeted_by_group = models.BooleanField(default=False)
+
+    #: Whether the user has starred the review request.
+    starred = models.BooleanField(default=False)
+
+    objects = ReviewRequestInboxEntryManager()
+
+    def __str__(self):
+        """Return a string representation of the entry.
+
+        Returns:
+            unicode:
+            A string representation of the entry.
+        """
+        return '%s: review request %s' % (self.user_id,
+                                          self.review_request_id)
+
+    class Meta:
+        app_label = 'reviews'
+        db_table = 'reviews_reviewrequestinboxentry'
+        unique_together = ('user', 'review_request')
+        verbose_name = _('Review Request Inbox Entry')
+        verbose_name_plural = _('Review Request Inbox Entries')
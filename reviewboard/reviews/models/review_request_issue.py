@@ -0,0 +1,68 @@
+"""Definitions for the ReviewRequestIssue model."""
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils.encoding import python_2_unicode_compatible
+from django.utils.translation import ugettext_lazy as _
+
+from reviewboard.reviews.managers import ReviewRequestIssueManager
+from reviewboard.reviews.models.base_comment import BaseComment
+from reviewboard.reviews.models.review import Review
+from reviewboard.reviews.models.review_request import ReviewRequest
+
+
+@python_2_unicode_compatible
+class ReviewRequestIssue(models.Model):
+    """An index entry for an issue opened on a review request.
+
+    There's one entry for each comment in a published review that has an
+    issue opened. These are kept up to date as reviews are published and
+    issues change state, and are used to build the issue summary table and
+    issue counts without loading every comment on the review request.
+
+    Entries for review requests created before the index existed are built
+    by the ``rebuild-issue-index`` management command. The index is only
+    used once that has been run (see :py:meth:`ReviewRequestIssueManager.
+    is_index_built <reviewboard.reviews.managers.ReviewRequestIssueManager.
+    is_index_built>`).
+    """
+
+    review_request = models.ForeignKey(ReviewRequest,
+                                       related_name='indexed_issues')
+    review = models.ForeignKey(Review, related_name='indexed_issues')
+    reviewer = models.ForeignKey(User, related_name='+')
+
+    #: The type of the comment.
+    #:
+    #: This corresponds to the ``comment_type`` attribute of the comment
+    #: classes.
+    comment_type = models.CharField(max_length=16)
+
+    #: The ID of the comment.
+    comment_id = models.PositiveIntegerField()
+
+    status = models.CharField(max_length=1,
+                              choices=BaseComment.ISSUE_STATUSES)
+    timestamp = models.DateTimeField()
+
+    objects = ReviewRequestIssueManager()
+
+    def __str__(self):
+        """Return a string representation of the issue.
+
+        Returns:
+            unicode:
+            A string representation of the issue.
+        """
+        return '%s comment %s (%s)' % (self.comment_type, self.comment_id,
+                                       self.status)
+
+    class Meta:
+        app_label = 'reviews'
+        db_table = 'reviews_reviewrequestissue'
+        unique_together = ('comment_type', 'comment_id')
+        index_together = [('review_request', 'status')]
+        verbose_name = _('Review Request Issue')
+        verbose_name_plural = _('Review Request Issues')
@@ -223,6 +223,8 @@ class StatusUpdate(models.Model):
 
     def drop_open_issues(self):
         """Drop any open issues associated with this status update."""
+        from reviewboard.reviews.page_snapshot import invalidate_page_snapshot
+
         if self.review is None:
             return
 
@@ -245,6 +247,7 @@ class StatusUpdate(models.Model):
             self.review_request.save(
                 update_fields=['last_review_activity_timestamp'])
             self.review_request.reinit_issue_open_count()
+            invalidate_page_snapshot(self.review_request_id)
 
     @property
     def can_run(self):
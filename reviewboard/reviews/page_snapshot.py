@@ -0,0 +1,335 @@
+"""Snapshots of the comment data shown on the review request page.
+
+Building the review request page requires knowing which comments belong to
+which reviews, how they reply to each other, and which have open issues.
+Comments are linked to reviews through many-to-many tables, so this means
+querying all four through tables (joined against the comments) on every
+uncached page view, and loading every comment row, which becomes slow on
+review requests with hundreds of reviews.
+
+A snapshot records just enough about each comment on the published reviews
+to build the page's structure: the IDs linking it to its review, what it
+replies to, and what it's attached to, along with its issue state. Page
+views build the reply graph, issue counts and collapsed states from the
+snapshot, and only load full comment rows for entries that are actually
+rendered (see :py:class:`~reviewboard.reviews.detail.ReviewRequestPageData`).
+
+Snapshots are stored in the cache per review request, under a generation
+number. They're built by page views when missing, and updated after a
+review or reply is published or an issue's status changes. Updates are made
+once the change is committed, while holding a lock on the snapshot. If the
+lock can't be acquired, or there's no snapshot to update, the generation is
+bumped instead, so that a snapshot being built or updated concurrently from
+older data is stored where it will never be read.
+"""
+
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from djblets.cache.backend import make_cache_key
+
+from reviewboard.cache_generation import CacheGeneration
+from reviewboard.reviews.models import (Comment,
+                                        FileAttachmentComment,
+                                        GeneralComment,
+                                        Review,
+                                        ScreenshotComment)
+
+
+#: The number of seconds a snapshot update can hold the lock on a snapshot.
+SNAPSHOT_LOCK_EXPIRATION_SECS = 30
+
+#: The comment fields stored in snapshots for every type of comment.
+_COMMON_SNAPSHOT_FIELDS = ('id', 'reply_to_id', 'issue_opened',
+                           'issue_status')
+
+#: The types of comments shown on the review request page.
+#:
+#: Each is a tuple of the comment model, the name of the field on Review
+#: containing those comments, the key for the comment type, the ordering
+#: used when querying through the field, and the attribute names of the
+#: comment fields stored in snapshots.
+COMMENT_TYPES = (
+    (GeneralComment,
+     'general_comments',
+     'general_comments',
+     None,
+     _COMMON_SNAPSHOT_FIELDS),
+    (ScreenshotComment,
+     'screenshot_comments',
+     'screenshot_comments',
+     None,
+     _COMMON_SNAPSHOT_FIELDS + ('screenshot_id',)),
+    (FileAttachmentComment,
+     'file_attachment_comments',
+     'file_attachment_comments',
+     None,
+     _COMMON_SNAPSHOT_FIELDS + ('file_attachment_id',
+                                'diff_against_file_attachment_id')),
+    (Comment,
+     'comments',
+     'diff_comments',
+     ('comment__filediff',
+      'comment__first_line',
+      'comment__timestamp'),
+     _COMMON_SNAPSHOT_FIELDS + ('filediff_id', 'interfilediff_id')),
+)
+
+
+def _get_snapshot_generation(review_request_id):
+    """Return the snapshot generation for a review request.
+
+    Args:
+        review_request_id (int):
+            The ID of the review request.
+
+    Returns:
+        reviewboard.cache_generation.CacheGeneration:
+        The snapshot generation.
+    """
+    return CacheGeneration('review-request-page-snapshot-generation:%s'
+                           % review_request_id)
+
+
+def get_page_snapshot_key(review_request_id):
+    """Return the current cache key for a review request's page snapshot.
+
+    The key must be fetched before querying any data used to build a new
+    snapshot, so that the snapshot won't be used if the data changes in the
+    meantime.
+
+    Args:
+        review_request_id (int):
+            The ID of the review request.
+
+    Returns:
+        unicode:
+        The cache key.
+    """
+    return make_cache_key('review-request-page-snapshot:%s:%s' % (
+        review_request_id,
+        _get_snapshot_generation(review_request_id).get()))
+
+
+def get_page_snapshot(snapshot_key):
+    """Return a stored page snapshot.
+
+    Args:
+        snapshot_key (unicode):
+            The cache key for the snapshot, from
+            :py:func:`get_page_snapshot_key`.
+
+    Returns:
+        dict:
+        The snapshot, or ``None`` if there isn't one stored. This contains
+        ``review_ids`` (the set of IDs of published reviews covered by the
+        snapshot) and ``comments`` (a dictionary mapping each comment type
+        key from :py:data:`COMMENT_TYPES` to a list of rows, in display
+        order). Each row is a tuple of the review ID followed by the values
+        of the snapshot fields for the comment type.
+    """
+    return cache.get(snapshot_key)
+
+
+def store_page_snapshot(snapshot_key, review_ids, comment_rows):
+    """Store a new page snapshot.
+
+    Nothing will be stored if a snapshot already exists for the key.
+
+    Args:
+        snapshot_key (unicode):
+            The cache key for the snapshot, from
+            :py:func:`get_page_snapshot_key`.
+
+        review_ids (set of int):
+            The IDs of all the published reviews on the review request.
+
+        comment_rows (dict):
+            A dictionary mapping each comment type key to a list of rows for
+            the comments on those reviews. See :py:func:`get_page_snapshot`
+            for the format.
+    """
+    cache.add(snapshot_key, {
+        'review_ids': set(review_ids),
+        'comments': comment_rows,
+    }, settings.CACHE_EXPIRATION_TIME)
+
+
+def add_review_to_page_snapshot(review):
+    """Add a newly-published review or reply to the page snapshot.
+
+    The snapshot is updated once the current transaction is committed.
+
+    Args:
+        review (reviewboard.reviews.models.review.Review):
+            The review or reply that was published.
+    """
+    review_id = review.pk
+
+    def _add_review(snapshot):
+        for comment_type_info in COMMENT_TYPES:
+            key = comment_type_info[2]
+            rows = [
+                row
+                for row in snapshot['comments'][key]
+                if row[0] != review_id
+            ]
+            rows += _query_snapshot_rows(comment_type_info,
+                                         review=review_id)
+            snapshot['comments'][key] = rows
+
+        snapshot['review_ids'].add(review_id)
+
+    _update_page_snapshot(review.review_request_id, _add_review)
+
+
+def update_comment_in_page_snapshot(review_request_id, comment):
+    """Update a comment's issue state in the page snapshot.
+
+    The snapshot is updated once the current transaction is committed.
+
+    Args:
+        review_request_id (int):
+            The ID of the review request the comment was made on.
+
+        comment (reviewboard.reviews.models.base_comment.BaseComment):
+            The comment that was updated.
+    """
+    comment_id = comment.pk
+
+    for comment_type_info in COMMENT_TYPES:
+        if isinstance(comment, comment_type_info[0]):
+            break
+    else:
+        return
+
+    def _update_comment(snapshot):
+        key = comment_type_info[2]
+        rows = snapshot['comments'][key]
+
+        for i, row in enumerate(rows):
+            if row[1] == comment_id:
+                new_rows = _query_snapshot_rows(comment_type_info,
+                                                pk=comment_id)
+
+                if new_rows:
+                    rows[i] = new_rows[0]
+                else:
+                    del rows[i]
+
+                break
+
+    _update_page_snapshot(review_request_id, _update_comment)
+
+
+def invalidate_page_snapshot(review_request_id):
+    """Invalidate the page snapshot for a review request.
+
+    The snapshot is invalidated once the current transaction is committed.
+
+    Args:
+        review_request_id (int):
+            The ID of the review request.
+    """
+    transaction.on_commit(
+        lambda: _get_snapshot_generation(review_request_id).bump())
+
+
+def _update_page_snapshot(review_request_id, update_func):
+    """Update a stored page snapshot once the transaction is committed.
+
+    The update is made while holding a lock on the snapshot. If the lock
+    can't be acquired, or there's no snapshot stored, the snapshot is
+    invalidated instead.
+
+    Args:
+        review_request_id (int):
+            The ID of the review request.
+
+        update_func (callable):
+            The function to call to update the snapshot in place. This takes
+            the snapshot as its only argument.
+    """
+    def _update():
+        lock_key = make_cache_key('review-request-page-snapshot-lock:%s'
+                                  % review_request_id)
+
+        if cache.add(lock_key, True, SNAPSHOT_LOCK_EXPIRATION_SECS):
+            try:
+                snapshot_key = get_page_snapshot_key(review_request_id)
+                snapshot = cache.get(snapshot_key)
+
+                if snapshot is not None:
+                    update_func(snapshot)
+                    cache.set(snapshot_key, snapshot,
+                              settings.CACHE_EXPIRATION_TIME)
+                    return
+            finally:
+                cache.delete(lock_key)
+
+        _get_snapshot_generation(review_request_id).bump()
+
+    transaction.on_commit(_update)
+
+
+def _query_snapshot_rows(comment_type_info, **filters):
+    """Query snapshot rows for comments on published reviews.
+
+    Args:
+        comment_type_info (tuple):
+            The entry in :py:data:`COMMENT_TYPES` for the comments.
+
+        **filters (dict):
+            Filters for the comments' rows in the through table.
+
+    Returns:
+        list of tuple:
+        The snapshot rows for the comments.
+    """
+    model, review_field_name, key, ordering, attnames = comment_type_info
+
+    related_field = Review._meta.get_field(review_field_name)
+    comment_field_name = related_field.m2m_reverse_field_name()
+
+    if 'pk' in filters:
+        filters[comment_field_name] = filters.pop('pk')
+
+    field_names = [
+        '%s__%s' % (comment_field_name,
+                    _get_field_name_for_attname(model, attname))
+        for attname in attnames
+    ]
+
+    q = (
+        related_field.rel.through.objects
+        .filter(review__public=True, **filters)
+        .values_list('review', *field_names)
+    )
+
+    if ordering:
+        q = q.order_by(*ordering)
+
+    return list(q)
+
+
+def _get_field_name_for_attname(model, attname):
+    """Return the name of a model's field with the given attribute name.
+
+    Args:
+        model (type):
+            The model class.
+
+        attname (unicode):
+            The attribute name of the field (such as ``reply_to_id``).
+
+    Returns:
+        unicode:
+        The name of the field (such as ``reply_to``).
+    """
+    for field in model._meta.concrete_fields:
+        if field.attname == attname:
+            return field.name
+
+    raise KeyError(attname)
@@ -0,0 +1,163 @@
+"""Change notifications for the review request page.
+
+Each review request has an updates version stored in the cache, which is
+bumped whenever something shown on the review request page changes (a
+review, reply, or status update being published or updated, or the review
+request being published, closed, or reopened).
+
+Open review request pages check this version through
+:py:class:`~reviewboard.reviews.views.ReviewRequestUpdatesWatchView`, which
+only reads the cache. Only once it changes do they fetch the updates payload
+from :py:class:`~reviewboard.reviews.views.ReviewRequestUpdatesView`,
+instead of polling it (and querying for all the page's data) on an interval.
+
+The view can optionally hold requests open until the version changes. Each
+waiting request ties up a server worker, so this is off by default, and the
+number of requests waiting at once across the site is capped.
+"""
+
+from __future__ import unicode_literals
+
+import time
+
+from django.core.cache import cache
+from djblets.cache.backend import make_cache_key
+
+from reviewboard.cache_generation import CacheGeneration
+
+
+#: The number of seconds between checks for an update while waiting.
+UPDATES_CHECK_INTERVAL_SECS = 1
+
+#: The number of seconds to keep the count of waiting requests.
+#:
+#: A request that dies while waiting never releases its slot, so the count
+#: is allowed to expire and start over.
+UPDATES_WAITERS_EXPIRATION_SECS = 5 * 60
+
+
+def _make_waiters_cache_key():
+    """Return the cache key for the number of requests waiting on updates.
+
+    Returns:
+        unicode:
+        The cache key.
+    """
+    return make_cache_key('review-request-page-waiters')
+
+
+def _get_version_generation(review_request_id):
+    """Return the updates version for a review request.
+
+    Args:
+        review_request_id (int):
+            The ID of the review request.
+
+    Returns:
+        reviewboard.cache_generation.CacheGeneration:
+        The updates version.
+    """
+    return CacheGeneration('review-request-page-version:%s'
+                           % review_request_id)
+
+
+def get_page_updates_version(review_request_id):
+    """Return the current updates version for a review request.
+
+    Args:
+        review_request_id (int):
+            The ID of the review request.
+
+    Returns:
+        int:
+        The current updates version.
+    """
+    return _get_version_generation(review_request_id).get()
+
+
+def bump_page_updates_version(review_request_id):
+    """Mark the review request page as changed.
+
+    Any pages waiting on the review request will be notified of the change.
+
+    Args:
+        review_request_id (int):
+            The ID of the review request.
+    """
+    _get_version_generation(review_request_id).bump()
+
+
+def acquire_updates_waiter(max_waiters):
+    """Reserve a slot for a request to wait for page updates.
+
+    If a slot was reserved, the caller must call
+    :py:func:`release_updates_waiter` once it's done waiting.
+
+    Args:
+        max_waiters (int):
+            The maximum number of requests allowed to wait at once.
+
+    Returns:
+        bool:
+        Whether a slot was reserved. If ``False``, the caller should respond
+        right away instead of waiting.
+    """
+    if max_waiters < 1:
+        return False
+
+    key = _make_waiters_cache_key()
+    cache.add(key, 0, UPDATES_WAITERS_EXPIRATION_SECS)
+
+    try:
+        num_waiters = cache.incr(key)
+    except ValueError:
+        # The count expired between adding and incrementing it.
+        return False
+
+    if num_waiters > max_waiters:
+        release_updates_waiter()
+        return False
+
+    return True
+
+
+def release_updates_waiter():
+    """Release a slot reserved by :py:func:`acquire_updates_waiter`."""
+    try:
+        cache.decr(_make_waiters_cache_key())
+    except ValueError:
+        # The count has expired, so there's nothing to release.
+        pass
+
+
+def wait_for_page_update(review_request_id, version, timeout):
+    """Wait for a review request's updates version to change.
+
+    This only checks the cache while waiting, and does not query the
+    database.
+
+    Args:
+        review_request_id (int):
+            The ID of the review request.
+
+        version (int):
+            The version the caller already has.
+
+        timeout (int):
+            The maximum number of seconds to wait.
+
+    Returns:
+        int:
+        The current updates version. This will be ``version`` if nothing
+        changed before the timeout.
+    """
+    deadline = time.time() + timeout
+
+    while True:
+        current_version = get_page_updates_version(review_request_id)
+
+        if current_version != version or time.time() >= deadline:
+            return current_version
+
+        time.sleep(min(UPDATES_CHECK_INTERVAL_SECS,
+                       max(deadline - time.time(), 0)))
@@ -0,0 +1,458 @@
+"""Keyset (cursor-based) pagination for lists of review requests.
+
+Paginating with offsets requires the database to scan and discard every row
+before the requested page, which gets slower the deeper the page. It's also
+unstable when rows are updated between requests, since an update can move a
+row from one page to another, causing it to be skipped or shown twice.
+
+Keyset pagination instead filters on the sort columns of the last row shown
+(for instance, ``last_updated < X OR (last_updated = X AND id < Y)``), which
+the database can satisfy using an index no matter how deep the page is. The
+values are handed to clients as an opaque cursor.
+
+Keysets require an ordering that uniquely identifies each row, so the
+primary key is added to the ordering when it isn't already present. Only
+orderings on non-nullable columns of the model and its forward relations are
+supported. :py:func:`get_keyset_ordering` returns ``None`` for any other
+ordering, and callers should fall back to offset-based pagination.
+"""
+
+from __future__ import unicode_literals
+
+import base64
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils import six
+
+
+#: The direction for a page following the cursor's row.
+DIRECTION_NEXT = 'next'
+
+#: The direction for a page preceding the cursor's row.
+DIRECTION_PREV = 'prev'
+
+#: The direction for the last page of results.
+#:
+#: Cursors for this direction don't contain any values.
+DIRECTION_LAST = 'last'
+
+
+class InvalidCursorError(ValueError):
+    """A pagination cursor couldn't be parsed or doesn't match the ordering.
+    """
+
+
+def _resolve_field(model, field_path):
+    """Return the model field for an ordering field path.
+
+    Args:
+        model (type):
+            The model being ordered.
+
+        field_path (unicode):
+            The field path, which may span forward relations.
+
+    Returns:
+        django.db.models.Field:
+        The field, or ``None`` if the path can't be used for a keyset.
+    """
+    parts = field_path.split('__')
+    field = None
+
+    for i, part in enumerate(parts):
+        try:
+            if part == 'pk':
+                field = model._meta.pk
+            else:
+                field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+
+        if (not field.concrete or
+            field.many_to_many or
+            field.one_to_many or
+            field.null):
+            return None
+
+        if i < len(parts) - 1:
+            if not field.is_relation:
+                return None
+
+            model = field.related_model
+        elif field.is_relation:
+            # Ordering on a relation orders on the related model's ordering,
+            # rather than on the stored ID.
+            return None
+
+    return field
+
+
+def get_keyset_ordering(queryset):
+    """Return the keyset ordering for a queryset.
+
+    Args:
+        queryset (django.db.models.query.QuerySet):
+            The ordered queryset.
+
+    Returns:
+        list of tuple:
+        A list of ``(field_path, descending)`` tuples, ending with the
+        primary key. This will be ``None`` if the queryset's ordering can't
+        be used for keyset pagination.
+    """
+    query = queryset.query
+
+    if query.extra_order_by:
+        return None
+
+    if query.order_by:
+        order_by = query.order_by
+    elif query.default_ordering:
+        order_by = queryset.model._meta.ordering
+    else:
+        order_by = []
+
+    ordering = []
+    pk_name = queryset.model._meta.pk.name
+
+    for item in order_by:
+        if not isinstance(item, six.string_types) or item == '?':
+            return None
+
+        if item.startswith('-'):
+            field_path = item[1:]
+            descending = True
+        else:
+            field_path = item
+            descending = False
+
+        if _resolve_field(queryset.model, field_path) is None:
+            return None
+
+        if field_path == pk_name:
+            field_path = 'pk'
+
+        ordering.append((field_path, descending))
+
+        if field_path == 'pk':
+            # Anything after the primary key won't affect the ordering.
+            return ordering
+
+    if ordering:
+        descending = ordering[-1][1]
+    else:
+        descending = False
+
+    ordering.append(('pk', descending))
+
+    return ordering
+
+
+def _serialize_value(value):
+    """Return a JSON-compatible version of a cursor value.
+
+    Args:
+        value (object):
+            The value from the database.
+
+    Returns:
+        object:
+        The JSON-compatible value.
+    """
+    if isinstance(value, (datetime.datetime, datetime.date,
+                          datetime.time)):
+        # This keeps full precision (unlike DjangoJSONEncoder), which is
+        # needed for the comparisons to match the stored values.
+        return value.isoformat()
+    elif isinstance(value, (six.integer_types, float, bool,
+                            six.string_types)):
+        return value
+    else:
+        return six.text_type(value)
+
+
+def _build_ordering_key(ordering):
+    """Return a string identifying an ordering in a cursor.
+
+    Args:
+        ordering (list of tuple):
+            The keyset ordering.
+
+    Returns:
+        unicode:
+        The identifier for the ordering.
+    """
+    return ','.join(
+        '%s%s' % ('-' if descending else '', field_path)
+        for field_path, descending in ordering
+    )
+
+
+def encode_cursor(ordering, values, direction):
+    """Return an opaque cursor for a position in a list.
+
+    Args:
+        ordering (list of tuple):
+            The keyset ordering (from :py:func:`get_keyset_ordering`).
+
+        values (list):
+            The values of the ordering fields for the row at the position.
+            This is ignored for :py:data:`DIRECTION_LAST`.
+
+        direction (unicode):
+            The direction of the page from the position.
+
+    Returns:
+        unicode:
+        The cursor.
+    """
+    data = {
+        'o': _build_ordering_key(ordering),
+        'd': direction,
+    }
+
+    if direction != DIRECTION_LAST:
+        data['v'] = [_serialize_value(value) for value in values]
+
+    return (
+        base64.urlsafe_b64encode(
+            json.dumps(data, separators=(',', ':')).encode('utf-8'))
+        .decode('ascii')
+        .rstrip('=')
+    )
+
+
+def decode_cursor(cursor, model, ordering):
+    """Parse a cursor created by :py:func:`encode_cursor`.
+
+    Args:
+        cursor (unicode):
+            The cursor to parse.
+
+        model (type):
+            The model being paginated.
+
+        ordering (list of tuple):
+            The keyset ordering the cursor must have been created for.
+
+    Returns:
+        tuple:
+        A 2-tuple containing the list of values (or ``None`` for
+        :py:data:`DIRECTION_LAST`) and the direction.
+
+    Raises:
+        InvalidCursorError:
+            The cursor was invalid, or was created for another ordering.
+    """
+    try:
+        cursor = cursor.encode('ascii')
+        data = json.loads(
+            base64.urlsafe_b64decode(cursor + b'=' * (-len(cursor) % 4))
+            .decode('utf-8'))
+        ordering_key = data['o']
+        direction = data['d']
+    except (KeyError, TypeError, ValueError, UnicodeError) as e:
+        raise InvalidCursorError('The cursor could not be parsed: %s' % e)
+
+    if ordering_key != _build_ordering_key(ordering):
+        raise InvalidCursorError('The cursor is for a different ordering.')
+
+    if direction == DIRECTION_LAST:
+        return None, direction
+    elif direction not in (DIRECTION_NEXT, DIRECTION_PREV):
+        raise InvalidCursorError('The cursor has an invalid direction.')
+
+    raw_values = data.get('v')
+
+    if not isinstance(raw_values, list) or len(raw_values) != len(ordering):
+        raise InvalidCursorError('The cursor has invalid values.')
+
+    try:
+        values = [
+            _resolve_field(model, field_path).to_python(value)
+            for (field_path, descending), value in zip(ordering, raw_values)
+        ]
+    except (AttributeError, ValidationError) as e:
+        raise InvalidCursorError('The cursor has invalid values: %s' % e)
+
+    if any(value is None for value in values):
+        raise InvalidCursorError('The cursor has invalid values.')
+
+    return values, direction
+
+
+def _build_keyset_query(ordering, values, reverse):
+    """Return a query for rows after a position in a list.
+
+    Args:
+        ordering (list of tuple):
+            The keyset ordering.
+
+        values (list):
+            The values of the ordering fields at the position.
+
+        reverse (bool):
+            Whether to query for rows before the position, instead of after.
+
+    Returns:
+        django.db.models.Q:
+        The query.
+    """
+    q = Q()
+
+    for i, (field_path, descending) in enumerate(ordering):
+        if descending != reverse:
+            op = 'lt'
+        else:
+            op = 'gt'
+
+        conditions = dict(
+            (ordering[j][0], values[j])
+            for j in range(i)
+        )
+        conditions['%s__%s' % (field_path, op)] = values[i]
+
+        q |= Q(**conditions)
+
+    return q
+
+
+class KeysetPage(object):
+    """A page of results from keyset pagination.
+
+    Attributes:
+        object_list (django.db.models.query.QuerySet):
+            A queryset for the objects on the page, in order.
+
+        next_cursor (unicode):
+            The cursor for the next page, if any.
+
+        previous_cursor (unicode):
+            The cursor for the previous page, if any.
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        """Initialize the page.
+
+        Args:
+            object_list (django.db.models.query.QuerySet):
+                A queryset for the objects on the page.
+
+            next_cursor (unicode):
+                The cursor for the next page, if any.
+
+            previous_cursor (unicode):
+                The cursor for the previous page, if any.
+        """
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        """Return whether there's a page after this one.
+
+        Returns:
+            bool:
+            Whether there's a next page.
+        """
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        """Return whether there's a page before this one.
+
+        Returns:
+            bool:
+            Whether there's a previous page.
+        """
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        """Return whether there are pages other than this one.
+
+        Returns:
+            bool:
+            Whether there are other pages.
+        """
+        return self.has_next() or self.has_previous()
+
+
+def paginate_keyset(queryset, ordering, per_page, cursor=None):
+    """Return a page of results using keyset pagination.
+
+    Args:
+        queryset (django.db.models.query.QuerySet):
+            The queryset to paginate.
+
+        ordering (list of tuple):
+            The keyset ordering (from :py:func:`get_keyset_ordering`).
+
+        per_page (int):
+            The maximum number of results on the page.
+
+        cursor (unicode, optional):
+            The cursor for the page. If not provided, the first page is
+            returned.
+
+    Returns:
+        KeysetPage:
+        The page of results.
+
+    Raises:
+        InvalidCursorError:
+            The cursor was invalid, or was created for another ordering.
+    """
+    if cursor:
+        values, direction = decode_cursor(cursor, queryset.model, ordering)
+    else:
+        values = None
+        direction = DIRECTION_NEXT
+
+    reverse = (direction != DIRECTION_NEXT)
+    queryset = queryset.order_by(*[
+        '%s%s' % ('-' if descending else '', field_path)
+        for field_path, descending in ordering
+    ])
+    page_queryset = queryset
+
+    if reverse:
+        page_queryset = page_queryset.reverse()
+
+    if values is not None:
+        page_queryset = page_queryset.filter(
+            _build_keyset_query(ordering, values, reverse))
+
+    field_paths = [field_path for field_path, descending in ordering]
+
+    # An extra row is fetched to determine whether there are more results.
+    rows = list(page_queryset.values_list(*field_paths)[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if reverse:
+        rows.reverse()
+        has_previous = has_more
+        has_next = (direction == DIRECTION_PREV)
+    else:
+        has_previous = values is not None
+        has_next = has_more
+
+    next_cursor = None
+    previous_cursor = None
+
+    if rows:
+        if has_next:
+            next_cursor = encode_cursor(ordering, rows[-1], DIRECTION_NEXT)
+
+        if has_previous:
+            previous_cursor = encode_cursor(ordering, rows[0],
+                                            DIRECTION_PREV)
+
+    pk_index = field_paths.index('pk')
+
+    return KeysetPage(
+        object_list=queryset.filter(pk__in=[row[pk_index] for row in rows]),
+        next_cursor=next_cursor,
+        previous_cursor=previous_cursor)
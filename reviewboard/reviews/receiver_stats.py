@@ -0,0 +1,258 @@
+"""Timing of signal receivers.
+
+Publishing a review request runs every receiver connected to
+:py:data:`~reviewboard.reviews.signals.review_request_published` before the
+publish completes, so its latency is the sum of the time spent in each of
+them. Signals created as :py:class:`InstrumentedSignal` time each receiver,
+logging slow ones and keeping running totals in the shared cache, so that
+the cost of each receiver can be seen across all processes.
+
+Totals are gathered in each process and only added to the shared cache every
+:py:data:`STATS_FLUSH_INTERVAL_SECS`, so that timing receivers doesn't add
+cache round trips to every signal sent. Totals not yet flushed when a process
+exits are lost.
+"""
+
+from __future__ import unicode_literals
+
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.dispatch import Signal
+from django.dispatch.dispatcher import NO_RECEIVERS
+from django.utils import six
+from djblets.cache.backend import make_cache_key
+
+
+logger = logging.getLogger(__name__)
+
+
+#: The number of seconds after which a receiver is logged as being slow.
+SLOW_RECEIVER_SECS = 1.0
+
+#: The number of seconds to keep receiver statistics without updates.
+RECEIVER_STATS_EXPIRATION_SECS = 60 * 60 * 24 * 7
+
+#: The number of seconds between adding each process's totals to the cache.
+STATS_FLUSH_INTERVAL_SECS = 60
+
+
+#: A lock for the totals gathered in this process.
+_local_lock = threading.Lock()
+
+#: The totals gathered in this process since they were last flushed.
+#:
+#: This maps receiver names to a list of the number of calls and total
+#: milliseconds.
+_local_stats = {}
+
+#: When the totals gathered in this process were last flushed.
+_last_flush_time = time.time()
+
+
+def get_receiver_name(receiver):
+    """Return the name of a signal receiver.
+
+    Args:
+        receiver (callable):
+            The receiver.
+
+    Returns:
+        unicode:
+        The name of the receiver, including its module.
+    """
+    name = getattr(receiver, 'receiver_name', None)
+
+    if name is None:
+        func = getattr(receiver, '__func__', receiver)
+        name = '%s.%s' % (
+            getattr(func, '__module__', None) or type(receiver).__module__,
+            getattr(func, '__qualname__', None) or
+            getattr(func, '__name__', None) or
+            type(receiver).__name__)
+
+    return name
+
+
+def _make_stats_cache_key(name, stat):
+    """Return the cache key for a receiver's statistic.
+
+    Args:
+        name (unicode):
+            The name of the receiver.
+
+        stat (unicode):
+            The name of the statistic.
+
+    Returns:
+        unicode:
+        The cache key.
+    """
+    return make_cache_key('receiver-stats:%s:%s' % (name, stat))
+
+
+def _incr_stat(name, stat, value):
+    """Increment a receiver's statistic.
+
+    Args:
+        name (unicode):
+            The name of the receiver.
+
+        stat (unicode):
+            The name of the statistic.
+
+        value (int):
+            The amount to increment by.
+
+    Returns:
+        bool:
+        Whether the statistic was not yet in the cache.
+    """
+    key = _make_stats_cache_key(name, stat)
+
+    try:
+        cache.incr(key, value)
+    except ValueError:
+        if cache.add(key, value, RECEIVER_STATS_EXPIRATION_SECS):
+            return True
+
+        # Another process stored the statistic first.
+        cache.incr(key, value)
+
+    return False
+
+
+def record_receiver_time(name, secs):
+    """Record the time spent in a signal receiver.
+
+    The time is added to this process's totals, which are flushed to the
+    cache if :py:data:`STATS_FLUSH_INTERVAL_SECS` have passed since they
+    were last flushed.
+
+    Args:
+        name (unicode):
+            The name of the receiver.
+
+        secs (float):
+            The number of seconds spent in the receiver.
+    """
+    if secs >= SLOW_RECEIVER_SECS:
+        logger.warning('Signal receiver %s took %.3f seconds', name, secs)
+    else:
+        logger.debug('Signal receiver %s took %.3f seconds', name, secs)
+
+    with _local_lock:
+        stats = _local_stats.setdefault(name, [0, 0])
+        stats[0] += 1
+        stats[1] += int(secs * 1000)
+
+        should_flush = (time.time() - _last_flush_time >=
+                        STATS_FLUSH_INTERVAL_SECS)
+
+    if should_flush:
+        flush_receiver_stats()
+
+
+def flush_receiver_stats():
+    """Add the totals gathered in this process to the cache."""
+    global _last_flush_time, _local_stats
+
+    with _local_lock:
+        local_stats = _local_stats
+        _local_stats = {}
+        _last_flush_time = time.time()
+
+    if not local_stats:
+        return
+
+    try:
+        new_names = set()
+
+        for name, (calls, total_ms) in six.iteritems(local_stats):
+            if _incr_stat(name, 'calls', calls):
+                new_names.add(name)
+
+            _incr_stat(name, 'total-ms', total_ms)
+
+        if new_names:
+            # These receivers have been timed for the first time since their
+            # statistics were last stored, so make sure they can be found.
+            names_key = make_cache_key('receiver-stats-names')
+            names = set(cache.get(names_key) or [])
+
+            if not new_names.issubset(names):
+                cache.set(names_key, sorted(names | new_names),
+                          RECEIVER_STATS_EXPIRATION_SECS)
+    except Exception as e:
+        # Statistics must never break the signal being handled.
+        logger.debug('Unable to record statistics for signal receivers: %s',
+                     e)
+
+
+def get_receiver_stats():
+    """Return the recorded statistics for all timed signal receivers.
+
+    This includes the totals gathered in this process, which are flushed
+    first. Totals not yet flushed by other processes aren't included.
+
+    Returns:
+        list of dict:
+        The statistics for each receiver, sorted by name. Each contains
+        ``name``, ``calls``, ``total_ms``, and ``average_ms`` keys.
+    """
+    flush_receiver_stats()
+
+    names = cache.get(make_cache_key('receiver-stats-names')) or []
+    stats = []
+
+    for name in names:
+        calls = cache.get(_make_stats_cache_key(name, 'calls')) or 0
+        total_ms = cache.get(_make_stats_cache_key(name, 'total-ms')) or 0
+
+        stats.append({
+            'name': name,
+            'calls': calls,
+            'total_ms': total_ms,
+            'average_ms': (float(total_ms) / calls if calls else 0.0),
+        })
+
+    return stats
+
+
+class InstrumentedSignal(Signal):
+    """A signal that records the time spent in each of its receivers."""
+
+    def send(self, sender, **named):
+        """Send the signal to all connected receivers, timing each.
+
+        Args:
+            sender (object):
+                The sender of the signal.
+
+            **named (dict):
+                Keyword arguments to pass to the receivers.
+
+        Returns:
+            list of tuple:
+            A list of 2-tuples of each receiver and its response.
+        """
+        if (not self.receivers or
+            self.sender_receivers_cache.get(sender) is NO_RECEIVERS):
+            return []
+
+        responses = []
+
+        for receiver in self._live_receivers(sender):
+            start_time = time.time()
+
+            try:
+                response = receiver(signal=self, sender=sender, **named)
+            finally:
+                record_receiver_time(get_receiver_name(receiver),
+                                     time.time() - start_time)
+
+            responses.append((receiver, response))
+
+        return responses
@@ -4,7 +4,10 @@ from django.contrib.auth.models import AnonymousUser
 from django.db.models import Q
 from haystack import indexes
 
+from reviewboard.reviews.access_principals import \
+    get_review_request_principals
 from reviewboard.reviews.models import ReviewRequest
+from reviewboard.search.fields import ExactMultiValueField
 from reviewboard.search.indexes import BaseSearchIndex
 
 
@@ -33,6 +36,7 @@ class ReviewRequestIndex(BaseSearchIndex, indexes.Indexable):
     private_repository_id = indexes.IntegerField()
     private_target_groups = indexes.MultiValueField()
     target_users = indexes.MultiValueField()
+    access_principals = ExactMultiValueField()
 
     def get_model(self):
         """Returns the Django model for this index."""
@@ -110,6 +114,23 @@ class ReviewRequestIndex(BaseSearchIndex, indexes.Indexable):
             for user in review_request.target_people.all()
         ] or [0]
 
+    def prepare_access_principals(self, review_request):
+        """Prepare the list of access principals for the index.
+
+        These are used to filter out review requests the user performing a
+        search can't access.
+
+        Args:
+            review_request (reviewboard.reviews.models.review_request.
+                            ReviewRequest):
+                The review request being indexed.
+
+        Returns:
+            list of unicode:
+            The principals granting access to the review request.
+        """
+        return get_review_request_principals(review_request)
+
     def prepare_author(self, review_request):
         """Prepare the author field.
 
@@ -0,0 +1,565 @@
+"""Signal handlers for reviews."""
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from djblets.siteconfig.models import SiteConfiguration
+
+from reviewboard.accounts.models import Profile
+from reviewboard.reviews.access_cache import access_generation
+from reviewboard.reviews.detail import entry_users_generation
+from reviewboard.reviews.models import (Group,
+                                        Review,
+                                        ReviewRequest,
+                                        ReviewRequestInboxEntry,
+                                        ReviewRequestIssue,
+                                        StatusUpdate)
+from reviewboard.reviews.page_snapshot import (COMMENT_TYPES,
+                                               add_review_to_page_snapshot,
+                                               invalidate_page_snapshot)
+from reviewboard.reviews.page_updates import bump_page_updates_version
+from reviewboard.reviews.signals import (reply_published,
+                                         review_published,
+                                         review_request_closed,
+                                         review_request_published,
+                                         review_request_reopened,
+                                         review_ship_it_revoked)
+from reviewboard.scmtools.models import Repository
+
+
+def _on_review_request_changed(sender, review_request, **kwargs):
+    """Handle a review request being published, closed, or reopened.
+
+    This will notify any open review request pages of the change.
+
+    Args:
+        sender (type):
+            The class that sent the signal.
+
+        review_request (reviewboard.reviews.models.review_request.
+                        ReviewRequest):
+            The review request that changed.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    bump_page_updates_version(review_request.pk)
+
+
+def _on_review_changed(sender, review=None, reply=None, **kwargs):
+    """Handle a review or reply being published or updated.
+
+    This will notify any open review request pages of the change.
+
+    Args:
+        sender (type):
+            The class that sent the signal.
+
+        review (reviewboard.reviews.models.review.Review, optional):
+            The review that changed.
+
+        reply (reviewboard.reviews.models.review.Review, optional):
+            The reply that changed.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    bump_page_updates_version((review or reply).review_request_id)
+
+
+def _on_review_published(sender, review=None, reply=None, **kwargs):
+    """Handle a review or reply being published.
+
+    The review or reply will be added to the review request's page snapshot.
+
+    Args:
+        sender (type):
+            The class that sent the signal.
+
+        review (reviewboard.reviews.models.review.Review, optional):
+            The review that was published.
+
+        reply (reviewboard.reviews.models.review.Review, optional):
+            The reply that was published.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    add_review_to_page_snapshot(review or reply)
+
+
+def _on_review_deleted(sender, instance, **kwargs):
+    """Handle a review or reply being deleted.
+
+    If the review was published, open review request pages will be notified,
+    and the review request's page snapshot will be invalidated.
+
+    Args:
+        sender (type):
+            The class that sent the signal.
+
+        instance (reviewboard.reviews.models.review.Review):
+            The review that was deleted.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    if instance.public:
+        bump_page_updates_version(instance.review_request_id)
+        invalidate_page_snapshot(instance.review_request_id)
+
+
+def _on_review_comments_changed(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    """Handle comments being added to or removed from reviews.
+
+    Comments are added to draft reviews as they're made, and the snapshots
+    and issue index are updated when they're published. If comments are
+    added to or removed from published reviews, the page snapshots for their
+    review requests will be invalidated, and the reviews' issues will be
+    re-indexed.
+
+    Args:
+        sender (type):
+            The through model for the comments relation.
+
+        instance (django.db.models.Model):
+            The review (or, if ``reverse`` is set, the comment) being
+            changed.
+
+        action (unicode):
+            The type of change being made.
+
+        reverse (bool):
+            Whether the change is being made from the comment side of the
+            relation.
+
+        pk_set (set of int):
+            The IDs of the comments (or, if ``reverse`` is set, the reviews)
+            being added or removed.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    if not reverse:
+        if not instance.public:
+            return
+
+        if action in ('post_add', 'post_remove', 'pre_clear'):
+            invalidate_page_snapshot(instance.review_request_id)
+
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            ReviewRequestIssue.objects.index_review(instance)
+    elif action in ('post_add', 'post_remove', 'pre_clear'):
+        if action == 'pre_clear':
+            reviews = instance.review.all()
+        else:
+            reviews = Review.objects.filter(pk__in=pk_set)
+
+        reviews = list(reviews.filter(public=True))
+
+        for review_request_id in set(review.review_request_id
+                                     for review in reviews):
+            invalidate_page_snapshot(review_request_id)
+
+        if action == 'post_add':
+            for review in reviews:
+                ReviewRequestIssue.objects.index_review(review)
+        elif reviews:
+            ReviewRequestIssue.objects.remove_comment(instance)
+
+
+def _on_comment_deleted(sender, instance, **kwargs):
+    """Handle a comment being deleted.
+
+    If the comment had an issue opened, it will be removed from the issue
+    index.
+
+    Args:
+        sender (type):
+            The class that sent the signal.
+
+        instance (reviewboard.reviews.models.base_comment.BaseComment):
+            The comment that was deleted.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    if instance.issue_opened:
+        ReviewRequestIssue.objects.remove_comment(instance)
+
+
+def _on_status_update_changed(sender, instance, **kwargs):
+    """Handle a status update being saved or deleted.
+
+    This will notify any open review request pages of the change.
+
+    Args:
+        sender (type):
+            The class that sent the signal.
+
+        instance (reviewboard.reviews.models.status_update.StatusUpdate):
+            The status update that changed.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    bump_page_updates_version(instance.review_request_id)
+
+
+def _on_target_people_changed(sender, instance, action, reverse, pk_set,
+                              **kwargs):
+    """Handle target people being added to or removed from review requests.
+
+    The inbox entries for the review requests and users will be updated.
+
+    Args:
+        sender (type):
+            The through model for the target people relation.
+
+        instance (django.db.models.Model):
+            The review request (or, if ``reverse`` is set, the user) being
+            changed.
+
+        action (unicode):
+            The type of change being made.
+
+        reverse (bool):
+            Whether the change is being made from the user side of the
+            relation.
+
+        pk_set (set of int):
+            The IDs of the users (or, if ``reverse`` is set, the review
+            requests) being added or removed.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if reverse:
+        ReviewRequestInboxEntry.objects.update_entries(
+            review_request_ids=pk_set,
+            user_ids=[instance.pk])
+    else:
+        ReviewRequestInboxEntry.objects.update_entries(
+            review_request_ids=[instance.pk],
+            user_ids=pk_set)
+
+
+def _on_target_groups_changed(sender, instance, action, reverse, pk_set,
+                              **kwargs):
+    """Handle target groups being added to or removed from review requests.
+
+    The inbox entries for the review requests will be updated.
+
+    Args:
+        sender (type):
+            The through model for the target groups relation.
+
+        instance (django.db.models.Model):
+            The review request (or, if ``reverse`` is set, the group) being
+            changed.
+
+        action (unicode):
+            The type of change being made.
+
+        reverse (bool):
+            Whether the change is being made from the group side of the
+            relation.
+
+        pk_set (set of int):
+            The IDs of the groups (or, if ``reverse`` is set, the review
+            requests) being added or removed.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        ReviewRequestInboxEntry.objects.update_entries(
+            review_request_ids=[instance.pk])
+    elif action == 'post_clear':
+        ReviewRequestInboxEntry.objects.update_entries(
+            user_ids=list(instance.users.values_list('pk', flat=True)))
+    else:
+        ReviewRequestInboxEntry.objects.update_entries(
+            review_request_ids=pk_set)
+
+
+def _on_group_users_changed(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    """Handle users being added to or removed from review groups.
+
+    The inbox entries for the users will be updated for the review requests
+    directed to the groups.
+
+    Args:
+        sender (type):
+            The through model for the group users relation.
+
+        instance (django.db.models.Model):
+            The group (or, if ``reverse`` is set, the user) being changed.
+
+        action (unicode):
+            The type of change being made.
+
+        reverse (bool):
+            Whether the change is being made from the user side of the
+            relation.
+
+        pk_set (set of int):
+            The IDs of the users (or, if ``reverse`` is set, the groups)
+            being added or removed.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if reverse:
+        if action == 'post_clear':
+            review_request_ids = None
+        else:
+            review_request_ids = list(
+                ReviewRequest.target_groups.through.objects
+                .filter(group__in=pk_set)
+                .values_list('reviewrequest_id', flat=True)
+                .distinct())
+
+        ReviewRequestInboxEntry.objects.update_entries(
+            review_request_ids=review_request_ids,
+            user_ids=[instance.pk])
+    else:
+        review_request_ids = list(
+            instance.review_requests.values_list('pk', flat=True))
+
+        if review_request_ids:
+            if action == 'post_clear':
+                user_ids = None
+            else:
+                user_ids = pk_set
+
+            ReviewRequestInboxEntry.objects.update_entries(
+                review_request_ids=review_request_ids,
+                user_ids=user_ids)
+
+
+def _on_starred_review_requests_changed(sender, instance, action, reverse,
+                                        pk_set, **kwargs):
+    """Handle review requests being starred or unstarred.
+
+    The inbox entries for the review requests and users will be updated.
+
+    Args:
+        sender (type):
+            The through model for the starred review requests relation.
+
+        instance (django.db.models.Model):
+            The profile (or, if ``reverse`` is set, the review request) being
+            changed.
+
+        action (unicode):
+            The type of change being made.
+
+        reverse (bool):
+            Whether the change is being made from the review request side of
+            the relation.
+
+        pk_set (set of int):
+            The IDs of the review requests (or, if ``reverse`` is set, the
+            profiles) being added or removed.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if reverse:
+        if action == 'post_clear':
+            user_ids = None
+        else:
+            user_ids = list(
+                Profile.objects.filter(pk__in=pk_set)
+                .values_list('user_id', flat=True))
+
+        ReviewRequestInboxEntry.objects.update_entries(
+            review_request_ids=[instance.pk],
+            user_ids=user_ids)
+    else:
+        ReviewRequestInboxEntry.objects.update_entries(
+            review_request_ids=pk_set,
+            user_ids=[instance.user_id])
+
+
+def _on_group_deleting(sender, instance, **kwargs):
+    """Handle a review group about to be deleted.
+
+    This will record the review requests directed to the group, so that
+    their inbox entries can be updated once it's deleted.
+
+    Args:
+        sender (type):
+            The class that sent the signal.
+
+        instance (reviewboard.reviews.models.group.Group):
+            The group being deleted.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    instance._inbox_review_request_ids = list(
+        instance.review_requests.values_list('pk', flat=True))
+
+
+def _on_group_deleted(sender, instance, **kwargs):
+    """Handle a review group being deleted.
+
+    The inbox entries for the review requests that were directed to the
+    group will be updated.
+
+    Args:
+        sender (type):
+            The class that sent the signal.
+
+        instance (reviewboard.reviews.models.group.Group):
+            The group that was deleted.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    review_request_ids = getattr(instance, '_inbox_review_request_ids', None)
+
+    if review_request_ids:
+        ReviewRequestInboxEntry.objects.update_entries(
+            review_request_ids=review_request_ids)
+
+
+def _on_profile_deleted(sender, instance, **kwargs):
+    """Handle a user's profile being deleted.
+
+    The user's inbox entries will be updated to remove any starred review
+    requests.
+
+    Args:
+        sender (type):
+            The class that sent the signal.
+
+        instance (reviewboard.accounts.models.Profile):
+            The profile that was deleted.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    ReviewRequestInboxEntry.objects.update_entries(
+        user_ids=[instance.user_id])
+
+
+def _on_access_changed(sender, action=None, **kwargs):
+    """Handle a change to the access lists of repositories or review groups.
+
+    This will invalidate all cached accessible repository and group IDs.
+
+    Args:
+        sender (type):
+            The class that sent the signal.
+
+        action (unicode, optional):
+            The action that was performed, for
+            :py:data:`~django.db.models.signals.m2m_changed` signals.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    if action is None or action in ('post_add', 'post_remove', 'post_clear'):
+        access_generation.bump()
+
+
+def _on_user_display_changed(sender, created=False, update_fields=None,
+                             **kwargs):
+    """Handle a change to how users are shown on review request pages.
+
+    This will invalidate all cached review request page entries, which show
+    the names and avatars of users.
+
+    Args:
+        sender (type):
+            The class that sent the signal.
+
+        created (bool, optional):
+            Whether the object was newly created.
+
+        update_fields (frozenset of unicode, optional):
+            The fields that were saved, for
+            :py:data:`~django.db.models.signals.post_save` signals.
+
+        **kwargs (dict):
+            Additional keyword arguments passed to the signal.
+    """
+    if created:
+        # New users aren't shown on any pages yet, and profiles are created
+        # with the defaults already used for users without one (often while
+        # rendering an entry).
+        return
+
+    if update_fields is not None and update_fields == {'last_login'}:
+        # This is saved on every login, and isn't shown on the page.
+        return
+
+    entry_users_generation.bump()
+
+
+def connect_signal_handlers():
+    """Connect the signal handlers for reviews."""
+    review_request_published.connect(_on_review_request_changed,
+                                     sender=ReviewRequest)
+    review_request_closed.connect(_on_review_request_changed,
+                                  sender=ReviewRequest)
+    review_request_reopened.connect(_on_review_request_changed,
+                                    sender=ReviewRequest)
+
+    review_published.connect(_on_review_changed, sender=Review)
+    reply_published.connect(_on_review_changed, sender=Review)
+    review_ship_it_revoked.connect(_on_review_changed, sender=Review)
+    review_published.connect(_on_review_published, sender=Review)
+    reply_published.connect(_on_review_published, sender=Review)
+    post_delete.connect(_on_review_deleted, sender=Review)
+
+    for comment_type_info in COMMENT_TYPES:
+        m2m_changed.connect(
+            _on_review_comments_changed,
+            sender=Review._meta.get_field(comment_type_info[1]).rel.through)
+        post_delete.connect(_on_comment_deleted, sender=comment_type_info[0])
+
+    post_save.connect(_on_status_update_changed, sender=StatusUpdate)
+    post_delete.connect(_on_status_update_changed, sender=StatusUpdate)
+
+    m2m_changed.connect(_on_target_people_changed,
+                        sender=ReviewRequest.target_people.through)
+    m2m_changed.connect(_on_target_groups_changed,
+                        sender=ReviewRequest.target_groups.through)
+    m2m_changed.connect(_on_group_users_changed,
+                        sender=Group.users.through)
+    m2m_changed.connect(_on_starred_review_requests_changed,
+                        sender=Profile.starred_review_requests.through)
+    pre_delete.connect(_on_group_deleting, sender=Group)
+    post_delete.connect(_on_group_deleted, sender=Group)
+    post_delete.connect(_on_profile_deleted, sender=Profile)
+
+    for model in (Group, Repository):
+        post_save.connect(_on_access_changed, sender=model)
+        post_delete.connect(_on_access_changed, sender=model)
+
+    for field in (Group.users, Repository.users, Repository.review_groups):
+        m2m_changed.connect(_on_access_changed, sender=field.through)
+
+    # Avatar settings are stored in the profile and site configuration.
+    for model in (User, Profile, SiteConfiguration):
+        post_save.connect(_on_user_display_changed, sender=model)
@@ -4,6 +4,8 @@ from __future__ import unicode_literals
 
 from django.dispatch import Signal
 
+from reviewboard.reviews.receiver_stats import InstrumentedSignal
+
 
 #: Emitted when a review request is publishing.
 #:
@@ -19,6 +21,9 @@ review_request_publishing = Signal(providing_args=['user',
 
 #: Emitted when a review request is published.
 #:
+#: The time spent in each receiver is recorded (see
+#: :py:mod:`reviewboard.reviews.receiver_stats`).
+#:
 #: Args:
 #:     user (django.contrib.auth.models.User):
 #:         The user who published the review request.
@@ -31,8 +36,12 @@ review_request_publishing = Signal(providing_args=['user',
 #:
 #:     changedesc (reviewboard.changedescs.models.ChangeDescription):
 #:         The change description associated with the publish, if any.
-review_request_published = Signal(
-    providing_args=['user', 'review_request', 'trivial', 'changedesc'])
+#:
+#:     first_publish (bool):
+#:         Whether this was the first time the review request was published.
+review_request_published = InstrumentedSignal(
+    providing_args=['user', 'review_request', 'trivial', 'changedesc',
+                    'first_publish'])
 
 
 #: Emitted when a review request is about to be closed.
@@ -0,0 +1,143 @@
+"""Unit tests for reviewboard.reviews.access_principals."""
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+
+from reviewboard.reviews.access_principals import (
+    get_review_request_principals,
+    get_user_principals)
+from reviewboard.reviews.models import ReviewRequest
+from reviewboard.testing import TestCase
+
+
+class AccessPrincipalsTests(TestCase):
+    """Unit tests for reviewboard.reviews.access_principals."""
+
+    fixtures = ['test_users', 'test_scmtools']
+
+    def test_get_review_request_principals_public(self):
+        """Testing get_review_request_principals with a public review
+        request
+        """
+        review_request = self.create_review_request(
+            repository=self.create_repository())
+
+        self.assertEqual(
+            get_review_request_principals(review_request),
+            [
+                'owner:%d' % review_request.submitter_id,
+                'repository:any',
+                'reviewer:any',
+            ])
+
+    def test_get_review_request_principals_private(self):
+        """Testing get_review_request_principals with a private repository
+        and invite-only review groups
+        """
+        repository = self.create_repository(public=False)
+        group1 = self.create_review_group(name='group1', invite_only=True)
+        group2 = self.create_review_group(name='group2', invite_only=True)
+        grumpy = User.objects.get(username='grumpy')
+
+        review_request = self.create_review_request(repository=repository)
+        review_request.target_groups.add(group1, group2)
+        review_request.target_people.add(grumpy)
+
+        self.assertEqual(
+            get_review_request_principals(review_request),
+            [
+                'owner:%d' % review_request.submitter_id,
+                'repository:%d' % repository.pk,
+                'user:%d' % grumpy.pk,
+                'group:%d' % group1.pk,
+                'group:%d' % group2.pk,
+            ])
+
+    def test_get_review_request_principals_with_public_group(self):
+        """Testing get_review_request_principals with invite-only and public
+        review groups
+        """
+        review_request = self.create_review_request()
+        review_request.target_groups.add(
+            self.create_review_group(name='group1', invite_only=True),
+            self.create_review_group(name='group2'))
+
+        self.assertEqual(
+            get_review_request_principals(review_request),
+            [
+                'owner:%d' % review_request.submitter_id,
+                'repository:any',
+                'reviewer:any',
+            ])
+
+    def test_get_user_principals(self):
+        """Testing get_user_principals"""
+        user = User.objects.get(username='grumpy')
+        repository = self.create_repository(public=False)
+        repository.users.add(user)
+        group = self.create_review_group(invite_only=True)
+        group.users.add(user)
+
+        principals = get_user_principals(user)
+
+        self.assertEqual(principals.owner_principals,
+                         ['owner:%d' % user.pk])
+        self.assertIn('repository:any', principals.repository_principals)
+        self.assertIn('repository:%d' % repository.pk,
+                      principals.repository_principals)
+        self.assertIn('reviewer:any', principals.reviewer_principals)
+        self.assertIn('user:%d' % user.pk, principals.reviewer_principals)
+        self.assertIn('group:%d' % group.pk, principals.reviewer_principals)
+
+    def test_principals_match_review_request_query(self):
+        """Testing that principals grant access to the same review requests
+        as ReviewRequest.objects.public
+        """
+        doc = User.objects.get(username='doc')
+        grumpy = User.objects.get(username='grumpy')
+        dopey = User.objects.get(username='dopey')
+
+        repository = self.create_repository(name='private', public=False)
+        repository.users.add(grumpy)
+        group = self.create_review_group(name='private', invite_only=True)
+        group.users.add(dopey)
+
+        # Every combination of repository and reviewer access.
+        review_requests = []
+
+        for private_repository in (False, True):
+            for target_group in (False, True):
+                for target_person in (None, grumpy, dopey):
+                    review_request = self.create_review_request(
+                        submitter=doc,
+                        repository=private_repository and repository or None,
+                        publish=True)
+
+                    if target_group:
+                        review_request.target_groups.add(group)
+
+                    if target_person:
+                        review_request.target_people.add(target_person)
+
+                    review_requests.append(review_request)
+
+        for user in (doc, grumpy, dopey):
+            principals = get_user_principals(user)
+            expected = set()
+
+            for review_request in review_requests:
+                granted = set(get_review_request_principals(review_request))
+
+                if (granted & set(principals.owner_principals) or
+                    (granted & set(principals.repository_principals) and
+                     granted & set(principals.reviewer_principals))):
+                    expected.add(review_request.pk)
+
+            self.assertEqual(
+                set(
+                    ReviewRequest.objects.public(user=user,
+                                                 status=None)
+                    .values_list('pk', flat=True)
+                ),
+                expected)
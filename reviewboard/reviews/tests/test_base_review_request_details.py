@@ -43,7 +43,14 @@ class BaseReviewRequestDetailsTests(TestCase):
         # 5. Group list for all matched default reviewers
         # 6. Existing user ID list (m2m.add())
         # 7. Setting new users (m2m.add())
-        with self.assertNumQueries(7):
+        # 8. Target people for the inbox entries
+        # 9. Target groups for the inbox entries
+        # 10. Starred review requests for the inbox entries
+        # 11. Existing inbox entries
+        # 12. Savepoint for the inbox entries
+        # 13. Creating inbox entries
+        # 14. Releasing the savepoint
+        with self.assertNumQueries(14):
             review_request.add_default_reviewers()
 
         self.assertEqual(list(review_request.target_people.all()),
@@ -78,9 +85,14 @@ class BaseReviewRequestDetailsTests(TestCase):
         # 3. The default reviewer list
         # 4. User list for all matched default reviewers
         # 5. Group list for all matched default reviewers
-        # 8. Existing group ID list (m2m.add())
-        # 9. Setting new groups (m2m.add())
-        with self.assertNumQueries(7):
+        # 6. Existing group ID list (m2m.add())
+        # 7. Setting new groups (m2m.add())
+        # 8. Target people for the inbox entries
+        # 9. Target groups for the inbox entries
+        # 10. Group members for the inbox entries
+        # 11. Starred review requests for the inbox entries
+        # 12. Existing inbox entries
+        with self.assertNumQueries(12):
             review_request.add_default_reviewers()
 
         self.assertEqual(list(review_request.target_groups.all()),
@@ -124,9 +136,21 @@ class BaseReviewRequestDetailsTests(TestCase):
         # 5. Group list for all matched default reviewers
         # 6. Existing user ID list (m2m.add())
         # 7. Setting new users (m2m.add())
-        # 8. Existing group ID list (m2m.add())
-        # 9. Setting new groups (m2m.add())
-        with self.assertNumQueries(9):
+        # 8. Target people for the inbox entries
+        # 9. Target groups for the inbox entries
+        # 10. Starred review requests for the inbox entries
+        # 11. Existing inbox entries
+        # 12. Savepoint for the inbox entries
+        # 13. Creating inbox entries
+        # 14. Releasing the savepoint
+        # 15. Existing group ID list (m2m.add())
+        # 16. Setting new groups (m2m.add())
+        # 17. Target people for the inbox entries
+        # 18. Target groups for the inbox entries
+        # 19. Group members for the inbox entries
+        # 20. Starred review requests for the inbox entries
+        # 21. Existing inbox entries
+        with self.assertNumQueries(21):
             review_request.add_default_reviewers()
 
         self.assertEqual(list(review_request.target_people.all()),
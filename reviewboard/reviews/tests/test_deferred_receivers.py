@@ -0,0 +1,268 @@
+"""Unit tests for reviewboard.reviews.deferred_receivers."""
+
+from __future__ import unicode_literals
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.dispatch import Signal
+from django.utils import timezone
+
+from reviewboard.accounts.models import Trophy
+from reviewboard.reviews.deferred_receivers import (
+    DeferredReceiverRunner,
+    connect_deferrable_receiver,
+    disconnect_deferrable_receiver)
+from reviewboard.reviews import receiver_stats
+from reviewboard.reviews.models import (DeferredReceiverTask, ReviewRequest,
+                                        ReviewRequestDraft)
+from reviewboard.reviews.receiver_stats import (InstrumentedSignal,
+                                                _make_stats_cache_key,
+                                                flush_receiver_stats,
+                                                get_receiver_stats)
+from reviewboard.testing import TestCase
+
+
+class DeferredReceiverTests(TestCase):
+    """Unit tests for deferrable signal receivers."""
+
+    fixtures = ['test_users']
+
+    RECEIVER_NAME = 'reviewboard.reviews.tests.test_deferred_receivers.test'
+
+    def setUp(self):
+        super(DeferredReceiverTests, self).setUp()
+
+        self.signal = Signal()
+        self.calls = []
+        self.error = None
+
+        connect_deferrable_receiver(self.signal, self._receiver,
+                                    name=self.RECEIVER_NAME)
+
+    def tearDown(self):
+        disconnect_deferrable_receiver(self.RECEIVER_NAME)
+
+        super(DeferredReceiverTests, self).tearDown()
+
+    def test_run_immediately(self):
+        """Testing deferrable receivers run immediately when deferring is
+        disabled
+        """
+        user = User.objects.get(username='doc')
+
+        with self.siteconfig_settings({'defer_signal_receivers': False}):
+            self.signal.send(sender=User, user=user, value=1)
+
+        self.assertEqual(self.calls, [(User, user, 1)])
+        self.assertFalse(DeferredReceiverTask.objects.exists())
+
+    def test_deferred(self):
+        """Testing deferrable receivers are queued and run later when
+        deferring is enabled
+        """
+        user = User.objects.get(username='doc')
+
+        with self.siteconfig_settings({'defer_signal_receivers': True}):
+            self.signal.send(sender=User, user=user, value=1)
+
+        self.assertEqual(self.calls, [])
+
+        task = DeferredReceiverTask.objects.get()
+        self.assertEqual(task.receiver_name, self.RECEIVER_NAME)
+        self.assertEqual(task.sender, 'auth.user')
+        self.assertEqual(task.kwargs, {
+            'user': {
+                'model': 'auth.user',
+                'pk': user.pk,
+            },
+            'value': 1,
+        })
+
+        self.assertEqual(DeferredReceiverRunner().process_tasks(10), 1)
+        self.assertEqual(self.calls, [(User, user, 1)])
+        self.assertFalse(DeferredReceiverTask.objects.exists())
+
+    def test_deferred_with_unstorable_args(self):
+        """Testing deferrable receivers run immediately when their arguments
+        can't be stored
+        """
+        value = object()
+
+        with self.siteconfig_settings({'defer_signal_receivers': True}):
+            self.signal.send(sender=None, user=None, value=value)
+
+        self.assertEqual(self.calls, [(None, None, value)])
+        self.assertFalse(DeferredReceiverTask.objects.exists())
+
+    def test_deferred_with_deleted_object(self):
+        """Testing deferred receivers are skipped when an object they were
+        passed has been deleted
+        """
+        user = User.objects.create_user(username='test-user')
+
+        with self.siteconfig_settings({'defer_signal_receivers': True}):
+            self.signal.send(sender=User, user=user, value=1)
+
+        user.delete()
+
+        self.assertEqual(DeferredReceiverRunner().process_tasks(10), 1)
+        self.assertEqual(self.calls, [])
+        self.assertFalse(DeferredReceiverTask.objects.exists())
+
+    def test_deferred_with_error(self):
+        """Testing deferred receivers are retried after failing, until they
+        fail too many times
+        """
+        self.error = Exception('Oh no')
+
+        with self.siteconfig_settings({'defer_signal_receivers': True}):
+            self.signal.send(sender=None, user=None, value=1)
+
+        runner = DeferredReceiverRunner()
+        self.assertEqual(runner.process_tasks(10), 1)
+
+        task = DeferredReceiverTask.objects.get()
+        self.assertEqual(task.status, DeferredReceiverTask.STATUS_PENDING)
+        self.assertEqual(task.attempts, 1)
+        self.assertEqual(task.error, 'Oh no')
+        self.assertGreater(task.next_attempt, timezone.now())
+
+        # The task shouldn't be run again until it's due.
+        self.assertEqual(runner.process_tasks(10), 0)
+
+        for i in range(DeferredReceiverTask.objects.MAX_ATTEMPTS - 1):
+            DeferredReceiverTask.objects.update(next_attempt=timezone.now())
+            self.assertEqual(runner.process_tasks(10), 1)
+
+        task = DeferredReceiverTask.objects.get()
+        self.assertEqual(task.status, DeferredReceiverTask.STATUS_FAILED)
+        self.assertEqual(task.attempts,
+                         DeferredReceiverTask.objects.MAX_ATTEMPTS)
+
+        DeferredReceiverTask.objects.update(
+            timestamp=timezone.now() - timedelta(days=8))
+        self.assertEqual(
+            DeferredReceiverTask.objects.prune(timedelta(days=7)),
+            1)
+
+    def test_claim_due(self):
+        """Testing DeferredReceiverTaskManager.claim_due doesn't return
+        claimed tasks until their claim expires
+        """
+        task = DeferredReceiverTask.objects.queue_task(
+            receiver_name=self.RECEIVER_NAME,
+            sender='',
+            kwargs={})
+
+        self.assertEqual(DeferredReceiverTask.objects.claim_due(10, 60),
+                         [task])
+        self.assertEqual(DeferredReceiverTask.objects.claim_due(10, 60), [])
+
+        DeferredReceiverTask.objects.update(
+            next_attempt=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(DeferredReceiverTask.objects.claim_due(10, 60),
+                         [task])
+
+    def test_compute_trophies_deferred(self):
+        """Testing trophies are computed by deferred tasks when deferring is
+        enabled
+        """
+        with self.siteconfig_settings({'defer_signal_receivers': True}):
+            review_request = self.create_review_request(publish=True,
+                                                        id=1000)
+
+        self.assertFalse(Trophy.objects.exists())
+        self.assertTrue(DeferredReceiverTask.objects.filter(
+            receiver_name='reviewboard.accounts.models._call_compute_trophies')
+            .exists())
+
+        DeferredReceiverRunner().process_tasks(10)
+
+        trophy = Trophy.objects.get()
+        self.assertEqual(trophy.category, 'milestone')
+        self.assertTrue(ReviewRequest.objects.get(pk=review_request.pk)
+                        .extra_data['calculated_trophies'])
+
+    def test_compute_trophies_deferred_after_update(self):
+        """Testing trophies are computed by deferred tasks for the first
+        publish when the review request was updated before they ran
+        """
+        with self.siteconfig_settings({'defer_signal_receivers': True}):
+            review_request = self.create_review_request(publish=True,
+                                                        id=1000)
+
+            draft = ReviewRequestDraft.create(review_request)
+            draft.summary = 'New summary'
+            draft.save()
+            draft.target_people.add(User.objects.get(username='doc'))
+            review_request.publish(review_request.submitter)
+
+        self.assertTrue(review_request.changedescs.exists())
+
+        DeferredReceiverRunner().process_tasks(10)
+
+        self.assertEqual(Trophy.objects.get().category, 'milestone')
+
+    def _receiver(self, sender, user, value, **kwargs):
+        if self.error is not None:
+            raise self.error
+
+        self.calls.append((sender, user, value))
+
+
+class InstrumentedSignalTests(TestCase):
+    """Unit tests for reviewboard.reviews.receiver_stats.InstrumentedSignal.
+    """
+
+    def setUp(self):
+        super(InstrumentedSignalTests, self).setUp()
+
+        # Discard any totals gathered by earlier tests.
+        flush_receiver_stats()
+        cache.clear()
+
+    def test_send(self):
+        """Testing InstrumentedSignal.send records the time spent in each
+        receiver
+        """
+        def _receiver(sender, **kwargs):
+            return 42
+
+        signal = InstrumentedSignal()
+        signal.connect(_receiver)
+
+        self.assertEqual(signal.send(sender=None), [(_receiver, 42)])
+        self.assertEqual(signal.send(sender=None), [(_receiver, 42)])
+
+        stats = get_receiver_stats()
+        self.assertEqual(len(stats), 1)
+        self.assertTrue(stats[0]['name'].startswith(
+            'reviewboard.reviews.tests.test_deferred_receivers.'))
+        self.assertTrue(stats[0]['name'].endswith('._receiver'))
+        self.assertEqual(stats[0]['calls'], 2)
+
+    def test_send_without_flush(self):
+        """Testing InstrumentedSignal.send doesn't store statistics in the
+        cache until the flush interval has passed
+        """
+        def _receiver(sender, **kwargs):
+            pass
+
+        signal = InstrumentedSignal()
+        signal.connect(_receiver)
+        signal.send(sender=None)
+
+        name = get_receiver_stats()[0]['name']
+        calls_key = _make_stats_cache_key(name, 'calls')
+        self.assertEqual(cache.get(calls_key), 1)
+
+        signal.send(sender=None)
+        self.assertEqual(cache.get(calls_key), 1)
+
+        receiver_stats._last_flush_time -= \
+            receiver_stats.STATS_FLUSH_INTERVAL_SECS
+        signal.send(sender=None)
+        self.assertEqual(cache.get(calls_key), 3)
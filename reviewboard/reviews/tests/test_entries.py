@@ -102,6 +102,31 @@ class BaseReviewRequestPageEntryTests(SpyAgency, TestCase):
             }))
         self.assertNotIn('<div class="box-statuses">', html)
 
+    def test_render_to_string_with_deferred(self):
+        """Testing BaseReviewRequestPageEntry.render_to_string with
+        deferred=True
+        """
+        self.spy_on(BaseReviewRequestPageEntry.get_extra_context,
+                    owner=BaseReviewRequestPageEntry)
+
+        entry = BaseReviewRequestPageEntry(data=self.data,
+                                           entry_id='test',
+                                           added_timestamp=None)
+        entry.template_name = 'reviews/entries/review.html'
+        entry.collapsed = True
+        entry.deferred = True
+
+        html = entry.render_to_string(
+            self.request,
+            RequestContext(self.request, {
+                'last_visited': timezone.now(),
+            }))
+
+        self.assertIn('deferred', html)
+        self.assertIn('collapsed', html)
+        self.assertNotIn('review-comments', html)
+        self.assertFalse(BaseReviewRequestPageEntry.get_extra_context.called)
+
     def test_render_to_string_with_new_entry(self):
         """Testing BaseReviewRequestPageEntry.render_to_string with
         entry_is_new=True
@@ -1070,7 +1095,7 @@ class InitialStatusUpdatesEntryTests(TestCase):
         self.assertFalse(entry.collapsed)
 
 
-class ReviewEntryTests(TestCase):
+class ReviewEntryTests(SpyAgency, TestCase):
     """Unit tests for ReviewEntry."""
 
     fixtures = ['test_users']
@@ -1136,6 +1161,135 @@ class ReviewEntryTests(TestCase):
         self.assertEqual(entry.updated_timestamp,
                          datetime(2017, 9, 14, 15, 40, 0, tzinfo=utc))
 
+    def test_render_to_string_with_cache(self):
+        """Testing ReviewEntry.render_to_string reuses cached HTML"""
+        self.spy_on(ReviewEntry.get_extra_context,
+                    owner=ReviewEntry)
+
+        html1 = self._render_entry()
+        html2 = self._render_entry()
+
+        self.assertNotEqual(html1, '')
+        self.assertEqual(html1, html2)
+        self.assertEqual(len(ReviewEntry.get_extra_context.calls), 1)
+
+    def test_render_to_string_with_cache_and_issue_status_changed(self):
+        """Testing ReviewEntry.render_to_string re-renders after an issue
+        status change
+        """
+        comment = self.create_general_comment(self.review, issue_opened=True)
+        self.spy_on(ReviewEntry.get_extra_context,
+                    owner=ReviewEntry)
+
+        html1 = self._render_entry()
+
+        comment.issue_status = BaseComment.RESOLVED
+        comment.save()
+        self.run_on_commit_callbacks()
+
+        html2 = self._render_entry()
+
+        self.assertNotEqual(html1, html2)
+        self.assertEqual(len(ReviewEntry.get_extra_context.calls), 2)
+
+    def test_render_to_string_with_cache_and_new_reply(self):
+        """Testing ReviewEntry.render_to_string re-renders after a reply is
+        published
+        """
+        self.spy_on(ReviewEntry.get_extra_context,
+                    owner=ReviewEntry)
+
+        self._render_entry()
+        self.create_reply(self.review,
+                          timestamp=datetime(2017, 9, 14, 15, 40, 0,
+                                             tzinfo=utc),
+                          publish=True)
+        self._render_entry()
+
+        self.assertEqual(len(ReviewEntry.get_extra_context.calls), 2)
+
+    def test_render_to_string_with_cache_and_user_changed(self):
+        """Testing ReviewEntry.render_to_string re-renders after the
+        reviewer's name changes
+        """
+        self.spy_on(ReviewEntry.get_extra_context,
+                    owner=ReviewEntry)
+
+        self._render_entry()
+
+        user = self.review.user
+        user.first_name = 'New'
+        user.save()
+
+        self._render_entry()
+
+        self.assertEqual(len(ReviewEntry.get_extra_context.calls), 2)
+
+    def test_render_to_string_with_cache_and_profile_changed(self):
+        """Testing ReviewEntry.render_to_string re-renders after the
+        reviewer's profile changes
+        """
+        self.spy_on(ReviewEntry.get_extra_context,
+                    owner=ReviewEntry)
+
+        profile = self.review.user.get_profile()
+        self._render_entry()
+
+        profile.is_private = True
+        profile.save(update_fields=('is_private',))
+
+        self._render_entry()
+
+        self.assertEqual(len(ReviewEntry.get_extra_context.calls), 2)
+
+    def test_render_to_string_with_cache_and_user_logged_in(self):
+        """Testing ReviewEntry.render_to_string reuses cached HTML after the
+        reviewer logs in
+        """
+        self.spy_on(ReviewEntry.get_extra_context,
+                    owner=ReviewEntry)
+
+        self._render_entry()
+
+        user = self.review.user
+        user.last_login = timezone.now()
+        user.save(update_fields=('last_login',))
+
+        self._render_entry()
+
+        self.assertEqual(len(ReviewEntry.get_extra_context.calls), 1)
+
+    def test_render_to_string_with_cache_and_different_user(self):
+        """Testing ReviewEntry.render_to_string doesn't share cached HTML
+        between users
+        """
+        self.spy_on(ReviewEntry.get_extra_context,
+                    owner=ReviewEntry)
+
+        self._render_entry()
+        self.request.user = User.objects.get(username='doc')
+        self._render_entry()
+
+        self.assertEqual(len(ReviewEntry.get_extra_context.calls), 2)
+
+    def _render_entry(self):
+        data = ReviewRequestPageData(review_request=self.review_request,
+                                     request=self.request,
+                                     last_visited=self.changedesc.timestamp)
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+
+        entry = list(ReviewEntry.build_entries(data))[0]
+        entry.finalize()
+
+        return entry.render_to_string(
+            self.request,
+            RequestContext(self.request, {
+                'last_visited': self.changedesc.timestamp,
+                'review_request': self.review_request,
+                'review_request_details': self.review_request,
+            }))
+
     def test_get_dom_element_id(self):
         """Testing ReviewEntry.get_dom_element_id"""
         entry = ReviewEntry(data=self.data,
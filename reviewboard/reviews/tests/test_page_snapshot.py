@@ -0,0 +1,193 @@
+"""Unit tests for review request page snapshots."""
+
+from __future__ import unicode_literals
+
+from django.core.cache import cache
+from djblets.cache.backend import make_cache_key
+
+from reviewboard.reviews.models import BaseComment
+from reviewboard.reviews.page_snapshot import (add_review_to_page_snapshot,
+                                               get_page_snapshot,
+                                               get_page_snapshot_key,
+                                               invalidate_page_snapshot,
+                                               store_page_snapshot,
+                                               update_comment_in_page_snapshot)
+from reviewboard.testing import TestCase
+
+
+class PageSnapshotTests(TestCase):
+    """Unit tests for review request page snapshots."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(PageSnapshotTests, self).setUp()
+
+        self.review_request = self.create_review_request(publish=True)
+
+        self.review = self.create_review(self.review_request, publish=True)
+        self.comment = self.create_general_comment(
+            self.review,
+            issue_opened=True,
+            issue_status=BaseComment.OPEN)
+
+        # Adding the comment to the published review invalidates any
+        # snapshot, so let that happen before storing one.
+        self.run_on_commit_callbacks()
+
+        self.snapshot_key = get_page_snapshot_key(self.review_request.pk)
+        store_page_snapshot(
+            self.snapshot_key,
+            review_ids=[self.review.pk],
+            comment_rows={
+                'general_comments': [
+                    (self.review.pk, self.comment.pk, None, True,
+                     BaseComment.OPEN),
+                ],
+                'screenshot_comments': [],
+                'file_attachment_comments': [],
+                'diff_comments': [],
+            })
+
+    def test_add_review_to_page_snapshot(self):
+        """Testing add_review_to_page_snapshot"""
+        review = self.create_review(self.review_request)
+        comment = self.create_general_comment(review)
+        review.publish()
+
+        reply = self.create_reply(self.review)
+        reply_comment = self.create_general_comment(reply,
+                                                    reply_to=self.comment)
+        reply.publish()
+
+        self.run_on_commit_callbacks()
+
+        snapshot = get_page_snapshot(self.snapshot_key)
+        self.assertEqual(snapshot['review_ids'],
+                         {self.review.pk, review.pk, reply.pk})
+        self.assertEqual(
+            snapshot['comments']['general_comments'],
+            [
+                (self.review.pk, self.comment.pk, None, True,
+                 BaseComment.OPEN),
+                (review.pk, comment.pk, None, False, None),
+                (reply.pk, reply_comment.pk, self.comment.pk, False, None),
+            ])
+
+    def test_add_review_to_page_snapshot_waits_for_commit(self):
+        """Testing add_review_to_page_snapshot doesn't update the snapshot
+        before the transaction is committed
+        """
+        review = self.create_review(self.review_request, publish=True)
+        add_review_to_page_snapshot(review)
+
+        self.assertEqual(get_page_snapshot(self.snapshot_key)['review_ids'],
+                         {self.review.pk})
+
+    def test_add_review_to_page_snapshot_with_lock_held(self):
+        """Testing add_review_to_page_snapshot invalidates the snapshot if
+        another update holds the lock
+        """
+        cache.add(
+            make_cache_key('review-request-page-snapshot-lock:%s'
+                           % self.review_request.pk),
+            True)
+
+        review = self.create_review(self.review_request, publish=True)
+        add_review_to_page_snapshot(review)
+        self.run_on_commit_callbacks()
+
+        self.assertNotEqual(get_page_snapshot_key(self.review_request.pk),
+                            self.snapshot_key)
+
+    def test_add_review_to_page_snapshot_without_snapshot(self):
+        """Testing add_review_to_page_snapshot invalidates the snapshot if
+        there isn't one stored
+        """
+        cache.delete(self.snapshot_key)
+
+        review = self.create_review(self.review_request, publish=True)
+        add_review_to_page_snapshot(review)
+        self.run_on_commit_callbacks()
+
+        # A snapshot built from data queried before the update must not be
+        # used.
+        self.assertNotEqual(get_page_snapshot_key(self.review_request.pk),
+                            self.snapshot_key)
+
+    def test_update_comment_in_page_snapshot(self):
+        """Testing update_comment_in_page_snapshot on issue status changes"""
+        self.comment.issue_status = BaseComment.RESOLVED
+        self.comment.save()
+
+        self.run_on_commit_callbacks()
+
+        snapshot = get_page_snapshot(self.snapshot_key)
+        self.assertEqual(
+            snapshot['comments']['general_comments'],
+            [
+                (self.review.pk, self.comment.pk, None, True,
+                 BaseComment.RESOLVED),
+            ])
+
+    def test_update_comment_in_page_snapshot_uses_committed_state(self):
+        """Testing update_comment_in_page_snapshot stores the latest
+        committed state of the comment
+        """
+        update_comment_in_page_snapshot(self.review_request.pk, self.comment)
+
+        self.comment.issue_status = BaseComment.DROPPED
+        self.comment.save()
+
+        self.run_on_commit_callbacks()
+
+        self.assertEqual(
+            get_page_snapshot(self.snapshot_key)
+            ['comments']['general_comments'],
+            [
+                (self.review.pk, self.comment.pk, None, True,
+                 BaseComment.DROPPED),
+            ])
+
+    def test_invalidate_page_snapshot(self):
+        """Testing invalidate_page_snapshot"""
+        invalidate_page_snapshot(self.review_request.pk)
+
+        self.assertEqual(get_page_snapshot_key(self.review_request.pk),
+                         self.snapshot_key)
+
+        self.run_on_commit_callbacks()
+
+        self.assertNotEqual(get_page_snapshot_key(self.review_request.pk),
+                            self.snapshot_key)
+
+    def test_invalidated_on_review_deleted(self):
+        """Testing page snapshots are invalidated when a published review is
+        deleted
+        """
+        self.review.delete()
+        self.run_on_commit_callbacks()
+
+        self.assertNotEqual(get_page_snapshot_key(self.review_request.pk),
+                            self.snapshot_key)
+
+    def test_invalidated_on_comment_added(self):
+        """Testing page snapshots are invalidated when a comment is added to
+        a published review
+        """
+        self.create_general_comment(self.review)
+        self.run_on_commit_callbacks()
+
+        self.assertNotEqual(get_page_snapshot_key(self.review_request.pk),
+                            self.snapshot_key)
+
+    def test_not_invalidated_on_draft_comment_added(self):
+        """Testing page snapshots are not invalidated when a comment is added
+        to a draft review
+        """
+        review = self.create_review(self.review_request)
+        self.create_general_comment(review)
+        self.run_on_commit_callbacks()
+
+        self.assertEqual(get_page_snapshot_key(self.review_request.pk),
+                         self.snapshot_key)
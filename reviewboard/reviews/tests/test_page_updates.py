@@ -0,0 +1,233 @@
+"""Unit tests for review request page change notifications."""
+
+from __future__ import unicode_literals
+
+import json
+
+from django.core.urlresolvers import reverse
+
+from reviewboard.reviews.models import StatusUpdate
+from reviewboard.reviews.page_updates import (acquire_updates_waiter,
+                                              bump_page_updates_version,
+                                              get_page_updates_version,
+                                              release_updates_waiter,
+                                              wait_for_page_update)
+from reviewboard.testing import TestCase
+
+
+class PageUpdatesVersionTests(TestCase):
+    """Unit tests for review request page updates versions."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(PageUpdatesVersionTests, self).setUp()
+
+        self.review_request = self.create_review_request(publish=True)
+        self.version = get_page_updates_version(self.review_request.pk)
+
+    def test_get_page_updates_version(self):
+        """Testing get_page_updates_version returns a stable version"""
+        self.assertEqual(get_page_updates_version(self.review_request.pk),
+                         self.version)
+
+    def test_bump_page_updates_version(self):
+        """Testing bump_page_updates_version"""
+        bump_page_updates_version(self.review_request.pk)
+
+        self.assertNotEqual(get_page_updates_version(self.review_request.pk),
+                            self.version)
+
+    def test_wait_for_page_update_with_change(self):
+        """Testing wait_for_page_update with an outdated version"""
+        bump_page_updates_version(self.review_request.pk)
+
+        self.assertNotEqual(
+            wait_for_page_update(self.review_request.pk, self.version,
+                                 timeout=10),
+            self.version)
+
+    def test_wait_for_page_update_with_timeout(self):
+        """Testing wait_for_page_update with no change before the timeout"""
+        self.assertEqual(
+            wait_for_page_update(self.review_request.pk, self.version,
+                                 timeout=0),
+            self.version)
+
+    def test_acquire_updates_waiter(self):
+        """Testing acquire_updates_waiter caps the number of waiters"""
+        self.assertTrue(acquire_updates_waiter(2))
+        self.assertTrue(acquire_updates_waiter(2))
+        self.assertFalse(acquire_updates_waiter(2))
+
+        release_updates_waiter()
+
+        self.assertTrue(acquire_updates_waiter(2))
+        self.assertFalse(acquire_updates_waiter(2))
+
+    def test_acquire_updates_waiter_with_no_waiters(self):
+        """Testing acquire_updates_waiter with waiting disabled"""
+        self.assertFalse(acquire_updates_waiter(0))
+
+    def test_review_published(self):
+        """Testing review publish bumps the page updates version"""
+        review = self.create_review(self.review_request)
+        self.assertEqual(get_page_updates_version(self.review_request.pk),
+                         self.version)
+
+        review.publish()
+
+        self.assertNotEqual(get_page_updates_version(self.review_request.pk),
+                            self.version)
+
+    def test_reply_published(self):
+        """Testing reply publish bumps the page updates version"""
+        review = self.create_review(self.review_request, publish=True)
+        reply = self.create_reply(review)
+        version = get_page_updates_version(self.review_request.pk)
+
+        reply.publish()
+
+        self.assertNotEqual(get_page_updates_version(self.review_request.pk),
+                            version)
+
+    def test_issue_status_changed(self):
+        """Testing changing a published comment's issue status bumps the page
+        updates version
+        """
+        review = self.create_review(self.review_request, publish=True)
+        comment = self.create_general_comment(review, issue_opened=True)
+        version = get_page_updates_version(self.review_request.pk)
+
+        comment.issue_status = comment.RESOLVED
+        comment.save()
+
+        self.assertNotEqual(get_page_updates_version(self.review_request.pk),
+                            version)
+
+    def test_status_update_saved(self):
+        """Testing saving a status update bumps the page updates version"""
+        status_update = self.create_status_update(self.review_request)
+        version = get_page_updates_version(self.review_request.pk)
+
+        status_update.state = StatusUpdate.DONE_SUCCESS
+        status_update.save()
+
+        self.assertNotEqual(get_page_updates_version(self.review_request.pk),
+                            version)
+
+    def test_review_request_closed(self):
+        """Testing closing a review request bumps the page updates version"""
+        self.review_request.close(self.review_request.SUBMITTED)
+
+        self.assertNotEqual(get_page_updates_version(self.review_request.pk),
+                            self.version)
+
+
+class ReviewRequestUpdatesWatchViewTests(TestCase):
+    """Unit tests for ReviewRequestUpdatesWatchView."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(ReviewRequestUpdatesWatchViewTests, self).setUp()
+
+        self.review_request = self.create_review_request(publish=True)
+        self.version = get_page_updates_version(self.review_request.pk)
+
+    def test_get_with_change(self):
+        """Testing ReviewRequestUpdatesWatchView GET with an outdated version
+        """
+        bump_page_updates_version(self.review_request.pk)
+
+        rsp = self._get(self.version)
+        self.assertEqual(rsp.status_code, 200)
+        self.assertEqual(
+            json.loads(rsp.content.decode('utf-8')),
+            {
+                'changed': True,
+                'version': get_page_updates_version(self.review_request.pk),
+                'waited': False,
+            })
+
+    def test_get_without_change(self):
+        """Testing ReviewRequestUpdatesWatchView GET with no change responds
+        right away by default
+        """
+        rsp = self._get(self.version)
+
+        self.assertEqual(rsp.status_code, 200)
+        self.assertEqual(
+            json.loads(rsp.content.decode('utf-8')),
+            {
+                'changed': False,
+                'version': self.version,
+                'waited': False,
+            })
+
+    def test_get_with_wait(self):
+        """Testing ReviewRequestUpdatesWatchView GET with waiting enabled"""
+        bump_page_updates_version(self.review_request.pk)
+
+        with self.siteconfig_settings({
+                'review_request_page_updates_wait_secs': 10,
+            }):
+            rsp = self._get(self.version)
+
+        self.assertEqual(rsp.status_code, 200)
+        self.assertEqual(
+            json.loads(rsp.content.decode('utf-8')),
+            {
+                'changed': True,
+                'version': get_page_updates_version(self.review_request.pk),
+                'waited': True,
+            })
+
+        # The slot should have been released.
+        self.assertTrue(acquire_updates_waiter(1))
+
+    def test_get_with_wait_and_too_many_waiters(self):
+        """Testing ReviewRequestUpdatesWatchView GET with waiting enabled
+        responds right away when too many requests are waiting
+        """
+        self.assertTrue(acquire_updates_waiter(1))
+
+        with self.siteconfig_settings({
+                'review_request_page_max_updates_waiters': 1,
+                'review_request_page_updates_wait_secs': 10,
+            }):
+            rsp = self._get(self.version)
+
+        self.assertEqual(rsp.status_code, 200)
+        self.assertEqual(
+            json.loads(rsp.content.decode('utf-8')),
+            {
+                'changed': False,
+                'version': self.version,
+                'waited': False,
+            })
+
+    def test_get_with_invalid_version(self):
+        """Testing ReviewRequestUpdatesWatchView GET with an invalid version
+        """
+        rsp = self.client.get(self._build_url(), {'version': 'abc'})
+        self.assertEqual(rsp.status_code, 400)
+
+    def test_get_with_inaccessible_review_request(self):
+        """Testing ReviewRequestUpdatesWatchView GET with a review request
+        the user can't access
+        """
+        review_request = self.create_review_request(publish=False)
+
+        rsp = self.client.get(
+            reverse('review-request-updates-watch',
+                    args=[review_request.display_id]),
+            {'version': self.version})
+        self.assertEqual(rsp.status_code, 403)
+
+    def _build_url(self):
+        return reverse('review-request-updates-watch',
+                       args=[self.review_request.display_id])
+
+    def _get(self, version):
+        return self.client.get(self._build_url(), {'version': version})
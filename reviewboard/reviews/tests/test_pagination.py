@@ -0,0 +1,188 @@
+"""Unit tests for reviewboard.reviews.pagination."""
+
+from __future__ import unicode_literals
+
+from reviewboard.reviews.models import ReviewRequest
+from reviewboard.reviews.pagination import (DIRECTION_LAST,
+                                            DIRECTION_NEXT,
+                                            InvalidCursorError,
+                                            decode_cursor,
+                                            encode_cursor,
+                                            get_keyset_ordering,
+                                            paginate_keyset)
+from reviewboard.testing import TestCase
+
+
+class GetKeysetOrderingTests(TestCase):
+    """Unit tests for reviewboard.reviews.pagination.get_keyset_ordering."""
+
+    def test_with_order_by(self):
+        """Testing get_keyset_ordering with explicit ordering"""
+        self.assertEqual(
+            get_keyset_ordering(
+                ReviewRequest.objects.order_by('-last_updated')),
+            [('last_updated', True), ('pk', True)])
+
+    def test_with_related_field(self):
+        """Testing get_keyset_ordering with ordering on a related model's
+        field
+        """
+        self.assertEqual(
+            get_keyset_ordering(
+                ReviewRequest.objects.order_by('submitter__username')),
+            [('submitter__username', False), ('pk', False)])
+
+    def test_with_pk(self):
+        """Testing get_keyset_ordering with the primary key in the ordering"""
+        self.assertEqual(
+            get_keyset_ordering(
+                ReviewRequest.objects.order_by('-id', 'summary')),
+            [('pk', True)])
+
+    def test_with_nullable_field(self):
+        """Testing get_keyset_ordering with ordering on a nullable field"""
+        self.assertIsNone(get_keyset_ordering(
+            ReviewRequest.objects.order_by('-diffset_history__'
+                                           'last_diff_updated')))
+
+    def test_with_relation(self):
+        """Testing get_keyset_ordering with ordering on a relation"""
+        self.assertIsNone(get_keyset_ordering(
+            ReviewRequest.objects.order_by('submitter')))
+
+    def test_with_random(self):
+        """Testing get_keyset_ordering with random ordering"""
+        self.assertIsNone(get_keyset_ordering(
+            ReviewRequest.objects.order_by('?')))
+
+
+class CursorTests(TestCase):
+    """Unit tests for reviewboard.reviews.pagination cursors."""
+
+    ordering = [('last_updated', True), ('pk', True)]
+
+    fixtures = ['test_users']
+
+    def test_round_trip(self):
+        """Testing encode_cursor and decode_cursor"""
+        review_request = self.create_review_request()
+
+        cursor = encode_cursor(
+            self.ordering,
+            [review_request.last_updated, review_request.pk],
+            DIRECTION_NEXT)
+
+        self.assertEqual(
+            decode_cursor(cursor, ReviewRequest, self.ordering),
+            ([review_request.last_updated, review_request.pk],
+             DIRECTION_NEXT))
+
+    def test_last(self):
+        """Testing encode_cursor and decode_cursor for the last page"""
+        cursor = encode_cursor(self.ordering, None, DIRECTION_LAST)
+
+        self.assertEqual(
+            decode_cursor(cursor, ReviewRequest, self.ordering),
+            (None, DIRECTION_LAST))
+
+    def test_decode_with_other_ordering(self):
+        """Testing decode_cursor with a cursor for another ordering"""
+        cursor = encode_cursor([('pk', True)], [1], DIRECTION_NEXT)
+
+        with self.assertRaises(InvalidCursorError):
+            decode_cursor(cursor, ReviewRequest, self.ordering)
+
+    def test_decode_with_invalid(self):
+        """Testing decode_cursor with an invalid cursor"""
+        with self.assertRaises(InvalidCursorError):
+            decode_cursor('abc!', ReviewRequest, self.ordering)
+
+        with self.assertRaises(InvalidCursorError):
+            decode_cursor(
+                encode_cursor(self.ordering, ['abc', 1], DIRECTION_NEXT),
+                ReviewRequest, self.ordering)
+
+
+class PaginateKeysetTests(TestCase):
+    """Unit tests for reviewboard.reviews.pagination.paginate_keyset."""
+
+    ordering = [('summary', False), ('pk', False)]
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(PaginateKeysetTests, self).setUp()
+
+        self.review_requests = [
+            self.create_review_request(summary=summary)
+            for summary in ('a', 'b', 'b', 'c', 'd')
+        ]
+
+    def _get_ids(self, page):
+        return list(page.object_list.values_list('pk', flat=True))
+
+    def test_pages(self):
+        """Testing paginate_keyset with next and previous pages"""
+        ids = [review_request.pk for review_request in self.review_requests]
+        queryset = ReviewRequest.objects.all()
+
+        page = paginate_keyset(queryset, self.ordering, 2)
+        self.assertEqual(self._get_ids(page), ids[:2])
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+
+        page = paginate_keyset(queryset, self.ordering, 2,
+                               cursor=page.next_cursor)
+        self.assertEqual(self._get_ids(page), ids[2:4])
+        self.assertTrue(page.has_previous())
+        self.assertTrue(page.has_next())
+
+        page = paginate_keyset(queryset, self.ordering, 2,
+                               cursor=page.next_cursor)
+        self.assertEqual(self._get_ids(page), ids[4:])
+        self.assertTrue(page.has_previous())
+        self.assertFalse(page.has_next())
+
+        page = paginate_keyset(queryset, self.ordering, 2,
+                               cursor=page.previous_cursor)
+        self.assertEqual(self._get_ids(page), ids[2:4])
+
+        page = paginate_keyset(queryset, self.ordering, 2,
+                               cursor=page.previous_cursor)
+        self.assertEqual(self._get_ids(page), ids[:2])
+        self.assertFalse(page.has_previous())
+
+    def test_last_page(self):
+        """Testing paginate_keyset with the last page"""
+        ids = [review_request.pk for review_request in self.review_requests]
+
+        page = paginate_keyset(
+            ReviewRequest.objects.all(), self.ordering, 2,
+            cursor=encode_cursor(self.ordering, None, DIRECTION_LAST))
+        self.assertEqual(self._get_ids(page), ids[3:])
+        self.assertTrue(page.has_previous())
+        self.assertFalse(page.has_next())
+
+    def test_with_changes(self):
+        """Testing paginate_keyset with rows changed between pages"""
+        ids = [review_request.pk for review_request in self.review_requests]
+        queryset = ReviewRequest.objects.all()
+
+        page = paginate_keyset(queryset, self.ordering, 2)
+        self.assertEqual(self._get_ids(page), ids[:2])
+
+        # Moving a row from a later page to before the cursor shouldn't
+        # cause any other rows to be skipped.
+        ReviewRequest.objects.filter(pk=ids[4]).update(summary='a')
+
+        page = paginate_keyset(queryset, self.ordering, 2,
+                               cursor=page.next_cursor)
+        self.assertEqual(self._get_ids(page), ids[2:4])
+        self.assertFalse(page.has_next())
+
+    def test_empty(self):
+        """Testing paginate_keyset with no results"""
+        page = paginate_keyset(ReviewRequest.objects.none(), self.ordering, 2)
+
+        self.assertEqual(self._get_ids(page), [])
+        self.assertFalse(page.has_other_pages())
@@ -183,3 +183,59 @@ class ReviewGroupManagerTests(TestCase):
         self.assertIn(
             group,
             Group.objects.accessible(user, show_all_local_sites=True))
+
+    def test_accessible_invite_only_ids(self):
+        """Testing Group.objects.accessible_invite_only_ids"""
+        user = self.create_user()
+        self.create_review_group(name='group1')
+        self.create_review_group(name='group2', invite_only=True)
+        group3 = self.create_review_group(name='group3', invite_only=True)
+        group3.users.add(user)
+
+        self.assertEqual(Group.objects.accessible_invite_only_ids(user),
+                         [group3.pk])
+
+    def test_accessible_invite_only_ids_cached(self):
+        """Testing Group.objects.accessible_invite_only_ids caches results"""
+        user = self.create_user()
+        group = self.create_review_group(invite_only=True)
+        group.users.add(user)
+
+        self.assertEqual(Group.objects.accessible_invite_only_ids(user),
+                         [group.pk])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(Group.objects.accessible_invite_only_ids(user),
+                             [group.pk])
+
+    def test_accessible_invite_only_ids_after_membership_change(self):
+        """Testing Group.objects.accessible_invite_only_ids after group
+        membership changes
+        """
+        user = self.create_user()
+        group = self.create_review_group(invite_only=True)
+
+        self.assertEqual(Group.objects.accessible_invite_only_ids(user), [])
+
+        group.users.add(user)
+        self.assertEqual(Group.objects.accessible_invite_only_ids(user),
+                         [group.pk])
+
+        user.review_groups.remove(group)
+        self.assertEqual(Group.objects.accessible_invite_only_ids(user), [])
+
+    def test_accessible_invite_only_ids_after_group_change(self):
+        """Testing Group.objects.accessible_invite_only_ids after a group
+        becomes invite-only
+        """
+        user = self.create_user()
+        group = self.create_review_group()
+        group.users.add(user)
+
+        self.assertEqual(Group.objects.accessible_invite_only_ids(user), [])
+
+        group.invite_only = True
+        group.save(update_fields=('invite_only',))
+
+        self.assertEqual(Group.objects.accessible_invite_only_ids(user),
+                         [group.pk])
@@ -12,6 +12,7 @@ from djblets.extensions.models import RegisteredExtension
 from djblets.siteconfig.models import SiteConfiguration
 from kgb import SpyAgency
 
+from reviewboard.accounts.models import ReviewRequestVisit
 from reviewboard.extensions.base import Extension, get_extension_manager
 from reviewboard.reviews.detail import InitialStatusUpdatesEntry, ReviewEntry
 from reviewboard.reviews.fields import get_review_request_fieldsets
@@ -346,6 +347,65 @@ class ReviewRequestDetailViewTests(SpyAgency, TestCase):
             response = self.client.get('/r/1/')
             self.assertEqual(response.status_code, 302)
 
+    def test_with_max_loaded_entries(self):
+        """Testing ReviewRequestDetailView with
+        review_request_page_max_loaded_entries defers older entries
+        """
+        review_request = self.create_review_request(publish=True)
+        review1 = self.create_review(review_request, publish=True)
+        review2 = self.create_review(review_request, publish=True)
+
+        # Reviews are only collapsed (and therefore deferred) once the user
+        # has seen them.
+        self.client.login(username='doc', password='doc')
+        self.client.get('/r/%d/' % review_request.pk)
+
+        with self.siteconfig_settings(
+                {'review_request_page_max_loaded_entries': 1},
+                reload_settings=False):
+            response = self.client.get('/r/%d/' % review_request.pk)
+
+        self.assertEqual(response.status_code, 200)
+
+        entries = response.context['entries']['main']
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0].review, review1)
+        self.assertTrue(entries[0].deferred)
+        self.assertEqual(entries[1].review, review2)
+        self.assertFalse(entries[1].deferred)
+
+        content = response.content.decode('utf-8')
+        self.assertIn('page.addDeferredEntry(', content)
+        self.assertIn("id: '%s'" % review1.pk, content)
+
+    def test_visit_tracking(self):
+        """Testing ReviewRequestDetailView only updates the visit timestamp
+        when there's been activity since the last visit
+        """
+        review_request = self.create_review_request(publish=True)
+        user = User.objects.get(username='doc')
+        self.client.login(username='doc', password='doc')
+
+        self.client.get('/r/%d/' % review_request.pk)
+        visit = ReviewRequestVisit.objects.get(user=user,
+                                               review_request=review_request)
+        timestamp1 = visit.timestamp
+
+        # There's been no activity, so the visit shouldn't be updated.
+        self.client.get('/r/%d/' % review_request.pk)
+        visit = ReviewRequestVisit.objects.get(pk=visit.pk)
+        self.assertEqual(visit.timestamp, timestamp1)
+
+        # After a new review, the visit should be updated.
+        review = self.create_review(review_request, publish=True)
+        self.assertGreater(review.timestamp, timestamp1)
+
+        response = self.client.get('/r/%d/' % review_request.pk)
+        self.assertEqual(response.context['last_visited'], timestamp1)
+
+        visit = ReviewRequestVisit.objects.get(pk=visit.pk)
+        self.assertGreater(visit.timestamp, review.timestamp)
+
     def test_etag_with_issues(self):
         """Testing ReviewRequestDetailView ETags with issue status toggling"""
         self.client.login(username='doc', password='doc')
@@ -0,0 +1,182 @@
+"""Unit tests for reviewboard.reviews.managers.ReviewRequestInboxEntryManager.
+"""
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.utils.six.moves import cStringIO as StringIO
+
+from reviewboard.reviews.models import ReviewRequest, ReviewRequestInboxEntry
+from reviewboard.testing import TestCase
+
+
+class ReviewRequestInboxEntryManagerTests(TestCase):
+    """Unit tests for
+    reviewboard.reviews.managers.ReviewRequestInboxEntryManager.
+    """
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(ReviewRequestInboxEntryManagerTests, self).setUp()
+
+        self.user = User.objects.get(username='grumpy')
+        self.review_request = self.create_review_request(publish=True)
+
+    def test_target_people_changed(self):
+        """Testing inbox entries when target people change"""
+        self.review_request.target_people.add(self.user)
+        self.assertEntries([(self.review_request.pk, self.user.pk,
+                             True, False, False)])
+
+        self.review_request.target_people.remove(self.user)
+        self.assertEntries([])
+
+    def test_target_people_changed_reverse(self):
+        """Testing inbox entries when target people change from the user"""
+        self.user.directed_review_requests.add(self.review_request)
+        self.assertEntries([(self.review_request.pk, self.user.pk,
+                             True, False, False)])
+
+        self.user.directed_review_requests.clear()
+        self.assertEntries([])
+
+    def test_target_groups_changed(self):
+        """Testing inbox entries when target groups change"""
+        group = self.create_review_group()
+        group.users.add(self.user)
+
+        self.review_request.target_groups.add(group)
+        self.assertEntries([(self.review_request.pk, self.user.pk,
+                             False, True, False)])
+
+        self.review_request.target_groups.clear()
+        self.assertEntries([])
+
+    def test_target_groups_changed_with_multiple_groups(self):
+        """Testing inbox entries when one of several target groups with the
+        same member is removed
+        """
+        group1 = self.create_review_group(name='group1')
+        group2 = self.create_review_group(name='group2')
+        group1.users.add(self.user)
+        group2.users.add(self.user)
+
+        self.review_request.target_groups.add(group1, group2)
+        self.review_request.target_groups.remove(group1)
+
+        self.assertEntries([(self.review_request.pk, self.user.pk,
+                             False, True, False)])
+
+    def test_group_users_changed(self):
+        """Testing inbox entries when group membership changes"""
+        group = self.create_review_group()
+        self.review_request.target_groups.add(group)
+        self.assertEntries([])
+
+        group.users.add(self.user)
+        self.assertEntries([(self.review_request.pk, self.user.pk,
+                             False, True, False)])
+
+        self.user.review_groups.remove(group)
+        self.assertEntries([])
+
+    def test_group_deleted(self):
+        """Testing inbox entries when a target group is deleted"""
+        group = self.create_review_group()
+        group.users.add(self.user)
+        self.review_request.target_groups.add(group)
+
+        group.delete()
+
+        self.assertEntries([])
+
+    def test_starred(self):
+        """Testing inbox entries when review requests are starred"""
+        profile = self.user.get_profile()
+        profile.star_review_request(self.review_request)
+        self.review_request.target_people.add(self.user)
+
+        self.assertEntries([(self.review_request.pk, self.user.pk,
+                             True, False, True)])
+
+        profile.unstar_review_request(self.review_request)
+        self.assertEntries([(self.review_request.pk, self.user.pk,
+                             True, False, False)])
+
+    def test_find_inconsistencies(self):
+        """Testing ReviewRequestInboxEntryManager.find_inconsistencies"""
+        other_user = User.objects.get(username='doc')
+        self.review_request.target_people.add(self.user, other_user)
+
+        ReviewRequestInboxEntry.objects.filter(user=self.user).delete()
+        ReviewRequestInboxEntry.objects.filter(user=other_user).update(
+            starred=True)
+
+        self.assertEqual(
+            ReviewRequestInboxEntry.objects.find_inconsistencies(),
+            [(self.review_request.pk, other_user.pk),
+             (self.review_request.pk, self.user.pk)])
+
+        ReviewRequestInboxEntry.objects.update_entries()
+
+        self.assertEqual(
+            ReviewRequestInboxEntry.objects.find_inconsistencies(), [])
+
+    def test_to_user(self):
+        """Testing ReviewRequest.objects.to_user with inbox entries"""
+        group = self.create_review_group()
+        group.users.add(self.user)
+
+        review_request1 = self.review_request
+        review_request1.target_people.add(self.user)
+
+        review_request2 = self.create_review_request(publish=True,
+                                                     summary='Test 2')
+        review_request2.target_groups.add(group)
+
+        review_request3 = self.create_review_request(publish=True,
+                                                     summary='Test 3')
+        self.user.get_profile().star_review_request(review_request3)
+
+        self.create_review_request(publish=True, summary='Test 4')
+
+        self.assertEqual(
+            set(ReviewRequest.objects.to_user(self.user)),
+            {review_request1, review_request2, review_request3})
+        self.assertEqual(
+            set(ReviewRequest.objects.to_user_directly(self.user)),
+            {review_request1, review_request3})
+        self.assertEqual(
+            set(ReviewRequest.objects.to_user_groups(self.user.username)),
+            {review_request2})
+
+    def test_rebuild_inboxes_command(self):
+        """Testing rebuild-inboxes"""
+        self.review_request.target_people.add(self.user)
+        ReviewRequestInboxEntry.objects.all().delete()
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild-inboxes', check=True, stdout=StringIO())
+
+        call_command('rebuild-inboxes', stdout=StringIO())
+
+        self.assertEntries([(self.review_request.pk, self.user.pk,
+                             True, False, False)])
+        call_command('rebuild-inboxes', check=True, stdout=StringIO())
+
+    def assertEntries(self, expected):
+        """Assert that the inbox entries match the expected entries.
+
+        Args:
+            expected (list of tuple):
+                The expected review request IDs, user IDs, and flags.
+        """
+        self.assertEqual(
+            list(ReviewRequestInboxEntry.objects
+                 .order_by('review_request', 'user')
+                 .values_list('review_request_id', 'user_id',
+                              'targeted_directly', 'targeted_by_group',
+                              'starred')),
+            expected)
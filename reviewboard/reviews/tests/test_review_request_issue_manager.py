@@ -0,0 +1,183 @@
+"""Unit tests for reviewboard.reviews.managers.ReviewRequestIssueManager."""
+
+from __future__ import unicode_literals
+
+from django.core.management import call_command
+from django.utils import six
+from django.utils.six.moves import cStringIO as StringIO
+
+from reviewboard.reviews.models import BaseComment, ReviewRequestIssue
+from reviewboard.testing import TestCase
+
+
+class ReviewRequestIssueManagerTests(TestCase):
+    """Unit tests for reviewboard.reviews.managers.ReviewRequestIssueManager.
+    """
+
+    fixtures = ['test_users', 'test_scmtools']
+
+    def setUp(self):
+        super(ReviewRequestIssueManagerTests, self).setUp()
+
+        self.review_request = self.create_review_request(publish=True)
+
+    def test_review_publish(self):
+        """Testing Review.publish indexes issues"""
+        review = self.create_review(self.review_request)
+        comment = self.create_general_comment(review, issue_opened=True)
+        self.create_general_comment(review, issue_opened=False)
+
+        self.assertFalse(ReviewRequestIssue.objects.exists())
+
+        review.publish()
+
+        issues = list(ReviewRequestIssue.objects.all())
+        self.assertEqual(len(issues), 1)
+
+        issue = issues[0]
+        self.assertEqual(issue.review_request_id, self.review_request.pk)
+        self.assertEqual(issue.review_id, review.pk)
+        self.assertEqual(issue.reviewer_id, review.user_id)
+        self.assertEqual(issue.comment_type, 'general')
+        self.assertEqual(issue.comment_id, comment.pk)
+        self.assertEqual(issue.status, BaseComment.OPEN)
+
+    def test_reply_publish(self):
+        """Testing Review.publish for replies doesn't index issues"""
+        review = self.create_review(self.review_request, publish=True)
+        comment = self.create_general_comment(review, issue_opened=True)
+        reply = self.create_reply(review)
+        self.create_general_comment(reply, issue_opened=True,
+                                    reply_to=comment)
+
+        reply.publish()
+
+        self.assertEqual(
+            list(ReviewRequestIssue.objects.values_list('comment_id',
+                                                        flat=True)),
+            [comment.pk])
+
+    def test_issue_status_changed(self):
+        """Testing changing a comment's issue status updates the index"""
+        review = self.create_review(self.review_request, publish=True)
+        comment = self.create_general_comment(review, issue_opened=True)
+
+        comment.issue_status = BaseComment.RESOLVED
+        comment.save()
+
+        issue = ReviewRequestIssue.objects.get(comment_id=comment.pk)
+        self.assertEqual(issue.status, BaseComment.RESOLVED)
+
+    def test_comment_deleted(self):
+        """Testing deleting a comment removes it from the index"""
+        review = self.create_review(self.review_request, publish=True)
+        comment = self.create_general_comment(review, issue_opened=True)
+        self.assertTrue(ReviewRequestIssue.objects.exists())
+
+        comment.delete()
+
+        self.assertFalse(ReviewRequestIssue.objects.exists())
+
+    def test_review_deleted(self):
+        """Testing deleting a review removes its issues from the index"""
+        review = self.create_review(self.review_request, publish=True)
+        self.create_general_comment(review, issue_opened=True)
+        self.create_diff_comment(review,
+                                 self._create_filediff(),
+                                 issue_opened=True)
+        self.assertEqual(ReviewRequestIssue.objects.count(), 2)
+
+        review.delete()
+
+        self.assertFalse(ReviewRequestIssue.objects.exists())
+
+    def test_rebuild(self):
+        """Testing ReviewRequestIssueManager.rebuild"""
+        review = self.create_review(self.review_request, publish=True)
+        comment1 = self.create_general_comment(review, issue_opened=True)
+        comment2 = self.create_general_comment(
+            review,
+            issue_opened=True,
+            issue_status=BaseComment.DROPPED)
+
+        draft_review = self.create_review(self.review_request)
+        self.create_general_comment(draft_review, issue_opened=True)
+
+        other_review_request = self.create_review_request(publish=True)
+        other_review = self.create_review(other_review_request,
+                                          publish=True)
+        other_comment = self.create_general_comment(other_review,
+                                                    issue_opened=True)
+
+        # Simulate review requests from before issues were indexed.
+        ReviewRequestIssue.objects.all().delete()
+
+        self.assertEqual(
+            ReviewRequestIssue.objects.rebuild([self.review_request.pk]),
+            2)
+
+        self.assertEqual(
+            list(ReviewRequestIssue.objects.order_by('comment_id')
+                 .values_list('comment_id', 'status')),
+            [
+                (comment1.pk, BaseComment.OPEN),
+                (comment2.pk, BaseComment.DROPPED),
+            ])
+
+        ReviewRequestIssue.objects.rebuild([self.review_request.pk,
+                                            other_review_request.pk])
+
+        self.assertEqual(
+            sorted(ReviewRequestIssue.objects.values_list('comment_id',
+                                                          flat=True)),
+            [comment1.pk, comment2.pk, other_comment.pk])
+
+    def test_is_index_built(self):
+        """Testing ReviewRequestIssueManager.is_index_built"""
+        self.assertFalse(ReviewRequestIssue.objects.is_index_built())
+
+        with self.siteconfig_settings({'review_request_issue_index_built':
+                                       True}):
+            self.assertTrue(ReviewRequestIssue.objects.is_index_built())
+
+    def test_rebuild_issue_index_command(self):
+        """Testing rebuild-issue-index"""
+        review = self.create_review(self.review_request, publish=True)
+        comment = self.create_general_comment(review, issue_opened=True)
+        ReviewRequestIssue.objects.all().delete()
+
+        # The settings will be restored once the test completes.
+        with self.siteconfig_settings({'review_request_issue_index_built':
+                                       False}):
+            call_command('rebuild-issue-index', stdout=StringIO())
+
+            self.assertEqual(
+                list(ReviewRequestIssue.objects.values_list('comment_id',
+                                                            flat=True)),
+                [comment.pk])
+            self.assertTrue(ReviewRequestIssue.objects.is_index_built())
+
+    def test_rebuild_issue_index_command_with_ids(self):
+        """Testing rebuild-issue-index with review request IDs doesn't
+        enable the index
+        """
+        review = self.create_review(self.review_request, publish=True)
+        comment = self.create_general_comment(review, issue_opened=True)
+        ReviewRequestIssue.objects.all().delete()
+
+        call_command('rebuild-issue-index', six.text_type(
+            self.review_request.pk), stdout=StringIO())
+
+        self.assertEqual(
+            list(ReviewRequestIssue.objects.values_list('comment_id',
+                                                        flat=True)),
+            [comment.pk])
+        self.assertFalse(ReviewRequestIssue.objects.is_index_built())
+
+    def _create_filediff(self):
+        self.review_request.repository = self.create_repository()
+        self.review_request.save()
+
+        diffset = self.create_diffset(self.review_request)
+
+        return self.create_filediff(diffset)
@@ -1,8 +1,12 @@
 from __future__ import unicode_literals
 
+from datetime import timedelta
+
 from django.contrib.auth.models import User
+from django.utils import timezone
 from djblets.testing.decorators import add_fixtures
 
+from reviewboard.accounts.models import ReviewRequestVisit
 from reviewboard.diffviewer.models import DiffSetHistory
 from reviewboard.reviews.models import (DefaultReviewer, ReviewRequest,
                                         ReviewRequestDraft)
@@ -932,6 +936,38 @@ class ReviewRequestManagerTests(TestCase):
                 'Test 1',
             ])
 
+    def test_with_counts(self):
+        """Testing ReviewRequestQuerySet.with_counts"""
+        user = User.objects.get(username='doc')
+
+        review_request1 = self.create_review_request(publish=True,
+                                                     summary='Test 1')
+        review_request2 = self.create_review_request(publish=True,
+                                                     summary='Test 2')
+        visit = ReviewRequestVisit.objects.create(
+            user=user,
+            review_request=review_request1,
+            timestamp=timezone.now() - timedelta(hours=1))
+
+        self.create_review(review_request1, publish=True)
+        self.create_review(review_request1, publish=True)
+        self.create_review(review_request2, publish=True)
+
+        self.assertEqual(
+            ReviewRequestVisit.objects.get(pk=visit.pk).unread_review_count,
+            2)
+
+        review_requests = ReviewRequest.objects.all().with_counts(user)
+        self.assertEqual(
+            dict(
+                (review_request.pk, review_request.new_review_count)
+                for review_request in review_requests
+            ),
+            {
+                review_request1.pk: 2,
+                review_request2.pk: 0,
+            })
+
     def assertValidSummaries(self, review_requests, summaries):
         r_summaries = [r.summary for r in review_requests]
 
@@ -12,7 +12,11 @@ from reviewboard.reviews.detail import (ChangeEntry,
                                         ReviewEntry,
                                         ReviewRequestEntry,
                                         ReviewRequestPageData)
-from reviewboard.reviews.models import BaseComment, ReviewRequestDraft
+from reviewboard.reviews.models import (BaseComment,
+                                        ReviewRequestDraft,
+                                        ReviewRequestIssue)
+from reviewboard.reviews.page_snapshot import (get_page_snapshot,
+                                               get_page_snapshot_key)
 from reviewboard.testing import TestCase
 
 
@@ -164,9 +168,273 @@ class ReviewRequestPageDataTests(TestCase):
         self.assertIsInstance(entry, ChangeEntry)
         self.assertEqual(entry.changedesc, self.changedesc2)
 
-    def _build_data(self, entry_classes=None):
+    def test_get_entries_with_max_loaded_main_entries(self):
+        """Testing ReviewRequestPageData.get_entries with
+        max_loaded_main_entries defers older collapsed entries
+        """
+        data = self._build_data()
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+
+        entries = data.get_entries(max_loaded_main_entries=1)
+        main_entries = entries['main']
+
+        self.assertEqual(len(main_entries), 4)
+
+        # The first review has an open issue, so it's expanded and loaded.
+        self.assertEqual(main_entries[0].review, self.review1)
+        self.assertFalse(main_entries[0].collapsed)
+        self.assertFalse(main_entries[0].deferred)
+
+        self.assertEqual(main_entries[1].changedesc, self.changedesc1)
+        self.assertTrue(main_entries[1].collapsed)
+        self.assertTrue(main_entries[1].deferred)
+
+        # The newest entry is always loaded.
+        self.assertEqual(main_entries[3].changedesc, self.changedesc2)
+        self.assertFalse(main_entries[3].deferred)
+
+        self.assertFalse(entries['initial'][0].deferred)
+
+    def test_get_entries_with_max_loaded_main_entries_not_reached(self):
+        """Testing ReviewRequestPageData.get_entries with
+        max_loaded_main_entries greater than the number of entries
+        """
+        data = self._build_data()
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+
+        entries = data.get_entries(max_loaded_main_entries=4)
+
+        for entry in entries['main']:
+            self.assertFalse(entry.deferred)
+
+    def test_query_data_post_etag_stores_snapshot(self):
+        """Testing ReviewRequestPageData.query_data_post_etag stores a page
+        snapshot
+        """
+        data = self._build_data()
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+
+        snapshot = get_page_snapshot(
+            get_page_snapshot_key(self.review_request.pk))
+        self.assertEqual(snapshot['review_ids'],
+                         {self.review1.pk, self.review2.pk})
+        self.assertEqual(
+            snapshot['comments']['general_comments'],
+            [
+                (self.review1.pk, self.general_comment1.pk, None, True,
+                 BaseComment.OPEN),
+                (self.review2.pk, self.general_comment2.pk, None, True,
+                 BaseComment.OPEN),
+            ])
+        self.assertEqual(
+            snapshot['comments']['diff_comments'],
+            [
+                (self.review1.pk, self.diff_comment1.pk, None, True,
+                 BaseComment.RESOLVED, self.filediff1.pk, None),
+                (self.review2.pk, self.diff_comment2.pk, None, True,
+                 BaseComment.RESOLVED, self.filediff2.pk, None),
+            ])
+
+    def test_query_data_post_etag_with_issue_index(self):
+        """Testing ReviewRequestPageData.query_data_post_etag with the issue
+        index built
+        """
+        with self.siteconfig_settings({'review_request_issue_index_built':
+                                       True}):
+            self._test_query_data_post_etag_with(
+                expected_num_queries=19,
+                expect_reviews=True,
+                expect_file_attachments=True,
+                expect_screenshots=True,
+                expect_draft=True,
+                expect_comments=True,
+                expect_issues=True)
+
+    def test_query_data_post_etag_with_issue_index_uses_index(self):
+        """Testing ReviewRequestPageData.query_data_post_etag with the issue
+        index built takes issues and counts from the index
+        """
+        data = self._build_data()
+
+        ReviewRequestIssue.objects.filter(
+            comment_type='general',
+            comment_id=self.general_comment2.pk).delete()
+        ReviewRequestIssue.objects.filter(
+            comment_type='diff',
+            comment_id=self.diff_comment2.pk).update(
+                status=BaseComment.VERIFYING_RESOLVED)
+
+        with self.siteconfig_settings({'review_request_issue_index_built':
+                                       True}):
+            data.query_data_pre_etag()
+            data.query_data_post_etag()
+
+        self.assertEqual(data.issues, [
+            self.general_comment1,
+            self.file_attachment_comment1,
+            self.file_attachment_comment2,
+            self.diff_comment1,
+            self.diff_comment2,
+        ])
+        self.assertEqual(data.issue_counts, {
+            'total': 5,
+            'open': 1,
+            'resolved': 1,
+            'dropped': 2,
+            'verifying': 1,
+        })
+
+    def test_query_data_post_etag_with_snapshot(self):
+        """Testing ReviewRequestPageData.query_data_post_etag with a stored
+        page snapshot
+        """
+        data = self._build_data()
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+
+        data = self._build_data(populate=False)
+        data.query_data_pre_etag()
+
+        # The comments aren't queried at all.
+        with self.assertNumQueries(6):
+            data.query_data_post_etag()
+
+        self.assertEqual(data.all_comments, [
+            self.general_comment1,
+            self.general_comment2,
+            self.screenshot_comment1,
+            self.screenshot_comment2,
+            self.file_attachment_comment1,
+            self.file_attachment_comment2,
+            self.diff_comment1,
+            self.diff_comment2,
+        ])
+        self.assertEqual(data.issue_counts, {
+            'total': 6,
+            'open': 2,
+            'resolved': 2,
+            'dropped': 2,
+            'verifying': 0,
+        })
+        self.assertEqual(data.review_comments[self.review1.pk], [
+            self.general_comment1,
+            self.screenshot_comment1,
+            self.file_attachment_comment1,
+            self.diff_comment1,
+        ])
+        self.assertIn('text', data.all_comments[0].get_deferred_fields())
+
+    def test_query_data_post_etag_with_snapshot_and_draft_review(self):
+        """Testing ReviewRequestPageData.query_data_post_etag with a stored
+        page snapshot and a draft review owned by the user
+        """
+        data = self._build_data()
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+
+        review = self.create_review(self.review_request,
+                                    user=self.review_request.submitter)
+        comment = self.create_general_comment(review)
+
+        data = self._build_data(populate=False)
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+
+        self.assertIn(comment, data.all_comments)
+        self.assertEqual(data.review_comments[review.pk], [comment])
+
+    def test_get_entries_with_snapshot(self):
+        """Testing ReviewRequestPageData.get_entries with a stored page
+        snapshot loads the comments
+        """
+        data = self._build_data()
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+
+        data = self._build_data(populate=False)
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+
+        # There's one query for each type of comment.
+        with self.assertNumQueries(4):
+            data._load_partial_comments(set())
+
+        for comment in data.all_comments:
+            self.assertEqual(comment.get_deferred_fields(), set())
+
+        self.assertEqual(data.all_comments[0].text,
+                         self.general_comment1.text)
+
+    def test_get_entries_with_snapshot_and_deferred_entries(self):
+        """Testing ReviewRequestPageData.get_entries with a stored page
+        snapshot and max_loaded_main_entries doesn't load comments only
+        shown in deferred entries
+        """
         self._populate_review_request()
 
+        review = self.create_review(
+            self.review_request,
+            timestamp=timezone.now() - timedelta(days=1),
+            publish=True)
+        comment = self.create_general_comment(review)
+
+        data = self._build_data(populate=False)
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+
+        data = self._build_data(populate=False)
+        data.last_visited = timezone.now() + timedelta(days=10)
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+
+        entries = data.get_entries(max_loaded_main_entries=1)
+
+        self.assertEqual(entries['main'][0].review, review)
+        self.assertTrue(entries['main'][0].deferred)
+
+        for loaded_comment in data.all_comments:
+            if loaded_comment == comment:
+                self.assertIn('text', loaded_comment.get_deferred_fields())
+            else:
+                self.assertEqual(loaded_comment.get_deferred_fields(),
+                                 set())
+
+    def test_get_entries_with_stale_snapshot(self):
+        """Testing ReviewRequestPageData.get_entries with a stored page
+        snapshot referencing a deleted comment
+        """
+        data = self._build_data()
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+
+        self.general_comment2.delete()
+
+        data = self._build_data(populate=False)
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+        data.get_entries()
+
+        self.assertEqual(data.all_comments, [
+            self.general_comment1,
+            self.screenshot_comment1,
+            self.screenshot_comment2,
+            self.file_attachment_comment1,
+            self.file_attachment_comment2,
+            self.diff_comment1,
+            self.diff_comment2,
+        ])
+        self.assertEqual(data.issue_counts['total'], 5)
+
+        for comment in data.all_comments:
+            self.assertEqual(comment.get_deferred_fields(), set())
+
+    def _build_data(self, entry_classes=None, populate=True):
+        if populate:
+            self._populate_review_request()
+
         request = RequestFactory().get('/r/1/')
         request.user = self.review_request.submitter
 
@@ -86,6 +86,10 @@ review_request_urls = [
         views.ReviewRequestUpdatesView.as_view(),
         name='review-request-updates'),
 
+    url(r'^_updates/watch/$',
+        views.ReviewRequestUpdatesWatchView.as_view(),
+        name='review-request-updates-watch'),
+
     # Review request diffs
     url(r'^diff/', include(diffviewer_urls)),
 
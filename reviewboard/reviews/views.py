@@ -17,7 +17,8 @@ from django.http import (Http404,
                          HttpResponseNotFound)
 from django.shortcuts import get_object_or_404, get_list_or_404, render
 from django.template.defaultfilters import date
-from django.utils import six, timezone
+from django.utils import six
+from django.utils.cache import add_never_cache_headers
 from django.utils.formats import localize
 from django.utils.html import escape, format_html, strip_tags
 from django.utils.safestring import mark_safe
@@ -73,6 +74,10 @@ from reviewboard.reviews.models import (Comment,
                                         Review,
                                         ReviewRequest,
                                         Screenshot)
+from reviewboard.reviews.page_updates import (acquire_updates_waiter,
+                                              get_page_updates_version,
+                                              release_updates_waiter,
+                                              wait_for_page_update)
 from reviewboard.reviews.ui.base import FileAttachmentReviewUI
 from reviewboard.scmtools.errors import FileNotFoundError
 from reviewboard.scmtools.models import Repository
@@ -559,6 +564,7 @@ class ReviewRequestDetailView(ReviewRequestViewMixin,
         super(ReviewRequestDetailView, self).__init__(**kwargs)
 
         self.data = None
+        self.updates_version = None
         self.visited = None
         self.blocks = None
         self.last_activity_time = None
@@ -587,6 +593,11 @@ class ReviewRequestDetailView(ReviewRequestViewMixin,
         """
         review_request = self.review_request
 
+        # Note the version of the page before loading any data, so that a
+        # change made while the page is being built will be picked up by the
+        # page once loaded.
+        self.updates_version = get_page_updates_version(review_request.pk)
+
         # Track the visit to this review request, so the dashboard can
         # reflect whether there are new updates.
         self.visited, self.last_visited = self.track_review_request_visit()
@@ -680,11 +691,18 @@ class ReviewRequestDetailView(ReviewRequestViewMixin,
 
             # If the review request is public and pending review and if the user
             # is logged in, mark that they've visited this review request.
+            #
+            # This is only written if there's been activity since the last
+            # recorded visit, since otherwise the result would be the same.
             if (visited and
                 review_request.public and
                 review_request.status == review_request.PENDING_REVIEW):
-                visited.timestamp = timezone.now()
-                visited.save()
+                ReviewRequestVisit.objects.update_timestamp(
+                    visited,
+                    last_activity_timestamp=max(
+                        review_request.last_updated,
+                        (review_request.last_review_activity_timestamp or
+                         review_request.last_updated)))
 
         return visited, last_visited
 
@@ -731,8 +749,12 @@ class ReviewRequestDetailView(ReviewRequestViewMixin,
         request = self.request
         data = self.data
 
+        siteconfig = SiteConfiguration.objects.get_current()
+
         data.query_data_post_etag()
-        entries = data.get_entries()
+        entries = data.get_entries(
+            max_loaded_main_entries=siteconfig.get(
+                'review_request_page_max_loaded_entries'))
 
         review = review_request.get_pending_review(request.user)
         close_info = review_request.get_close_info()
@@ -772,6 +794,7 @@ class ReviewRequestDetailView(ReviewRequestViewMixin,
                 'Review Request #%s: %s'
                 % (review_request.display_id, review_request.summary)
             ),
+            'updates_version': self.updates_version,
         })
 
         return context
@@ -1000,19 +1023,9 @@ class ReviewRequestUpdatesView(ReviewRequestViewMixin, ETagViewMixin,
                 base_entry_context.update(
                     make_review_request_context(request, review_request))
 
-            try:
-                html = render_to_string(
-                    template_name=entry.template_name,
-                    context=dict({
-                        'show_entry_statuses_area': (
-                            entry.entry_pos == entry.ENTRY_POS_MAIN),
-                        'entry': entry,
-                    }, **base_entry_context),
-                    request=request)
-            except Exception as e:
-                logging.error('Error rendering review request page entry '
-                              '%r: %s',
-                              entry, e, request=request)
+            # This will reuse any cached HTML for the entry.
+            html = entry.render_to_string(request, base_entry_context,
+                                          include_empty=True)
 
             self._write_update(payload, metadata, html)
 
@@ -1067,6 +1080,85 @@ class ReviewRequestUpdatesView(ReviewRequestViewMixin, ETagViewMixin,
         payload.write(html)
 
 
+class ReviewRequestUpdatesWatchView(ReviewRequestViewMixin, View):
+    """Internal view for checking for changes to the review request page.
+
+    The review request page calls this with the updates version it knows
+    about (from the page or a previous call), and gets back the current
+    version. Only the cache is checked, so this is far cheaper than
+    repeatedly requesting :py:class:`ReviewRequestUpdatesView`, which the
+    page only needs to do once something has changed.
+
+    If the ``review_request_page_updates_wait_secs`` setting is set, the
+    request is held open until the version changes or that many seconds
+    have passed. This ties up a server worker while waiting, so at most
+    ``review_request_page_max_updates_waiters`` requests can wait at once.
+    Past that, requests are answered right away.
+
+    The response is a JSON payload in the following format:
+
+    .. code-block:: javascript
+
+       {
+           "changed": <bool>,
+           "version": <int>,
+           "waited": <bool>
+       }
+
+    ``waited`` indicates whether the request was held open. If not, the page
+    waits for its polling interval before checking again.
+
+    The format is subject to change without notice, and should not be
+    relied upon by third parties.
+    """
+
+    def get(self, request, **kwargs):
+        """Handle HTTP GET requests for this view.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            **kwargs (dict):
+                Keyword arguments passed to the handler.
+
+        Returns:
+            django.http.HttpResponse:
+            The HTTP response containing the current version.
+        """
+        try:
+            version = int(request.GET['version'])
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest('A valid ?version= is required')
+
+        siteconfig = SiteConfiguration.objects.get_current()
+        wait_secs = siteconfig.get('review_request_page_updates_wait_secs')
+        waited = (wait_secs > 0 and
+                  acquire_updates_waiter(siteconfig.get(
+                      'review_request_page_max_updates_waiters')))
+
+        if waited:
+            try:
+                new_version = wait_for_page_update(self.review_request.pk,
+                                                   version,
+                                                   timeout=wait_secs)
+            finally:
+                release_updates_waiter()
+        else:
+            new_version = get_page_updates_version(self.review_request.pk)
+
+        response = HttpResponse(
+            json.dumps({
+                'changed': new_version != version,
+                'version': new_version,
+                'waited': waited,
+            }),
+            content_type='application/json')
+        add_never_cache_headers(response)
+
+        return response
+
+
 class ReviewsDiffViewerView(ReviewRequestViewMixin,
                             UserProfileRequiredViewMixin,
                             DiffViewerView):
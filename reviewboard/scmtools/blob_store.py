@@ -0,0 +1,626 @@
+"""A local on-disk store for repository file contents.
+
+Repository file contents are normally cached in memcached, split across
+chunked keys. Large files fetched at immutable revisions can instead be
+stored in a content-addressed blob store under ``SITE_DATA_DIR``, leaving
+only small files and pointers in memcached. This keeps large files from
+churning the cache, and lets them survive a memcached restart.
+
+Blobs are stored by the SHA-256 of their contents. Once the store grows past
+the configured size, blobs are evicted in least recently used order by the
+``evict-file-blobs`` management command.
+"""
+
+from __future__ import division, unicode_literals
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.encoding import force_bytes
+from djblets.cache.backend import make_cache_key
+from djblets.siteconfig.models import SiteConfiguration
+
+
+logger = logging.getLogger(__name__)
+
+
+#: A regex matching revisions that can never change.
+#:
+#: This matches full SHA-1 and SHA-256 IDs, as used by Git and Mercurial
+#: commits, trees, blobs, and changesets. Abbreviated IDs, branch names, and
+#: sequential revision numbers are never considered immutable.
+IMMUTABLE_REVISION_RE = re.compile(r'^(?:[0-9a-fA-F]{40}|[0-9a-fA-F]{64})$')
+
+
+class FileBlobStore(object):
+    """A content-addressed, size-limited on-disk store for file contents.
+
+    The store keeps two directories:
+
+    ``objects/``
+        The file contents, named by the SHA-256 of their contents.
+
+    ``refs/``
+        Small files mapping a file cache key to the digest of its contents.
+
+    Memcached holds either the file contents (for files smaller than
+    :py:attr:`inline_threshold`) or the digest of the blob on disk.
+    """
+
+    #: The directory name within ``SITE_DATA_DIR`` for the store.
+    DIR_NAME = 'file-blobs'
+
+    #: The cache key used to track the approximate size of the store.
+    USAGE_CACHE_KEY = 'file-blob-store-usage'
+
+    #: The cache key used to track the approximate number of blobs stored.
+    BLOB_COUNT_CACHE_KEY = 'file-blob-store-blob-count'
+
+    #: The cache key prefix used to track hit and miss statistics.
+    STATS_CACHE_KEY = 'file-blob-store-stats:%s'
+
+    #: The fraction of the maximum size to shrink to when evicting blobs.
+    EVICT_TARGET_RATIO = 0.9
+
+    #: Files smaller than this many bytes are also stored in memcached.
+    inline_threshold = 64 * 1024
+
+    def __init__(self, path=None):
+        """Initialize the store.
+
+        Args:
+            path (unicode, optional):
+                The path to the store. This defaults to a ``file-blobs``
+                directory within ``SITE_DATA_DIR``.
+        """
+        self._path = path
+
+    @property
+    def path(self):
+        """The path to the store on disk.
+
+        Type:
+            unicode
+        """
+        return self._path or os.path.join(settings.SITE_DATA_DIR,
+                                          self.DIR_NAME)
+
+    @property
+    def enabled(self):
+        """Whether the store is enabled for the site.
+
+        Type:
+            bool
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+
+        return siteconfig.get('file_blob_store_enabled')
+
+    @property
+    def max_size(self):
+        """The maximum size of the store in bytes.
+
+        A value of 0 means the store is not size-limited.
+
+        Type:
+            int
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+
+        return siteconfig.get('file_blob_store_max_size') or 0
+
+    def is_immutable_revision(self, revision, base_commit_id=None):
+        """Return whether a file at the given revision can never change.
+
+        Args:
+            revision (unicode):
+                The revision of the file.
+
+            base_commit_id (unicode, optional):
+                The ID of the commit containing the revision of the file.
+
+        Returns:
+            bool:
+            ``True`` if the revision (or base commit ID) is a full commit or
+            blob ID.
+        """
+        return bool(IMMUTABLE_REVISION_RE.match(revision) or
+                    (base_commit_id and
+                     IMMUTABLE_REVISION_RE.match(base_commit_id)))
+
+    def get_file(self, key, lookup_callable):
+        """Return file contents from the store, fetching them if needed.
+
+        This checks memcached first, then the blob store on disk. If neither
+        has the file, ``lookup_callable`` is called and its result is stored.
+
+        Args:
+            key (unicode):
+                The file cache key, as generated by
+                :py:meth:`Repository._make_file_cache_key
+                <reviewboard.scmtools.models.Repository._make_file_cache_key>`.
+
+            lookup_callable (callable):
+                A function returning the file contents as a byte string.
+
+        Returns:
+            bytes:
+            The file contents.
+        """
+        cache_key = self._make_pointer_cache_key(key)
+        entry = cache.get(cache_key)
+
+        if entry is not None:
+            kind, value = entry
+
+            if kind == 'inline':
+                self._record_stat('hits')
+                return value
+
+            data = self._read_blob(value)
+
+            if data is not None:
+                self._record_stat('hits')
+                return data
+
+        digest = self._read_ref(key)
+
+        if digest is not None:
+            data = self._read_blob(digest)
+
+            if data is not None:
+                self._record_stat('hits')
+                self._set_pointer(cache_key, data, digest)
+
+                return data
+
+        self._record_stat('misses')
+
+        data = lookup_callable()
+        digest = hashlib.sha256(data).hexdigest()
+
+        try:
+            self._write_blob(digest, data)
+            self._write_ref(key, digest)
+        except (IOError, OSError) as e:
+            logger.error('Unable to write file blob %s to %s: %s',
+                         digest, self.path, e)
+        else:
+            self._set_pointer(cache_key, data, digest)
+
+        return data
+
+    def has_file(self, key):
+        """Return whether the store has contents for a file cache key.
+
+        Args:
+            key (unicode):
+                The file cache key.
+
+        Returns:
+            bool:
+            ``True`` if the file is in the store.
+        """
+        return (self._make_pointer_cache_key(key) in cache or
+                os.path.exists(self._get_ref_path(key)))
+
+    def get_usage(self):
+        """Return the number of bytes used by blobs on disk.
+
+        This scans the store, and may be slow for very large stores.
+
+        Returns:
+            tuple:
+            A 2-tuple of ``(total_bytes, blob_count)``.
+        """
+        total = 0
+        count = 0
+
+        for blob_path, stat in self._iter_blobs():
+            total += stat.st_size
+            count += 1
+
+        return total, count
+
+    def get_stats(self):
+        """Return statistics on the store.
+
+        The size of the store and number of blobs come from the totals kept
+        in the cache as blobs are written and evicted. The store is only
+        scanned if those totals aren't in the cache.
+
+        Returns:
+            dict:
+            A dictionary containing ``hits``, ``misses``, ``hit_rate``,
+            ``miss_rate``, ``bytes``, ``blob_count``, ``max_size`` and
+            ``path`` keys.
+        """
+        hits = cache.get(make_cache_key(self.STATS_CACHE_KEY % 'hits')) or 0
+        misses = (cache.get(make_cache_key(self.STATS_CACHE_KEY % 'misses'))
+                  or 0)
+        total = hits + misses
+        usage, blob_count = self._get_cached_usage()
+
+        if total:
+            hit_rate = 100 * hits / total
+            miss_rate = 100 * misses / total
+        else:
+            hit_rate = 0
+            miss_rate = 0
+
+        return {
+            'blob_count': blob_count,
+            'bytes': usage,
+            'hit_rate': hit_rate,
+            'hits': hits,
+            'max_size': self.max_size,
+            'miss_rate': miss_rate,
+            'misses': misses,
+            'path': self.path,
+        }
+
+    def needs_eviction(self):
+        """Return whether the store may have grown past its size limit.
+
+        This uses the approximate size tracked in the cache, and doesn't scan
+        the store.
+
+        Returns:
+            bool:
+            ``True`` if the store is size-limited and its tracked size is past
+            the limit or unknown.
+        """
+        max_size = self.max_size
+
+        if not max_size:
+            return False
+
+        usage = cache.get(make_cache_key(self.USAGE_CACHE_KEY))
+
+        return usage is None or usage > max_size
+
+    def evict(self, max_size=None):
+        """Evict least recently used blobs until under the size limit.
+
+        Blobs are ordered by their modification time, which is bumped every
+        time a blob is read. Any refs pointing to evicted blobs are removed.
+
+        Args:
+            max_size (int, optional):
+                The maximum size of the store. This defaults to
+                :py:attr:`max_size`.
+
+        Returns:
+            int:
+            The number of blobs evicted.
+        """
+        if max_size is None:
+            max_size = self.max_size
+
+        blobs = sorted(self._iter_blobs(),
+                       key=lambda info: info[1].st_mtime)
+        usage = sum(stat.st_size for blob_path, stat in blobs)
+        evicted_digests = set()
+
+        if max_size:
+            target_size = int(max_size * self.EVICT_TARGET_RATIO)
+
+            for blob_path, stat in blobs:
+                if usage <= target_size:
+                    break
+
+                try:
+                    os.unlink(blob_path)
+                except OSError:
+                    continue
+
+                usage -= stat.st_size
+                evicted_digests.add(os.path.basename(blob_path))
+
+        if evicted_digests:
+            self._remove_refs(evicted_digests)
+
+        self._set_cached_usage(usage, len(blobs) - len(evicted_digests))
+
+        return len(evicted_digests)
+
+    def _get_cached_usage(self):
+        """Return the size of the store and number of blobs from the cache.
+
+        If either total isn't in the cache, the store will be scanned and
+        the totals cached.
+
+        Returns:
+            tuple:
+            A 2-tuple of ``(total_bytes, blob_count)``.
+        """
+        usage_key = make_cache_key(self.USAGE_CACHE_KEY)
+        count_key = make_cache_key(self.BLOB_COUNT_CACHE_KEY)
+        totals = cache.get_many([usage_key, count_key])
+
+        if usage_key in totals and count_key in totals:
+            return totals[usage_key], totals[count_key]
+
+        usage, blob_count = self.get_usage()
+        self._set_cached_usage(usage, blob_count)
+
+        return usage, blob_count
+
+    def _set_cached_usage(self, usage, blob_count):
+        """Store the size of the store and number of blobs in the cache.
+
+        Args:
+            usage (int):
+                The number of bytes used by blobs on disk.
+
+            blob_count (int):
+                The number of blobs on disk.
+        """
+        cache.set_many(
+            {
+                make_cache_key(self.USAGE_CACHE_KEY): usage,
+                make_cache_key(self.BLOB_COUNT_CACHE_KEY): blob_count,
+            },
+            settings.CACHE_EXPIRATION_TIME)
+
+    def _record_stat(self, name):
+        """Increment a hit/miss counter.
+
+        Args:
+            name (unicode):
+                The name of the counter.
+        """
+        key = make_cache_key(self.STATS_CACHE_KEY % name)
+
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1)
+
+    def _make_pointer_cache_key(self, key):
+        """Return the memcached key for a file's pointer.
+
+        Args:
+            key (unicode):
+                The file cache key.
+
+        Returns:
+            unicode:
+            The memcached key for the pointer.
+        """
+        return make_cache_key('file-blob:%s' % key)
+
+    def _set_pointer(self, cache_key, data, digest):
+        """Store a pointer (or small file contents) in memcached.
+
+        Args:
+            cache_key (unicode):
+                The memcached key for the pointer.
+
+            data (bytes):
+                The file contents.
+
+            digest (unicode):
+                The SHA-256 digest of the file contents.
+        """
+        if len(data) < self.inline_threshold:
+            entry = ('inline', data)
+        else:
+            entry = ('blob', digest)
+
+        cache.set(cache_key, entry, settings.CACHE_EXPIRATION_TIME)
+
+    def _get_blob_path(self, digest):
+        """Return the path to a blob on disk.
+
+        Args:
+            digest (unicode):
+                The SHA-256 digest of the blob.
+
+        Returns:
+            unicode:
+            The path to the blob.
+        """
+        return os.path.join(self.path, 'objects', digest[:2], digest)
+
+    def _get_ref_path(self, key):
+        """Return the path to a ref on disk.
+
+        Args:
+            key (unicode):
+                The file cache key.
+
+        Returns:
+            unicode:
+            The path to the ref.
+        """
+        ref_name = hashlib.sha256(force_bytes(key)).hexdigest()
+
+        return os.path.join(self.path, 'refs', ref_name[:2], ref_name)
+
+    def _read_blob(self, digest):
+        """Read a blob from disk.
+
+        This marks the blob as recently used.
+
+        Args:
+            digest (unicode):
+                The SHA-256 digest of the blob.
+
+        Returns:
+            bytes:
+            The blob's contents, or ``None`` if the blob was not found.
+        """
+        blob_path = self._get_blob_path(digest)
+
+        try:
+            with open(blob_path, 'rb') as fp:
+                data = fp.read()
+
+            os.utime(blob_path, None)
+        except (IOError, OSError):
+            return None
+
+        return data
+
+    def _read_ref(self, key):
+        """Read a ref from disk.
+
+        Args:
+            key (unicode):
+                The file cache key.
+
+        Returns:
+            unicode:
+            The digest of the blob, or ``None`` if there is no ref.
+        """
+        try:
+            with open(self._get_ref_path(key), 'r') as fp:
+                return fp.read().strip() or None
+        except (IOError, OSError):
+            return None
+
+    def _write_blob(self, digest, data):
+        """Write a blob to disk.
+
+        Blobs that already exist are not rewritten. This never evicts other
+        blobs, since that requires scanning the whole store. The store's size
+        is instead checked by the ``evict-file-blobs`` management command.
+
+        Args:
+            digest (unicode):
+                The SHA-256 digest of the blob.
+
+            data (bytes):
+                The blob's contents.
+        """
+        blob_path = self._get_blob_path(digest)
+
+        if os.path.exists(blob_path):
+            os.utime(blob_path, None)
+            return
+
+        self._write_atomic(blob_path, data)
+
+        try:
+            cache.incr(make_cache_key(self.USAGE_CACHE_KEY), len(data))
+            cache.incr(make_cache_key(self.BLOB_COUNT_CACHE_KEY))
+        except ValueError:
+            # The totals will be counted again the next time blobs are
+            # evicted or statistics are fetched.
+            cache.delete_many([make_cache_key(self.USAGE_CACHE_KEY),
+                               make_cache_key(self.BLOB_COUNT_CACHE_KEY)])
+
+    def _write_ref(self, key, digest):
+        """Write a ref to disk.
+
+        Args:
+            key (unicode):
+                The file cache key.
+
+            digest (unicode):
+                The SHA-256 digest of the blob.
+        """
+        self._write_atomic(self._get_ref_path(key), force_bytes(digest))
+
+    def _write_atomic(self, path, data):
+        """Atomically write a file to disk.
+
+        The data is written to a temporary file in the same directory and then
+        renamed, so that readers never see a partially-written file.
+
+        Args:
+            path (unicode):
+                The destination path.
+
+            data (bytes):
+                The data to write.
+        """
+        dirname = os.path.dirname(path)
+
+        if not os.path.exists(dirname):
+            try:
+                os.makedirs(dirname, 0o755)
+            except OSError:
+                # Another process may have created it first.
+                if not os.path.isdir(dirname):
+                    raise
+
+        fd, temp_path = tempfile.mkstemp(dir=dirname, prefix='.tmp-')
+
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(data)
+
+            os.rename(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+            raise
+
+    def _iter_blobs(self):
+        """Iterate through all blobs on disk.
+
+        Yields:
+            tuple:
+            A 2-tuple of ``(blob_path, stat_result)``.
+        """
+        objects_dir = os.path.join(self.path, 'objects')
+
+        for dirpath, dirnames, filenames in os.walk(objects_dir):
+            for filename in filenames:
+                if filename.startswith('.tmp-'):
+                    continue
+
+                blob_path = os.path.join(dirpath, filename)
+
+                try:
+                    yield blob_path, os.stat(blob_path)
+                except OSError:
+                    continue
+
+    def _remove_refs(self, digests):
+        """Remove all refs pointing to the given blobs.
+
+        Args:
+            digests (set of unicode):
+                The digests of the removed blobs.
+        """
+        refs_dir = os.path.join(self.path, 'refs')
+
+        for dirpath, dirnames, filenames in os.walk(refs_dir):
+            for filename in filenames:
+                ref_path = os.path.join(dirpath, filename)
+
+                try:
+                    with open(ref_path, 'r') as fp:
+                        digest = fp.read().strip()
+
+                    if digest in digests:
+                        os.unlink(ref_path)
+                except (IOError, OSError):
+                    continue
+
+
+_file_blob_store = None
+
+
+def get_file_blob_store():
+    """Return the file blob store for the site.
+
+    Returns:
+        FileBlobStore:
+        The file blob store.
+    """
+    global _file_blob_store
+
+    if _file_blob_store is None:
+        _file_blob_store = FileBlobStore()
+
+    return _file_blob_store
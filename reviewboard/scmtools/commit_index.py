@@ -0,0 +1,411 @@
+"""Persistent, incrementally refreshed commit history for repositories.
+
+Listing commits for a repository used to require a call to the hosting
+service or repository backend for every page of history, cached only for a
+short time. This module maintains a :py:class:`~reviewboard.scmtools.models.
+CommitIndex` for each branch that's been listed, containing every commit seen
+so far.
+
+When the newest commits are requested, the index is refreshed by fetching
+history from the head of the branch only until a commit already in the index
+is found. Older pages are served directly from the index, and the index is
+extended whenever a client paginates past the oldest commit it contains.
+
+Pages served from the index are the same size as the pages returned by the
+backend, and a single request never fetches more than a couple of pages of
+history. Any fetches beyond what's needed for the requested page are made
+at background priority for the hosting service's API rate limit, and are
+skipped if that budget has run out.
+"""
+
+from __future__ import unicode_literals
+
+import logging
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.six.moves import range
+
+from reviewboard.hostingsvcs.errors import RateLimitExceededError
+from reviewboard.hostingsvcs.rate_limits import (PRIORITY_BACKGROUND,
+                                                 api_call_priority)
+from reviewboard.scmtools.models import CommitIndex, IndexedCommit
+
+
+logger = logging.getLogger(__name__)
+
+
+#: The number of commits in a page, if the backend's page size is unknown.
+#:
+#: The backend's page size is only unknown if it's never returned a full
+#: page, in which case the whole branch fits in the index's first page.
+DEFAULT_COMMITS_PAGE_SIZE = 30
+
+#: The maximum number of pages fetched when refreshing an index.
+#:
+#: This bounds the backend calls made while handling a single request. If no
+#: commit already in the index is found after this many pages, the index is
+#: rebuilt from the commits just fetched. Older history is then fetched
+#: again as it's paginated through.
+MAX_REFRESH_PAGES = 2
+
+
+def get_indexed_commits(repository, branch, start, fetch_commits):
+    """Return a page of commits, using the commit index where possible.
+
+    Args:
+        repository (reviewboard.scmtools.models.Repository):
+            The repository to list commits for.
+
+        branch (unicode):
+            The branch to list commits for, or ``None`` for the default
+            branch.
+
+        start (unicode):
+            The commit to start listing from, or ``None`` to list from the
+            head of the branch.
+
+        fetch_commits (callable):
+            A function taking a ``start`` argument and returning a list of
+            :py:class:`~reviewboard.scmtools.core.Commit` from the hosting
+            service or repository backend.
+
+    Returns:
+        list of reviewboard.scmtools.core.Commit:
+        The commits, from newest to oldest. This will be ``None`` if the
+        index cannot serve this page, in which case the caller should fetch
+        it directly.
+
+    Raises:
+        reviewboard.hostingsvcs.errors.HostingServiceError:
+            The hosting service backing the repository encountered an error.
+
+        reviewboard.scmtools.errors.SCMError:
+            The repository tool encountered an error.
+
+        NotImplementedError:
+            Commits retrieval is not available for this type of repository.
+    """
+    branch = branch or ''
+
+    try:
+        index = CommitIndex.objects.get(repository=repository, branch=branch)
+    except CommitIndex.DoesNotExist:
+        index = None
+
+    try:
+        if not start:
+            refresh_period = timedelta(
+                seconds=repository.COMMITS_CACHE_PERIOD_SHORT)
+
+            if (index is None or
+                index.last_refreshed is None or
+                timezone.now() - index.last_refreshed > refresh_period):
+                index = _refresh_index(repository, branch, index,
+                                       fetch_commits)
+
+            entries = list(index.commits.all()[:_get_page_size(index)])
+        elif index is None:
+            return None
+        else:
+            entries = _get_entries_from(index, start, fetch_commits)
+
+            if entries is None:
+                return None
+    except IntegrityError as e:
+        # Another process updated the index at the same time. The caller can
+        # fetch directly for now.
+        logger.warning('Unable to update commit index for repository %s, '
+                       'branch "%s": %s',
+                       repository.pk, branch, e)
+        return None
+
+    return [
+        entry.to_commit()
+        for entry in entries
+    ]
+
+
+def invalidate_commit_indexes(repository):
+    """Mark all commit indexes for a repository as needing a refresh.
+
+    This is called when a repository hook reports that new commits have been
+    pushed. The next listing of the newest commits on each branch will
+    refresh its index.
+
+    Args:
+        repository (reviewboard.scmtools.models.Repository):
+            The repository whose indexes should be refreshed.
+    """
+    CommitIndex.objects.filter(repository=repository).update(
+        last_refreshed=None)
+
+
+def _get_entries_from(index, start, fetch_commits):
+    """Return a page of entries from the index, starting at a commit.
+
+    The index will be extended with older history if needed to fill the
+    page. At most one page of history will be fetched from the backend.
+
+    Args:
+        index (reviewboard.scmtools.models.CommitIndex):
+            The index to read from.
+
+        start (unicode):
+            The ID of the first commit in the page.
+
+        fetch_commits (callable):
+            A function for fetching commits from the backend.
+
+    Returns:
+        list of reviewboard.scmtools.models.IndexedCommit:
+        The entries in the page, or ``None`` if the start commit isn't in the
+        index and can't be added to it.
+    """
+    extended = False
+    page_size = _get_page_size(index)
+
+    try:
+        entry = index.commits.get(commit_id=start)
+    except IndexedCommit.DoesNotExist:
+        if (start != index.tail_parent_id or
+            not _extend_index(index, fetch_commits)):
+            return None
+
+        extended = True
+
+        try:
+            entry = index.commits.get(commit_id=start)
+        except IndexedCommit.DoesNotExist:
+            return None
+
+    entries = list(index.commits.filter(position__lte=entry.position)
+                   [:page_size])
+
+    if not extended and len(entries) < page_size:
+        # Filling out the rest of the page is optional, so it shouldn't use
+        # up the budget reserved for more important requests.
+        try:
+            with api_call_priority(PRIORITY_BACKGROUND):
+                extended = _extend_index(index, fetch_commits)
+        except RateLimitExceededError:
+            extended = False
+
+        if extended:
+            entries = list(index.commits.filter(position__lte=entry.position)
+                           [:page_size])
+
+    return entries
+
+
+def _refresh_index(repository, branch, index, fetch_commits):
+    """Refresh an index from the head of the branch.
+
+    Pages of history are fetched until a commit already in the index is
+    found. Any commits in the index newer than that commit are no longer on
+    the branch, and are removed.
+
+    Args:
+        repository (reviewboard.scmtools.models.Repository):
+            The repository being indexed.
+
+        branch (unicode):
+            The branch being indexed.
+
+        index (reviewboard.scmtools.models.CommitIndex):
+            The existing index, or ``None`` if one needs to be created.
+
+        fetch_commits (callable):
+            A function for fetching commits from the backend.
+
+    Returns:
+        reviewboard.scmtools.models.CommitIndex:
+        The refreshed index.
+    """
+    has_entries = index is not None and index.commits.exists()
+    new_commits = []
+    seen_ids = set()
+    overlap_position = None
+    complete = False
+    page_start = None
+    page_size = 0
+
+    for i in range(MAX_REFRESH_PAGES):
+        if i == 0:
+            commits = fetch_commits(page_start)
+        else:
+            # Only the first page is needed for the response. Later pages
+            # just keep the rest of the index, so they shouldn't use up the
+            # budget reserved for more important requests.
+            try:
+                with api_call_priority(PRIORITY_BACKGROUND):
+                    commits = fetch_commits(page_start)
+            except RateLimitExceededError:
+                break
+
+        if not commits:
+            complete = True
+            break
+
+        if commits[-1].parent:
+            page_size = max(page_size, len(commits))
+
+        if has_entries:
+            known_positions = dict(
+                index.commits
+                .filter(commit_id__in=[commit.id for commit in commits])
+                .values_list('commit_id', 'position'))
+        else:
+            known_positions = {}
+
+        for commit in commits:
+            if commit.id in known_positions:
+                overlap_position = known_positions[commit.id]
+                break
+
+            if commit.id not in seen_ids:
+                seen_ids.add(commit.id)
+                new_commits.append(commit)
+
+        if overlap_position is not None or not has_entries:
+            break
+
+        page_start = commits[-1].parent
+
+        if not page_start:
+            complete = True
+            break
+
+    with transaction.atomic():
+        if index is None:
+            index = CommitIndex.objects.create(repository=repository,
+                                               branch=branch)
+
+        if overlap_position is None:
+            # Either this is a new index, or we couldn't find where the new
+            # history joins the old. Start the index over.
+            index.commits.all().delete()
+            top_position = -1
+
+            if new_commits:
+                index.tail_parent_id = new_commits[-1].parent or ''
+            else:
+                index.tail_parent_id = ''
+
+            index.complete = complete or not index.tail_parent_id
+        else:
+            index.commits.filter(position__gt=overlap_position).delete()
+            top_position = overlap_position
+
+        IndexedCommit.objects.bulk_create(
+            _build_entry(index, commit, top_position + i + 1)
+            for i, commit in enumerate(reversed(new_commits))
+        )
+
+        index.page_size = max(index.page_size, page_size)
+        index.last_refreshed = timezone.now()
+        index.save(update_fields=('tail_parent_id', 'complete', 'page_size',
+                                  'last_refreshed'))
+
+    return index
+
+
+def _extend_index(index, fetch_commits):
+    """Extend an index with the next page of older history.
+
+    Args:
+        index (reviewboard.scmtools.models.CommitIndex):
+            The index to extend.
+
+        fetch_commits (callable):
+            A function for fetching commits from the backend.
+
+    Returns:
+        bool:
+        ``True`` if new commits were added to the index.
+    """
+    if index.complete or not index.tail_parent_id:
+        return False
+
+    commits = fetch_commits(index.tail_parent_id)
+
+    if commits and commits[0].id != index.tail_parent_id:
+        # The backend didn't start the page where we asked it to, so we
+        # can't be sure the history is contiguous.
+        return False
+
+    with transaction.atomic():
+        if commits:
+            known_ids = set(
+                index.commits
+                .filter(commit_id__in=[commit.id for commit in commits])
+                .values_list('commit_id', flat=True))
+            bottom_position = (
+                index.commits.aggregate(Min('position'))['position__min'] or
+                0)
+            new_commits = [
+                commit
+                for commit in commits
+                if commit.id not in known_ids
+            ]
+
+            IndexedCommit.objects.bulk_create(
+                _build_entry(index, commit, bottom_position - i - 1)
+                for i, commit in enumerate(new_commits)
+            )
+
+            index.tail_parent_id = commits[-1].parent or ''
+
+            if index.tail_parent_id:
+                index.page_size = max(index.page_size, len(commits))
+        else:
+            new_commits = []
+            index.tail_parent_id = ''
+
+        index.complete = not index.tail_parent_id
+        index.save(update_fields=('tail_parent_id', 'complete', 'page_size'))
+
+    return len(new_commits) > 0
+
+
+def _get_page_size(index):
+    """Return the number of commits to serve in a page from an index.
+
+    Args:
+        index (reviewboard.scmtools.models.CommitIndex):
+            The index.
+
+    Returns:
+        int:
+        The backend's page size, if known, or
+        :py:data:`DEFAULT_COMMITS_PAGE_SIZE`.
+    """
+    return index.page_size or DEFAULT_COMMITS_PAGE_SIZE
+
+
+def _build_entry(index, commit, position):
+    """Return a new index entry for a commit.
+
+    Args:
+        index (reviewboard.scmtools.models.CommitIndex):
+            The index the entry belongs to.
+
+        commit (reviewboard.scmtools.core.Commit):
+            The commit.
+
+        position (int):
+            The position of the commit in the index.
+
+    Returns:
+        reviewboard.scmtools.models.IndexedCommit:
+        The unsaved entry.
+    """
+    return IndexedCommit(index=index,
+                         commit_id=commit.id,
+                         position=position,
+                         author_name=commit.author_name or '',
+                         date=commit.date or '',
+                         message=commit.message or '',
+                         parent_id=commit.parent or '')
@@ -457,6 +457,16 @@ class SCMTool(object):
     #: Whether or not commits in this SCMTool require the committer fields.
     commits_have_committer = False
 
+    #: Whether the SCMTool can check for many files' existence at once.
+    #:
+    #: If ``True``, :py:meth:`files_exist` must be overridden to check all
+    #: files in one operation. It will be used when validating uploaded
+    #: diffs, instead of checking each file concurrently.
+    #:
+    #: Version Added:
+    #:     4.0
+    supports_batch_file_exists = False
+
     #: Whether server-side pending changesets are supported.
     #:
     #: These are used by some types of repositories to track what changes
@@ -706,6 +716,42 @@ class SCMTool(object):
         except FileNotFoundError:
             return False
 
+    def files_exist(self, files, base_commit_id=None, **kwargs):
+        """Return whether each of a list of files exists in a repository.
+
+        By default, this checks each file in turn using :py:meth:`file_exists`.
+        Subclasses that set :py:attr:`supports_batch_file_exists` to ``True``
+        must override this to check all files in one operation.
+
+        Version Added:
+            4.0
+
+        Args:
+            files (list of tuple):
+                A list of ``(path, revision)`` tuples to check, with each
+                path as a Unicode string and each revision as a
+                :py:class:`Revision` or Unicode string.
+
+            base_commit_id (unicode, optional):
+                The ID of the commit that the files were changed in. This may
+                not be provided, and is dependent on the type of repository.
+
+            **kwargs (dict):
+                Additional keyword arguments. This is not currently used, but
+                is available for future expansion.
+
+        Returns:
+            list of bool:
+            A list of results, in the same order as ``files``. Each is
+            ``True`` if the file exists in the repository, or ``False`` if
+            it does not.
+        """
+        return [
+            self.file_exists(path, revision, base_commit_id=base_commit_id,
+                             **kwargs)
+            for path, revision in files
+        ]
+
     def parse_diff_revision(self, file_str, revision_str, moved=False,
                             copied=False, **kwargs):
         """Return a parsed filename and revision as represented in a diff.
@@ -978,13 +1024,17 @@ class SCMTool(object):
         return patch
 
     @classmethod
-    def popen(cls, command, local_site_name=None, env={}):
+    def popen(cls, command, local_site_name=None, env={}, stdin=None):
         """Launch an application and return its output.
 
         This wraps :py:func:`subprocess.Popen` to provide some common
         parameters and to pass environment variables that may be needed by
         :command:`rbssh` (if used).
 
+        Version Changed:
+            4.0:
+            Added the ``stdin`` argument.
+
         Args:
             command (list of unicode):
                 The command to execute.
@@ -996,6 +1046,11 @@ class SCMTool(object):
                 Extra environment variables to provide. Each key and value
                 must be byte strings.
 
+            stdin (int or file, optional):
+                The standard input for the command, such as
+                :py:data:`subprocess.PIPE`. This defaults to inheriting the
+                standard input of the process.
+
         Returns:
             bytes:
             The combined output (stdout and stderr) from the command.
@@ -1015,6 +1070,7 @@ class SCMTool(object):
 
         return subprocess.Popen(command,
                                 env=dict(os.environ, **new_env),
+                                stdin=stdin,
                                 stderr=subprocess.PIPE,
                                 stdout=subprocess.PIPE,
                                 close_fds=(os.name != 'nt'))
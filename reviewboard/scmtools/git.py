@@ -6,10 +6,11 @@ import os
 import platform
 import re
 import stat
+import subprocess
 
 from django.utils import six
 from django.utils.encoding import force_bytes
-from django.utils.six.moves import cStringIO as StringIO
+from django.utils.six.moves import cStringIO as StringIO, zip
 from django.utils.six.moves.urllib.parse import (quote as urlquote,
                                                  urlsplit as urlsplit,
                                                  urlunsplit as urlunsplit)
@@ -71,6 +72,7 @@ class GitTool(SCMTool):
     supports_history = True
     commits_have_committer = True
     supports_raw_file_urls = True
+    supports_batch_file_exists = True
     field_help_text = {
         'path': _('For local Git repositories, this should be the path to a '
                   '.git directory that Review Board can read from. For remote '
@@ -95,6 +97,11 @@ class GitTool(SCMTool):
                                 credentials['password'],
                                 repository.encoding, local_site_name)
 
+        if repository.raw_file_url:
+            # Files fetched through a raw file URL can only be checked one at
+            # a time.
+            self.supports_batch_file_exists = False
+
     def get_file(self, path, revision=HEAD, **kwargs):
         if revision == PRE_CREATION:
             return b''
@@ -110,6 +117,51 @@ class GitTool(SCMTool):
         except (FileNotFoundError, InvalidRevisionFormatError):
             return False
 
+    def files_exist(self, files, base_commit_id=None, **kwargs):
+        """Return whether each of a list of files exists in the repository.
+
+        For local repositories, all files are checked with a single call to
+        :command:`git cat-file`.
+
+        Args:
+            files (list of tuple):
+                A list of ``(path, revision)`` tuples to check.
+
+            base_commit_id (unicode, optional):
+                The ID of the commit that the files were changed in. This is
+                not used for Git repositories.
+
+            **kwargs (dict):
+                Additional keyword arguments.
+
+        Returns:
+            list of bool:
+            A list of results, in the same order as ``files``.
+        """
+        if not self.supports_batch_file_exists:
+            return super(GitTool, self).files_exist(
+                files,
+                base_commit_id=base_commit_id,
+                **kwargs)
+
+        results = [False] * len(files)
+        indexes = [
+            i
+            for i, (path, revision) in enumerate(files)
+            if revision != PRE_CREATION
+        ]
+
+        if indexes:
+            exists_list = self.client.get_files_exist([
+                files[i]
+                for i in indexes
+            ])
+
+            for i, exists in zip(indexes, exists_list):
+                results[i] = exists
+
+        return results
+
     def normalize_patch(self, patch, filename, revision):
         """Normalize the provided patch file.
 
@@ -701,15 +753,95 @@ class GitClient(SCMClient):
             contents = self._cat_file(path, revision, '-t')
             return contents and contents.strip() == b'blob'
 
+    def get_files_exist(self, files):
+        """Return whether each of a list of files exists in the repository.
+
+        All files are checked with a single call to
+        :command:`git cat-file --batch-check`.
+
+        Args:
+            files (list of tuple):
+                A list of ``(path, revision)`` tuples to check.
+
+        Returns:
+            list of bool:
+            A list of results, in the same order as ``files``.
+
+        Raises:
+            reviewboard.scmtools.errors.SCMError:
+                There was an error running :command:`git cat-file`.
+        """
+        object_names = [
+            force_bytes(self._resolve_head(revision, path))
+            for path, revision in files
+        ]
+
+        if any(b'\n' in object_name for object_name in object_names):
+            # Object names are read one per line, so these must be checked
+            # individually.
+            return [
+                self._get_file_exists_safe(path, revision)
+                for path, revision in files
+            ]
+
+        p = self._run_git(['--git-dir=%s' % self.git_dir, 'cat-file',
+                           '--batch-check'],
+                          stdin=subprocess.PIPE)
+        stdout, errmsg = p.communicate(b''.join(
+            object_name + b'\n'
+            for object_name in object_names
+        ))
+
+        if p.returncode:
+            raise SCMError(errmsg.decode('utf-8'))
+
+        lines = stdout.splitlines()
+
+        if len(lines) != len(object_names):
+            raise SCMError('Unexpected output from git cat-file: %r'
+                           % stdout)
+
+        # Found objects are listed as "<sha> <type> <size>". Any other line
+        # ends with the reason the object couldn't be looked up.
+        results = []
+
+        for line in lines:
+            parts = line.split(b' ')
+            results.append(len(parts) == 3 and
+                           parts[1] == b'blob' and
+                           parts[2].isdigit())
+
+        return results
+
     def validate_sha1_format(self, path, sha1):
         """Validates that a SHA1 is of the right length for this repository."""
         if self.raw_file_url and len(sha1) != self.FULL_SHA1_LENGTH:
             raise ShortSHA1Error(path, sha1)
 
-    def _run_git(self, args):
+    def _get_file_exists_safe(self, path, revision):
+        """Return whether a file exists, treating lookup errors as missing.
+
+        Args:
+            path (unicode):
+                The path to the file.
+
+            revision (unicode):
+                The revision of the file.
+
+        Returns:
+            bool:
+            Whether the file exists.
+        """
+        try:
+            return self.get_file_exists(path, revision)
+        except (FileNotFoundError, InvalidRevisionFormatError):
+            return False
+
+    def _run_git(self, args, stdin=None):
         """Runs a git command, returning a subprocess.Popen."""
         return SCMTool.popen(['git'] + args,
-                             local_site_name=self.local_site_name)
+                             local_site_name=self.local_site_name,
+                             stdin=stdin)
 
     def _build_raw_url(self, path, revision):
         url = self.raw_file_url
@@ -0,0 +1,90 @@
+"""Management command to evict files from the on-disk file blob store."""
+
+from __future__ import unicode_literals
+
+import time
+
+from django.core.management.base import CommandError
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.scmtools.blob_store import get_file_blob_store
+
+
+class Command(BaseCommand):
+    """Management command to evict files from the on-disk file blob store."""
+
+    help = _('Removes the least recently used files from the on-disk file '
+             'blob store once it has grown past its maximum size.')
+
+    #: The default number of seconds between checks when looping.
+    DEFAULT_INTERVAL_SECS = 5 * 60
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            default=False,
+            dest='loop',
+            help=_('Keep running, checking the size of the store every '
+                   '--interval seconds.'))
+
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=self.DEFAULT_INTERVAL_SECS,
+            dest='interval',
+            metavar='SECONDS',
+            help=_('The number of seconds between checks when using '
+                   '--loop. Defaults to %(default)s.'))
+
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            default=False,
+            dest='force',
+            help=_('Scan the store even if its tracked size is under the '
+                   'limit.'))
+
+    def handle(self, *args, **options):
+        """Handle the command.
+
+        Args:
+            *args (tuple, unused):
+                Positional arguments passed to the command.
+
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                An invalid option was provided.
+        """
+        interval = options['interval']
+
+        if interval < 1:
+            raise CommandError(_('--interval must be at least 1.'))
+
+        blob_store = get_file_blob_store()
+        force = options['force']
+
+        while True:
+            # Evicting scans the whole store, so only do it when the size
+            # tracked as blobs are written says it's needed.
+            if force or blob_store.needs_eviction():
+                num_evicted = blob_store.evict()
+
+                if num_evicted:
+                    self.stdout.write(_('Evicted %d files.') % num_evicted)
+
+            if not options['loop']:
+                break
+
+            force = False
+            time.sleep(interval)
@@ -3,6 +3,8 @@ from __future__ import unicode_literals
 from django.db.models import Manager, Q
 from django.db.models.query import QuerySet
 
+from reviewboard.reviews.access_cache import get_cached_accessible_ids
+
 
 _TOOL_CACHE = {}
 
@@ -200,6 +202,39 @@ class RepositoryManager(Manager):
         """
         return self.accessible(*args, **kwargs).values_list('pk', flat=True)
 
+    def accessible_private_ids(self, user, local_site=None):
+        """Return IDs of private repositories accessible by the given user.
+
+        Any user can access public repositories, so only the private
+        repositories are listed. This keeps the list small enough to cache
+        and to use directly in queries. The IDs are cached until the access
+        lists of any repositories or review groups change.
+
+        Args:
+            user (django.contrib.auth.models.User):
+                The user that must have access to any returned repositories.
+
+            local_site (reviewboard.site.models.LocalSite, optional):
+                A specific :term:`Local Site` that the repositories must be
+                associated with.
+
+        Returns:
+            list of int:
+            The list of IDs.
+        """
+        return get_cached_accessible_ids(
+            'private-repositories',
+            user,
+            local_site,
+            lambda: (
+                self.accessible(user,
+                                visible_only=False,
+                                local_site=local_site)
+                .filter(public=False)
+                .values_list('pk', flat=True)
+            ),
+            extra_key='%d' % user.is_superuser)
+
     def get_best_match(self, repo_identifier, local_site=None):
         """Return a repository best matching the provided identifier.
 
@@ -14,7 +14,7 @@ from django.db.models import Q
 from django.utils import six, timezone
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.http import urlquote
-from django.utils.six.moves import range
+from django.utils.six.moves import range, zip
 from django.utils.translation import ugettext_lazy as _
 from djblets.cache.backend import cache_memoize, make_cache_key
 from djblets.db.fields import JSONField
@@ -23,6 +23,8 @@ from djblets.util.decorators import cached_property
 
 from reviewboard.hostingsvcs.models import HostingServiceAccount
 from reviewboard.hostingsvcs.service import get_hosting_service
+from reviewboard.scmtools.blob_store import get_file_blob_store
+from reviewboard.scmtools.core import Commit
 from reviewboard.scmtools.crypto_utils import (decrypt_password,
                                                encrypt_password)
 from reviewboard.scmtools.managers import RepositoryManager, ToolManager
@@ -363,6 +365,26 @@ class Repository(models.Model):
 
         return None
 
+    @property
+    def supports_batch_file_exists(self):
+        """Whether many files' existence can be checked at once.
+
+        This depends on the hosting service backing the repository, if any,
+        or otherwise on the SCMTool. SCMTools may only support this for some
+        repository configurations, so this checks an instance of the SCMTool
+        if its class supports it.
+
+        Type:
+            bool
+        """
+        hosting_service = self.hosting_service
+
+        if hosting_service:
+            return hosting_service.supports_batch_file_exists
+
+        return (self.scmtool_class.supports_batch_file_exists and
+                self.get_scmtool().supports_batch_file_exists)
+
     @cached_property
     def bug_tracker_service(self):
         """The selected bug tracker service for the repository.
@@ -605,8 +627,20 @@ class Repository(models.Model):
                             'not %s'
                             % type(base_commit_id))
 
+        key = self._make_file_cache_key(path, revision, base_commit_id)
+        blob_store = get_file_blob_store()
+
+        if (blob_store.enabled and
+            blob_store.is_immutable_revision(revision, base_commit_id)):
+            # Files at immutable revisions are kept in the on-disk blob
+            # store, with only small files and pointers living in memcached.
+            return blob_store.get_file(
+                key,
+                lambda: self._get_file_uncached(path, revision,
+                                                base_commit_id, request))
+
         return cache_memoize(
-            self._make_file_cache_key(path, revision, base_commit_id),
+            key,
             lambda: [self._get_file_uncached(path, revision, base_commit_id,
                                              request)],
             large_data=True)[0]
@@ -681,6 +715,114 @@ class Repository(models.Model):
 
         return exists
 
+    def get_files_exist(self, files, base_commit_id=None, request=None):
+        """Return whether each of a list of files exists in the repository.
+
+        This works like :py:meth:`get_file_exists`, but checks all files not
+        already known to exist in a single call to the hosting service or
+        repository backend. If the backend can't check many files at once
+        (see :py:attr:`supports_batch_file_exists`), it will check each file
+        in turn.
+
+        Positive results are cached, and the
+        :py:data:`~reviewboard.scmtools.signals.checking_file_exists` and
+        :py:data:`~reviewboard.scmtools.signals.checked_file_exists` signals
+        are sent for each file checked against the backend.
+
+        Version Added:
+            4.0
+
+        Args:
+            files (list of tuple):
+                A list of ``(path, revision)`` tuples to check. Each must be
+                a Unicode string.
+
+            base_commit_id (unicode, optional):
+                The ID of the commit containing the revisions of the files
+                to check. This is required for some types of repositories
+                where the revision of a file and the ID of a commit differ.
+
+            request (django.http.HttpRequest, optional):
+                The current HTTP request from the client. This is used for
+                logging purposes.
+
+        Returns:
+            list of bool:
+            A list of results, in the same order as ``files``.
+
+        Raises:
+            TypeError:
+                One or more of the provided arguments is an invalid type.
+                Details are contained in the error message.
+        """
+        if (base_commit_id is not None and
+            not isinstance(base_commit_id, six.text_type)):
+            raise TypeError('"base_commit_id" must be a Unicode string, '
+                            'not %s'
+                            % type(base_commit_id))
+
+        results = [False] * len(files)
+        uncached = []
+
+        for i, (path, revision) in enumerate(files):
+            if not isinstance(path, six.text_type):
+                raise TypeError('"path" must be a Unicode string, not %s'
+                                % type(path))
+
+            if not isinstance(revision, six.text_type):
+                raise TypeError('"revision" must be a Unicode string, not %s'
+                                % type(revision))
+
+            key = self._make_file_exists_cache_key(path, revision,
+                                                   base_commit_id)
+
+            if (cache.get(make_cache_key(key)) == '1' or
+                self._is_file_cached(path, revision, base_commit_id)):
+                results[i] = True
+            else:
+                uncached.append(i)
+
+        if uncached:
+            uncached_files = [files[i] for i in uncached]
+
+            for path, revision in uncached_files:
+                checking_file_exists.send(sender=self,
+                                          path=path,
+                                          revision=revision,
+                                          base_commit_id=base_commit_id,
+                                          request=request)
+
+            hosting_service = self.hosting_service
+
+            if hosting_service:
+                exists_list = hosting_service.get_files_exist(
+                    self,
+                    uncached_files,
+                    base_commit_id=base_commit_id)
+            else:
+                exists_list = self.get_scmtool().files_exist(
+                    uncached_files,
+                    base_commit_id=base_commit_id)
+
+            for i, exists in zip(uncached, exists_list):
+                path, revision = files[i]
+                results[i] = exists
+
+                checked_file_exists.send(sender=self,
+                                         path=path,
+                                         revision=revision,
+                                         base_commit_id=base_commit_id,
+                                         request=request,
+                                         exists=exists)
+
+                if exists:
+                    cache_memoize(
+                        self._make_file_exists_cache_key(path, revision,
+                                                         base_commit_id),
+                        lambda: '1')
+
+        return results
+
     def get_branches(self):
         """Return a list of all branches on the repository.
 
@@ -748,6 +890,11 @@ class Repository(models.Model):
         :py:attr:`Commit.parent` of the last entry as the ``start`` parameter
         in order to paginate through the history of commits in the repository.
 
+        Commits are stored in a persistent index for each branch (see
+        :py:mod:`reviewboard.scmtools.commit_index`). Listing the newest
+        commits only fetches history newer than what's already indexed, and
+        older pages already seen are served from the index.
+
         Args:
             branch (unicode, optional):
                 The branch to limit commits to. This may not be supported by
@@ -772,6 +919,8 @@ class Repository(models.Model):
             NotImplementedError:
                 Commits retrieval is not available for this type of repository.
         """
+        from reviewboard.scmtools.commit_index import get_indexed_commits
+
         hosting_service = self.hosting_service
 
         commits_kwargs = {
@@ -786,20 +935,36 @@ class Repository(models.Model):
             commits_callable = \
                 lambda: self.get_scmtool().get_commits(**commits_kwargs)
 
-        # We cache both the entire list for 'start', as well as each individual
-        # commit. This allows us to reduce API load when people are looking at
-        # the "new review request" page more frequently than they're pushing
-        # code, and will usually save 1 API request when they go to actually
-        # create a new review request.
-        if branch and start:
-            cache_period = self.COMMITS_CACHE_PERIOD_LONG
-        else:
-            cache_period = self.COMMITS_CACHE_PERIOD_SHORT
+        def _fetch_commits(start):
+            commits_kwargs['start'] = start
+
+            return commits_callable()
+
+        commits = get_indexed_commits(repository=self,
+                                      branch=branch,
+                                      start=start,
+                                      fetch_commits=_fetch_commits)
+
+        if commits is None:
+            # The index couldn't serve this page, so fall back on fetching
+            # it directly.
+            #
+            # We cache both the entire list for 'start', as well as each
+            # individual commit. This allows us to reduce API load when people
+            # are looking at the "new review request" page more frequently
+            # than they're pushing code, and will usually save 1 API request
+            # when they go to actually create a new review request.
+            commits_kwargs['start'] = start
+
+            if branch and start:
+                cache_period = self.COMMITS_CACHE_PERIOD_LONG
+            else:
+                cache_period = self.COMMITS_CACHE_PERIOD_SHORT
 
-        cache_key = make_cache_key('repository-commits:%s:%s:%s'
-                                   % (self.pk, branch, start))
-        commits = cache_memoize(cache_key, commits_callable,
-                                cache_period)
+            cache_key = make_cache_key('repository-commits:%s:%s:%s'
+                                       % (self.pk, branch, start))
+            commits = cache_memoize(cache_key, commits_callable,
+                                    cache_period)
 
         for commit in commits:
             cache.set(self.get_commit_cache_key(commit.id),
@@ -807,6 +972,20 @@ class Repository(models.Model):
 
         return commits
 
+    def invalidate_history_cache(self):
+        """Mark cached branches and commit history as out of date.
+
+        This should be called when new commits are known to have been pushed
+        to the repository (for instance, by a repository hook). The next
+        listing of branches or of the newest commits will fetch fresh
+        information from the repository.
+        """
+        from reviewboard.scmtools.commit_index import \
+            invalidate_commit_indexes
+
+        cache.delete(make_cache_key('repository-branches:%s' % self.pk))
+        invalidate_commit_indexes(self)
+
     def get_change(self, revision):
         """Return an individual change/commit in the repository.
 
@@ -1058,6 +1237,30 @@ class Repository(models.Model):
             urlquote(base_commit_id or ''),
             urlquote(self.raw_file_url or ''))
 
+    def _is_file_cached(self, path, revision, base_commit_id):
+        """Return whether a file's contents have already been fetched.
+
+        Args:
+            path (unicode):
+                The path to the file in the repository.
+
+            revision (unicode):
+                The revision of the file.
+
+            base_commit_id (unicode):
+                The ID of the commit containing the revision of the file.
+
+        Returns:
+            bool:
+            ``True`` if the file's contents are in the cache or the file blob
+            store.
+        """
+        key = self._make_file_cache_key(path, revision, base_commit_id)
+        blob_store = get_file_blob_store()
+
+        return (make_cache_key(key) in cache or
+                (blob_store.enabled and blob_store.has_file(key)))
+
     def _get_file_uncached(self, path, revision, base_commit_id, request):
         """Return a file from the repository, bypassing cache.
 
@@ -1155,10 +1358,7 @@ class Repository(models.Model):
         """
         # First we check to see if we've fetched the file before. If so,
         # it's in there and we can just return that we have it.
-        file_cache_key = make_cache_key(
-            self._make_file_cache_key(path, revision, base_commit_id))
-
-        if file_cache_key in cache:
+        if self._is_file_cached(path, revision, base_commit_id):
             exists = True
         else:
             # We didn't have that in the cache, so check from the repository.
@@ -1210,3 +1410,108 @@ class Repository(models.Model):
                            ('hooks_uuid', 'local_site'))
         verbose_name = _('Repository')
         verbose_name_plural = _('Repositories')
+
+
+@python_2_unicode_compatible
+class CommitIndex(models.Model):
+    """A persistent index of commit history for a branch of a repository.
+
+    The index holds a contiguous range of history, from the newest known
+    commit on the branch back to the oldest commit fetched so far. It's
+    refreshed incrementally from the head of the branch, and extended as
+    older history is paginated through.
+
+    See :py:mod:`reviewboard.scmtools.commit_index` for the logic that
+    maintains these.
+    """
+
+    repository = models.ForeignKey(Repository,
+                                   related_name='commit_indexes')
+
+    #: The branch being indexed. This is blank for the default branch.
+    branch = models.CharField(max_length=255, blank=True, default='')
+
+    #: The parent of the oldest commit in the index.
+    #:
+    #: This is used to fetch the next page of older history. It will be
+    #: blank if the index reaches the first commit on the branch.
+    tail_parent_id = models.CharField(max_length=255, blank=True, default='')
+
+    #: Whether the index extends back to the first commit on the branch.
+    complete = models.BooleanField(default=False)
+
+    #: The number of commits the backend returns in a page of history.
+    #:
+    #: This is learned from the pages fetched while maintaining the index,
+    #: and is 0 until a full page has been seen.
+    page_size = models.PositiveIntegerField(default=0)
+
+    #: When the index was last refreshed from the head of the branch.
+    #:
+    #: This is cleared when a repository hook reports new commits, forcing a
+    #: refresh on the next request.
+    last_refreshed = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        """Return a string representation of the index.
+
+        Returns:
+            unicode:
+            The string representation.
+        """
+        return '%s: %s' % (self.repository, self.branch or '(default)')
+
+    class Meta:
+        db_table = 'scmtools_commitindex'
+        unique_together = (('repository', 'branch'),)
+        verbose_name = _('Commit Index')
+        verbose_name_plural = _('Commit Indexes')
+
+
+@python_2_unicode_compatible
+class IndexedCommit(models.Model):
+    """A commit stored in a :py:class:`CommitIndex`."""
+
+    index = models.ForeignKey(CommitIndex, related_name='commits')
+    commit_id = models.CharField(max_length=255)
+
+    #: The position of the commit in the index.
+    #:
+    #: Newer commits have higher positions. Positions are contiguous within
+    #: an index.
+    position = models.BigIntegerField()
+
+    author_name = models.CharField(max_length=255, blank=True)
+    date = models.CharField(max_length=64, blank=True)
+    message = models.TextField(blank=True)
+    parent_id = models.CharField(max_length=255, blank=True)
+
+    def to_commit(self):
+        """Return a Commit for this entry.
+
+        Returns:
+            reviewboard.scmtools.core.Commit:
+            The commit.
+        """
+        return Commit(author_name=self.author_name,
+                      id=self.commit_id,
+                      date=self.date,
+                      message=self.message,
+                      parent=self.parent_id)
+
+    def __str__(self):
+        """Return a string representation of the commit.
+
+        Returns:
+            unicode:
+            The commit ID.
+        """
+        return self.commit_id
+
+    class Meta:
+        db_table = 'scmtools_indexedcommit'
+        unique_together = (('index', 'commit_id'),
+                           ('index', 'position'))
+        ordering = ('-position',)
+        verbose_name = _('Indexed Commit')
+        verbose_name_plural = _('Indexed Commits')
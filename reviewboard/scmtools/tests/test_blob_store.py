@@ -0,0 +1,242 @@
+"""Unit tests for reviewboard.scmtools.blob_store."""
+
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from kgb import SpyAgency
+
+from reviewboard.scmtools.blob_store import FileBlobStore
+from reviewboard.scmtools.models import Repository, Tool
+from reviewboard.testing.testcase import TestCase
+
+
+class FileBlobStoreTests(SpyAgency, TestCase):
+    """Unit tests for reviewboard.scmtools.blob_store.FileBlobStore."""
+
+    def setUp(self):
+        super(FileBlobStoreTests, self).setUp()
+
+        cache.clear()
+        self.tempdir = tempfile.mkdtemp(prefix='rb-tests-blobs-')
+        self.blob_store = FileBlobStore(path=self.tempdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+        super(FileBlobStoreTests, self).tearDown()
+
+    def test_is_immutable_revision(self):
+        """Testing FileBlobStore.is_immutable_revision"""
+        blob_store = self.blob_store
+
+        self.assertTrue(blob_store.is_immutable_revision('a' * 40))
+        self.assertTrue(blob_store.is_immutable_revision('A' * 64))
+        self.assertTrue(blob_store.is_immutable_revision(
+            'HEAD', base_commit_id='b' * 40))
+        self.assertFalse(blob_store.is_immutable_revision('e965047'))
+        self.assertFalse(blob_store.is_immutable_revision('HEAD'))
+        self.assertFalse(blob_store.is_immutable_revision('123'))
+
+    def test_get_file_stores_on_disk(self):
+        """Testing FileBlobStore.get_file stores contents on disk"""
+        calls = []
+
+        def _lookup():
+            calls.append(1)
+            return b'x' * 100000
+
+        data1 = self.blob_store.get_file('file:1:foo', _lookup)
+        data2 = self.blob_store.get_file('file:1:foo', _lookup)
+
+        self.assertEqual(data1, b'x' * 100000)
+        self.assertEqual(data1, data2)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.blob_store.get_usage(), (100000, 1))
+        self.assertTrue(self.blob_store.has_file('file:1:foo'))
+
+    def test_get_file_after_cache_clear(self):
+        """Testing FileBlobStore.get_file uses the disk after the cache is
+        cleared
+        """
+        calls = []
+
+        def _lookup():
+            calls.append(1)
+            return b'data'
+
+        self.blob_store.get_file('file:1:foo', _lookup)
+        cache.clear()
+        data = self.blob_store.get_file('file:1:foo', _lookup)
+
+        self.assertEqual(data, b'data')
+        self.assertEqual(len(calls), 1)
+
+        stats = self.blob_store.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['blob_count'], 1)
+
+    def test_get_stats_uses_cached_totals(self):
+        """Testing FileBlobStore.get_stats uses totals kept up to date on
+        write and evict instead of scanning the store
+        """
+        blob_store = self.blob_store
+
+        blob_store.get_file('file:1:old', lambda: b'a' * 100)
+        blob_store.get_file('file:1:new', lambda: b'b' * 50)
+        self.assertEqual(blob_store.evict(max_size=1000), 0)
+
+        blob_store.get_file('file:1:newer', lambda: b'c' * 25)
+
+        self.spy_on(blob_store.get_usage)
+
+        stats = blob_store.get_stats()
+        self.assertEqual(stats['bytes'], 175)
+        self.assertEqual(stats['blob_count'], 3)
+
+        old_path = blob_store._get_blob_path(
+            blob_store._read_ref('file:1:old'))
+        os.utime(old_path, (0, 0))
+        self.assertEqual(blob_store.evict(max_size=100), 1)
+
+        stats = blob_store.get_stats()
+        self.assertEqual(stats['bytes'], 75)
+        self.assertEqual(stats['blob_count'], 2)
+        self.assertFalse(blob_store.get_usage.called)
+
+    def test_get_stats_without_cached_totals(self):
+        """Testing FileBlobStore.get_stats scans the store once when the
+        totals aren't cached
+        """
+        blob_store = self.blob_store
+
+        blob_store.get_file('file:1:foo', lambda: b'a' * 100)
+        cache.clear()
+
+        self.spy_on(blob_store.get_usage)
+
+        self.assertEqual(blob_store.get_stats()['bytes'], 100)
+        self.assertEqual(blob_store.get_stats()['blob_count'], 1)
+        self.assertEqual(len(blob_store.get_usage.calls), 1)
+
+    def test_get_file_deduplicates(self):
+        """Testing FileBlobStore.get_file stores identical contents once"""
+        self.blob_store.get_file('file:1:foo', lambda: b'data')
+        self.blob_store.get_file('file:1:bar', lambda: b'data')
+
+        self.assertEqual(self.blob_store.get_usage(), (4, 1))
+
+    def test_evict(self):
+        """Testing FileBlobStore.evict removes least recently used blobs"""
+        blob_store = self.blob_store
+
+        blob_store.get_file('file:1:old', lambda: b'a' * 100)
+        blob_store.get_file('file:1:new', lambda: b'b' * 100)
+
+        old_path = blob_store._get_blob_path(
+            blob_store._read_ref('file:1:old'))
+        os.utime(old_path, (0, 0))
+
+        self.assertEqual(blob_store.evict(max_size=150), 1)
+        self.assertEqual(blob_store.get_usage(), (100, 1))
+        self.assertFalse(os.path.exists(old_path))
+        self.assertIsNone(blob_store._read_ref('file:1:old'))
+        self.assertIsNotNone(blob_store._read_ref('file:1:new'))
+
+    def test_get_file_past_max_size(self):
+        """Testing FileBlobStore.get_file doesn't evict blobs when the store
+        grows past its maximum size
+        """
+        blob_store = self.blob_store
+
+        with self.siteconfig_settings({'file_blob_store_max_size': 150}):
+            self.assertTrue(blob_store.needs_eviction())
+            self.assertEqual(blob_store.evict(), 0)
+            self.assertFalse(blob_store.needs_eviction())
+
+            blob_store.get_file('file:1:old', lambda: b'a' * 100)
+            self.assertFalse(blob_store.needs_eviction())
+
+            blob_store.get_file('file:1:new', lambda: b'b' * 100)
+            self.assertTrue(blob_store.needs_eviction())
+            self.assertEqual(blob_store.get_usage(), (200, 2))
+
+            self.assertEqual(blob_store.evict(), 1)
+            self.assertFalse(blob_store.needs_eviction())
+
+        with self.siteconfig_settings({'file_blob_store_max_size': 0}):
+            self.assertFalse(blob_store.needs_eviction())
+
+    def test_get_file_with_evicted_blob(self):
+        """Testing FileBlobStore.get_file refetches evicted blobs"""
+        calls = []
+
+        def _lookup():
+            calls.append(1)
+            return b'x' * (FileBlobStore.inline_threshold + 1)
+
+        self.blob_store.get_file('file:1:foo', _lookup)
+        self.blob_store.evict(max_size=1)
+        self.blob_store.get_file('file:1:foo', _lookup)
+
+        self.assertEqual(len(calls), 2)
+
+
+class RepositoryBlobStoreTests(SpyAgency, TestCase):
+    """Unit tests for Repository.get_file with the file blob store."""
+
+    fixtures = ['test_scmtools']
+
+    def setUp(self):
+        super(RepositoryBlobStoreTests, self).setUp()
+
+        cache.clear()
+        self.repository = Repository.objects.create(
+            name='Git test repo',
+            path=os.path.join(os.path.dirname(__file__), '..', 'testdata',
+                              'git_repo'),
+            tool=Tool.objects.get(name='Git'))
+
+    def test_get_file_with_immutable_revision(self):
+        """Testing Repository.get_file with blob store and immutable
+        revision
+        """
+        repository = self.repository
+        scmtool_cls = repository.scmtool_class
+        revision = 'e965047' + 'a' * 33
+
+        self.spy_on(scmtool_cls.get_file,
+                    call_fake=lambda *args, **kwargs: b'file data',
+                    owner=scmtool_cls)
+
+        with self.siteconfig_settings({'file_blob_store_enabled': True}):
+            data1 = repository.get_file('readme', revision)
+            cache.clear()
+            data2 = repository.get_file('readme', revision)
+
+            self.assertTrue(repository.get_file_exists('readme', revision))
+
+        self.assertEqual(data1, b'file data')
+        self.assertEqual(data2, b'file data')
+        self.assertEqual(len(scmtool_cls.get_file.calls), 1)
+
+    def test_get_file_with_mutable_revision(self):
+        """Testing Repository.get_file with blob store and abbreviated
+        revision bypasses the blob store
+        """
+        repository = self.repository
+        scmtool_cls = repository.scmtool_class
+
+        self.spy_on(scmtool_cls.get_file,
+                    call_fake=lambda *args, **kwargs: b'file data',
+                    owner=scmtool_cls)
+
+        with self.siteconfig_settings({'file_blob_store_enabled': True}):
+            repository.get_file('readme', 'e965047')
+            cache.clear()
+            repository.get_file('readme', 'e965047')
+
+        self.assertEqual(len(scmtool_cls.get_file.calls), 2)
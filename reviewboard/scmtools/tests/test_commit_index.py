@@ -0,0 +1,229 @@
+"""Unit tests for reviewboard.scmtools.commit_index."""
+
+from __future__ import unicode_literals
+
+from django.utils.six.moves import range
+
+from reviewboard.hostingsvcs.errors import RateLimitExceededError
+from reviewboard.hostingsvcs.rate_limits import (PRIORITY_BACKGROUND,
+                                                 get_api_call_priority)
+from reviewboard.scmtools.commit_index import get_indexed_commits
+from reviewboard.scmtools.core import Commit
+from reviewboard.scmtools.models import CommitIndex
+from reviewboard.testing.testcase import TestCase
+
+
+class CommitIndexTests(TestCase):
+    """Unit tests for reviewboard.scmtools.commit_index."""
+
+    fixtures = ['test_scmtools']
+
+    def setUp(self):
+        super(CommitIndexTests, self).setUp()
+
+        self.repository = self.create_repository(tool_name='Test')
+        self.head = 50
+        self.id_prefix = ''
+        self.backend_page_size = 10
+        self.background_rate_limited = False
+        self.fetches = []
+
+    def _fetch_commits(self, start):
+        """Return a page of commits, simulating a backend.
+
+        Commits are numbered from 1 (the first commit) to ``self.head``.
+        """
+        if (self.background_rate_limited and
+            get_api_call_priority() == PRIORITY_BACKGROUND):
+            raise RateLimitExceededError(retry_after=60)
+
+        self.fetches.append(start)
+
+        if start:
+            first = int(start[len(self.id_prefix):])
+        else:
+            first = self.head
+
+        return [
+            Commit(author_name='user%d' % i,
+                   id='%s%d' % (self.id_prefix, i),
+                   date='2013-01-01T00:00:00',
+                   message='Commit %d' % i,
+                   parent=('%s%d' % (self.id_prefix, i - 1)
+                           if i > 1 else ''))
+            for i in range(first, max(first - self.backend_page_size, 0), -1)
+        ]
+
+    def _get_commits(self, start=None, branch=None):
+        commits = get_indexed_commits(repository=self.repository,
+                                      branch=branch,
+                                      start=start,
+                                      fetch_commits=self._fetch_commits)
+
+        if commits is None:
+            return None
+
+        return [
+            int(commit.id[len(self.id_prefix):])
+            for commit in commits
+        ]
+
+    def test_get_head(self):
+        """Testing get_indexed_commits for the head of a new index"""
+        self.assertEqual(self._get_commits(), list(range(50, 40, -1)))
+        self.assertEqual(self.fetches, [None])
+
+        index = CommitIndex.objects.get(repository=self.repository)
+        self.assertEqual(index.branch, '')
+        self.assertEqual(index.tail_parent_id, '40')
+        self.assertEqual(index.page_size, 10)
+        self.assertFalse(index.complete)
+
+    def test_get_head_with_backend_page_size(self):
+        """Testing get_indexed_commits serves pages the size of the
+        backend's pages
+        """
+        self.backend_page_size = 5
+
+        self.assertEqual(self._get_commits(), list(range(50, 45, -1)))
+        self.assertEqual(self._get_commits(start='45'),
+                         list(range(45, 40, -1)))
+        self.assertEqual(self.fetches, [None, '45'])
+
+    def test_get_head_when_fresh(self):
+        """Testing get_indexed_commits for the head of a fresh index uses
+        the index
+        """
+        self._get_commits()
+        self.head = 55
+
+        self.assertEqual(self._get_commits(), list(range(50, 40, -1)))
+        self.assertEqual(self.fetches, [None])
+
+    def test_get_head_after_invalidate(self):
+        """Testing get_indexed_commits after invalidate_history_cache fetches
+        only new commits
+        """
+        self._get_commits()
+        self.head = 55
+        self.repository.invalidate_history_cache()
+
+        self.assertEqual(self._get_commits(), list(range(55, 45, -1)))
+        self.assertEqual(self.fetches, [None, None])
+        self.assertEqual(CommitIndex.objects.get().commits.count(), 15)
+
+    def test_get_with_start_pagination(self):
+        """Testing get_indexed_commits paginating past the index extends it,
+        and later serves from it
+        """
+        self._get_commits()
+
+        self.assertEqual(self._get_commits(start='40'),
+                         list(range(40, 30, -1)))
+        self.assertEqual(self.fetches, [None, '40'])
+
+        self.assertEqual(self._get_commits(start='45'),
+                         list(range(45, 35, -1)))
+        self.assertEqual(self.fetches, [None, '40'])
+
+        self.assertEqual(self._get_commits(start='35'),
+                         list(range(35, 25, -1)))
+        self.assertEqual(self.fetches, [None, '40', '30'])
+
+        self.assertEqual(self._get_commits(start='26'),
+                         list(range(26, 16, -1)))
+        self.assertEqual(self.fetches, [None, '40', '30', '20'])
+
+        self.assertEqual(self._get_commits(start='25'),
+                         list(range(25, 15, -1)))
+        self.assertEqual(self.fetches, [None, '40', '30', '20'])
+
+    def test_get_with_start_rate_limited(self):
+        """Testing get_indexed_commits doesn't fill a short page when the
+        background rate limit budget is used up
+        """
+        self._get_commits()
+        self._get_commits(start='40')
+        self.background_rate_limited = True
+
+        self.assertEqual(self._get_commits(start='35'),
+                         list(range(35, 30, -1)))
+        self.assertEqual(self.fetches, [None, '40'])
+
+        # Fetching the requested page itself isn't optional.
+        self.assertEqual(self._get_commits(start='30'),
+                         list(range(30, 20, -1)))
+        self.assertEqual(self.fetches, [None, '40', '30'])
+
+    def test_get_with_start_complete(self):
+        """Testing get_indexed_commits reaching the first commit marks the
+        index complete
+        """
+        self.head = 15
+        self._get_commits()
+        self.assertEqual(self._get_commits(start='5'), [5, 4, 3, 2, 1])
+        self.assertEqual(self.fetches, [None, '5'])
+
+        index = CommitIndex.objects.get(repository=self.repository)
+        self.assertTrue(index.complete)
+        self.assertEqual(index.tail_parent_id, '')
+
+        self.fetches = []
+        self.assertEqual(self._get_commits(start='10'),
+                         list(range(10, 0, -1)))
+        self.assertEqual(self.fetches, [])
+
+    def test_get_with_unknown_start(self):
+        """Testing get_indexed_commits with a start commit not in the index"""
+        self.assertIsNone(self._get_commits(start='20'))
+
+        self._get_commits()
+        self.assertIsNone(self._get_commits(start='foo'))
+
+    def test_get_with_rewritten_history(self):
+        """Testing get_indexed_commits with rewritten history rebuilds the
+        index, fetching a bounded number of pages
+        """
+        self._get_commits()
+        self.id_prefix = 'new-'
+        self.repository.invalidate_history_cache()
+
+        self.assertEqual(self._get_commits(), list(range(50, 40, -1)))
+        self.assertEqual(self.fetches, [None, None, 'new-40'])
+
+        index = CommitIndex.objects.get(repository=self.repository)
+        self.assertEqual(index.commits.count(), 20)
+        self.assertFalse(index.commits.filter(
+            commit_id__startswith='4').exists())
+        self.assertEqual(index.tail_parent_id, 'new-30')
+        self.assertFalse(index.complete)
+
+        self.assertEqual(self._get_commits(start='new-30'),
+                         list(range(30, 20, -1)))
+        self.assertEqual(self.fetches, [None, None, 'new-40', 'new-30'])
+
+    def test_get_with_rewritten_history_rate_limited(self):
+        """Testing get_indexed_commits with rewritten history and the
+        background rate limit budget used up fetches only the first page
+        """
+        self._get_commits()
+        self.id_prefix = 'new-'
+        self.background_rate_limited = True
+        self.repository.invalidate_history_cache()
+
+        self.assertEqual(self._get_commits(), list(range(50, 40, -1)))
+        self.assertEqual(self.fetches, [None, None])
+
+        index = CommitIndex.objects.get(repository=self.repository)
+        self.assertEqual(index.commits.count(), 10)
+        self.assertEqual(index.tail_parent_id, 'new-40')
+        self.assertFalse(index.complete)
+
+    def test_get_with_branch(self):
+        """Testing get_indexed_commits keeps separate indexes per branch"""
+        self._get_commits()
+        self._get_commits(branch='release')
+
+        self.assertEqual(
+            sorted(CommitIndex.objects.values_list('branch', flat=True)),
+            ['', 'release'])
@@ -1077,6 +1077,39 @@ class GitTests(SpyAgency, SCMTestCase):
         self.assertFalse(tool.file_exists('readme', 'a62df6c'))
         self.assertFalse(tool.file_exists('readme2', 'ccffbb4'))
 
+    def test_files_exist(self):
+        """Testing GitTool.files_exist checks all files in one call"""
+        tool = self.tool
+
+        self.assertTrue(tool.supports_batch_file_exists)
+        self.spy_on(tool.client._run_git)
+
+        self.assertEqual(
+            tool.files_exist([
+                ('readme', 'e965047'),
+                ('readme', PRE_CREATION),
+                ('readme', 'fffffff'),
+                ('readme', 'd6613f5'),
+                ('readme', 'a62df6c'),
+                ('readme2', 'ccffbb4'),
+                ('my file', 'fffffff'),
+            ]),
+            [True, False, False, True, False, False, False])
+        self.assertEqual(len(tool.client._run_git.calls), 1)
+
+    def test_files_exist_with_raw_file_url(self):
+        """Testing GitTool.files_exist with raw file URL checks each file"""
+        tool = self.remote_tool
+
+        self.assertFalse(tool.supports_batch_file_exists)
+        self.spy_on(tool.client.get_file_exists,
+                    call_fake=lambda _self, path, revision: path == 'readme')
+
+        self.assertEqual(
+            tool.files_exist([('readme', 'e965047'), ('missing', 'e965047')]),
+            [True, False])
+        self.assertEqual(len(tool.client.get_file_exists.calls), 2)
+
     def test_get_file(self):
         """Testing GitTool.get_file"""
         tool = self.tool
@@ -276,6 +276,43 @@ class RepositoryTests(SpyAgency, TestCase):
         self.assertEqual(found_signals[1],
                          ('checked_file_exists', path, revision, request))
 
+    def test_get_files_exist(self):
+        """Testing Repository.get_files_exist with batched backend"""
+        repository = self.repository
+        scmtool_cls = repository.scmtool_class
+
+        self.assertTrue(repository.supports_batch_file_exists)
+
+        self.spy_on(scmtool_cls.files_exist, owner=scmtool_cls)
+        self.spy_on(scmtool_cls.file_exists, owner=scmtool_cls)
+
+        files = [('readme', 'e965047'), ('readme', 'fffffff')]
+
+        self.assertEqual(repository.get_files_exist(files), [True, False])
+        self.assertEqual(repository.get_files_exist(files), [True, False])
+
+        self.assertSpyNotCalled(scmtool_cls.file_exists)
+        self.assertEqual(len(scmtool_cls.files_exist.calls), 2)
+        self.assertEqual(scmtool_cls.files_exist.calls[1].args[0],
+                         [('readme', 'fffffff')])
+
+    def test_get_files_exist_without_batch_support(self):
+        """Testing Repository.get_files_exist without batched backend checks
+        each file
+        """
+        repository = self.create_repository(tool_name='Test')
+        scmtool_cls = repository.scmtool_class
+
+        self.assertFalse(repository.supports_batch_file_exists)
+
+        self.spy_on(scmtool_cls.file_exists, owner=scmtool_cls)
+
+        self.assertEqual(
+            repository.get_files_exist([('/FILE_FOUND', 'abc123'),
+                                        ('/data:foo', 'def456')]),
+            [True, True])
+        self.assertEqual(len(scmtool_cls.file_exists.calls), 2)
+
     def test_repository_name_with_255_characters(self):
         """Testing Repository.name with 255 characters"""
         repository = self.create_repository(name='t' * 255)
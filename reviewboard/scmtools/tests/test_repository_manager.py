@@ -438,3 +438,74 @@ class RepositoryManagerTests(TestCase):
         self.assertEqual(
             Repository.objects.get_best_match('mirror'),
             repository1)
+
+    def test_accessible_private_ids(self):
+        """Testing Repository.objects.accessible_private_ids"""
+        user = self.create_user()
+        self.create_repository(name='repo1')
+        self.create_repository(name='repo2', public=False)
+        repository = self.create_repository(name='repo3', public=False)
+        repository.users.add(user)
+
+        self.assertEqual(Repository.objects.accessible_private_ids(user),
+                         [repository.pk])
+
+    def test_accessible_private_ids_cached(self):
+        """Testing Repository.objects.accessible_private_ids caches results"""
+        user = self.create_user()
+        repository = self.create_repository(public=False)
+        repository.users.add(user)
+
+        self.assertEqual(Repository.objects.accessible_private_ids(user),
+                         [repository.pk])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(Repository.objects.accessible_private_ids(user),
+                             [repository.pk])
+
+    def test_accessible_private_ids_after_access_list_change(self):
+        """Testing Repository.objects.accessible_private_ids after access
+        list changes
+        """
+        user = self.create_user()
+        repository = self.create_repository(public=False)
+
+        self.assertEqual(Repository.objects.accessible_private_ids(user), [])
+
+        repository.users.add(user)
+        self.assertEqual(Repository.objects.accessible_private_ids(user),
+                         [repository.pk])
+
+        repository.users.remove(user)
+        self.assertEqual(Repository.objects.accessible_private_ids(user), [])
+
+    def test_accessible_private_ids_after_group_membership_change(self):
+        """Testing Repository.objects.accessible_private_ids after membership
+        changes in a group on the access list
+        """
+        user = self.create_user()
+        group = self.create_review_group(invite_only=True)
+        repository = self.create_repository(public=False)
+        repository.review_groups.add(group)
+
+        self.assertEqual(Repository.objects.accessible_private_ids(user), [])
+
+        group.users.add(user)
+        self.assertEqual(Repository.objects.accessible_private_ids(user),
+                         [repository.pk])
+
+    def test_accessible_private_ids_after_repository_change(self):
+        """Testing Repository.objects.accessible_private_ids after a
+        repository becomes private
+        """
+        user = self.create_user()
+        repository = self.create_repository()
+        repository.users.add(user)
+
+        self.assertEqual(Repository.objects.accessible_private_ids(user), [])
+
+        repository.public = False
+        repository.save(update_fields=('public',))
+
+        self.assertEqual(Repository.objects.accessible_private_ids(user),
+                         [repository.pk])
@@ -36,3 +36,13 @@ class BooleanField(indexes.BooleanField):
             return self.value_map[value]
         except KeyError:
             return bool(value)
+
+
+class ExactMultiValueField(indexes.FacetMultiValueField):
+    """A MultiValueField whose values are only matched exactly.
+
+    Haystack's Elasticsearch backend analyzes string fields (splitting
+    values such as ``owner:1`` into separate words), except for fields
+    used for faceting. This is indexed as a facet field, so that each value
+    is stored and matched as a whole.
+    """
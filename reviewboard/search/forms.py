@@ -8,12 +8,13 @@ from django import forms
 from django.contrib.auth.models import User
 from django.utils import six
 from django.utils.translation import ugettext_lazy as _
+from djblets.siteconfig.models import SiteConfiguration
 from haystack.forms import ModelSearchForm
 from haystack.inputs import Raw
 from haystack.query import SQ
 
-from reviewboard.reviews.models import Group, ReviewRequest
-from reviewboard.scmtools.models import Repository
+from reviewboard.reviews.access_principals import get_user_principals
+from reviewboard.reviews.models import ReviewRequest
 from reviewboard.search.indexes import BaseSearchIndex
 
 
@@ -142,52 +143,58 @@ class RBSearchForm(ModelSearchForm):
                           SQ(private=True))
 
             if user.is_authenticated():
-                # We're going to build a series of queries that mimic the
-                # accessibility checks we have internally, based on the access
-                # permissions the user currently has, and the IDs listed in
-                # the indexed review request.
-                #
-                # This must always be kept in sync with
+                # Allow review requests that share principals with the user.
+                # These follow the same access rules as
                 # ReviewRequestManager._query.
                 #
                 # Note that we are not performing Local Site checks here,
                 # because we're already filtering by Local Sites.
+                principals = get_user_principals(user,
+                                                 local_site=self.local_site)
+                access_sq = principals.get_search_query('access_principals')
 
-                # Make sure they have access to the repository, if any.
-                accessible_repo_ids = list(Repository.objects.accessible_ids(
-                    user,
-                    visible_only=False,
-                    local_site=self.local_site,
-                ))
+                siteconfig = SiteConfiguration.objects.get_current()
 
-                accessible_group_ids = Group.objects.accessible_ids(
-                    user,
-                    visible_only=False,
-                )
+                if not siteconfig.get('search_access_principals_indexed'):
+                    access_sq |= self._get_legacy_access_sq(principals)
 
-                repository_sq = SQ(
-                    private_repository_id__in=[0] + accessible_repo_ids
-                )
+                private_sq &= ~access_sq
 
-                # Next, build a query to see if the review request targets any
-                # invite-only groups the user is a member of.
-                target_groups_sq = SQ(private_target_groups__contains=0)
+            sqs = sqs.exclude(private_sq)
 
-                for pk in accessible_group_ids:
-                    target_groups_sq |= SQ(private_target_groups__contains=pk)
+        return sqs.order_by('-last_updated')
 
-                # Build a query to see if the user is explicitly listed
-                # in the list of reviewers.
-                target_users_sq = SQ(target_users__contains=user.pk)
+    def _get_legacy_access_sq(self, principals):
+        """Return a search query for access using the older index fields.
 
-                # And, of course, the owner of the review request can see it.
-                #
-                # With that, we'll put the whole query together, in the order
-                # matching ReviewRequest.is_accessible_by.
-                private_sq &= ~(SQ(username=user.username) |
-                                (repository_sq &
-                                 (target_users_sq | target_groups_sq)))
+        Indexes built before ``access_principals`` was added don't have
+        that field, so private review requests would otherwise be hidden
+        from everyone but superusers until the index is rebuilt. This
+        matches the ``username``, ``private_repository_id``,
+        ``private_target_groups``, and ``target_users`` fields instead,
+        which are still indexed.
 
-            sqs = sqs.exclude(private_sq)
+        Access granted by these fields is always also granted by
+        ``access_principals``, so this doesn't grant any extra access for
+        review requests that have been indexed since. It's no longer used
+        once ``index --full`` has rebuilt the index.
 
-        return sqs.order_by('-last_updated')
+        Args:
+            principals (reviewboard.reviews.access_principals.
+                        UserAccessPrincipals):
+                The principals held by the user.
+
+        Returns:
+            haystack.query.SQ:
+            The search query.
+        """
+        user = principals.user
+
+        return (
+            SQ(username=user.username) |
+            (SQ(private_repository_id__in=(
+                [0] + list(principals.private_repository_ids))) &
+             (SQ(target_users__in=[user.pk]) |
+              SQ(private_target_groups__in=(
+                  [0] + list(principals.invite_only_group_ids)))))
+        )
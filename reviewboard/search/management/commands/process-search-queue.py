@@ -0,0 +1,96 @@
+"""Management command to apply queued changes to the search index."""
+
+from __future__ import unicode_literals
+
+import time
+
+from django.core.management.base import CommandError
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.search.models import SearchIndexQueueEntry
+
+
+class Command(BaseCommand):
+    """Management command to apply queued changes to the search index."""
+
+    help = _('Applies changes queued by on-the-fly indexing to the search '
+             'index.')
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            default=False,
+            dest='loop',
+            help=_('Keep running, checking for new changes every few '
+                   'seconds.'))
+
+        parser.add_argument(
+            '--debounce',
+            type=int,
+            default=SearchIndexQueueEntry.objects.DEFAULT_DEBOUNCE_SECS,
+            dest='debounce',
+            metavar='SECONDS',
+            help=_('The number of seconds to wait after a change before '
+                   'applying it, so that further changes to the same object '
+                   'are applied together. Defaults to %(default)s.'))
+
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SearchIndexQueueEntry.objects.DEFAULT_BATCH_SIZE,
+            dest='batch_size',
+            help=_('The maximum number of changes to apply at a time. '
+                   'Defaults to %(default)s.'))
+
+    def handle(self, *args, **options):
+        """Handle the command.
+
+        Args:
+            *args (tuple, unused):
+                Positional arguments passed to the command.
+
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                An invalid option was provided.
+        """
+        debounce_secs = options['debounce']
+        batch_size = options['batch_size']
+
+        if debounce_secs < 0:
+            raise CommandError(_('--debounce cannot be negative.'))
+
+        if batch_size < 1:
+            raise CommandError(_('--batch-size must be at least 1.'))
+
+        while True:
+            num_processed = 0
+
+            while True:
+                num_entries = SearchIndexQueueEntry.objects.process_entries(
+                    debounce_secs=debounce_secs,
+                    batch_size=batch_size)
+
+                num_processed += num_entries
+
+                if num_entries < batch_size:
+                    break
+
+            if num_processed:
+                self.stdout.write(_('Applied %d queued search index changes.')
+                                  % num_processed)
+
+            if not options['loop']:
+                break
+
+            time.sleep(max(debounce_secs, 1))
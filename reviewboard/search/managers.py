@@ -0,0 +1,362 @@
+"""Managers for Review Board search models."""
+
+from __future__ import unicode_literals
+
+import logging
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.apps import apps
+from django.db.models import Manager, Q
+from django.utils import six, timezone
+from haystack import connection_router, connections
+from haystack.exceptions import NotHandled
+
+
+class SearchIndexQueueEntryManager(Manager):
+    """A manager for SearchIndexQueueEntry models."""
+
+    #: The default number of seconds to wait before indexing a change.
+    #:
+    #: Any changes to the same object made within this window are indexed
+    #: together.
+    DEFAULT_DEBOUNCE_SECS = 5
+
+    #: The default maximum number of entries to process at a time.
+    DEFAULT_BATCH_SIZE = 500
+
+    #: The maximum number of attempts to make to apply a change.
+    #:
+    #: Together with the retry delays, this lets changes survive the search
+    #: backend being unavailable for a few hours.
+    MAX_ATTEMPTS = 10
+
+    #: The number of seconds to wait before first retrying a change.
+    #:
+    #: This doubles for each later retry, up to :py:attr:`MAX_RETRY_DELAY`.
+    RETRY_DELAY = 30
+
+    #: The maximum number of seconds to wait before retrying a change.
+    MAX_RETRY_DELAY = 60 * 60
+
+    def queue_update(self, instance):
+        """Queue an update to the search index for an object.
+
+        Args:
+            instance (django.db.models.Model):
+                The object that was created or updated.
+        """
+        self._queue(instance, self.model.ACTION_UPDATE)
+
+    def queue_delete(self, instance):
+        """Queue removal of an object from the search index.
+
+        Args:
+            instance (django.db.models.Model):
+                The object that was deleted.
+        """
+        self._queue(instance, self.model.ACTION_DELETE)
+
+    def process_entries(self, debounce_secs=DEFAULT_DEBOUNCE_SECS,
+                        batch_size=DEFAULT_BATCH_SIZE):
+        """Apply a batch of queued changes to the search index.
+
+        Entries queued within the last ``debounce_secs`` seconds are left
+        for a later call, so that bursts of changes to an object result in
+        a single update. Multiple entries for the same object are collapsed
+        into the most recent action, and objects are then updated in bulk
+        for each index.
+
+        Objects that no longer exist or are no longer included in their
+        index's queryset are removed from the index.
+
+        If changes to an object fail to apply, its latest entry is kept and
+        retried on a later call, with exponential backoff. After
+        :py:attr:`MAX_ATTEMPTS` failed attempts, the entry is dropped.
+
+        Args:
+            debounce_secs (int, optional):
+                The minimum age, in seconds, of entries to process.
+
+            batch_size (int, optional):
+                The maximum number of entries to process.
+
+        Returns:
+            int:
+            The number of entries processed, including any dropped after
+            failing too many times.
+        """
+        now = timezone.now()
+        cutoff = now - timedelta(seconds=debounce_secs)
+        entries = list(
+            self.filter(Q(next_attempt__isnull=True) |
+                        Q(next_attempt__lte=now),
+                        timestamp__lte=cutoff)
+            .order_by('pk')
+            .values_list('pk', 'model_name', 'object_id', 'action',
+                         'attempts')
+            [:batch_size])
+
+        if not entries:
+            return 0
+
+        # Later entries replace the actions of earlier ones for an object.
+        actions = OrderedDict()
+
+        for entry_id, model_name, object_id, action, attempts in entries:
+            actions.pop((model_name, object_id), None)
+            actions[(model_name, object_id)] = action
+
+        update_ids = OrderedDict()
+        delete_ids = OrderedDict()
+
+        for (model_name, object_id), action in six.iteritems(actions):
+            if action == self.model.ACTION_UPDATE:
+                update_ids.setdefault(model_name, []).append(object_id)
+            else:
+                delete_ids.setdefault(model_name, []).append(object_id)
+
+        failed_keys = set()
+
+        try:
+            for using in connection_router.for_write():
+                failed_keys.update(
+                    self._apply_changes(using, update_ids, delete_ids))
+        except Exception as e:
+            logging.exception('Unable to update the search index from '
+                              'queued changes: %s',
+                              e)
+            failed_keys = set(actions)
+
+        # Only the latest entry for each failed object needs to be kept.
+        # It's retried with the highest attempt count of the object's
+        # entries.
+        retry_entries = OrderedDict()
+
+        for entry_id, model_name, object_id, action, attempts in entries:
+            key = (model_name, object_id)
+
+            if key in failed_keys:
+                old_attempts = retry_entries.get(key, (None, 0))[1]
+                retry_entries[key] = (entry_id, max(attempts, old_attempts))
+
+        retry_entry_ids = set()
+
+        for (model_name, object_id), (entry_id, attempts) in \
+                six.iteritems(retry_entries):
+            attempts += 1
+
+            if attempts < self.MAX_ATTEMPTS:
+                self.filter(pk=entry_id).update(
+                    attempts=attempts,
+                    next_attempt=now + timedelta(seconds=min(
+                        self.RETRY_DELAY * 2 ** (attempts - 1),
+                        self.MAX_RETRY_DELAY)))
+                retry_entry_ids.add(entry_id)
+            else:
+                logging.error('Dropping queued search index change for '
+                              '%s.%s after %d failed attempts. Run the '
+                              '"index" management command to bring the '
+                              'search index up to date.',
+                              model_name, object_id, attempts)
+
+        self.filter(pk__in=[
+            entry[0]
+            for entry in entries
+            if entry[0] not in retry_entry_ids
+        ]).delete()
+
+        return len(entries) - len(retry_entry_ids)
+
+    def _queue(self, instance, action):
+        """Queue a change to the search index.
+
+        Args:
+            instance (django.db.models.Model):
+                The changed object.
+
+            action (unicode):
+                The action to perform.
+        """
+        self.create(model_name=instance._meta.label_lower,
+                    object_id=instance.pk,
+                    action=action)
+
+    def _apply_changes(self, using, update_ids, delete_ids):
+        """Apply changes to a search connection.
+
+        Changes are applied in bulk for each model. If that fails, the
+        changes are applied one object at a time, so that only the objects
+        that fail are retried.
+
+        Args:
+            using (unicode):
+                The name of the search connection.
+
+            update_ids (dict):
+                A mapping of model names to IDs of objects to update.
+
+            delete_ids (dict):
+                A mapping of model names to IDs of objects to remove.
+
+        Returns:
+            set of tuple:
+            The ``(model_name, object_id)`` keys of objects whose changes
+            failed to apply.
+        """
+        connection = connections[using]
+        backend = connection.get_backend()
+        unified_index = connection.get_unified_index()
+
+        # Haystack backends log and ignore most errors by default (the
+        # connection's SILENTLY_FAIL option). The errors must be raised here
+        # so that failed changes are retried. The backend is shared with the
+        # rest of the thread, so this is restored afterward.
+        old_silently_fail = backend.silently_fail
+        backend.silently_fail = False
+
+        try:
+            return self._apply_backend_changes(using, backend, unified_index,
+                                               update_ids, delete_ids)
+        finally:
+            backend.silently_fail = old_silently_fail
+
+    def _apply_backend_changes(self, using, backend, unified_index,
+                               update_ids, delete_ids):
+        """Apply changes to a search backend.
+
+        Args:
+            using (unicode):
+                The name of the search connection.
+
+            backend (haystack.backends.BaseSearchBackend):
+                The search backend for the connection.
+
+            unified_index (haystack.utils.loading.UnifiedIndex):
+                The search indexes for the connection.
+
+            update_ids (dict):
+                A mapping of model names to IDs of objects to update.
+
+            delete_ids (dict):
+                A mapping of model names to IDs of objects to remove.
+
+        Returns:
+            set of tuple:
+            The ``(model_name, object_id)`` keys of objects whose changes
+            failed to apply.
+        """
+        failed_keys = set()
+
+        for model_name in set(update_ids) | set(delete_ids):
+            try:
+                model = apps.get_model(model_name)
+                index = unified_index.get_index(model)
+            except (LookupError, NotHandled):
+                continue
+
+            object_ids = update_ids.get(model_name, [])
+            remove_ids = delete_ids.get(model_name, [])
+
+            try:
+                self._apply_model_changes(using, backend, index, model_name,
+                                          object_ids, remove_ids)
+                continue
+            except Exception as e:
+                logging.warning('Unable to update the search index for %s '
+                                'from queued changes. Retrying each object '
+                                'separately: %s',
+                                model_name, e)
+
+            for object_id in object_ids:
+                failed_keys.update(self._apply_object_changes(
+                    using, backend, index, model_name, [object_id], []))
+
+            for object_id in remove_ids:
+                failed_keys.update(self._apply_object_changes(
+                    using, backend, index, model_name, [], [object_id]))
+
+        return failed_keys
+
+    def _apply_object_changes(self, using, backend, index, model_name,
+                              object_ids, remove_ids):
+        """Apply changes for a single object to a search connection.
+
+        Args:
+            using (unicode):
+                The name of the search connection.
+
+            backend (haystack.backends.BaseSearchBackend):
+                The search backend for the connection.
+
+            index (haystack.indexes.SearchIndex):
+                The search index for the model.
+
+            model_name (unicode):
+                The name of the model.
+
+            object_ids (list of int):
+                The ID of the object to update, if it was updated.
+
+            remove_ids (list of int):
+                The ID of the object to remove, if it was deleted.
+
+        Returns:
+            list of tuple:
+            The ``(model_name, object_id)`` key of the object if its changes
+            failed to apply, or an empty list.
+        """
+        try:
+            self._apply_model_changes(using, backend, index, model_name,
+                                      object_ids, remove_ids)
+            return []
+        except Exception as e:
+            object_id = (object_ids or remove_ids)[0]
+            logging.exception('Unable to update the search index for %s.%s '
+                              'from queued changes: %s',
+                              model_name, object_id, e)
+
+            return [(model_name, object_id)]
+
+    def _apply_model_changes(self, using, backend, index, model_name,
+                             object_ids, remove_ids):
+        """Apply changes for objects of a model to a search connection.
+
+        Args:
+            using (unicode):
+                The name of the search connection.
+
+            backend (haystack.backends.BaseSearchBackend):
+                The search backend for the connection.
+
+            index (haystack.indexes.SearchIndex):
+                The search index for the model.
+
+            model_name (unicode):
+                The name of the model.
+
+            object_ids (list of int):
+                The IDs of objects to update.
+
+            remove_ids (list of int):
+                The IDs of objects to remove.
+        """
+        remove_ids = set(remove_ids)
+
+        if object_ids:
+            found_objs = list(index.index_queryset(using=using)
+                              .filter(pk__in=object_ids))
+            objs = [
+                obj
+                for obj in found_objs
+                if index.should_update(obj)
+            ]
+
+            if objs:
+                backend.update(index, objs)
+
+            remove_ids.update(set(object_ids) -
+                              set(obj.pk for obj in found_objs))
+
+        for object_id in remove_ids:
+            backend.remove('%s.%s' % (model_name, object_id))
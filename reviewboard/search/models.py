@@ -0,0 +1,114 @@
+"""Models for Review Board search."""
+
+from __future__ import unicode_literals
+
+from django.db import models
+from django.utils import timezone
+from django.utils.encoding import python_2_unicode_compatible
+from django.utils.translation import ugettext_lazy as _
+
+from reviewboard.search.managers import SearchIndexQueueEntryManager
+
+
+@python_2_unicode_compatible
+class SearchIndexQueueEntry(models.Model):
+    """A pending change to the search index.
+
+    When queued on-the-fly indexing is enabled, changes to indexed objects
+    are recorded as entries, instead of updating the search index while
+    handling the request that made the change. Entries are processed in
+    batches by the ``process-search-queue`` management command, which
+    collapses multiple changes to the same object into a single update.
+
+    Changes that fail to apply are retried with exponential backoff, and
+    dropped after too many attempts, so that they can't hold up the rest of
+    the queue.
+    """
+
+    #: The action for an object that was created or updated.
+    ACTION_UPDATE = 'U'
+
+    #: The action for an object that was deleted.
+    ACTION_DELETE = 'D'
+
+    ACTION_CHOICES = (
+        (ACTION_UPDATE, _('Update')),
+        (ACTION_DELETE, _('Delete')),
+    )
+
+    #: The model of the changed object, in ``app_label.model_name`` form.
+    model_name = models.CharField(max_length=128)
+
+    #: The ID of the changed object.
+    object_id = models.PositiveIntegerField()
+
+    action = models.CharField(max_length=1, choices=ACTION_CHOICES)
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
+
+    #: The number of failed attempts to apply the change.
+    attempts = models.PositiveIntegerField(default=0)
+
+    #: When to next try applying the change, after a failed attempt.
+    next_attempt = models.DateTimeField(null=True, blank=True)
+
+    objects = SearchIndexQueueEntryManager()
+
+    def __str__(self):
+        """Return a string representation of the entry.
+
+        Returns:
+            unicode:
+            A string representation of the entry.
+        """
+        return '%s %s.%s' % (self.get_action_display(), self.model_name,
+                             self.object_id)
+
+    class Meta:
+        db_table = 'search_searchindexqueueentry'
+        verbose_name = _('Search Index Queue Entry')
+        verbose_name_plural = _('Search Index Queue Entries')
+
+
+@python_2_unicode_compatible
+class SearchIndexProgress(models.Model):
+    """The indexing progress for a model in a search connection.
+
+    This is used by the ``index`` management command to resume interrupted
+    rebuilds of the search index, and to limit incremental updates to
+    objects changed since the last successful run.
+    """
+
+    #: The name of the Haystack search connection.
+    connection = models.CharField(max_length=64)
+
+    #: The indexed model, in ``app_label.model_name`` form.
+    model_name = models.CharField(max_length=128)
+
+    #: When the in-progress rebuild of the index started, if any.
+    rebuild_started = models.DateTimeField(null=True)
+
+    #: The highest object ID indexed so far by the in-progress rebuild.
+    #:
+    #: All objects with IDs up to and including this have been indexed.
+    rebuild_last_pk = models.PositiveIntegerField(null=True)
+
+    #: When the last successful rebuild or update started.
+    #:
+    #: Objects changed since this time will be indexed by the next
+    #: incremental update.
+    last_indexed = models.DateTimeField(null=True)
+
+    def __str__(self):
+        """Return a string representation of the progress.
+
+        Returns:
+            unicode:
+            A string representation of the progress.
+        """
+        return '%s: %s' % (self.connection, self.model_name)
+
+    class Meta:
+        db_table = 'search_searchindexprogress'
+        unique_together = ('connection', 'model_name')
+        verbose_name = _('Search Index Progress')
+        verbose_name_plural = _('Search Index Progress')
@@ -7,6 +7,7 @@ from djblets.siteconfig.models import SiteConfiguration
 from reviewboard.registries.registry import Registry
 from reviewboard.search.search_backends.elasticsearch import \
     ElasticsearchBackend
+from reviewboard.search.search_backends.sqlite_fts import SQLiteFTSBackend
 from reviewboard.search.search_backends.whoosh import WhooshBackend
 
 
@@ -44,6 +45,7 @@ class SearchBackendRegistry(Registry):
         return [
             WhooshBackend(),
             ElasticsearchBackend(),
+            SQLiteFTSBackend(),
         ]
 
     @property
@@ -52,6 +54,16 @@ class SearchBackendRegistry(Registry):
         siteconfig = SiteConfiguration.objects.get_current()
         return siteconfig.get('search_on_the_fly_indexing')
 
+    @property
+    def on_the_fly_indexing_queued(self):
+        """Whether or not on-the-fly indexing changes are queued.
+
+        If ``True``, changes are queued and applied to the search index in
+        batches. Otherwise, the search index is updated immediately.
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+        return siteconfig.get('search_on_the_fly_indexing_queued')
+
     @property
     def search_enabled(self):
         """Whether or not search is enabled."""
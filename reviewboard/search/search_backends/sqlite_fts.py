@@ -0,0 +1,860 @@
+"""A backend for SQLite's FTS5 full-text search engine.
+
+This stores the search index in SQLite, either in a dedicated database file
+or in the Review Board database (when that is also SQLite). It requires no
+additional services or Python modules, and supports concurrent readers and
+writers, making it suitable for small and medium installs.
+
+Each indexed document is stored as a row containing the prepared values of
+all its fields (encoded as JSON), which are used for filtering, sorting, and
+populating results. The document field is additionally stored in an FTS5
+table, which handles content searches.
+"""
+
+from __future__ import unicode_literals
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from django import forms
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, connections as db_connections, \
+    transaction
+from django.utils import six, timezone
+from django.utils.encoding import force_text
+from django.utils.translation import ugettext, ugettext_lazy as _
+from haystack import connections
+from haystack.backends import BaseEngine, BaseSearchBackend, BaseSearchQuery
+from haystack.constants import DJANGO_CT, DJANGO_ID, ID
+from haystack.exceptions import NotHandled, SearchBackendError, SkipDocument
+from haystack.inputs import BaseInput, PythonData
+from haystack.models import SearchResult
+from haystack.utils import get_identifier, get_model_ct
+
+from reviewboard.search.search_backends.base import (SearchBackend,
+                                                     SearchBackendForm)
+
+
+logger = logging.getLogger(__name__)
+
+
+#: The table storing the prepared fields of each indexed document.
+DOCUMENTS_TABLE = 'rbsearch_documents'
+
+#: The FTS5 table storing the searchable text of each indexed document.
+FTS_TABLE = 'rbsearch_documents_fts'
+
+#: The statements used to create the search index tables.
+SCHEMA_SQL = (
+    'CREATE TABLE IF NOT EXISTS %s ('
+    '  doc_id INTEGER PRIMARY KEY,'
+    '  id TEXT NOT NULL UNIQUE,'
+    '  django_ct TEXT NOT NULL,'
+    '  fields TEXT NOT NULL'
+    ')' % DOCUMENTS_TABLE,
+
+    'CREATE INDEX IF NOT EXISTS %s_django_ct ON %s (django_ct)'
+    % (DOCUMENTS_TABLE, DOCUMENTS_TABLE),
+
+    "CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5("
+    "  text,"
+    "  tokenize = 'porter unicode61 remove_diacritics 1'"
+    ")" % FTS_TABLE,
+)
+
+#: The format used to store datetimes in the index.
+#:
+#: Datetimes are stored in UTC, so that they sort correctly.
+DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+#: The format used to store dates in the index.
+DATE_FORMAT = '%Y-%m-%d'
+
+#: The number of seconds to wait for another process's write to finish.
+LOCK_TIMEOUT_SECS = 30
+
+_MATCH_OPERATORS = ('AND', 'OR', 'NOT')
+_MATCH_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r'\w', re.UNICODE)
+
+
+def check_sqlite_fts_support():
+    """Check whether SQLite supports the features needed for search.
+
+    Raises:
+        django.core.exceptions.ValidationError:
+            SQLite was built without FTS5 or JSON support.
+    """
+    db = sqlite3.connect(':memory:')
+
+    try:
+        db.execute('CREATE VIRTUAL TABLE test USING fts5(text)')
+        db.execute("SELECT json_extract('{}', '$.test')")
+    except sqlite3.Error:
+        raise ValidationError(
+            ugettext('The installed version of SQLite (%s) does not support '
+                     'FTS5 full-text search and JSON functions, which are '
+                     'required for this search backend.')
+            % sqlite3.sqlite_version)
+    finally:
+        db.close()
+
+
+def build_match_expression(query_string):
+    """Return an FTS5 query expression for a search query.
+
+    Words and quoted phrases are searched for as-is, without any FTS5
+    syntax, so that punctuation in the query can't result in syntax errors.
+    Words ending in ``*`` are searched for as prefixes, and ``AND``, ``OR``,
+    and ``NOT`` can be used between terms. Terms are otherwise all required.
+
+    Args:
+        query_string (unicode):
+            The search query.
+
+    Returns:
+        unicode:
+        The FTS5 query expression. This will be empty if there were no terms
+        in the query.
+    """
+    parts = []
+    operator = None
+
+    for m in _MATCH_TOKEN_RE.finditer(query_string):
+        phrase, word = m.groups()
+
+        if word in _MATCH_OPERATORS:
+            if parts:
+                operator = word
+
+            continue
+
+        prefix = False
+
+        if phrase is None:
+            if word.endswith('*'):
+                word = word.rstrip('*')
+                prefix = True
+
+            phrase = word
+
+        if not _WORD_RE.search(phrase):
+            # FTS5 would discard this anyway, and an empty phrase is a
+            # syntax error.
+            continue
+
+        term = '"%s"' % phrase.replace('"', '""')
+
+        if prefix:
+            term += '*'
+
+        if parts:
+            parts.append(operator or 'AND')
+
+        parts.append(term)
+        operator = None
+
+    return ' '.join(parts)
+
+
+def _to_index_value(value):
+    """Return a value in the form stored in the index.
+
+    Args:
+        value (object):
+            The value to convert.
+
+    Returns:
+        object:
+        The value to store.
+    """
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.make_naive(value, timezone.utc)
+
+        return value.strftime(DATETIME_FORMAT)
+    elif isinstance(value, date):
+        return value.strftime(DATE_FORMAT)
+    elif isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    elif (value is None or
+          isinstance(value, (bool, float, list, dict) + six.integer_types)):
+        return value
+    else:
+        return force_text(value)
+
+
+def _from_index_value(field, value):
+    """Return a value from the index as a native value for a field.
+
+    Args:
+        field (haystack.fields.SearchField):
+            The search field for the value.
+
+        value (object):
+            The value stored in the index.
+
+    Returns:
+        object:
+        The converted value.
+    """
+    if value is None:
+        return None
+    elif field.field_type == 'datetime':
+        value = datetime.strptime(value, DATETIME_FORMAT)
+
+        if settings.USE_TZ:
+            value = timezone.make_aware(value, timezone.utc)
+
+        return value
+    elif field.field_type == 'date':
+        return datetime.strptime(value, DATE_FORMAT).date()
+    elif field.is_multivalued:
+        # Other backends return the values as strings, so do the same for
+        # consistency.
+        return [force_text(item) for item in value]
+    else:
+        return field.convert(value)
+
+
+def _quote(value):
+    """Return a value as an SQL literal.
+
+    Args:
+        value (object):
+            The value to quote.
+
+    Returns:
+        unicode:
+        The SQL literal.
+    """
+    value = _to_index_value(value)
+
+    if value is None:
+        return 'NULL'
+    elif isinstance(value, bool):
+        return '%d' % value
+    elif isinstance(value, six.integer_types):
+        return '%d' % value
+    elif isinstance(value, float):
+        return repr(value)
+    else:
+        return "'%s'" % (force_text(value)
+                         .replace('\0', '')
+                         .replace("'", "''"))
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """A Haystack search backend using SQLite FTS5.
+
+    Connections to the index database are opened per-thread and per-process.
+    A dedicated index database uses write-ahead logging, so that searches
+    don't block on (or block) indexing in other processes.
+    """
+
+    def __init__(self, connection_alias, **connection_options):
+        """Initialize the backend.
+
+        Args:
+            connection_alias (unicode):
+                The name of the search connection.
+
+            **connection_options (dict):
+                The search connection's settings. If ``PATH`` is empty, the
+                index is stored in the Review Board database.
+        """
+        super(SQLiteFTSSearchBackend, self).__init__(connection_alias,
+                                                     **connection_options)
+
+        self.path = connection_options.get('PATH')
+        self._local = threading.local()
+
+    def update(self, index, iterable, commit=True):
+        """Add or update documents in the index.
+
+        Args:
+            index (haystack.indexes.SearchIndex):
+                The search index for the objects.
+
+            iterable (list):
+                The objects to index.
+
+            commit (bool, unused):
+                Whether to commit the changes. Changes are always committed.
+        """
+        content_field = index.get_content_field()
+        documents = []
+
+        for obj in iterable:
+            try:
+                doc = index.full_prepare(obj)
+            except SkipDocument:
+                logger.debug('Indexing for object "%s" skipped', obj)
+                continue
+
+            documents.append((
+                doc[ID],
+                doc[DJANGO_CT],
+                json.dumps(doc, default=_to_index_value),
+                force_text(doc.get(content_field) or ''),
+            ))
+
+        if not documents:
+            return
+
+        try:
+            with self._write() as cursor:
+                for doc_id, django_ct, fields, text in documents:
+                    self._delete_documents(cursor, 'id = ?', [doc_id])
+
+                    cursor.execute(
+                        'INSERT INTO %s (id, django_ct, fields)'
+                        ' VALUES (?, ?, ?)'
+                        % DOCUMENTS_TABLE,
+                        [doc_id, django_ct, fields])
+                    cursor.execute(
+                        'INSERT INTO %s (rowid, text) VALUES (?, ?)'
+                        % FTS_TABLE,
+                        [cursor.lastrowid, text])
+        except sqlite3.Error as e:
+            if not self.silently_fail:
+                raise
+
+            logger.exception('Failed to update the SQLite search index: %s',
+                             e)
+
+    def remove(self, obj_or_string, commit=True):
+        """Remove a document from the index.
+
+        Args:
+            obj_or_string (object):
+                The object to remove, or its identifier.
+
+            commit (bool, unused):
+                Whether to commit the changes. Changes are always committed.
+        """
+        doc_id = get_identifier(obj_or_string)
+
+        try:
+            with self._write() as cursor:
+                self._delete_documents(cursor, 'id = ?', [doc_id])
+        except sqlite3.Error as e:
+            if not self.silently_fail:
+                raise
+
+            logger.exception('Failed to remove document "%s" from the SQLite '
+                             'search index: %s',
+                             doc_id, e)
+
+    def clear(self, models=None, commit=True):
+        """Remove documents from the index.
+
+        Args:
+            models (list of type, optional):
+                The models whose documents should be removed. If not
+                provided, all documents are removed.
+
+            commit (bool, unused):
+                Whether to commit the changes. Changes are always committed.
+        """
+        try:
+            with self._write() as cursor:
+                if models is None:
+                    cursor.execute('DELETE FROM %s' % FTS_TABLE)
+                    cursor.execute('DELETE FROM %s' % DOCUMENTS_TABLE)
+                else:
+                    model_cts = [get_model_ct(model) for model in models]
+
+                    if model_cts:
+                        self._delete_documents(
+                            cursor,
+                            'django_ct IN (%s)'
+                            % ', '.join(['?'] * len(model_cts)),
+                            model_cts)
+        except sqlite3.Error as e:
+            if not self.silently_fail:
+                raise
+
+            logger.exception('Failed to clear the SQLite search index: %s',
+                             e)
+
+    def search(self, query_string, sort_by=None, start_offset=0,
+               end_offset=None, fields='', models=None,
+               limit_to_registered_models=None, result_class=None, **kwargs):
+        """Search the index.
+
+        Faceting, highlighting, spelling suggestions, and narrowing queries
+        are not supported, and are ignored.
+
+        Args:
+            query_string (unicode):
+                The SQL expression built by :py:class:`SQLiteFTSSearchQuery`.
+
+            sort_by (list of unicode, optional):
+                The fields to sort by. Fields starting with ``-`` are sorted
+                in descending order. Documents without a value for a field
+                sort after all others.
+
+            start_offset (int, optional):
+                The index of the first result to return.
+
+            end_offset (int, optional):
+                The index after the last result to return.
+
+            fields (list of unicode, optional):
+                The fields to return. Defaults to all stored fields.
+
+            models (set of type, optional):
+                The models to limit results to.
+
+            limit_to_registered_models (bool, optional):
+                Whether to limit results to indexed models, if ``models``
+                isn't provided.
+
+            result_class (type, optional):
+                The class used for results.
+
+            **kwargs (dict, unused):
+                Additional search options.
+
+        Returns:
+            dict:
+            A dictionary with ``results`` and ``hits`` keys.
+        """
+        if limit_to_registered_models is None:
+            limit_to_registered_models = getattr(
+                settings, 'HAYSTACK_LIMIT_TO_REGISTERED_MODELS', True)
+
+        if models:
+            model_cts = sorted(get_model_ct(model) for model in models)
+        elif limit_to_registered_models:
+            model_cts = self.build_models_list()
+        else:
+            model_cts = []
+
+        where = query_string
+
+        if model_cts:
+            where = '(%s) AND doc.django_ct IN (%s)' % (
+                where,
+                ', '.join(_quote(model_ct) for model_ct in model_cts))
+
+        order_by = []
+
+        for field_name in sort_by or []:
+            if field_name.startswith('-'):
+                direction = 'DESC'
+                field_name = field_name[1:]
+            else:
+                direction = 'ASC'
+
+            value_sql = 'json_extract(doc.fields, %s)' % _quote('$.%s'
+                                                                % field_name)
+            order_by += [
+                '%s IS NULL %s' % (value_sql, direction),
+                '%s %s' % (value_sql, direction),
+            ]
+
+        order_by.append('doc.doc_id')
+
+        if end_offset is None:
+            limit = -1
+        else:
+            limit = max(end_offset - start_offset, 0)
+
+        try:
+            with self._read() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM %s AS doc WHERE %s'
+                               % (DOCUMENTS_TABLE, where))
+                hits = cursor.fetchone()[0]
+
+                cursor.execute(
+                    'SELECT doc.fields FROM %s AS doc WHERE %s'
+                    ' ORDER BY %s LIMIT ? OFFSET ?'
+                    % (DOCUMENTS_TABLE, where, ', '.join(order_by)),
+                    [limit, start_offset])
+                rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            if not self.silently_fail:
+                raise
+
+            logger.exception('Failed to query the SQLite search index: %s', e)
+
+            return {
+                'results': [],
+                'hits': 0,
+            }
+
+        unified_index = connections[self.connection_alias].get_unified_index()
+        result_class = result_class or SearchResult
+        results = []
+
+        for fields_json, in rows:
+            doc = json.loads(fields_json)
+
+            try:
+                model = apps.get_model(doc[DJANGO_CT])
+                index = unified_index.get_index(model)
+            except (LookupError, NotHandled):
+                hits -= 1
+                continue
+
+            result_fields = {}
+
+            for key, value in six.iteritems(doc):
+                if key in (DJANGO_CT, DJANGO_ID) or (fields and
+                                                     key not in fields):
+                    continue
+
+                field = index.fields.get(key)
+
+                if field is None:
+                    result_fields[key] = value
+                elif field.stored:
+                    result_fields[key] = _from_index_value(field, value)
+
+            app_label, model_name = doc[DJANGO_CT].split('.')
+            results.append(result_class(app_label, model_name,
+                                        doc[DJANGO_ID], 0, **result_fields))
+
+        return {
+            'results': results,
+            'hits': hits,
+            'facets': {},
+            'spelling_suggestion': None,
+        }
+
+    def build_schema(self, fields):
+        """Return schema information for the index.
+
+        The schema is the same for all indexes, so this returns nothing.
+
+        Args:
+            fields (dict, unused):
+                The fields in the indexes.
+
+        Returns:
+            dict:
+            An empty dictionary.
+        """
+        return {}
+
+    def _delete_documents(self, cursor, where, params):
+        """Delete documents matching a condition.
+
+        Args:
+            cursor (sqlite3.Cursor):
+                The cursor to use.
+
+            where (unicode):
+                The condition on the documents table.
+
+            params (list):
+                The parameters for the condition.
+        """
+        cursor.execute(
+            'DELETE FROM %s WHERE rowid IN (SELECT doc_id FROM %s WHERE %s)'
+            % (FTS_TABLE, DOCUMENTS_TABLE, where),
+            params)
+        cursor.execute('DELETE FROM %s WHERE %s' % (DOCUMENTS_TABLE, where),
+                       params)
+
+    def _get_db(self):
+        """Return the connection to the index database.
+
+        Returns:
+            sqlite3.Connection:
+            The connection to the index database.
+        """
+        if not self.path:
+            db_connection = db_connections[DEFAULT_DB_ALIAS]
+            db_connection.ensure_connection()
+            db = db_connection.connection
+
+            # Tables created here may be rolled back along with a
+            # transaction, so make sure they always exist.
+            for sql in SCHEMA_SQL:
+                db.execute(sql)
+
+            return db
+
+        pid = os.getpid()
+        db = getattr(self._local, 'db', None)
+
+        # SQLite connections can't be shared with forked processes.
+        if db is None or self._local.pid != pid:
+            index_dir = os.path.dirname(self.path)
+
+            if index_dir and not os.path.exists(index_dir):
+                os.makedirs(index_dir)
+
+            db = sqlite3.connect(self.path,
+                                 timeout=LOCK_TIMEOUT_SECS,
+                                 isolation_level=None)
+            db.execute('PRAGMA journal_mode = WAL')
+
+            for sql in SCHEMA_SQL:
+                db.execute(sql)
+
+            self._local.db = db
+            self._local.pid = pid
+
+        return db
+
+    @contextmanager
+    def _read(self):
+        """Return a cursor for reading from the index.
+
+        Context:
+            sqlite3.Cursor:
+            The cursor to use.
+        """
+        cursor = self._get_db().cursor()
+
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    @contextmanager
+    def _write(self):
+        """Return a cursor for changing the index in a transaction.
+
+        Context:
+            sqlite3.Cursor:
+            The cursor to use.
+        """
+        if not self.path:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                with self._read() as cursor:
+                    yield cursor
+        else:
+            with self._read() as cursor:
+                # Take the write lock up-front, so that concurrent writers
+                # wait for each other instead of failing to upgrade a lock.
+                cursor.execute('BEGIN IMMEDIATE')
+
+                try:
+                    yield cursor
+                except Exception:
+                    cursor.execute('ROLLBACK')
+                    raise
+                else:
+                    cursor.execute('COMMIT')
+
+
+class SQLiteFTSSearchQuery(BaseSearchQuery):
+    """A Haystack search query for the SQLite FTS5 backend.
+
+    Queries are built as SQL expressions on the documents table. Values are
+    included as quoted literals, so that the query is a self-contained
+    string.
+    """
+
+    def matching_all_fragment(self):
+        """Return the query fragment matching all documents.
+
+        Returns:
+            unicode:
+            The query fragment.
+        """
+        return '1'
+
+    def build_query(self):
+        """Return the SQL expression for the query.
+
+        Boosts are not supported, and are ignored.
+
+        Returns:
+            unicode:
+            The SQL expression.
+        """
+        return (self.query_filter.as_query_string(self.build_query_fragment) or
+                self.matching_all_fragment())
+
+    def build_query_fragment(self, field, filter_type, value):
+        """Return the SQL expression for a filter.
+
+        Filters on the document field (or ``content``) perform a full-text
+        search. Filters on other fields are performed against each value of
+        multi-value fields. Plain field filters are treated as exact
+        matches.
+
+        Args:
+            field (unicode):
+                The name of the field to filter on.
+
+            filter_type (unicode):
+                The type of filter.
+
+            value (object):
+                The value to filter by.
+
+        Returns:
+            unicode:
+            The SQL expression.
+
+        Raises:
+            haystack.exceptions.SearchBackendError:
+                The filter type isn't supported.
+        """
+        if not isinstance(value, BaseInput):
+            value = PythonData(value)
+
+        unified_index = connections[self._using].get_unified_index()
+
+        if field in ('content', unified_index.document_field):
+            expression = build_match_expression(
+                force_text(value.prepare(self)))
+
+            if not expression:
+                return '0'
+
+            return ('doc.doc_id IN (SELECT rowid FROM %s WHERE %s MATCH %s)'
+                    % (FTS_TABLE, FTS_TABLE, _quote(expression)))
+
+        value = value.query_string
+        path = _quote('$.%s' % field)
+
+        if filter_type in ('content', 'exact'):
+            condition = 'value = %s' % _quote(value)
+        elif filter_type in ('contains', 'fuzzy'):
+            condition = (
+                "CASE WHEN json_type(doc.fields, %s) = 'array'"
+                " THEN value = %s"
+                " ELSE instr(lower(value), lower(%s)) > 0 END"
+                % (path, _quote(value), _quote(value)))
+        elif filter_type == 'startswith':
+            condition = ('lower(substr(value, 1, length(%s))) = lower(%s)'
+                         % (_quote(value), _quote(value)))
+        elif filter_type == 'endswith':
+            condition = ('lower(substr(value, -length(%s))) = lower(%s)'
+                         % (_quote(value), _quote(value)))
+        elif filter_type in ('gt', 'gte', 'lt', 'lte'):
+            condition = 'value %s %s' % (
+                {
+                    'gt': '>',
+                    'gte': '>=',
+                    'lt': '<',
+                    'lte': '<=',
+                }[filter_type],
+                _quote(value))
+        elif filter_type == 'in':
+            if not value:
+                return '0'
+
+            condition = 'value IN (%s)' % ', '.join(_quote(item)
+                                                    for item in value)
+        elif filter_type == 'range':
+            start, end = value
+            condition = 'value BETWEEN %s AND %s' % (_quote(start),
+                                                     _quote(end))
+        else:
+            raise SearchBackendError(
+                'The SQLite search backend does not support "%s" filters.'
+                % filter_type)
+
+        return ('EXISTS (SELECT 1 FROM json_each(doc.fields, %s) WHERE %s)'
+                % (path, condition))
+
+
+class SQLiteFTSSearchEngine(BaseEngine):
+    """A Haystack search engine using SQLite FTS5."""
+
+    backend = SQLiteFTSSearchBackend
+    query = SQLiteFTSSearchQuery
+
+
+class SQLiteFTSConfigForm(SearchBackendForm):
+    """A form for configuring the SQLite FTS5 search backend."""
+
+    search_index_file = forms.CharField(
+        label=_('Search index file'),
+        help_text=_('The SQLite database file that the search index should '
+                    'be stored in. If blank, the index will be stored in '
+                    'the Review Board database, which must be using SQLite.'),
+        required=False,
+        widget=forms.TextInput(attrs={'size': '80'}))
+
+    def clean_search_index_file(self):
+        """Clean the search_index_file field.
+
+        This ensures the value is an absolute path and is writable, or that
+        the Review Board database can store the index if no path was
+        provided.
+
+        Returns:
+            unicode:
+            The cleaned path.
+
+        Raises:
+            django.core.exceptions.ValidationError:
+                The path is invalid.
+        """
+        index_file = self.cleaned_data['search_index_file'].strip()
+
+        if index_file:
+            if not os.path.isabs(index_file):
+                raise ValidationError(
+                    ugettext('The search index path must be absolute.'))
+
+            if os.path.exists(index_file):
+                writable_path = index_file
+            else:
+                writable_path = os.path.dirname(index_file)
+
+            if (os.path.exists(writable_path) and
+                not os.access(writable_path, os.W_OK)):
+                raise ValidationError(
+                    ugettext('The search index path is not writable. Make '
+                             'sure the web server has write access to it '
+                             'and its parent directory.'))
+        elif db_connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise ValidationError(
+                ugettext('A search index file is required when the Review '
+                         'Board database is not using SQLite.'))
+
+        return index_file
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """A search backend using SQLite's FTS5 full-text search."""
+
+    search_backend_id = 'sqlite_fts'
+    name = _('SQLite full-text search')
+    haystack_backend_name = ('reviewboard.search.search_backends.sqlite_fts.'
+                             'SQLiteFTSSearchEngine')
+    config_form_class = SQLiteFTSConfigForm
+    form_field_map = {
+        'search_index_file': 'PATH',
+    }
+
+    @property
+    def default_settings(self):
+        """The default settings for the backend.
+
+        This is dynamic, in order to account for a change to
+        ``SITE_DATA_DIR``. In production, this value shouldn't change, but
+        it does in unit tests.
+        """
+        return {
+            'PATH': os.path.join(settings.SITE_DATA_DIR,
+                                 'search-index.sqlite3'),
+        }
+
+    def validate(self):
+        """Ensure that SQLite supports full-text search.
+
+        Raises:
+            django.core.exceptions.ValidationError:
+                Raised if SQLite was built without FTS5 or JSON support.
+        """
+        check_sqlite_fts_support()
@@ -16,6 +16,7 @@ from reviewboard.accounts.models import Profile
 from reviewboard.reviews.models import Group, ReviewRequest
 from reviewboard.reviews.signals import review_request_published
 from reviewboard.search import search_backend_registry
+from reviewboard.search.models import SearchIndexQueueEntry
 
 
 class SignalProcessor(BaseSignalProcessor):
@@ -29,6 +30,11 @@ class SignalProcessor(BaseSignalProcessor):
 
     1) Search is enabled.
     2) The current search engine backend supports on-the-fly indexing.
+
+    If queued on-the-fly indexing is enabled, changes are instead recorded
+    as :py:class:`~reviewboard.search.models.SearchIndexQueueEntry` entries,
+    which are applied to the index in batches by the
+    ``process-search-queue`` management command.
     """
 
     save_signals = [
@@ -128,7 +134,7 @@ class SignalProcessor(BaseSignalProcessor):
                 kwargs['sender'] = User
                 instance = instance.user
 
-            self.handle_save(instance=instance, **kwargs)
+            self._update_index(instance=instance, **kwargs)
 
     def check_handle_delete(self, **kwargs):
         """Conditionally update the search index when an object is deleted.
@@ -144,7 +150,45 @@ class SignalProcessor(BaseSignalProcessor):
         backend = search_backend_registry.current_backend
 
         if backend and search_backend_registry.on_the_fly_indexing_enabled:
-            self.handle_delete(**kwargs)
+            self._remove_from_index(**kwargs)
+
+    def _update_index(self, instance, **kwargs):
+        """Update an object in the search index.
+
+        Depending on the site configuration, this will either update the
+        index immediately or queue the update.
+
+        Args:
+            instance (django.db.models.Model):
+                The object to update.
+
+            **kwargs (dict):
+                Signal arguments. These will be passed to
+                :py:meth:`handle_save`.
+        """
+        if search_backend_registry.on_the_fly_indexing_queued:
+            SearchIndexQueueEntry.objects.queue_update(instance)
+        else:
+            self.handle_save(instance=instance, **kwargs)
+
+    def _remove_from_index(self, instance, **kwargs):
+        """Remove an object from the search index.
+
+        Depending on the site configuration, this will either update the
+        index immediately or queue the removal.
+
+        Args:
+            instance (django.db.models.Model):
+                The object to remove.
+
+            **kwargs (dict):
+                Signal arguments. These will be passed to
+                :py:meth:`handle_delete`.
+        """
+        if search_backend_registry.on_the_fly_indexing_queued:
+            SearchIndexQueueEntry.objects.queue_delete(instance)
+        else:
+            self.handle_delete(instance=instance, **kwargs)
 
     def _handle_group_m2m_changed(self, instance, action, pk_set, reverse,
                                   **kwargs):
@@ -213,8 +257,7 @@ class SignalProcessor(BaseSignalProcessor):
                 users = User.objects.filter(pk__in=pk_set)
 
             for user in users:
-                self.handle_save(instance=user, instance_kwarg='instance',
-                                 sender=User)
+                self._update_index(instance=user, sender=User)
         elif action == 'pre_clear':
             # When ``reverse`` is ``True``, a User is having their groups
             # cleared so we don't need to worry about storing any state in the
@@ -231,13 +274,11 @@ class SignalProcessor(BaseSignalProcessor):
             if reverse:
                 # When ``reverse`` is ``True``, we just have to reindex a
                 # single user.
-                self.handle_save(instance=instance, instance_kwarg='instance',
-                                 sender=User)
+                self._update_index(instance=instance, sender=User)
             else:
                 # Here, we are reindexing every user that got removed from the
                 # group via clearing.
                 pks = self._pending_user_changes.data.pop(instance.pk)
 
                 for user in User.objects.filter(pk__in=pks):
-                    self.handle_save(instance=user, instance_kwarg='instance',
-                                     sender=User)
+                    self._update_index(instance=user, sender=User)
@@ -1,14 +1,25 @@
 from __future__ import unicode_literals
 
+import os
+import shutil
+import sqlite3
+import tempfile
+import weakref
+from copy import deepcopy
+
 import django
 import haystack
 from django.contrib.auth.models import User
 from django.contrib.sites.models import Site
+from django.core.management import CommandError, call_command
 from django.core.urlresolvers import reverse
-from django.utils import six
+from django.db.models.signals import m2m_changed
+from django.utils import six, timezone
+from django.utils.six.moves import cStringIO as StringIO
 from django.utils.six.moves.urllib.parse import urlencode
 from djblets.siteconfig.models import SiteConfiguration
 from djblets.testing.decorators import add_fixtures
+from haystack.utils import get_identifier
 from kgb import SpyAgency
 
 try:
@@ -20,7 +31,14 @@ except ImportError:
 
 from reviewboard.admin.server import build_server_url
 from reviewboard.admin.siteconfig import load_site_config
-from reviewboard.reviews.models import ReviewRequestDraft
+from reviewboard.reviews.models import ReviewRequest, ReviewRequestDraft
+from reviewboard.reviews.search_indexes import ReviewRequestIndex
+from reviewboard.search.models import (SearchIndexProgress,
+                                       SearchIndexQueueEntry)
+from reviewboard.search.search_backends.sqlite_fts import (
+    SQLiteFTSBackend,
+    SQLiteFTSSearchBackend,
+    build_match_expression)
 from reviewboard.search.signal_processor import SignalProcessor
 from reviewboard.search.testing import reindex_search
 from reviewboard.site.urlresolvers import local_site_reverse
@@ -99,6 +117,11 @@ class SearchTests(SpyAgency, TestCase):
 
         load_site_config()
 
+    def setUp(self):
+        super(SearchTests, self).setUp()
+
+        self._teardown_stray_signal_processors()
+
     def test_search_all(self):
         """Testing search with review requests and users"""
         # We already have doc. Now let's create a review request.
@@ -362,6 +385,37 @@ class SearchTests(SpyAgency, TestCase):
         self.assertEqual(results[0].content_type(), 'reviews.reviewrequest')
         self.assertEqual(results[0].summary, review_request.summary)
 
+    @add_fixtures(['test_scmtools'])
+    def test_review_requests_without_access_principals(self):
+        """Testing search with private review requests indexed without
+        access principals
+        """
+        accessible = self._index_without_access_principals()
+
+        # Perform the search.
+        self.client.login(username='grumpy', password='grumpy')
+        response = self.search('Legacy')
+        context = response.context
+        self.assertEqual(context['hits_returned'], 1)
+
+        results = context['object_list']
+        self.assertEqual(results[0].summary, accessible.summary)
+
+    @add_fixtures(['test_scmtools'])
+    def test_review_requests_without_access_principals_after_rebuild(self):
+        """Testing search with private review requests indexed without
+        access principals after the index has been rebuilt
+        """
+        self._index_without_access_principals()
+
+        self.client.login(username='grumpy', password='grumpy')
+
+        with self.siteconfig_settings({'search_access_principals_indexed':
+                                       True}):
+            response = self.search('Legacy')
+
+        self.assertEqual(response.context['hits_returned'], 0)
+
     def test_search_review_request_id(self):
         """Testing search with a review request ID"""
         site = Site.objects.get_current()
@@ -542,6 +596,237 @@ class SearchTests(SpyAgency, TestCase):
         self.assertEqual(result.username, 'doc')
         self.assertEqual(result.full_name, '')
 
+    def test_on_the_fly_indexing_queued(self):
+        """Testing queued on-the-fly indexing"""
+        reindex_search()
+
+        signal_processor = self._get_signal_processor()
+
+        with self.siteconfig_settings({
+                'search_on_the_fly_indexing': True,
+                'search_on_the_fly_indexing_queued': True,
+            }, reload_settings=False):
+            self.spy_on(signal_processor.handle_save)
+
+            review_request = self.create_review_request(summary='foo',
+                                                        publish=True)
+
+            draft = ReviewRequestDraft.create(review_request)
+            draft.summary = 'Not foo whatsoever'
+            draft.save()
+            draft.target_people = [User.objects.get(username='grumpy')]
+
+            review_request.publish(review_request.submitter)
+
+            self.assertFalse(signal_processor.handle_save.spy.called)
+            self.assertEqual(SearchIndexQueueEntry.objects.count(), 2)
+
+            rsp = self.search('Not foo')
+            self.assertEqual(rsp.context['hits_returned'], 0)
+
+            # Recent changes are left for later.
+            self.assertEqual(
+                SearchIndexQueueEntry.objects.process_entries(),
+                0)
+
+            call_command('process-search-queue', debounce=0,
+                         stdout=StringIO())
+
+            self.assertFalse(SearchIndexQueueEntry.objects.exists())
+
+            rsp = self.search('Not foo')
+
+        self.assertEqual(rsp.context['hits_returned'], 1)
+        self.assertEqual(rsp.context['result'].summary, 'Not foo whatsoever')
+
+    def test_on_the_fly_indexing_queued_delete(self):
+        """Testing queued on-the-fly indexing with deleted objects"""
+        review_request = self.create_review_request(summary='foo',
+                                                    publish=True)
+        reindex_search()
+
+        with self.siteconfig_settings({
+                'search_on_the_fly_indexing': True,
+                'search_on_the_fly_indexing_queued': True,
+            }, reload_settings=False):
+            review_request.delete()
+
+            self.assertEqual(
+                list(SearchIndexQueueEntry.objects.values_list('model_name',
+                                                               'action')),
+                [('reviews.reviewrequest',
+                  SearchIndexQueueEntry.ACTION_DELETE)])
+            self.assertEqual(
+                SearchIndexQueueEntry.objects.process_entries(
+                    debounce_secs=0),
+                1)
+
+            rsp = self.search('foo')
+
+        self.assertEqual(rsp.context['hits_returned'], 0)
+
+    def test_on_the_fly_indexing_queued_with_error(self):
+        """Testing queued on-the-fly indexing retries objects that fail to
+        index without holding up other objects
+        """
+        reindex_search()
+
+        manager = SearchIndexQueueEntry.objects
+
+        with self.siteconfig_settings({
+                'search_on_the_fly_indexing': True,
+                'search_on_the_fly_indexing_queued': True,
+            }, reload_settings=False):
+            bad_review_request = self.create_review_request(summary='bad',
+                                                            publish=True)
+            self.create_review_request(summary='good', publish=True)
+
+        backend = haystack.connections['default'].get_backend()
+        self.assertTrue(backend.silently_fail)
+
+        self._make_backend_fail_for(bad_review_request)
+
+        self.assertEqual(manager.process_entries(debounce_secs=0), 1)
+        self.assertTrue(backend.silently_fail)
+
+        rsp = self.search('good')
+        self.assertEqual(rsp.context['hits_returned'], 1)
+
+        entry = manager.get()
+        self.assertEqual(entry.object_id, bad_review_request.pk)
+        self.assertEqual(entry.attempts, 1)
+        self.assertGreater(entry.next_attempt, timezone.now())
+
+        # The entry shouldn't be retried until it's due.
+        self.assertEqual(manager.process_entries(debounce_secs=0), 0)
+
+        for i in range(manager.MAX_ATTEMPTS - 2):
+            manager.update(next_attempt=timezone.now())
+            self.assertEqual(manager.process_entries(debounce_secs=0), 0)
+
+        self.assertEqual(manager.get().attempts, manager.MAX_ATTEMPTS - 1)
+
+        # The last failure drops the entry.
+        manager.update(next_attempt=timezone.now())
+        self.assertEqual(manager.process_entries(debounce_secs=0), 1)
+        self.assertFalse(manager.exists())
+
+    def test_index_command_full(self):
+        """Testing the index --full management command"""
+        review_requests = [
+            self.create_review_request(summary='Indexed %s' % i,
+                                       publish=True)
+            for i in range(3)
+        ]
+
+        # The command records that access principals have been indexed.
+        # Restore the setting afterward, so it doesn't affect other tests.
+        with self.siteconfig_settings({'search_access_principals_indexed':
+                                       False},
+                                      reload_settings=False):
+            call_command('index', full=True, batch_size=2,
+                         stdout=StringIO())
+
+            siteconfig = SiteConfiguration.objects.get_current()
+            self.assertTrue(
+                siteconfig.get('search_access_principals_indexed'))
+
+        rsp = self.search('Indexed')
+        self.assertEqual(rsp.context['hits_returned'], 3)
+
+        progress = SearchIndexProgress.objects.get(
+            model_name='reviews.reviewrequest')
+        self.assertIsNone(progress.rebuild_started)
+        self.assertIsNone(progress.rebuild_last_pk)
+        self.assertIsNotNone(progress.last_indexed)
+        self.assertGreaterEqual(progress.last_indexed,
+                                review_requests[-1].last_updated)
+
+    def test_index_command_resume(self):
+        """Testing the index --resume management command"""
+        review_requests = [
+            self.create_review_request(summary='Indexed %s' % i,
+                                       publish=True)
+            for i in range(3)
+        ]
+
+        call_command('clear_index', interactive=False, stdout=StringIO())
+
+        # Simulate a rebuild interrupted after the first review request.
+        now = timezone.now()
+
+        SearchIndexProgress.objects.create(
+            connection='default',
+            model_name='reviews.reviewrequest',
+            rebuild_started=now,
+            rebuild_last_pk=review_requests[0].pk)
+        SearchIndexProgress.objects.create(
+            connection='default',
+            model_name='auth.user',
+            last_indexed=now)
+
+        with self.siteconfig_settings({'search_access_principals_indexed':
+                                       False},
+                                      reload_settings=False):
+            call_command('index', resume=True, batch_size=1,
+                         stdout=StringIO())
+
+            siteconfig = SiteConfiguration.objects.get_current()
+            self.assertTrue(
+                siteconfig.get('search_access_principals_indexed'))
+
+        rsp = self.search('Indexed')
+        self.assertEqual(
+            sorted(result.summary for result in rsp.context['object_list']),
+            ['Indexed 1', 'Indexed 2'])
+
+        # Users were already indexed, and shouldn't have been indexed again.
+        rsp = self.search('doc')
+        self.assertEqual(
+            [result.content_type() for result in rsp.context['object_list']],
+            ['reviews.reviewrequest', 'reviews.reviewrequest'])
+
+        progress = SearchIndexProgress.objects.get(
+            model_name='reviews.reviewrequest')
+        self.assertIsNone(progress.rebuild_started)
+        self.assertEqual(progress.last_indexed, now)
+
+    def test_index_command_resume_without_rebuild(self):
+        """Testing the index --resume management command without an
+        interrupted rebuild
+        """
+        with self.assertRaises(CommandError):
+            call_command('index', resume=True, stdout=StringIO())
+
+    def test_index_command_incremental(self):
+        """Testing the index management command indexes only objects updated
+        since the last run
+        """
+        old_review_request = self.create_review_request(summary='Old',
+                                                        publish=True)
+
+        call_command('index', stdout=StringIO())
+
+        progress = SearchIndexProgress.objects.get(
+            model_name='reviews.reviewrequest')
+        progress.last_indexed = timezone.now()
+        progress.save()
+
+        # This change won't be noticed, since last_updated isn't changed.
+        ReviewRequest.objects.filter(pk=old_review_request.pk).update(
+            summary='Changed')
+
+        self.create_review_request(summary='New', publish=True)
+
+        call_command('index', stdout=StringIO())
+
+        self.assertEqual(self.search('Old').context['hits_returned'], 1)
+        self.assertEqual(self.search('Changed').context['hits_returned'], 0)
+        self.assertEqual(self.search('New').context['hits_returned'], 1)
+
+        siteconfig = SiteConfiguration.objects.get_current()
+        self.assertFalse(siteconfig.get('search_access_principals_indexed'))
+
     def test_search_by_full_name_public_profile(self):
         """Testing searching by full name for users with public profiles"""
         user = User.objects.get(username='doc')
@@ -720,6 +1005,243 @@ class SearchTests(SpyAgency, TestCase):
 
         return signal_processor
 
+    def _make_backend_fail_for(self, obj):
+        """Make the search backend fail to write a document.
+
+        Args:
+            obj (django.db.models.Model):
+                The object whose document should fail to be written.
+        """
+        from whoosh.writing import AsyncWriter
+
+        def _update_document(_self, *args, **doc):
+            if doc['django_id'] == six.text_type(obj.pk):
+                # Haystack's Whoosh backend doesn't release the index lock if
+                # a write fails, so do that here, as the underlying writer
+                # would when failing.
+                _self.writer.cancel()
+
+                raise IOError('Oh no')
+
+            return AsyncWriter.update_document.call_original(_self, *args,
+                                                             **doc)
+
+        self.spy_on(AsyncWriter.update_document,
+                    owner=AsyncWriter,
+                    call_fake=_update_document)
+
+    def _teardown_stray_signal_processors(self):
+        """Disconnect signal processors other than the configured one.
+
+        Tests that reload the installed apps (such as the extension tests)
+        leave behind the signal processors created for the old Haystack app
+        configurations, still connected to signals. These would index or
+        queue every change a second time.
+        """
+        current_signal_processor = self._get_signal_processor()
+        stray_signal_processors = []
+        signals = set(
+            signal
+            for signal_info in (SignalProcessor.save_signals +
+                                SignalProcessor.delete_signals)
+            for signal in signal_info[1:2]
+        )
+        signals.add(m2m_changed)
+
+        for signal in signals:
+            for lookup_key, receiver in signal.receivers:
+                if isinstance(receiver, weakref.ReferenceType):
+                    receiver = receiver()
+
+                receiver = getattr(receiver, 'func', receiver)
+                owner = getattr(receiver, '__self__', None)
+
+                if (isinstance(owner, SignalProcessor) and
+                    owner is not current_signal_processor and
+                    owner not in stray_signal_processors):
+                    stray_signal_processors.append(owner)
+
+        for signal_processor in stray_signal_processors:
+            signal_processor.teardown()
+
+    def _index_without_access_principals(self):
+        """Index private review requests without access principals.
+
+        This simulates an index built before access principals were added.
+        Of the two review requests indexed, only the first is accessible by
+        the ``grumpy`` user.
+
+        Returns:
+            reviewboard.reviews.models.review_request.ReviewRequest:
+            The review request accessible by ``grumpy``.
+        """
+        user = User.objects.get(username='grumpy')
+
+        group = self.create_review_group(invite_only=True)
+        group.users.add(user)
+
+        repository = self.create_repository(public=False)
+        repository.users.add(user)
+
+        accessible = self.create_review_request(summary='Legacy accessible',
+                                                repository=repository,
+                                                publish=True)
+        accessible.target_groups.add(group)
+
+        inaccessible = self.create_review_request(
+            summary='Legacy inaccessible',
+            publish=True)
+        inaccessible.target_groups.add(
+            self.create_review_group(name='other', invite_only=True))
+
+        self.assertTrue(accessible.is_accessible_by(user))
+        self.assertFalse(inaccessible.is_accessible_by(user))
+
+        def _full_prepare(index, obj):
+            data = ReviewRequestIndex.full_prepare.call_original(index, obj)
+            data.pop('access_principals', None)
+
+            return data
+
+        self.spy_on(ReviewRequestIndex.full_prepare,
+                    owner=ReviewRequestIndex,
+                    call_fake=_full_prepare)
+
+        reindex_search()
+
+        return accessible
+
+
+class SQLiteFTSSearchTests(SearchTests):
+    """Unit tests for search functionality with the SQLite FTS5 backend.
+
+    These run all the search tests, with the search index stored in the test
+    database.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Set some initial state for all search-related tests.
+
+        This will switch to the SQLite FTS5 backend, before enabling search.
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+        cls._old_search_backend_id = siteconfig.get('search_backend_id')
+        cls._old_search_backend_settings = \
+            deepcopy(siteconfig.get('search_backend_settings'))
+
+        backend_settings = deepcopy(cls._old_search_backend_settings or {})
+        backend_settings[SQLiteFTSBackend.search_backend_id] = {
+            'PATH': '',
+        }
+
+        siteconfig.set('search_backend_id', SQLiteFTSBackend.search_backend_id)
+        siteconfig.set('search_backend_settings', backend_settings)
+        siteconfig.save()
+
+        super(SQLiteFTSSearchTests, cls).setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        # This must happen after the class's transaction is rolled back, or
+        # the old settings would be rolled back with it.
+        super(SQLiteFTSSearchTests, cls).tearDownClass()
+
+        siteconfig = SiteConfiguration.objects.get_current()
+
+        for key, value in (('search_backend_id',
+                            cls._old_search_backend_id),
+                           ('search_backend_settings',
+                            cls._old_search_backend_settings)):
+            if value is None:
+                # The setting wasn't stored, so let the default apply again.
+                siteconfig.settings.pop(key, None)
+            else:
+                siteconfig.set(key, value)
+
+        siteconfig.save()
+
+        load_site_config()
+
+    def test_search_with_syntax(self):
+        """Testing search with the SQLite FTS5 backend and query syntax"""
+        self.create_review_request(summary='Fix the frobnicator',
+                                   publish=True)
+        self.create_review_request(summary='Add a "frobnicator-2000" test',
+                                   publish=True)
+        reindex_search()
+
+        self.assertEqual(
+            self.search('frobni*').context['hits_returned'], 2)
+        self.assertEqual(
+            self.search('frobnicator NOT 2000').context['hits_returned'], 1)
+        self.assertEqual(
+            self.search('"frobnicator-2000" OR fix')
+            .context['hits_returned'],
+            2)
+        self.assertEqual(
+            self.search('frobnicator AND (unknown').context['hits_returned'],
+            0)
+
+    def test_search_with_index_file(self):
+        """Testing search with the SQLite FTS5 backend and a search index
+        file
+        """
+        index_dir = tempfile.mkdtemp()
+        index_file = os.path.join(index_dir, 'search-index.sqlite3')
+
+        try:
+            with self.siteconfig_settings({
+                    'search_backend_settings': {
+                        SQLiteFTSBackend.search_backend_id: {
+                            'PATH': index_file,
+                        },
+                    },
+                }):
+                self.create_review_request(summary='Fix the frobnicator',
+                                           publish=True)
+                reindex_search()
+
+                self.assertTrue(os.path.exists(index_file))
+                self.assertEqual(
+                    self.search('frobnicator').context['hits_returned'], 1)
+        finally:
+            shutil.rmtree(index_dir)
+
+    def test_build_match_expression(self):
+        """Testing build_match_expression"""
+        self.assertEqual(build_match_expression('fix bug'),
+                         '"fix" AND "bug"')
+        self.assertEqual(build_match_expression('fix OR bug'),
+                         '"fix" OR "bug"')
+        self.assertEqual(build_match_expression('fix NOT bug*'),
+                         '"fix" NOT "bug"*')
+        self.assertEqual(build_match_expression('"a phrase" x"y'),
+                         '"a phrase" AND "x""y"')
+        self.assertEqual(build_match_expression('NOT fix AND OR bug AND'),
+                         '"fix" OR "bug"')
+        self.assertEqual(build_match_expression('- ( ) ""'), '')
+
+    def _make_backend_fail_for(self, obj):
+        """Make the search backend fail to write a document.
+
+        Args:
+            obj (django.db.models.Model):
+                The object whose document should fail to be written.
+        """
+        doc_id = get_identifier(obj)
+
+        def _delete_documents(_self, cursor, where, params):
+            if params == [doc_id]:
+                raise sqlite3.OperationalError('Oh no')
+
+            return SQLiteFTSSearchBackend._delete_documents.call_original(
+                _self, cursor, where, params)
+
+        self.spy_on(SQLiteFTSSearchBackend._delete_documents,
+                    owner=SQLiteFTSSearchBackend,
+                    call_fake=_delete_documents)
+
 
 class ViewTests(TestCase):
     """Tests for the search view."""
@@ -9,6 +9,7 @@ from django.http import HttpResponseRedirect
 from django.shortcuts import render
 from django.utils import six
 from haystack.generic_views import SearchView
+from haystack.query import SearchQuerySet
 
 from reviewboard.accounts.mixins import (CheckLoginRequiredViewMixin,
                                          UserProfileRequiredViewMixin)
@@ -100,6 +101,20 @@ class RBSearchView(CheckLoginRequiredViewMixin,
 
         return self.form_valid(form)
 
+    def get_queryset(self):
+        """Return the queryset to search.
+
+        Haystack's default queryset is created when the view class is
+        defined, which ties it to the search backend in use at that time. A
+        new one is created for each search instead, so that changes to the
+        search backend settings take effect immediately.
+
+        Returns:
+            haystack.query.SearchQuerySet:
+            The queryset to search.
+        """
+        return SearchQuerySet()
+
     def get_context_data(self, form=None, **kwargs):
         """Return context data for rendering the view.
 
@@ -168,6 +168,7 @@ RB_BUILTIN_APPS = [
     'reviewboard.oauth',
     'reviewboard.reviews',
     'reviewboard.scmtools',
+    'reviewboard.search',
     'reviewboard.site',
     'reviewboard.webapi',
 ]
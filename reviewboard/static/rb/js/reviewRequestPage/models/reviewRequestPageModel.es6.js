@@ -7,6 +7,8 @@
 RB.ReviewRequestPage.ReviewRequestPage = RB.ReviewablePage.extend({
     defaults: _.defaults({
         updatesURL: null,
+        updatesVersion: null,
+        updatesWatchURL: null,
     }, RB.ReviewablePage.prototype.defaults),
 
     /**
@@ -19,6 +21,8 @@ RB.ReviewRequestPage.ReviewRequestPage = RB.ReviewablePage.extend({
         this._watchedUpdatesPeriodMS = null;
         this._watchedUpdatesTimeout = null;
         this._watchedUpdatesLastScheduleTime = null;
+        this._waitingForUpdates = false;
+        this._updatesWatchFailed = false;
 
         this.entries = new Backbone.Collection([], {
             model: RB.ReviewRequestPage.Entry,
@@ -42,6 +46,8 @@ RB.ReviewRequestPage.ReviewRequestPage = RB.ReviewablePage.extend({
     parse(rsp) {
         return _.extend({
             updatesURL: rsp.updatesURL,
+            updatesVersion: rsp.updatesVersion,
+            updatesWatchURL: rsp.updatesWatchURL,
         }, RB.ReviewablePage.prototype.parse.call(this, rsp));
     },
 
@@ -158,16 +164,58 @@ RB.ReviewRequestPage.ReviewRequestPage = RB.ReviewablePage.extend({
         }
     },
 
+    /**
+     * Load the full content of entries from the server.
+     *
+     * This is used to load entries that were deferred when the page was
+     * rendered. Any entries not yet on the page will trigger a
+     * ``loadedNewEntry`` event with the entry's metadata and HTML.
+     *
+     * Args:
+     *     entries (Array of Backbone.Model):
+     *         The entries to load. Each must have an ``id`` and a ``typeID``
+     *         attribute.
+     *
+     *     onDone (function, optional):
+     *         Optional function to call after the entries are loaded.
+     */
+    loadEntries(entries, onDone) {
+        this._loadUpdates({
+            entries: entries,
+            onDone: onDone,
+        });
+    },
+
     /**
      * Schedule the next updates check.
      *
      * The check will only be scheduled so long as there are still entries
      * being watched. Any data returned in the check will trigger reloads
      * of parts of the page.
+     *
+     * If the server supports it, this will check the review request's
+     * updates version before loading updates, rather than loading them on
+     * every check.
+     *
+     * Args:
+     *     options (object, optional):
+     *         Options for the check.
+     *
+     * Option Args:
+     *     immediate (boolean, optional):
+     *         Whether to check the updates version immediately, instead of
+     *         waiting for the next interval. This is used when the server
+     *         has already held the last check open.
      */
-    _scheduleCheckUpdates() {
+    _scheduleCheckUpdates(options={}) {
         if (this._watchedUpdatesTimeout !== null ||
-            this._watchedUpdatesPeriodMS === null) {
+            this._watchedUpdatesPeriodMS === null ||
+            this._waitingForUpdates) {
+            return;
+        }
+
+        if (options.immediate && this._canWatchUpdates()) {
+            this._waitForUpdates();
             return;
         }
 
@@ -175,14 +223,85 @@ RB.ReviewRequestPage.ReviewRequestPage = RB.ReviewablePage.extend({
         this._watchedUpdatesTimeout = setTimeout(
             () => {
                 this._watchedUpdatesTimeout = null;
-                this._loadUpdates({
-                    entries: _.pluck(this._watchedEntries, 'entry'),
-                    onDone: this._scheduleCheckUpdates.bind(this),
-                });
+
+                if (this._canWatchUpdates()) {
+                    this._waitForUpdates();
+                } else {
+                    this._loadUpdates({
+                        entries: _.pluck(this._watchedEntries, 'entry'),
+                        onDone: this._scheduleCheckUpdates.bind(this),
+                    });
+                }
             },
             this._watchedUpdatesPeriodMS);
     },
 
+    /**
+     * Return whether the updates version can be checked for changes.
+     *
+     * Returns:
+     *     boolean:
+     *     Whether the server supports checking the updates version, and
+     *     checking hasn't failed.
+     */
+    _canWatchUpdates() {
+        return (!!this.get('updatesWatchURL') &&
+                this.get('updatesVersion') !== null &&
+                !this._updatesWatchFailed);
+    },
+
+    /**
+     * Check the server for a change to the page.
+     *
+     * This only requests the review request's updates version, which is
+     * cheap for the server to look up. Updates for the watched entries are
+     * only loaded once there's been a change.
+     *
+     * The server may hold the request open until the version changes. If
+     * it did, the next check is made right away. Otherwise, it's made on
+     * the next interval.
+     *
+     * If the request fails, this will fall back to polling for updates.
+     */
+    _waitForUpdates() {
+        this._waitingForUpdates = true;
+
+        Backbone.sync(
+            'read',
+            this,
+            {
+                url: this.get('updatesWatchURL'),
+                data: {
+                    version: this.get('updatesVersion'),
+                },
+                dataType: 'json',
+                noActivityIndicator: true,
+                success: rsp => {
+                    this._waitingForUpdates = false;
+
+                    if (rsp.changed) {
+                        this.set('updatesVersion', rsp.version);
+                    }
+
+                    if (rsp.changed && !_.isEmpty(this._watchedEntries)) {
+                        this._loadUpdates({
+                            entries: _.pluck(this._watchedEntries, 'entry'),
+                            onDone: this._scheduleCheckUpdates.bind(this),
+                        });
+                    } else {
+                        this._scheduleCheckUpdates({
+                            immediate: !!rsp.waited,
+                        });
+                    }
+                },
+                error: () => {
+                    this._waitingForUpdates = false;
+                    this._updatesWatchFailed = true;
+                    this._scheduleCheckUpdates();
+                },
+            });
+    },
+
     /**
      * Load updates from the server.
      *
@@ -392,14 +511,18 @@ RB.ReviewRequestPage.ReviewRequestPage = RB.ReviewablePage.extend({
      *         The new HTML for the entry.
      */
     _processEntryUpdate(metadata, html) {
-        /*
-         * TODO: We'll eventually want to handle new entries we don't
-         *       know about. This would be part of a larger dynamic
-         *       page updates change.
-         */
         const entry = this.entries.get(metadata.entryID);
 
         if (!entry) {
+            /*
+             * This is an entry that hasn't been loaded on the page yet
+             * (such as a deferred entry). Let the view construct it.
+             *
+             * TODO: We'll eventually want to handle brand new entries as
+             *       well. This would be part of a larger dynamic page
+             *       updates change.
+             */
+            this.trigger('loadedNewEntry', metadata, html);
             return;
         }
 
@@ -188,6 +188,139 @@ suite('rb/reviewRequestPage/models/ReviewRequestPage', function() {
             expect(callOptions.dataType).toBe('arraybuffer');
         });
 
+        it('Checking for changes from the server', function() {
+            page.set({
+                updatesVersion: 1,
+                updatesWatchURL: '/r/123/_updates/watch/',
+            });
+
+            spyOn(window, 'setTimeout').and.returnValue('dummy value');
+            spyOn(page, '_loadUpdates');
+            spyOn(Backbone, 'sync').and.callFake(
+                (method, model, options) => options.success({
+                    changed: true,
+                    version: 2,
+                    waited: false,
+                }));
+
+            const entry = new RB.ReviewRequestPage.Entry({
+                typeID: 'my-entry',
+                id: '100',
+            });
+
+            page.watchEntryUpdates(entry, 2000);
+
+            expect(window.setTimeout.calls.count()).toBe(1);
+            expect(window.setTimeout.calls.mostRecent().args[1]).toBe(2000);
+            expect(Backbone.sync).not.toHaveBeenCalled();
+
+            window.setTimeout.calls.mostRecent().args[0]();
+
+            expect(Backbone.sync.calls.count()).toBe(1);
+
+            const callOptions = Backbone.sync.calls.mostRecent().args[2];
+            expect(callOptions.url).toBe('/r/123/_updates/watch/');
+            expect(callOptions.data).toEqual({version: 1});
+
+            expect(page.get('updatesVersion')).toBe(2);
+            expect(page._loadUpdates.calls.count()).toBe(1);
+            expect(page._loadUpdates.calls.mostRecent().args[0].entries)
+                .toEqual([entry]);
+        });
+
+        it('Checking for changes again on an interval', function() {
+            page.set({
+                updatesVersion: 1,
+                updatesWatchURL: '/r/123/_updates/watch/',
+            });
+
+            spyOn(window, 'setTimeout').and.returnValue('dummy value');
+            spyOn(page, '_loadUpdates');
+            spyOn(Backbone, 'sync').and.callFake(
+                (method, model, options) => options.success({
+                    changed: false,
+                    version: 1,
+                    waited: false,
+                }));
+
+            const entry = new RB.ReviewRequestPage.Entry({
+                typeID: 'my-entry',
+                id: '100',
+            });
+
+            page.watchEntryUpdates(entry, 2000);
+            window.setTimeout.calls.mostRecent().args[0]();
+
+            expect(Backbone.sync.calls.count()).toBe(1);
+            expect(page._loadUpdates).not.toHaveBeenCalled();
+            expect(window.setTimeout.calls.count()).toBe(2);
+            expect(window.setTimeout.calls.mostRecent().args[1]).toBe(2000);
+        });
+
+        it('Checking for changes again immediately after the server waited',
+           function() {
+            page.set({
+                updatesVersion: 1,
+                updatesWatchURL: '/r/123/_updates/watch/',
+            });
+
+            spyOn(window, 'setTimeout').and.returnValue('dummy value');
+            spyOn(page, '_loadUpdates');
+
+            let numCalls = 0;
+
+            spyOn(Backbone, 'sync').and.callFake((method, model, options) => {
+                numCalls++;
+
+                options.success({
+                    changed: numCalls > 1,
+                    version: numCalls,
+                    waited: true,
+                });
+            });
+
+            const entry = new RB.ReviewRequestPage.Entry({
+                typeID: 'my-entry',
+                id: '100',
+            });
+
+            page.watchEntryUpdates(entry, 2000);
+            window.setTimeout.calls.mostRecent().args[0]();
+
+            expect(Backbone.sync.calls.count()).toBe(2);
+            expect(window.setTimeout.calls.count()).toBe(1);
+            expect(page.get('updatesVersion')).toBe(2);
+            expect(page._loadUpdates.calls.count()).toBe(1);
+        });
+
+        it('Falling back to polling when checking fails', function() {
+            page.set({
+                updatesVersion: 1,
+                updatesWatchURL: '/r/123/_updates/watch/',
+            });
+
+            spyOn(window, 'setTimeout').and.returnValue('dummy value');
+            spyOn(page, '_loadUpdates');
+            spyOn(Backbone, 'sync').and.callFake(
+                (method, model, options) => options.error());
+
+            const entry = new RB.ReviewRequestPage.Entry({
+                typeID: 'my-entry',
+                id: '100',
+            });
+
+            page.watchEntryUpdates(entry, 2000);
+            window.setTimeout.calls.mostRecent().args[0]();
+
+            expect(Backbone.sync.calls.count()).toBe(1);
+            expect(window.setTimeout.calls.count()).toBe(2);
+
+            window.setTimeout.calls.mostRecent().args[0]();
+
+            expect(Backbone.sync.calls.count()).toBe(1);
+            expect(page._loadUpdates.calls.count()).toBe(1);
+        });
+
         describe('Response parsing', function() {
             const TestEntry = RB.ReviewRequestPage.Entry.extend({
                 parse(rsp) {
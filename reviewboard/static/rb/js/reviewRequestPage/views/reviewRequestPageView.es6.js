@@ -28,6 +28,7 @@ RB.ReviewRequestPage.ReviewRequestPageView = RB.ReviewablePageView.extend({
 
         this._entryViews = [];
         this._entryViewsByID = {};
+        this._deferredEntries = {};
         this._rendered = false;
         this._issueSummaryTableView = null;
 
@@ -51,6 +52,12 @@ RB.ReviewRequestPage.ReviewRequestPageView = RB.ReviewablePageView.extend({
         this.listenTo(this.model, 'updatesProcessed',
                       () => this.diffFragmentQueue.loadFragments());
 
+        /*
+         * Listen for entries that were loaded from the server after being
+         * deferred when the page was rendered.
+         */
+        this.listenTo(this.model, 'loadedNewEntry', this._onLoadedNewEntry);
+
         /*
          * Listen for updates to any entries on the page. When updated,
          * we'll store the collapse state on the entry so we can re-apply it
@@ -99,6 +106,13 @@ RB.ReviewRequestPage.ReviewRequestPageView = RB.ReviewablePageView.extend({
          */
         this._entryViews.forEach(entryView => entryView.render());
 
+        /*
+         * Set up each of the entries that were deferred, so that they can
+         * be loaded when expanded.
+         */
+        _.each(this._deferredEntries,
+               info => this._setupDeferredEntry(info));
+
         /*
          * Navigate to the right anchor on the page, if there's a valid hash
          * in the URL. We'll also do this whenever it changes, if the browser
@@ -159,6 +173,73 @@ RB.ReviewRequestPage.ReviewRequestPageView = RB.ReviewablePageView.extend({
         }
     },
 
+    /**
+     * Add an entry to the page whose loading has been deferred.
+     *
+     * The entry will be shown as a collapsed placeholder, and loaded from
+     * the server once it's expanded (or needed for navigation).
+     *
+     * Args:
+     *     info (object):
+     *         Information on the entry. This contains the following keys:
+     *
+     *         ``id`` (string):
+     *             The ID of the entry.
+     *
+     *         ``typeID`` (string):
+     *             The type ID of the entry.
+     *
+     *         ``elementID`` (string):
+     *             The ID of the entry's placeholder element.
+     *
+     *         ``modelClass`` (function):
+     *             The model class to construct for the entry.
+     *
+     *         ``viewClass`` (function):
+     *             The view class to construct for the entry.
+     */
+    addDeferredEntry(info) {
+        this._deferredEntries[info.id] = info;
+
+        if (this._rendered) {
+            this._setupDeferredEntry(info);
+        }
+    },
+
+    /**
+     * Load any deferred entries from the server.
+     *
+     * Args:
+     *     infos (Array of object):
+     *         The information on the deferred entries to load, as passed to
+     *         :js:func:`addDeferredEntry`.
+     *
+     *     onDone (function, optional):
+     *         Optional function to call after the entries are loaded.
+     */
+    loadDeferredEntries(infos, onDone) {
+        infos = infos.filter(info => !info.loading);
+
+        if (infos.length === 0) {
+            if (_.isFunction(onDone)) {
+                onDone();
+            }
+
+            return;
+        }
+
+        infos.forEach(info => {
+            info.loading = true;
+        });
+
+        this.model.loadEntries(
+            infos.map(info => new Backbone.Model({
+                id: info.id,
+                typeID: info.typeID,
+            })),
+            onDone);
+    },
+
     /**
      * Queue a diff fragment for loading.
      *
@@ -231,6 +312,80 @@ RB.ReviewRequestPage.ReviewRequestPageView = RB.ReviewablePageView.extend({
         view.render();
     },
 
+    /**
+     * Set up the placeholder for a deferred entry.
+     *
+     * Expanding the placeholder will load the entry from the server.
+     *
+     * Args:
+     *     info (object):
+     *         The information on the deferred entry, as passed to
+     *         :js:func:`addDeferredEntry`.
+     */
+    _setupDeferredEntry(info) {
+        $(`#${info.elementID}`)
+            .find('.collapse-button')
+            .one('click', e => {
+                e.preventDefault();
+                e.stopPropagation();
+
+                this.loadDeferredEntries([info]);
+            });
+    },
+
+    /**
+     * Handler for when a deferred entry has been loaded from the server.
+     *
+     * This will replace the entry's placeholder with the loaded HTML, and
+     * construct the entry's model and view.
+     *
+     * Args:
+     *     metadata (object):
+     *         The metadata for the loaded entry.
+     *
+     *     html (string):
+     *         The HTML for the loaded entry.
+     */
+    _onLoadedNewEntry(metadata, html) {
+        const info = this._deferredEntries[metadata.entryID];
+
+        if (!info || info.typeID !== metadata.entryType) {
+            return;
+        }
+
+        delete this._deferredEntries[metadata.entryID];
+
+        const $newEl = $(html);
+        $(`#${info.elementID}`).replaceWith($newEl);
+
+        const entryView = new info.viewClass(_.extend(
+            {},
+            metadata.viewOptions,
+            {
+                el: $newEl,
+                reviewRequestEditorView: this.reviewRequestEditorView,
+                model: new info.modelClass(
+                    _.extend(
+                        {},
+                        metadata.modelData,
+                        {
+                            id: metadata.entryID,
+                            collapsed: false,
+                            addedTimestamp: metadata.addedTimestamp,
+                            updatedTimestamp: metadata.updatedTimestamp,
+                            typeID: metadata.entryType,
+                            reviewRequestEditor:
+                                this.model.reviewRequestEditor,
+                        }),
+                    {
+                        parse: true,
+                    }),
+            }));
+
+        this.addEntryView(entryView);
+        entryView.expand();
+    },
+
     /**
      * Handler for when a new update is being applied to a view.
      *
@@ -314,9 +469,21 @@ RB.ReviewRequestPage.ReviewRequestPageView = RB.ReviewablePageView.extend({
                  * is expanded.
                  */
                 RB.scrollManager.scrollToElement($anchor);
-                break;
+                return;
             }
         }
+
+        /*
+         * The anchor may be in an entry that was deferred. If so, load
+         * the deferred entries and try again.
+         */
+        const pendingInfos = _.values(this._deferredEntries)
+            .filter(info => !info.loading);
+
+        if (pendingInfos.length > 0) {
+            this.loadDeferredEntries(pendingInfos,
+                                     () => this._onHashChanged());
+        }
     },
 
     /**
@@ -349,6 +516,7 @@ RB.ReviewRequestPage.ReviewRequestPageView = RB.ReviewablePageView.extend({
         e.stopPropagation();
 
         this._entryViews.forEach(entryView => entryView.expand());
+        this.loadDeferredEntries(_.values(this._deferredEntries));
     },
 
     /**
@@ -364,14 +532,28 @@ RB.ReviewRequestPage.ReviewRequestPageView = RB.ReviewablePageView.extend({
     _onIssueClicked(params) {
         const prefix = commentTypeToIDPrefix[params.commentType];
         const selector = `#${prefix}comment${params.commentID}`;
-
-        this._entryViews.forEach(entryView => {
+        const found = this._entryViews.some(entryView => {
             if (entryView.$el.find(selector).length > 0) {
                 entryView.expand();
+                return true;
             }
+
+            return false;
         });
 
-        window.location = params.commentURL;
+        if (found || _.isEmpty(this._deferredEntries)) {
+            window.location = params.commentURL;
+        } else {
+            /*
+             * The comment is in an entry that was deferred. Load the
+             * deferred entries before navigating to it.
+             */
+            this.loadDeferredEntries(
+                _.values(this._deferredEntries),
+                () => {
+                    window.location = params.commentURL;
+                });
+        }
     },
 });
 
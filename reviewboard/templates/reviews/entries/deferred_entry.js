@@ -0,0 +1,7 @@
+page.addDeferredEntry({
+    id: '{{entry.entry_id|escapejs}}',
+    typeID: '{{entry.entry_type_id|escapejs}}',
+    elementID: '{{entry.get_dom_element_id|escapejs}}',
+    modelClass: {{entry.js_model_class}},
+    viewClass: {{entry.js_view_class}}
+});
@@ -17,6 +17,7 @@ class TestTool(GitTool):
     diffs_use_absolute_paths = False
     supports_post_commit = True
     supports_history = False
+    supports_batch_file_exists = False
 
     _PATH_RE = re.compile(
         r'^(?:/(?P<type>data):)?(?P<path>[^;]+)'
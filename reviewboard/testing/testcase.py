@@ -12,6 +12,7 @@ from django.core.cache import cache
 from django.core.files import File
 from django.core.files.base import ContentFile
 from django.core.urlresolvers import ResolverMatch
+from django.db import connection
 from django.test.client import RequestFactory
 from django.utils import six, timezone
 from djblets.siteconfig.models import SiteConfiguration
@@ -349,6 +350,19 @@ class TestCase(FixturesCompilerMixin, DjbletsTestCase):
                           '%r'
                           % (cls, message))
 
+    def run_on_commit_callbacks(self):
+        """Run the callbacks waiting for the transaction to be committed.
+
+        Test cases run in a transaction that's never committed, so callbacks
+        registered through :py:func:`django.db.transaction.on_commit` would
+        otherwise never run.
+        """
+        callbacks = connection.run_on_commit
+        connection.run_on_commit = []
+
+        for sids, func in callbacks:
+            func()
+
     def create_diff_file_attachment(self, filediff, from_modified=True,
                                     review_request=None,
                                     orig_filename='filename.png',
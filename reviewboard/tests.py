@@ -4,15 +4,50 @@ from __future__ import unicode_literals
 
 import os
 
+from django.core.cache import cache
 from django.utils import six
 from djblets.staticbundles import (
     PIPELINE_JAVASCRIPT as DJBLETS_PIPELINE_JAVASCRIPT,
     PIPELINE_STYLESHEETS as DJBLETS_PIPELINE_STYLESHEETS)
 
+from reviewboard.cache_generation import CacheGeneration
 from reviewboard.staticbundles import PIPELINE_JAVASCRIPT, PIPELINE_STYLESHEETS
 from reviewboard.testing import TestCase
 
 
+class CacheGenerationTests(TestCase):
+    """Unit tests for reviewboard.cache_generation.CacheGeneration."""
+
+    def test_get(self):
+        """Testing CacheGeneration.get returns a stable generation"""
+        generation = CacheGeneration('test-generation')
+
+        self.assertEqual(generation.get(), generation.get())
+        self.assertEqual(CacheGeneration('test-generation').get(),
+                         generation.get())
+
+    def test_bump(self):
+        """Testing CacheGeneration.bump changes the generation"""
+        generation = CacheGeneration('test-generation')
+        old_generation = generation.get()
+
+        generation.bump()
+
+        self.assertNotEqual(generation.get(), old_generation)
+
+    def test_bump_after_eviction(self):
+        """Testing CacheGeneration.bump after the generation was evicted from
+        the cache
+        """
+        generation = CacheGeneration('test-generation')
+        old_generation = generation.get()
+
+        cache.clear()
+        generation.bump()
+
+        self.assertGreater(generation.get(), old_generation)
+
+
 class StaticBundlesTests(TestCase):
     """Tests the static bundles in reviewboard.staticbundles."""
 
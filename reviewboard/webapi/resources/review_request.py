@@ -17,6 +17,7 @@ from djblets.webapi.errors import (DOES_NOT_EXIST,
                                    INVALID_FORM_DATA,
                                    NOT_LOGGED_IN,
                                    PERMISSION_DENIED)
+from djblets.util.http import get_url_params_except
 from djblets.webapi.fields import (BooleanFieldType,
                                    ChoiceFieldType,
                                    DateTimeFieldType,
@@ -26,6 +27,7 @@ from djblets.webapi.fields import (BooleanFieldType,
                                    ResourceFieldType,
                                    ResourceListFieldType,
                                    StringFieldType)
+from djblets.webapi.responses import WebAPIResponsePaginated
 
 from reviewboard.admin.server import build_server_url
 from reviewboard.diffviewer.errors import (DiffTooBigError,
@@ -38,7 +40,10 @@ from reviewboard.reviews.errors import (CloseError,
                                         PublishError,
                                         ReopenError)
 from reviewboard.reviews.fields import get_review_request_field
-from reviewboard.reviews.models import ReviewRequest
+from reviewboard.reviews.models import ReviewRequest, ReviewRequestIssue
+from reviewboard.reviews.pagination import (InvalidCursorError,
+                                            decode_cursor,
+                                            paginate_keyset)
 from reviewboard.scmtools.errors import (AuthenticationError,
                                          ChangeNumberInUseError,
                                          EmptyChangeSetError,
@@ -75,6 +80,91 @@ from reviewboard.webapi.resources.review_request_draft import \
 from reviewboard.webapi.resources.user import UserResource
 
 
+#: The keyset ordering used for cursor-based lists of review requests.
+REVIEW_REQUEST_LIST_KEYSET_ORDERING = [
+    ('last_updated', True),
+    ('pk', True),
+]
+
+
+class ReviewRequestResponsePaginated(WebAPIResponsePaginated):
+    """Provides paginated responses for lists of review requests.
+
+    By default, this uses the standard index-based pagination (passed as
+    ``?start=``), with results in the default order.
+
+    If ``?cursor=`` is provided (with an empty value for the first page),
+    this instead paginates using opaque cursors. Results are ordered by
+    their last updated timestamps, and each page picks up after the last
+    result of the previous page, so pages don't skip or repeat results when
+    review requests are updated between requests, and later pages are as
+    fast to fetch as the first.
+    """
+
+    cursor_param = 'cursor'
+
+    def __init__(self, request, queryset, *args, **kwargs):
+        """Initialize the response."""
+        self.use_cursor = self.cursor_param in request.GET
+        self.page = None
+
+        super(ReviewRequestResponsePaginated, self).__init__(
+            request, queryset, *args, **kwargs)
+
+    def has_prev(self):
+        """Return whether there's a previous page of results."""
+        if self.use_cursor:
+            return self.page.has_previous()
+        else:
+            return super(ReviewRequestResponsePaginated, self).has_prev()
+
+    def has_next(self):
+        """Return whether there's a next page of results."""
+        if self.use_cursor:
+            return self.page.has_next()
+        else:
+            return super(ReviewRequestResponsePaginated, self).has_next()
+
+    def get_results(self):
+        """Return the results for the page."""
+        if self.use_cursor:
+            self.page = paginate_keyset(
+                self.queryset,
+                REVIEW_REQUEST_LIST_KEYSET_ORDERING,
+                self.max_results,
+                cursor=self.request.GET.get(self.cursor_param))
+
+            return self.page.object_list
+        else:
+            return super(ReviewRequestResponsePaginated, self).get_results()
+
+    def get_links(self):
+        """Return the pagination links for the page."""
+        if not self.use_cursor:
+            return super(ReviewRequestResponsePaginated, self).get_links()
+
+        links = {}
+        full_path = self.request.build_absolute_uri(self.request.path)
+        query_parameters = get_url_params_except(
+            self.request.GET, self.cursor_param, self.max_results_param)
+
+        if query_parameters:
+            query_parameters = '&' + query_parameters
+
+        for key, cursor in ((self.prev_key, self.page.previous_cursor),
+                            (self.next_key, self.page.next_cursor)):
+            if cursor:
+                links[key] = {
+                    'method': 'GET',
+                    'href': '%s?%s=%s&%s=%s%s' % (
+                        full_path, self.cursor_param, cursor,
+                        self.max_results_param, self.max_results,
+                        query_parameters),
+                }
+
+        return links
+
+
 class ReviewRequestResource(MarkdownFieldsMixin, WebAPIResource):
     """Provides information on review requests.
 
@@ -92,6 +182,7 @@ class ReviewRequestResource(MarkdownFieldsMixin, WebAPIResource):
     """
     model = ReviewRequest
     name = 'review_request'
+    paginated_cls = ReviewRequestResponsePaginated
 
     fields = {
         'id': {
@@ -474,12 +565,18 @@ class ReviewRequestResource(MarkdownFieldsMixin, WebAPIResource):
             q = q & self.build_queries_for_int_field(
                 request, 'shipit_count', 'ship-it-count')
 
+            use_issue_index = ReviewRequestIssue.objects.is_index_built()
+
             for issue_field in ('issue_open_count',
                                 'issue_dropped_count',
                                 'issue_resolved_count',
                                 'issue_verifying_count'):
-                q = q & self.build_queries_for_int_field(
-                    request, issue_field)
+                if use_issue_index:
+                    q = q & self._build_issue_index_queries(request,
+                                                            issue_field)
+                else:
+                    q = q & self.build_queries_for_int_field(
+                        request, issue_field)
 
             if 'time-added-from' in kwargs:
                 q = q & Q(time_added__gte=kwargs['time-added-from'])
@@ -1136,6 +1233,17 @@ class ReviewRequestResource(MarkdownFieldsMixin, WebAPIResource):
                                'This obsoletes the ``changenum`` field.',
                 'added_in': '2.0',
             },
+            'cursor': {
+                'type': StringFieldType,
+                'description': 'The position in the list to return results '
+                               'from, for cursor-based pagination. Pass an '
+                               'empty value to get the first page. Results '
+                               'are then ordered by when they were last '
+                               'updated, and later positions are opaque, '
+                               'provided in the ``next`` and ``prev`` links. '
+                               'It cannot be combined with ``start``.',
+                'added_in': '4.0',
+            },
             'time-added-to': {
                 'type': DateTimeFieldType,
                 'description': 'The date/time that all review requests must '
@@ -1358,6 +1466,49 @@ class ReviewRequestResource(MarkdownFieldsMixin, WebAPIResource):
         """
         pass
 
+    def _get_list_impl(self, request, *args, **kwargs):
+        """Return the list of review requests.
+
+        This validates the pagination cursor, if provided, before building
+        the list.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            *args (tuple):
+                Positional arguments from the URL.
+
+            **kwargs (dict):
+                Keyword arguments from the URL.
+
+        Returns:
+            tuple or django.http.HttpResponse:
+            The response to send to the client.
+        """
+        cursor = request.GET.get('cursor')
+
+        if cursor is not None and 'start' in request.GET:
+            return INVALID_FORM_DATA, {
+                'fields': {
+                    'cursor': ['This cannot be combined with start.'],
+                },
+            }
+
+        if cursor:
+            try:
+                decode_cursor(cursor, self.model,
+                              REVIEW_REQUEST_LIST_KEYSET_ORDERING)
+            except InvalidCursorError as e:
+                return INVALID_FORM_DATA, {
+                    'fields': {
+                        'cursor': [six.text_type(e)],
+                    },
+                }
+
+        return super(ReviewRequestResource, self)._get_list_impl(
+            request, *args, **kwargs)
+
     @augment_method_from(WebAPIResource)
     def get(self, *args, **kwargs):
         """Returns information on a particular review request.
@@ -1434,5 +1585,74 @@ class ReviewRequestResource(MarkdownFieldsMixin, WebAPIResource):
 
         return user
 
+    def _build_issue_index_queries(self, request, field_name):
+        """Build queries for an issue count field using the issue index.
+
+        This accepts the same query arguments as
+        :py:meth:`build_queries_for_int_field`, but counts issues in the
+        index (see :py:class:`~reviewboard.reviews.models.
+        review_request_issue.ReviewRequestIssue`) instead of filtering on the
+        review request's issue counter field, which isn't indexed and may
+        not have been computed yet.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            field_name (unicode):
+                The name of the issue counter field on the review request.
+
+        Returns:
+            django.db.models.Q:
+            A query expression that can be used in database queries.
+        """
+        statuses = [
+            status
+            for status, counter_field_name in six.iteritems(
+                ReviewRequest.ISSUE_COUNTER_FIELDS)
+            if counter_field_name == field_name
+        ]
+        query_param_name = field_name.replace('_', '-')
+
+        def _has_at_least(count):
+            if count <= 0:
+                return Q()
+
+            return Q(pk__in=ReviewRequestIssue.objects
+                     .get_review_request_ids_with_count(statuses, count))
+
+        def _has_fewer_than(count):
+            if count <= 0:
+                return Q(pk__in=[])
+
+            return ~_has_at_least(count)
+
+        q = Q()
+
+        for op in ('', '-gt', '-gte', '-lt', '-lte'):
+            param = query_param_name + op
+
+            if param not in request.GET:
+                continue
+
+            try:
+                value = int(request.GET[param])
+            except ValueError:
+                # Not a valid query, so ignore it.
+                continue
+
+            if op == '':
+                q &= _has_at_least(value) & _has_fewer_than(value + 1)
+            elif op == '-gt':
+                q &= _has_at_least(value + 1)
+            elif op == '-gte':
+                q &= _has_at_least(value)
+            elif op == '-lt':
+                q &= _has_fewer_than(value)
+            elif op == '-lte':
+                q &= _has_fewer_than(value + 1)
+
+        return q
+
 
 review_request_resource = ReviewRequestResource()
@@ -149,6 +149,115 @@ class ResourceListTests(SpyAgency, ExtraDataListMixin, BaseWebAPITestCase):
         self.assertEqual(rsp['stat'], 'ok')
         self.assertEqual(len(rsp['review_requests']), 2)
 
+    def test_get_with_cursor(self):
+        """Testing the GET review-requests/?cursor= API"""
+        review_requests = [
+            self.create_review_request(publish=True, summary='Test %s' % i)
+            for i in range(5)
+        ]
+
+        # Give every review request the same timestamp, so that the
+        # ordering falls back on IDs.
+        ReviewRequest.objects.update(
+            last_updated=review_requests[0].last_updated)
+
+        url = get_review_request_list_url()
+
+        rsp = self.api_get(url, {
+            'cursor': '',
+            'max-results': 2,
+        }, expected_mimetype=review_request_list_mimetype)
+        self.assertEqual(rsp['stat'], 'ok')
+        self.assertEqual(rsp['total_results'], 5)
+        self.assertEqual(
+            [item['id'] for item in rsp['review_requests']],
+            [review_requests[4].pk, review_requests[3].pk])
+        self.assertNotIn('prev', rsp['links'])
+
+        # Updating a review request on the first page shouldn't cause any
+        # review requests to be repeated or skipped on later pages.
+        review_requests[3].save(update_fields=['last_updated'])
+
+        next_href = rsp['links']['next']['href']
+        self.assertIn('cursor=', next_href)
+        self.assertIn('max-results=2', next_href)
+
+        rsp = self.api_get(next_href,
+                           expected_mimetype=review_request_list_mimetype)
+        self.assertEqual(rsp['stat'], 'ok')
+        self.assertEqual(
+            [item['id'] for item in rsp['review_requests']],
+            [review_requests[2].pk, review_requests[1].pk])
+        self.assertIn('prev', rsp['links'])
+
+        rsp = self.api_get(rsp['links']['next']['href'],
+                           expected_mimetype=review_request_list_mimetype)
+        self.assertEqual(rsp['stat'], 'ok')
+        self.assertEqual(
+            [item['id'] for item in rsp['review_requests']],
+            [review_requests[0].pk])
+        self.assertNotIn('next', rsp['links'])
+
+        rsp = self.api_get(rsp['links']['prev']['href'],
+                           expected_mimetype=review_request_list_mimetype)
+        self.assertEqual(rsp['stat'], 'ok')
+        self.assertEqual(
+            [item['id'] for item in rsp['review_requests']],
+            [review_requests[2].pk, review_requests[1].pk])
+
+    def test_get_with_start(self):
+        """Testing the GET review-requests/?start= API uses index-based
+        pagination
+        """
+        for i in range(3):
+            self.create_review_request(publish=True)
+
+        rsp = self.api_get(get_review_request_list_url(), {
+            'max-results': 1,
+            'start': 1,
+        }, expected_mimetype=review_request_list_mimetype)
+        self.assertEqual(rsp['stat'], 'ok')
+        self.assertEqual(len(rsp['review_requests']), 1)
+        self.assertIn('start=0', rsp['links']['prev']['href'])
+        self.assertIn('start=2', rsp['links']['next']['href'])
+
+    def test_get_without_cursor(self):
+        """Testing the GET review-requests/ API uses index-based pagination
+        by default
+        """
+        for i in range(3):
+            self.create_review_request(publish=True)
+
+        rsp = self.api_get(get_review_request_list_url(), {
+            'max-results': 1,
+        }, expected_mimetype=review_request_list_mimetype)
+        self.assertEqual(rsp['stat'], 'ok')
+        self.assertEqual(len(rsp['review_requests']), 1)
+        self.assertNotIn('prev', rsp['links'])
+        self.assertIn('start=1', rsp['links']['next']['href'])
+        self.assertNotIn('cursor=', rsp['links']['next']['href'])
+
+    def test_get_with_cursor_and_start(self):
+        """Testing the GET review-requests/?cursor=&start= API"""
+        rsp = self.api_get(get_review_request_list_url(), {
+            'cursor': '',
+            'start': 1,
+        }, expected_status=400)
+        self.assertEqual(rsp['stat'], 'fail')
+        self.assertEqual(rsp['err']['code'], INVALID_FORM_DATA.code)
+        self.assertIn('cursor', rsp['fields'])
+
+    def test_get_with_invalid_cursor(self):
+        """Testing the GET review-requests/?cursor= API with an invalid
+        cursor
+        """
+        rsp = self.api_get(get_review_request_list_url(), {
+            'cursor': 'invalid',
+        }, expected_status=400)
+        self.assertEqual(rsp['stat'], 'fail')
+        self.assertEqual(rsp['err']['code'], INVALID_FORM_DATA.code)
+        self.assertIn('cursor', rsp['fields'])
+
     def test_get_with_counts_only(self):
         """Testing the GET review-requests/?counts-only=1 API"""
         self.create_review_request(publish=True)
@@ -524,6 +633,67 @@ class ResourceListTests(SpyAgency, ExtraDataListMixin, BaseWebAPITestCase):
         self._test_get_with_field_count('issue-resolved-count-gte', 2, 1)
         self._test_get_with_field_count('issue-resolved-count-gte', 3, 0)
 
+    # Tests for ?issue-*-count*= query parameters using the issue index.
+    def _setup_issue_index_count_tests(self):
+        self.create_review_request(publish=True)
+
+        review_request = self.create_review_request(publish=True)
+        file_attachment = self.create_file_attachment(review_request)
+        review = self.create_review(review_request)
+        comments = [
+            self.create_file_attachment_comment(review, file_attachment,
+                                                issue_opened=True)
+            for i in range(4)
+        ]
+        review.publish()
+
+        comments[0].issue_status = BaseComment.RESOLVED
+        comments[0].save()
+
+        comments[1].issue_status = BaseComment.VERIFYING_DROPPED
+        comments[1].save()
+
+        # Make sure the counter fields aren't used.
+        ReviewRequest.objects.filter(pk=review_request.pk).update(
+            issue_open_count=100,
+            issue_resolved_count=100,
+            issue_verifying_count=100)
+
+    def test_get_with_issue_open_count_with_issue_index(self):
+        """Testing the GET review-requests/?issue-open-count*= API with the
+        issue index built
+        """
+        self._setup_issue_index_count_tests()
+
+        with self.siteconfig_settings({'review_request_issue_index_built':
+                                       True}):
+            self._test_get_with_field_count('issue-open-count', 2, 1)
+            self._test_get_with_field_count('issue-open-count', 1, 0)
+            self._test_get_with_field_count('issue-open-count', 0, 1)
+            self._test_get_with_field_count('issue-open-count-lt', 0, 0)
+            self._test_get_with_field_count('issue-open-count-lt', 2, 1)
+            self._test_get_with_field_count('issue-open-count-lt', 3, 2)
+            self._test_get_with_field_count('issue-open-count-lte', 1, 1)
+            self._test_get_with_field_count('issue-open-count-lte', 2, 2)
+            self._test_get_with_field_count('issue-open-count-gt', 0, 1)
+            self._test_get_with_field_count('issue-open-count-gt', 2, 0)
+            self._test_get_with_field_count('issue-open-count-gte', 0, 2)
+            self._test_get_with_field_count('issue-open-count-gte', 2, 1)
+            self._test_get_with_field_count('issue-open-count-gte', 3, 0)
+
+    def test_get_with_issue_verifying_count_with_issue_index(self):
+        """Testing the GET review-requests/?issue-verifying-count*= API with
+        the issue index built
+        """
+        self._setup_issue_index_count_tests()
+
+        with self.siteconfig_settings({'review_request_issue_index_built':
+                                       True}):
+            self._test_get_with_field_count('issue-verifying-count', 1, 1)
+            self._test_get_with_field_count('issue-verifying-count-gt', 1, 0)
+            self._test_get_with_field_count('issue-resolved-count', 1, 1)
+            self._test_get_with_field_count('issue-dropped-count', 0, 2)
+
     # Tests for ?ship-it-count*= query parameters.
     def _setup_ship_it_count_tests(self):
         review_request = self.create_review_request(publish=True)
@@ -853,10 +1023,13 @@ class ResourceListTests(SpyAgency, ExtraDataListMixin, BaseWebAPITestCase):
         # in ReviewRequestResource.get_queryset() doesn't need to perform a
         # fetch of the DiffSetHistory, instead utilizing the one we fetched
         # in the select_related(). On 1.6, it will need to fetch it anyway.
+        #
+        # The accessible repository and group IDs aren't cached yet, adding
+        # two more queries.
         if django.VERSION[:2] >= (1, 11):
-            expected_queries = 12
+            expected_queries = 14
         else:
-            expected_queries = 13
+            expected_queries = 15
 
         with self.assertNumQueries(expected_queries):
             rsp = self.api_get(get_review_request_list_url(),